@@ -0,0 +1,386 @@
+"""
+Structured nginx access logs: the log_format definitions are read from the
+configuration (`nginx -T`), turned into one regular expression, and parsed
+lines are stored column by column in compact arrays (array module, no
+third party dependency).
+
+Parsing works on whole blocks of text: one findall per block does the
+matching in C, and every column is then converted in a single pass.
+Strings that repeat a lot (client addresses, URIs, timestamps) are interned,
+so the URI and IP columns are integer ids and the per-minute column is
+computed once per distinct timestamp rather than once per line.
+"""
+import calendar
+import re
+from array import array
+from collections import Counter
+from dataclasses import dataclass, field
+
+from .base import BackendError
+from .logtime import MONTHS, parse_log_time
+
+COMBINED_FORMAT = ('$remote_addr - $remote_user [$time_local] "$request" $status $body_bytes_sent '
+                   '"$http_referer" "$http_user_agent"')
+BUILTIN_FORMATS = {"combined": COMBINED_FORMAT}
+READ_BLOCK = 8 * 1024 * 1024
+
+_VARIABLE = re.compile(r"\$(?:\{(\w+)\}|(\w+))")
+_TOKEN = re.compile(r"'[^']*'|\"[^\"]*\"|[;{}]|[^\s;{}'\"]+")
+_TIME_LOCAL = re.compile(r"(\d{2})/([A-Za-z]{3})/(\d{4}):(\d{2}):(\d{2}):(\d{2}) ([+-])(\d{2})(\d{2})")
+_COMMENT = re.compile(r"#[^\n]*")
+
+TIME_FIELDS = ("time_local", "time_iso8601", "msec")
+BYTES_FIELDS = ("body_bytes_sent", "bytes_sent")
+# Everything AccessLogColumns stores; other variables are matched but not captured
+COLUMN_FIELDS = {"remote_addr", "status", "request", "request_uri"} | set(TIME_FIELDS) | set(BYTES_FIELDS)
+
+
+def compile_log_format(fmt: str, fields: set[str] | None = None) -> tuple[re.Pattern, list[str]]:
+    """
+    Regex for one log_format. Each variable matches everything up to the
+    literal character that follows it in the format, which is how nginx
+    output is delimited ("$request" -> "([^"]*)"). A variable at the very
+    end takes the rest of the line. Only the variables in `fields` (all when
+    None) are captured; the returned names are those of the groups, in order.
+    "$request" captures just the path of the request line, without query.
+    """
+    parts, names = [], []
+    pos = 0
+    for m in _VARIABLE.finditer(fmt):
+        parts.append(re.escape(fmt[pos:m.start()]))
+        name = m.group(1) or m.group(2)
+        nxt = fmt[m.end():m.end() + 1]
+        if not nxt or nxt == "$":
+            body = "[^\\n]*?" if nxt else "[^\\r\\n]*"
+        else:
+            body = f"[^{re.escape(nxt)}\\n]*"
+        captured = fields is None or name in fields
+        if captured and name == "request" and nxt:
+            # "GET /path?query HTTP/1.1": method and protocol are matched, not captured
+            stop = re.escape(nxt)
+            parts.append(f"(?:[^ {stop}\\n]* )?([^ ?{stop}\\n]*){body}")
+        else:
+            parts.append(f"({body})" if captured else body)
+        if captured:
+            names.append(name)
+        pos = m.end()
+    parts.append(re.escape(fmt[pos:]))
+    # Not anchored at the end: fields appended to a known format do not break parsing
+    return re.compile("^" + "".join(parts), re.M), names
+
+
+def parse_nginx_config(conf: str) -> tuple[dict[str, str], dict[str, str]]:
+    """
+    Reads `nginx -T` output. Returns ({format name: format}, {access log
+    path: format name}); the builtin "combined" format is included.
+    """
+    formats = dict(BUILTIN_FORMATS)
+    logs: dict[str, str] = {}
+    statement: list[str] = []
+    for token in _TOKEN.findall(_COMMENT.sub("", conf)):
+        if token not in (";", "{", "}"):
+            statement.append(token)
+            continue
+        if token == ";" and statement:
+            if statement[0] == "log_format" and len(statement) > 2:
+                pieces = [t for t in statement[2:] if not t.startswith("escape=")]
+                formats[statement[1]] = "".join(t[1:-1] if t[:1] in "'\"" else t for t in pieces)
+            elif statement[0] == "access_log" and len(statement) > 1 and statement[1] != "off":
+                name = statement[2] if len(statement) > 2 and "=" not in statement[2] else "combined"
+                logs[statement[1].strip("'\"")] = name
+        statement = []
+    return formats, logs
+
+
+def format_for(conf: str, path: str) -> str:
+    """The log_format an access log is written with; combined when unknown"""
+    formats, logs = parse_nginx_config(conf)
+    return formats.get(logs.get(path, "combined"), COMBINED_FORMAT)
+
+
+def _time_local(value: str) -> float | None:
+    m = _TIME_LOCAL.match(value)
+    if not m:
+        return None
+    day, mon, year, hh, mm, ss, sign, zh, zm = m.groups()
+    month = MONTHS.get(mon.lower())
+    if month is None:
+        return None
+    offset = (int(zh) * 3600 + int(zm) * 60) * (-1 if sign == "-" else 1)
+    return calendar.timegm((int(year), month, int(day), int(hh), int(mm), int(ss), 0, 0, 0)) - offset
+
+
+def field_time(name: str, value: str) -> float | None:
+    """Epoch seconds from the value of one of TIME_FIELDS"""
+    if name == "time_local":
+        return _time_local(value)
+    if name == "msec":
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return parse_log_time(value)
+
+
+def _ints(values, typecode: str) -> array:
+    try:
+        return array(typecode, map(int, values))
+    except ValueError:
+        # "-" and friends: rare, so only then take the slow path
+        return array(typecode, (int(v) if v.isdigit() else 0 for v in values))
+
+
+@dataclass
+class AccessSummary:
+    requests: int = 0
+    unparsed: int = 0
+    bytes_total: int = 0
+    first_minute: int | None = None  # epoch minutes
+    last_minute: int | None = None
+    statuses: list[tuple[int, int]] = field(default_factory=list)  # (status, count), by status
+    top_uris: list[tuple[str, int]] = field(default_factory=list)
+    top_ips: list[tuple[str, int]] = field(default_factory=list)
+    per_minute: list[tuple[int, int]] = field(default_factory=list)  # (epoch minute, requests), by time
+
+    @property
+    def peak_per_minute(self) -> int:
+        return max((n for _, n in self.per_minute), default=0)
+
+    @property
+    def mean_per_minute(self) -> float:
+        if self.first_minute is None:
+            return 0.0
+        return self.requests / (self.last_minute - self.first_minute + 1)
+
+
+class AccessLogColumns:
+    """Parsed access log, one array per field"""
+
+    def __init__(self, log_format: str = COMBINED_FORMAT):
+        self.pattern, names = compile_log_format(log_format, COLUMN_FIELDS)
+        # Column -> group index in the match tuples (first occurrence wins)
+        self._group = {}
+        for i, name in enumerate(names):
+            self._group.setdefault(name, i)
+        self._time_field = next((n for n in TIME_FIELDS if n in self._group), None)
+        self._bytes_field = next((n for n in BYTES_FIELDS if n in self._group), None)
+        self._uri_field = "request_uri" if "request_uri" in self._group else "request"
+
+        self.status = array("H")
+        self.bytes = array("Q")
+        self.minute = array("I")  # epoch minutes, 0 when the line has no usable time
+        self.uri = array("I")
+        self.ip = array("I")
+        self.uri_names: list[str] = []
+        self.ip_names: list[str] = []
+        self._uri_ids: dict[str, int] = {}
+        self._ip_ids: dict[str, int] = {}
+        self._minutes: dict[str, int] = {}
+        self.lines = 0
+
+    def __len__(self):
+        return len(self.status)
+
+    @property
+    def unparsed(self) -> int:
+        return self.lines - len(self)
+
+    def feed(self, text: str):
+        """Adds a block of whole lines"""
+        self.lines += text.count("\n") + (0 if not text or text.endswith("\n") else 1)
+        rows = self.pattern.findall(text)
+        if not rows:
+            return
+        if not isinstance(rows[0], tuple):
+            rows = [(r,) for r in rows]
+        columns = list(zip(*rows))
+        n = len(rows)
+
+        if "status" in self._group:
+            self.status.extend(_ints(columns[self._group["status"]], "H"))
+        else:
+            self.status.extend(array("H", [0]) * n)
+        if self._bytes_field:
+            self.bytes.extend(_ints(columns[self._group[self._bytes_field]], "Q"))
+        else:
+            self.bytes.extend(array("Q", [0]) * n)
+
+        if self._time_field:
+            values = columns[self._group[self._time_field]]
+            known = self._minutes
+            for value in set(values).difference(known):
+                ts = field_time(self._time_field, value)
+                known[value] = int(ts // 60) if ts is not None and ts > 0 else 0
+            self.minute.extend(array("I", map(known.__getitem__, values)))
+            if len(known) > 500000:
+                known.clear()  # a log spanning years; keep the cache bounded
+        else:
+            self.minute.extend(array("I", [0]) * n)
+
+        if self._uri_field in self._group:
+            values = columns[self._group[self._uri_field]]
+            if self._uri_field == "request_uri":
+                values = [v.partition("?")[0] for v in values]
+            self.uri.extend(self._intern(values, self._uri_ids, self.uri_names))
+        else:
+            self.uri.extend(array("I", [0]) * n)
+        if "remote_addr" in self._group:
+            self.ip.extend(self._intern(columns[self._group["remote_addr"]], self._ip_ids, self.ip_names))
+        else:
+            self.ip.extend(array("I", [0]) * n)
+
+    @staticmethod
+    def _intern(values, ids: dict[str, int], names: list[str]) -> array:
+        for value in set(values).difference(ids):
+            ids[value] = len(names)
+            names.append(value)
+        return array("I", map(ids.__getitem__, values))
+
+    def feed_file(self, f, block_size: int = READ_BLOCK):
+        """Parses a binary file object block by block (line aligned)"""
+        carry = b""
+        while True:
+            chunk = f.read(block_size)
+            if not chunk:
+                break
+            data = carry + chunk
+            nl = data.rfind(b"\n")
+            if nl == -1:
+                carry = data
+                continue
+            self.feed(data[:nl + 1].decode("utf-8", "replace"))
+            carry = data[nl + 1:]
+        if carry:
+            self.feed(carry.decode("utf-8", "replace"))
+
+    def summary(self, top: int = 20) -> AccessSummary:
+        per_minute = Counter(self.minute)
+        per_minute.pop(0, None)
+        minutes = sorted(per_minute.items())
+        return AccessSummary(
+            requests=len(self),
+            unparsed=self.unparsed,
+            bytes_total=sum(self.bytes),
+            first_minute=minutes[0][0] if minutes else None,
+            last_minute=minutes[-1][0] if minutes else None,
+            statuses=sorted(Counter(self.status).items()),
+            top_uris=[(self.uri_names[i], n) for i, n in Counter(self.uri).most_common(top)] if self.uri_names else [],
+            top_ips=[(self.ip_names[i], n) for i, n in Counter(self.ip).most_common(top)] if self.ip_names else [],
+            per_minute=minutes,
+        )
+
+
+def aggregate_args(paths: list[str], group_by: list[str], pattern: str | None = None,
+                   log_format: str | None = None, since: float | None = None, top: int = 50) -> dict:
+    """
+    Keyword arguments of aggregate.aggregate_paths. The log_format regex is
+    compiled here and sent as text, the server side needs no nginx knowledge.
+    """
+    args = {"paths": list(paths), "group_by": list(group_by), "pattern": pattern, "since": since, "top": top}
+    if log_format:
+        regex, names = compile_log_format(log_format, COLUMN_FIELDS)
+        args.update(line_regex=regex.pattern, names=names)
+    return args
+
+
+def summary_from_aggregate(result: dict) -> AccessSummary:
+    """AccessSummary of an aggregate() result grouped by status, uri, ip and minute"""
+    groups = result.get("groups", {})
+    first, last = result.get("minute_range") or (None, None)
+    return AccessSummary(
+        requests=result.get("matched", 0),
+        unparsed=result.get("unparsed", 0),
+        bytes_total=result.get("bytes", 0),
+        first_minute=first,
+        last_minute=last,
+        statuses=sorted((int(k) if str(k).isdigit() else 0, n) for k, n in groups.get("status", [])),
+        top_uris=[(k, n) for k, n in groups.get("uri", [])],
+        top_ips=[(k, n) for k, n in groups.get("ip", [])],
+        per_minute=[(int(k), n) for k, n in groups.get("minute", [])],
+    )
+
+
+def analyze_access_log(text: str, log_format: str = COMBINED_FORMAT, top: int = 20) -> AccessSummary:
+    columns = AccessLogColumns(log_format)
+    columns.feed(text)
+    return columns.summary(top)
+
+
+def backend_log_format(backend, path: str, default: str = COMBINED_FORMAT) -> str:
+    """The format nginx writes path in, or `default` when the configuration cannot be read"""
+    try:
+        return format_for(backend.dump_nginx_config(), path)
+    except (BackendError, NotImplementedError):
+        return default
+
+
+def analyze_backend_log(backend, path: str, lines: int, top: int = 20) -> AccessSummary:
+    """Last `lines` lines of an access log, parsed with the format nginx writes it in"""
+    return analyze_access_log(backend.tail(path, lines), backend_log_format(backend, path), top)
+
+
+def aggregate_backend_log(backend, path: str, top: int = 20, since: float | None = None,
+                          cancel_event=None) -> AccessSummary:
+    """The whole access log, rotated archives included, counted where it lives; only the counts are transferred"""
+    result = backend.aggregate([path, path + ".[0-9]*"], ["status", "uri", "ip", "minute"],
+                               log_format=backend_log_format(backend, path), since=since, top=top,
+                               cancel_event=cancel_event)
+    return summary_from_aggregate(result)
+
+
+if __name__ == "__main__":
+    # Benchmark: python -m backend.access_log [lines | path]
+    import os
+    import random
+    import sys
+    import tempfile
+    import time
+
+    arg = sys.argv[1] if len(sys.argv) > 1 else "5000000"
+    tmp = None
+    if os.path.exists(arg):
+        target = arg
+    else:
+        count = int(arg)
+        tmp = tempfile.NamedTemporaryFile(prefix="rsc_access_", suffix=".log", delete=False)
+        target = tmp.name
+        rnd = random.Random(1)
+        ips = [f"10.{rnd.randrange(256)}.{rnd.randrange(256)}.{rnd.randrange(256)}" for _ in range(5000)]
+        uris = [f"/api/v1/item/{i}" for i in range(2000)] + ["/", "/login", "/static/app.js", "/favicon.ico"]
+        statuses = [200] * 90 + [301, 302, 304, 304] + [404] * 4 + [500, 502]
+        agent = '"https://example.com/" "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36"'
+        start = 1698400000
+        t0 = time.perf_counter()
+        with tmp:
+            batch = []
+            for i in range(count):
+                ts = time.strftime("%d/%b/%Y:%H:%M:%S +0000", time.gmtime(start + i // 60))
+                batch.append(f'{rnd.choice(ips)} - - [{ts}] "GET {rnd.choice(uris)}?page={i % 7} HTTP/1.1" '
+                             f'{rnd.choice(statuses)} {rnd.randrange(100, 60000)} {agent}\n')
+                if len(batch) >= 100000:
+                    tmp.write("".join(batch).encode())
+                    batch = []
+            tmp.write("".join(batch).encode())
+        print(f"generated {count} lines, {os.path.getsize(target) / 1024 ** 2:.0f} MB "
+              f"in {time.perf_counter() - t0:.1f}s: {target}")
+
+    try:
+        cols = AccessLogColumns()
+        t0 = time.perf_counter()
+        with open(target, "rb") as f:
+            cols.feed_file(f)
+        parsed = time.perf_counter() - t0
+        print(f"  parse into columns  {parsed:8.2f}s  {len(cols) / parsed / 1e6:.2f}M lines/s, "
+              f"{cols.unparsed} unparsed")
+        t0 = time.perf_counter()
+        s = cols.summary()
+        print(f"  aggregate           {time.perf_counter() - t0:8.2f}s")
+        print(f"  {s.requests} requests, {s.bytes_total / 1024 ** 3:.2f} GB, peak {s.peak_per_minute}/min, "
+              f"statuses {dict(s.statuses)}")
+        print(f"  top uri {s.top_uris[:3]}, top ip {s.top_ips[:3]}")
+        # Column memory, what a list of dicts per line would need many times over
+        size = sum(a.itemsize * len(a) for a in (cols.status, cols.bytes, cols.minute, cols.uri, cols.ip))
+        print(f"  columns {size / 1024 ** 2:.0f} MB for {len(cols)} rows")
+    finally:
+        if tmp is not None:
+            os.unlink(target)
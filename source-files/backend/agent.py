@@ -0,0 +1,348 @@
+import inspect
+import itertools
+import json
+import threading
+from . import aggregate, fpm_status, line_index, logtime
+from .base import BackendError
+
+# Uploaded to the server once per connection and kept running (under sudo if
+# configured). Reads one JSON request per line on stdin, answers one JSON line
+# on stdout: {"id": n, "ok": true, "result": ...} or {"id": n, "ok": false, "error": "..."}
+# Each request runs on its own thread, so answers come back in the order they finish.
+# Keep it compatible with the python3 shipped by older Raspberry Pi OS releases.
+# The stdlib-only helper modules it needs are prepended when it is uploaded.
+_AGENT_MAIN = r'''
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+
+
+def _tail_lines(f, end, lines):
+    """Last `lines` lines of the first `end` bytes of f"""
+    pos = end
+    data = b""
+    while pos > 0 and data.count(b"\n") <= lines:
+        step = min(65536, pos)
+        pos -= step
+        f.seek(pos)
+        data = f.read(step) + data
+    if lines <= 0:
+        return []
+    return data.splitlines(True)[-lines:]
+
+
+def _read_tail(path, lines):
+    with open(path, "rb") as f:
+        return _tail_lines(f, f.seek(0, 2), lines)
+
+
+def op_ping():
+    return "pong"
+
+
+def op_tail(path, lines):
+    return b"".join(_read_tail(path, int(lines))).decode("utf-8", "replace")
+
+
+def op_tail_cursor(path, lines):
+    with open(path, "rb") as f:
+        st = os.fstat(f.fileno())
+        data = b"".join(_tail_lines(f, st.st_size, int(lines)))
+    return {"data": data.decode("utf-8", "replace"), "inode": st.st_ino, "size": st.st_size}
+
+
+def op_stat(path):
+    st = os.stat(path)
+    return {"size": st.st_size, "inode": st.st_ino, "mtime": int(st.st_mtime)}
+
+
+def op_read_since(path, offset, max_bytes, inode=None):
+    with open(path, "rb") as f:
+        st = os.fstat(f.fileno())
+        if (inode is not None and st.st_ino != inode) or st.st_size < offset:
+            offset = 0
+        f.seek(offset)
+        raw = f.read(max(0, int(max_bytes)))
+    nl = raw.rfind(b"\n")
+    if nl != -1:
+        raw = raw[:nl + 1]
+    return {"data": raw.decode("utf-8", "replace"), "offset": offset + len(raw),
+            "inode": st.st_ino, "size": st.st_size}
+
+
+_INDEXES = {}
+_INDEX_LOCKS = {}
+_INDEX_LOCKS_GUARD = threading.Lock()
+
+
+def _index_lock(path):
+    """One index build per file at a time; other files and ops are not held up"""
+    with _INDEX_LOCKS_GUARD:
+        return _INDEX_LOCKS.setdefault(path, threading.Lock())
+
+
+def _indexed(f, path):
+    return indexed(_INDEXES, f, path, parse_log_time)
+
+
+def op_line_count(path):
+    with _index_lock(path), open(path, "rb") as f:
+        return _indexed(f, path).total_lines
+
+
+def op_read_range(path, start_line, count):
+    with _index_lock(path), open(path, "rb") as f:
+        return _indexed(f, path).read_range(f, int(start_line), int(count))
+
+
+def op_seek_line(path, line_no):
+    with _index_lock(path), open(path, "rb") as f:
+        return _indexed(f, path).seek_line(f, max(0, int(line_no)))
+
+
+def op_tail_start(path, lines):
+    with _index_lock(path), open(path, "rb") as f:
+        return list(_indexed(f, path).tail_start(f, max(0, int(lines))))
+
+
+def op_seek_time(path, ts):
+    with _index_lock(path), open(path, "rb") as f:
+        return list(_indexed(f, path).seek_time(f, float(ts)))
+
+
+def op_search(path, pattern, tail_lines=5000, max_hits=300):
+    try:
+        rx = re.compile(pattern.encode("utf-8"), re.IGNORECASE)
+    except re.error:
+        rx = re.compile(re.escape(pattern.encode("utf-8")), re.IGNORECASE)
+    hits = []
+    for no, line in enumerate(_read_tail(path, int(tail_lines)), 1):
+        if rx.search(line):
+            hits.append("%d:%s" % (no, line.decode("utf-8", "replace")))
+            if len(hits) >= int(max_hits):
+                break
+    return "".join(hits)
+
+
+def op_systemctl(action, unit):
+    p = subprocess.Popen(["systemctl", action, unit], stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    out = p.communicate()[0].decode("utf-8", "replace")
+    if p.returncode != 0:
+        raise RuntimeError("systemctl %s %s: %s" % (action, unit, out.strip()))
+    return out
+
+
+def op_truncate(path):
+    with open(path, "r+b") as f:
+        f.truncate(0)
+    return ""
+
+
+OPS = dict((k[3:], v) for k, v in globals().items() if k.startswith("op_"))
+
+
+_WRITE_LOCK = threading.Lock()
+
+
+def _answer(stdout, line):
+    req_id = None
+    try:
+        req = json.loads(line.decode("utf-8"))
+        req_id = req.get("id")
+        fn = OPS[req["op"]]
+        resp = {"id": req_id, "ok": True, "result": fn(**req.get("args", {}))}
+    except Exception as e:
+        resp = {"id": req_id, "ok": False, "error": "%s: %s" % (type(e).__name__, e)}
+    with _WRITE_LOCK:
+        stdout.write(json.dumps(resp).encode("utf-8") + b"\n")
+        stdout.flush()
+
+
+def main():
+    stdin = sys.stdin.buffer if hasattr(sys.stdin, "buffer") else sys.stdin
+    stdout = sys.stdout.buffer if hasattr(sys.stdout, "buffer") else sys.stdout
+    while True:
+        line = stdin.readline()
+        if not line:
+            break
+        line = line.strip()
+        if not line:
+            continue
+        worker = threading.Thread(target=_answer, args=(stdout, line))
+        worker.daemon = True
+        worker.start()
+
+
+if __name__ == "__main__":
+    main()
+'''
+
+# One-shot form of the index ops for connections without the agent:
+# python3 -c INDEX_TOOL_SOURCE <seek_line|seek_time|tail_start> <path> <arg>, prints JSON.
+# Uses the same sidecar files as the agent, so either one can pick up the other's index.
+_INDEX_TOOL_MAIN = r'''
+import json
+import sys
+
+
+def _index_tool(op, path, arg):
+    with open(path, "rb") as f:
+        idx = indexed({}, f, path, parse_log_time)
+        if op == "seek_line":
+            result = idx.seek_line(f, max(0, int(arg)))
+        elif op == "tail_start":
+            result = list(idx.tail_start(f, max(0, int(arg))))
+        else:
+            result = list(idx.seek_time(f, float(arg)))
+    sys.stdout.write(json.dumps(result) + "\n")
+
+
+_index_tool(*sys.argv[1:4])
+'''
+
+# Aggregation always runs one-shot, on its own channel: a scan of /var/log can
+# take longer than an agent call may, and would hold up every other call meanwhile.
+# python3 -c AGGREGATE_TOOL_SOURCE '<json arguments>', prints JSON lines.
+_AGGREGATE_TOOL_MAIN = r'''
+run_tool(sys.argv, parse_log_time)
+'''
+
+# PHP-FPM status pages over FastCGI, one-shot under sudo (pool sockets are usually www-data only).
+# python3 -c FPM_TOOL_SOURCE '<json arguments>', prints one JSON line.
+_FPM_TOOL_MAIN = r'''
+run_tool(sys.argv)
+'''
+
+_HELPERS_SOURCE = inspect.getsource(logtime) + inspect.getsource(line_index)
+AGENT_SOURCE = _HELPERS_SOURCE + _AGENT_MAIN
+INDEX_TOOL_SOURCE = _HELPERS_SOURCE + _INDEX_TOOL_MAIN
+AGGREGATE_TOOL_SOURCE = inspect.getsource(logtime) + inspect.getsource(aggregate) + _AGGREGATE_TOOL_MAIN
+FPM_TOOL_SOURCE = inspect.getsource(fpm_status) + _FPM_TOOL_MAIN
+
+AGENT_REMOTE_NAME = ".rsc_agent.py"
+
+
+# Ops that may build a line index first: a multi-GB log takes minutes on a Pi
+INDEX_OPS = {"line_count", "read_range", "seek_line", "tail_start", "seek_time"}
+INDEX_TIMEOUT = 900
+
+
+class RemoteAgent:
+    """
+    Client side of the helper process: one long lived channel per connection,
+    framed as newline delimited JSON. Calls from several threads are in flight
+    together: a reader thread hands each reply to the call with its id, so a
+    long index build does not hold up the other tabs.
+    """
+
+    def __init__(self, client, cfg, timeout: float = 60):
+        self.client = client
+        self.cfg = cfg
+        self.timeout = timeout
+        self.channel = None
+        self._stdin = None
+        self._stdout = None
+        self._write_lock = threading.Lock()
+        self._pending: dict[int, list] = {}  # id -> [Event, reply]; reply stays None when the channel broke
+        self._pending_lock = threading.Lock()
+        self._broken = ""
+        self._ids = itertools.count(1)
+
+    @property
+    def alive(self) -> bool:
+        return (self.channel is not None and not self._broken and not self.channel.closed
+                and not self.channel.exit_status_ready())
+
+    def start(self):
+        try:
+            # Upload once per connection (relative to the user's home directory)
+            sftp = self.client.open_sftp()
+            with sftp.open(AGENT_REMOTE_NAME, "w") as f:
+                f.write(AGENT_SOURCE.encode("utf-8"))
+            sftp.close()
+
+            cmd = f"python3 -u ~/{AGENT_REMOTE_NAME}"
+            if self.cfg.use_sudo_nopass:
+                cmd = f"sudo -n {cmd}"
+            elif self.cfg.password:
+                # Password goes in as the first stdin line, read by sudo only
+                cmd = f"sudo -S -p '' {cmd}"
+
+            self.channel = self.client.get_transport().open_session()
+            self.channel.exec_command(cmd)
+            self._stdin = self.channel.makefile_stdin("wb")
+            self._stdout = self.channel.makefile("rb")
+            if not self.cfg.use_sudo_nopass and self.cfg.password:
+                self._stdin.write((self.cfg.password + "\n").encode("utf-8"))
+                self._stdin.flush()
+            threading.Thread(target=self._read_replies, args=(self.channel, self._stdout),
+                             name="agent-reader", daemon=True).start()
+
+            if self.call("ping") != "pong":
+                raise BackendError("Agent yanıt vermedi")
+        except BackendError:
+            self.close()
+            raise
+        except Exception as e:
+            self.close()
+            raise BackendError(f"Agent başlatılamadı: {e}")
+
+    def _read_replies(self, channel, stdout):
+        """Reader thread: wakes the caller of each reply; all of them once the channel ends"""
+        try:
+            for line in iter(stdout.readline, b""):
+                resp = json.loads(line)
+                with self._pending_lock:
+                    waiter = self._pending.pop(resp.get("id"), None)
+                if waiter is not None:
+                    waiter[1] = resp
+                    waiter[0].set()
+            err = channel.recv_stderr(4096).decode("utf-8", errors="replace")
+            self._broken = err.strip() or "agent kapandı"
+        except Exception as e:
+            self._broken = str(e) or type(e).__name__
+        with self._pending_lock:
+            waiters, self._pending = list(self._pending.values()), {}
+        for waiter in waiters:
+            waiter[0].set()
+
+    def call(self, op: str, **args):
+        req_id = next(self._ids)
+        waiter = [threading.Event(), None]
+        with self._pending_lock:
+            if self._broken:
+                raise BackendError(f"Agent iletişim hatası ({op}): {self._broken}")
+            self._pending[req_id] = waiter
+        frame = json.dumps({"id": req_id, "op": op, "args": args}) + "\n"
+        try:
+            with self._write_lock:
+                self._stdin.write(frame.encode("utf-8"))
+                self._stdin.flush()
+        except Exception as e:
+            # Broken channel: drop it, the backend restarts the agent on next use
+            self.close()
+            raise BackendError(f"Agent iletişim hatası ({op}): {e}")
+
+        if not waiter[0].wait(INDEX_TIMEOUT if op in INDEX_OPS else self.timeout):
+            # Only this call gives up; the agent keeps serving the others
+            with self._pending_lock:
+                self._pending.pop(req_id, None)
+            raise BackendError(f"Agent hatası ({op}): zaman aşımı")
+        resp = waiter[1]
+        if resp is None:
+            self.close()
+            raise BackendError(f"Agent iletişim hatası ({op}): {self._broken}")
+        if not resp.get("ok"):
+            raise BackendError(f"Agent hatası ({op}): {resp.get('error')}")
+        return resp.get("result")
+
+    def close(self):
+        if self.channel is not None:
+            try:
+                self.channel.close()
+            except Exception:
+                pass
+        self.channel = None
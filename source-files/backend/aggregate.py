@@ -0,0 +1,250 @@
+"""
+Server side log aggregation: lines are grouped and counted where the logs
+live and only the counts travel back, instead of every matching line.
+
+Groups: "status", "ip", "uri" (access log fields, from a log_format regex
+compiled on the client), "minute", "file" and "signature" (the line with its
+timestamp, numbers, addresses and quoted values masked, so repeats of one
+error count as one). Each group keeps at most MAX_KEYS distinct keys; later
+keys are counted under OTHER_KEY.
+
+The result is a plain dict (JSON). run_tool() is the one-shot command line
+form: it prints {"progress": ...} frames while it goes and one {"result": ...}
+frame at the end, one JSON object per line.
+
+Like line_index, this module is shipped to the server inside remote scripts,
+so it must stay stdlib only and compatible with older python3 releases.
+"""
+import glob
+import gzip
+import json
+import os
+import re
+import sys
+
+GROUPS = ("status", "ip", "uri", "minute", "file", "signature")
+# Access log variables each group reads, first one present wins
+GROUP_FIELDS = {"status": ("status",), "ip": ("remote_addr",), "uri": ("request", "request_uri")}
+TIME_FIELD_NAMES = ("time_local", "time_iso8601", "msec")
+BYTES_FIELD_NAMES = ("body_bytes_sent", "bytes_sent")
+MAX_KEYS = 20000
+RESULT_MINUTES = 1440  # most recent minutes returned
+OTHER_KEY = "(other)"
+SAMPLE_CHARS = 300
+SIGNATURE_CHARS = 200
+BINARY_PROBE = 1024
+
+_SIG_TIME = re.compile(
+    r"^\s*(?:\[[^\]]*\d{2}:\d{2}:\d{2}[^\]]*\]|\d{4}[-/]\d{2}[-/]\d{2}[T ]\d{2}:\d{2}:\d{2}\S*"
+    r"|[A-Za-z]{3} +\d{1,2} \d{2}:\d{2}:\d{2})\s*")
+_SIG_MASKS = (
+    (re.compile(r"\"[^\"]*\"|'[^']*'"), "\"...\""),
+    (re.compile(r"\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b"), "<ip>"),
+    (re.compile(r"\b0x[0-9a-fA-F]+\b|\b[0-9a-fA-F]{8,}\b"), "<hex>"),
+    (re.compile(r"\d+"), "N"),
+)
+
+
+def error_signature(line):
+    """The line without its timestamp and with variable parts masked"""
+    sig = _SIG_TIME.sub("", line, 1)
+    for rx, mask in _SIG_MASKS:
+        sig = rx.sub(mask, sig)
+    return sig.strip()[:SIGNATURE_CHARS]
+
+
+def _compile_filter(pattern):
+    if not pattern:
+        return None
+    try:
+        return re.compile(pattern, re.IGNORECASE)
+    except re.error:
+        return re.compile(re.escape(pattern), re.IGNORECASE)
+
+
+class Aggregator(object):
+    def __init__(self, group_by, pattern=None, line_regex=None, names=None, since=None, parse_time=None,
+                 max_keys=MAX_KEYS):
+        self.group_by = [g for g in group_by if g in GROUPS]
+        self.filter = _compile_filter(pattern)
+        self.fields = re.compile(line_regex) if line_regex else None
+        names = names or []
+        self._field_at = {}
+        for i, name in enumerate(names):
+            self._field_at.setdefault(name, i)
+        self._time_field = next((n for n in TIME_FIELD_NAMES if n in self._field_at), None)
+        self._bytes_field = next((n for n in BYTES_FIELD_NAMES if n in self._field_at), None)
+        self.since = since
+        self.parse_time = parse_time
+        self.max_keys = max_keys
+        self.counts = dict((g, {}) for g in self.group_by)
+        self.samples = {}
+        self._minutes = {}
+        self.lines = 0
+        self.matched = 0
+        self.unparsed = 0
+        self.bytes = 0
+        self.files = 0
+
+    def _count(self, group, key):
+        counts = self.counts[group]
+        if key not in counts and len(counts) >= self.max_keys:
+            if group == "minute":
+                return  # keys stay numeric
+            key = OTHER_KEY
+        counts[key] = counts.get(key, 0) + 1
+
+    def _minute(self, text, field):
+        minute = self._minutes.get(text)
+        if minute is None:
+            ts = None
+            if field == "msec":
+                try:
+                    ts = float(text)
+                except ValueError:
+                    pass
+            elif self.parse_time is not None:
+                # time_local comes without the brackets the access log parser looks for
+                ts = self.parse_time("[%s]" % text if field == "time_local" else text)
+            minute = int(ts // 60) if ts else 0
+            if len(self._minutes) >= self.max_keys:
+                self._minutes.clear()
+            self._minutes[text] = minute
+        return minute
+
+    def feed_line(self, line, source=""):
+        self.lines += 1
+        if self.filter is not None and not self.filter.search(line):
+            return
+        row = None
+        if self.fields is not None:
+            m = self.fields.match(line)
+            if m is None:
+                self.unparsed += 1
+                return
+            row = m.groups()
+
+        minute = 0
+        if "minute" in self.counts or self.since is not None:
+            if row is not None and self._time_field:
+                minute = self._minute(row[self._field_at[self._time_field]], self._time_field)
+            elif self.parse_time is not None:
+                ts = self.parse_time(line)
+                minute = int(ts // 60) if ts else 0
+            if self.since is not None and minute and minute * 60 + 59 < self.since:
+                return
+
+        self.matched += 1
+        if row is not None and self._bytes_field:
+            value = row[self._field_at[self._bytes_field]]
+            if value.isdigit():
+                self.bytes += int(value)
+        for group in self.group_by:
+            if group == "minute":
+                if minute:
+                    self._count(group, minute)
+            elif group == "file":
+                self._count(group, source)
+            elif group == "signature":
+                sig = error_signature(line)
+                self._count(group, sig)
+                if sig not in self.samples and len(self.samples) < self.max_keys:
+                    self.samples[sig] = line[:SAMPLE_CHARS]
+            elif row is not None:
+                field = next((f for f in GROUP_FIELDS[group] if f in self._field_at), None)
+                if field is not None:
+                    value = row[self._field_at[field]]
+                    self._count(group, value.partition("?")[0] if field == "request_uri" else value)
+
+    def feed_file(self, path, display=None):
+        """Whole file, .gz inflated; files that look binary (wtmp, journals) are skipped"""
+        opener = gzip.open if path.endswith(".gz") else open
+        try:
+            with opener(path, "rb") as f:
+                if b"\0" in f.read(BINARY_PROBE):
+                    return
+                f.seek(0)
+                self.files += 1
+                source = display or path
+                for raw in f:
+                    self.feed_line(raw.decode("utf-8", "replace").rstrip("\r\n"), source)
+        except (IOError, OSError, EOFError):
+            pass
+
+    def result(self, top=50):
+        """Top `top` keys of each group by count; minutes are the last RESULT_MINUTES, in time order"""
+        groups = {}
+        distinct = {}
+        minute_range = None
+        for group, counts in self.counts.items():
+            distinct[group] = len(counts)
+            if group == "minute":
+                groups[group] = sorted(counts.items())[-RESULT_MINUTES:]
+                if counts:
+                    minute_range = [min(counts), max(counts)]
+            else:
+                groups[group] = sorted(counts.items(), key=lambda kv: (-kv[1], str(kv[0])))[:top]
+        samples = {}
+        for key, _ in groups.get("signature", []):
+            if key in self.samples:
+                samples[key] = self.samples[key]
+        return {"lines": self.lines, "matched": self.matched, "unparsed": self.unparsed, "bytes": self.bytes,
+                "files": self.files, "groups": groups, "distinct": distinct, "samples": samples,
+                "minute_range": minute_range}
+
+
+def expand_paths(paths):
+    """Files of `paths` (shell patterns allowed), directories walked recursively, in a stable order"""
+    found = []
+    for pattern in paths:
+        for path in sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]:
+            found.extend(_files_under(path))
+    return found
+
+
+def _files_under(path):
+    if os.path.isfile(path):
+        return [path]
+    found = []
+    for dirpath, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            full = os.path.join(dirpath, name)
+            if os.path.isfile(full) and not os.path.islink(full):
+                found.append(full)
+    return found
+
+
+def aggregate_paths(paths, group_by, pattern=None, line_regex=None, names=None, since=None, top=50,
+                    parse_time=None, progress=None, cancelled=None):
+    """
+    Aggregates every file of `paths`. progress(done, total, path) is called
+    before each file; once cancelled() returns true the files left are skipped.
+    """
+    agg = Aggregator(group_by, pattern, line_regex, names, since, parse_time)
+    files = expand_paths(paths)
+    for i, path in enumerate(files):
+        if cancelled is not None and cancelled():
+            break
+        if progress is not None:
+            progress(i, len(files), path)
+        agg.feed_file(path)
+    return agg.result(top)
+
+
+def run_tool(argv, parse_time=None):
+    """python3 -c <source> '<json arguments of aggregate_paths>'"""
+    out = sys.stdout
+
+    def progress(done, total, path):
+        out.write(json.dumps({"progress": [done, total, path]}) + "\n")
+        out.flush()
+
+    try:
+        args = json.loads(argv[1])
+        result = aggregate_paths(parse_time=parse_time, progress=progress, **args)
+    except Exception as e:
+        sys.stderr.write("%s: %s\n" % (type(e).__name__, e))
+        sys.exit(2)
+    out.write(json.dumps({"result": result}) + "\n")
+    out.flush()
@@ -1,7 +1,51 @@
+import sys
+import threading
+from typing import TYPE_CHECKING, Callable, Iterator
+from .inventory import InventoryDelta
+from .logsearch import SCOPE_TAIL, SCOPE_FULL, SCOPE_SINCE
+from .rotation import ChainHit, ChainMember, keep_newest, select_members
+from .fpm_monitor import FpmPoolStatus
+from .resources import ResourceReading
+from .probe import MySQLDiagnostics, StatusSnapshot, php_fpm_service_name, active_state_from_status
+
+if TYPE_CHECKING:
+    from .mysql_metrics import PyMySQLSource
+
+
+DB_ERROR_PATTERN = "SQLSTATE|mysql|mysqli|pdo"
+PHP_ERROR_LOG = "/var/log/nginx/error.log"
+
+
 class BackendError(Exception):
     pass
 
 
+def cut_at_last_line(raw: bytes) -> bytes:
+    """Drops a trailing partial line so incremental reads stay line aligned"""
+    nl = raw.rfind(b"\n")
+    if nl == -1:
+        return raw
+    return raw[:nl + 1]
+
+
+def line_blocks(read: Callable[[int], bytes], block_size: int = 1024 * 1024) -> Iterator[str]:
+    """Text of a byte stream in blocks of whole lines; a last line without newline comes alone at the end"""
+    carry = b""
+    while True:
+        chunk = read(block_size)
+        if not chunk:
+            break
+        data = carry + chunk
+        nl = data.rfind(b"\n")
+        if nl == -1:
+            carry = data
+            continue
+        yield data[:nl + 1].decode("utf-8", errors="replace")
+        carry = data[nl + 1:]
+    if carry:
+        yield carry.decode("utf-8", errors="replace")
+
+
 class Backend:
     def tail(self, path: str, lines: int) -> str:
         raise NotImplementedError
@@ -9,18 +53,150 @@ class Backend:
     def size_bytes(self, path: str) -> int:
         raise NotImplementedError
 
+    def read_since(self, path: str, offset: int, max_bytes: int = 1024 * 1024,
+                   inode: int | None = None) -> tuple[str, int, int, int]:
+        """
+        Reads new bytes appended after `offset`.
+        Returns (data, new_offset, inode, size). If the file was rotated (inode
+        differs from the given one) or truncated (size < offset), reading
+        restarts from 0; callers detect that by comparing inode / new_offset.
+        Data is cut at the last complete line when possible.
+        """
+        raise NotImplementedError
+
+    def tail_with_cursor(self, path: str, lines: int) -> tuple[str, int, int]:
+        """
+        Last `lines` lines with the (inode, size) of the file they were read
+        from, taken in one read: the text ends exactly at `size`, the offset
+        read_since continues from, even if the file grows or rotates meanwhile.
+        """
+        raise NotImplementedError
+
+    def line_count(self, path: str) -> int:
+        """Number of lines in the file (a trailing partial line counts)"""
+        raise NotImplementedError
+
+    def read_range(self, path: str, start_line: int, count: int) -> list[str]:
+        """Returns up to `count` lines starting at 0-based `start_line`, without newlines"""
+        raise NotImplementedError
+
+    def seek_line(self, path: str, line_no: int) -> int:
+        """Byte offset where 0-based line `line_no` starts (the file size past the end)"""
+        raise NotImplementedError
+
+    def tail_start(self, path: str, lines: int) -> tuple[int, int]:
+        """(line_no, byte_offset) where the last `lines` lines start, 0-based, from the same index"""
+        raise NotImplementedError
+
+    def seek_time(self, path: str, ts: float) -> tuple[int, int]:
+        """
+        (line_no, byte_offset) of the first line logged at or after epoch
+        time `ts`, 0-based; the end of the file when there is none. Backed by
+        a persistent sparse line/time index, so it costs a bisection plus at
+        most one index step of reading, whatever the file size.
+        """
+        raise NotImplementedError
+
     def search(self, path: str, pattern: str, tail_lines: int = 5000, max_hits: int = 300) -> str:
         raise NotImplementedError
 
+    def search_stream(self, path: str, pattern: str, scope: str = SCOPE_TAIL, tail_lines: int = 5000,
+                      since: float | None = None, max_hits: int = 300,
+                      cancel_event: threading.Event | None = None) -> Iterator[tuple[int, int, str]]:
+        """
+        Case-insensitive grep that yields (line_no, byte_offset, line) as matches
+        arrive. line_no is 1-based and absolute within the file whatever the scope:
+        SCOPE_TAIL (last `tail_lines` lines), SCOPE_FULL or SCOPE_SINCE (lines
+        logged at or after the `since` epoch time). Setting cancel_event stops
+        the search on the server side.
+        """
+        raise NotImplementedError
+
+    def rotation_chain(self, path: str, spans: bool = True) -> list[ChainMember]:
+        """
+        The live file and the copies logrotate left next to it (path.1,
+        path.2.gz ...), oldest first, each with the first and last timestamp
+        it holds. Spans are cached; only new or changed members are read.
+        With spans=False (no time bound to check) none are read, which would
+        inflate every archive; select_members then goes by mtime.
+        """
+        raise NotImplementedError
+
+    def search_rotated(self, path: str, pattern: str, since: float | None = None, max_hits: int = 300,
+                       cancel_event: threading.Event | None = None) -> Iterator[ChainHit]:
+        """
+        search_stream over the whole rotation chain: the newest `max_hits`
+        hits, oldest first. Yields (member_path, line_no, byte_offset, line);
+        line numbers are per member. Members are searched newest first, so
+        older archives are only opened while the limit is not reached; with
+        `since`, archives that ended before it are skipped as well.
+        """
+        def member_hits(member: ChainMember, needs_check: bool):
+            if cancel_event and cancel_event.is_set():
+                return ()
+            scope = SCOPE_SINCE if needs_check else SCOPE_FULL
+            # Every hit of the member is read, keep_newest holds on to its last ones
+            return self.search_stream(member.path, pattern, scope, since=since, max_hits=sys.maxsize,
+                                      cancel_event=cancel_event)
+
+        selected = select_members(self.rotation_chain(path, spans=since is not None), since)
+        yield from keep_newest(((m.path, member_hits(m, check)) for m, check in reversed(selected)), max_hits)
+
+    def read_blocks(self, path: str, cancel_event: threading.Event | None = None) -> Iterator[str]:
+        """
+        The whole file as text blocks of complete lines, inflated when it is
+        a .gz archive, for parsers that need every line (latency history).
+        Setting cancel_event stops the transfer.
+        """
+        raise NotImplementedError
+
+    def aggregate(self, paths: list[str], group_by: list[str], pattern: str | None = None,
+                  log_format: str | None = None, since: float | None = None, top: int = 50,
+                  progress: Callable[[int, int, str], None] | None = None,
+                  cancel_event: threading.Event | None = None) -> dict:
+        """
+        Counts lines of `paths` (files, directories, shell patterns; .gz
+        inflated) by each of `group_by` (see aggregate.GROUPS) where the logs
+        live, so only the counts are transferred. `pattern` keeps matching
+        lines only (case-insensitive regex); `log_format` parses access log
+        fields for the status / ip / uri groups. Returns the dict described in
+        aggregate.Aggregator.result. progress(done, total, path) per file.
+        """
+        raise NotImplementedError
+
     def truncate(self, path: str) -> str:
         raise NotImplementedError
 
-    def list_var_log(self) -> list[tuple[str, int, str]]:
-        """Returns list of (name, size_bytes, mtime_str) for files directly under /var/log"""
+    def log_inventory(self, token: str | None = None) -> InventoryDelta:
+        """
+        Recursive listing of the files under /var/log. With the token of the
+        previous answer only the entries that changed since then (size, mtime
+        or inode) and the removed paths are returned; otherwise everything,
+        with full=True. Use LogInventory rather than calling this directly.
+        """
         raise NotImplementedError
 
-    def download_file(self, remote_path: str, local_path: str) -> str:
-        """Downloads a file from remote to local. Returns status message."""
+    def download_file(self, remote_path: str, local_path: str,
+                      progress: Callable[[int, int], None] | None = None,
+                      cancel_event: threading.Event | None = None) -> str:
+        """
+        Downloads a file from remote to local. Returns status message.
+        Data goes to local_path + ".part" first, an interrupted download
+        continues from there on the next call. progress(done, total) is
+        called from the worker thread; cancel_event stops the transfer.
+        """
+        raise NotImplementedError
+
+    def download_bundle(self, paths: list[str], local_path: str, compression: str = "zst",
+                        since: float | None = None,
+                        progress: Callable[[int, int], None] | None = None,
+                        cancel_event: threading.Event | None = None) -> str:
+        """
+        Archives many logs (globs allowed) on the server into one tar.zst or
+        tar.gz and downloads it in a single transfer. With `since`, each log
+        is trimmed to the lines logged at or after that epoch time. The file
+        extension follows the compression actually used. Returns status message.
+        """
         raise NotImplementedError
 
     def get_nginx_version(self) -> str:
@@ -33,6 +209,10 @@ class Backend:
         """Executes 'sudo nginx -t' and returns output"""
         raise NotImplementedError
 
+    def dump_nginx_config(self) -> str:
+        """Executes 'sudo nginx -T' (the full configuration) and returns output"""
+        raise NotImplementedError
+
     def get_php_version(self) -> str:
         """Returns PHP version string (e.g. '8.2.7')"""
         raise NotImplementedError
@@ -49,6 +229,17 @@ class Backend:
         """Returns grep output for 'php' in nginx error log"""
         raise NotImplementedError
 
+    def fpm_pool_status(self) -> list[FpmPoolStatus]:
+        """Every PHP-FPM pool in /etc/php/*/fpm/pool.d with its status page, read over FastCGI"""
+        raise NotImplementedError
+
+    def sample_resources(self) -> ResourceReading:
+        """
+        CPU, memory, disk and load counters plus thermal zones in one read
+        (see resources); rates come from two consecutive readings
+        """
+        raise NotImplementedError
+
     def control_service(self, service_name: str, action: str) -> str:
         """
         Executes systemctl {action} {service_name}. 
@@ -57,6 +248,32 @@ class Backend:
         """
         raise NotImplementedError
 
+    def probe_all(self) -> StatusSnapshot:
+        """
+        Collects everything the status bar needs.
+        Default implementation calls the single getters one by one;
+        remote backends override it with one batched command.
+        """
+        php_ver = self.get_php_version()
+        mysql_service = self.get_mysql_service_name()
+        return StatusSnapshot(
+            nginx_version=self.get_nginx_version(),
+            nginx_status=self.get_nginx_status(),
+            php_version=php_ver,
+            php_fpm_service=php_fpm_service_name(php_ver),
+            php_fpm_status=self.get_php_fpm_status(php_ver),
+            mysql_service=mysql_service,
+            mysql_status=active_state_from_status(self.get_mysql_status()),
+            mysql_version=self.get_mysql_version(),
+        )
+
+    def connection_stats(self) -> dict:
+        """
+        Connection metrics for the status bar: handshake_ms, reconnects,
+        last_drop. Empty for backends without a network connection.
+        """
+        return {}
+
     # MySQL / MariaDB
     def get_mysql_version(self) -> str:
         raise NotImplementedError
@@ -85,6 +302,32 @@ class Backend:
         """Greps bind-address in /etc/mysql"""
         raise NotImplementedError
 
+    def collect_mysql_diagnostics(self) -> MySQLDiagnostics:
+        """
+        Everything the MySQL info panel shows. Default implementation calls
+        the single getters one by one; remote backends override it with one
+        batched command.
+        """
+        return MySQLDiagnostics(
+            service=self.get_mysql_service_name(),
+            version=self.get_mysql_version(),
+            status=self.get_mysql_status(),
+            port=self.check_mysql_port(),
+            socket=self.check_mysql_socket(),
+            bind_address=self.check_mysql_bind_address(),
+        )
+
+    def fetch_mysql_metrics(self) -> tuple[dict[str, str], list[dict]]:
+        """
+        SHOW GLOBAL STATUS and SHOW FULL PROCESSLIST through the server's own
+        mysql client (see mysql_metrics), as (status, processes)
+        """
+        raise NotImplementedError
+
+    def mysql_client_source(self, user: str, password: str = "") -> "PyMySQLSource":
+        """PyMySQL metrics source for the server: its unix socket locally, a forwarded port over SSH"""
+        raise NotImplementedError
+
     def search_db_errors_in_nginx(self) -> str:
         """Greps db related errors in nginx log"""
         raise NotImplementedError
@@ -92,6 +335,14 @@ class Backend:
     def search_db_errors_in_varlog(self) -> str:
         """Greps db related errors in /var/log"""
         raise NotImplementedError
+
+    def summarize_db_errors_in_varlog(self) -> dict:
+        """search_db_errors_in_varlog counted on the server: error signatures and files, not lines"""
+        return self.aggregate(["/var/log"], ["signature", "file"], pattern=DB_ERROR_PATTERN)
+
+    def summarize_php_errors(self) -> dict:
+        """check_php_errors over the nginx error log and its archives, as signatures per minute"""
+        return self.aggregate([PHP_ERROR_LOG, PHP_ERROR_LOG + ".[0-9]*"], ["signature", "minute"], pattern="php")
     
     def truncate_all_nginx_logs(self) -> str:
         """Truncates all nginx logs"""
@@ -0,0 +1,167 @@
+"""
+Log bundles: many logs archived on the server and transferred as one
+compressed tar stream.
+
+The shell script expands the requested paths (globs allowed), removes
+duplicates and pipes a tar of them through zstd (gzip when zstd is not
+installed). It first prints "@@BUNDLE <zst|gz>" so the client knows what
+it receives. With a time window each file is trimmed by a small python3
+filter (logtime shipped along) before it goes into the archive; files left
+with no line in the window are not added. The script fails when tar or the
+filter does, not only when the compressor does.
+"""
+import inspect
+import os
+import re
+import shlex
+import threading
+from . import logtime
+from .base import BackendError
+from .transfer import DownloadCancelled, ProgressFn, CHUNK_SIZE, finish, part_path
+
+BUNDLE_MARK = b"@@BUNDLE"
+COMPRESSIONS = ("zst", "gz")
+
+# (label key, path patterns)
+BUNDLE_PRESETS = [
+    ("bundle_preset_nginx", ["/var/log/nginx/*"]),
+    ("bundle_preset_php", ["/var/log/php*-fpm.log*"]),
+    ("bundle_preset_mysql", ["/var/log/mysql/*", "/var/log/mariadb/*"]),
+    ("bundle_preset_syslog", ["/var/log/syslog*", "/var/log/messages*", "/var/log/auth.log*", "/var/log/kern.log*"]),
+    ("bundle_preset_rotated", ["/var/log/*.gz", "/var/log/*/*.gz"]),
+]
+
+# Runs on the server: file names on stdin, uncompressed tar on stdout.
+# Same compatibility rules as logtime (stdlib only, older python3).
+_FILTER_MAIN = r'''
+import gzip
+import os
+import sys
+import tarfile
+import tempfile
+
+
+def _bundle(since):
+    tar = tarfile.open(fileobj=sys.stdout.buffer, mode="w|")
+    names = sys.stdin.read().splitlines()
+    selected = set(names)
+    for name in names:
+        try:
+            st = os.stat(name)
+        except OSError as e:
+            sys.stderr.write("skip %s: %s\n" % (name, e))
+            continue
+        # Nothing written after the window started: no line can match
+        if not os.path.isfile(name) or st.st_mtime < since:
+            continue
+        packed = name.endswith(".gz")
+        # x.gz goes in inflated as x, unless x itself (an interrupted rotation) is
+        # in the bundle too: then it stays x.gz, compressed again
+        repack = packed and name[:-3] in selected
+        keep = TimeFilter(since)
+        kept = 0
+        with tempfile.TemporaryFile() as tmp:
+            out = gzip.GzipFile(fileobj=tmp, mode="wb") if repack else tmp
+            try:
+                with (gzip.open(name, "rb") if packed else open(name, "rb")) as src:
+                    for raw in src:
+                        if keep.accept(raw.decode("utf-8", "replace")):
+                            out.write(raw)
+                            kept += 1
+            except (IOError, OSError, EOFError) as e:
+                sys.stderr.write("skip %s: %s\n" % (name, e))
+                continue
+            if repack:
+                out.close()
+            if not kept:
+                continue  # written to during the window, but only undated or older lines
+            info = tarfile.TarInfo(name[:-3] if packed and not repack else name)
+            info.size = tmp.tell()
+            info.mtime = st.st_mtime
+            info.mode = 0o644
+            tmp.seek(0)
+            tar.addfile(info, tmp)
+    tar.close()
+
+
+_bundle(float(sys.argv[1]))
+'''
+
+FILTER_SOURCE = inspect.getsource(logtime) + _FILTER_MAIN
+
+_GLOB_CHARS = re.compile(r"([*?])")
+
+
+def _shell_pattern(path: str) -> str:
+    """Quotes a path relative to / but leaves * and ? for the shell to expand"""
+    parts = _GLOB_CHARS.split(path.lstrip("/"))
+    return "".join(p if p in ("*", "?") else shlex.quote(p) for p in parts if p)
+
+
+def build_bundle_script(paths: list[str], compression: str = "zst", since: float | None = None) -> str:
+    if compression not in COMPRESSIONS:
+        raise BackendError(f"Bilinmeyen sıkıştırma: {compression}")
+    members = " ".join(_shell_pattern(p) for p in paths)
+    if since is None:
+        # GNU tar exits 1 when a log grew while it was read: the archive is still good
+        archiver, ok_status = "tar -c --ignore-failed-read -f - -T -", "0|1"
+    else:
+        archiver, ok_status = f"python3 -c {shlex.quote(FILTER_SOURCE)} {float(since)}", "0"
+    # sh has no pipefail: the archiver's status comes back on fd 3, the archive goes out on fd 4
+    return (
+        f"cd / || exit 1; fmt=gz; comp='gzip -1 -c'; "
+        f"if [ {compression} = zst ] && command -v zstd >/dev/null 2>&1; then fmt=zst; comp='zstd -q -3 -T0 -c'; fi; "
+        f"echo \"@@BUNDLE $fmt\"; exec 4>&1; "
+        f"st=$( {{ {{ printf '%s\\n' {members} | sort -u | {archiver}; echo $? >&3; }} | $comp >&4; }} 3>&1 ) || exit 1; "
+        f"case \"$st\" in {ok_status}) ;; *) echo \"archiver exit status $st\" >&2; exit 1;; esac"
+    )
+
+
+def bundle_path(local_path: str, fmt: str) -> str:
+    """local_path with the extension of the format the server actually used"""
+    for ext in (".tar.zst", ".tar.gz", ".tgz"):
+        if local_path.endswith(ext):
+            local_path = local_path[:-len(ext)]
+            break
+    return f"{local_path}.tar.{fmt}"
+
+
+def save_bundle(read, local_path: str, progress: ProgressFn | None = None,
+                cancel_event: threading.Event | None = None) -> str:
+    """
+    Writes the stream produced by build_bundle_script to disk and returns
+    the final file name. read(n) returns b"" at the end of the stream.
+    """
+    head = b""
+    while b"\n" not in head:
+        data = read(CHUNK_SIZE)
+        if not data:
+            raise BackendError("Arşiv oluşturulamadı")
+        head += data
+    line, _, rest = head.partition(b"\n")
+    parts = line.split()
+    if len(parts) != 2 or parts[0] != BUNDLE_MARK:
+        raise BackendError(f"Arşiv başlığı anlaşılamadı: {line[:200]!r}")
+    target = bundle_path(local_path, parts[1].decode())
+
+    # A bundle is generated on the fly, there is nothing to resume from
+    part = part_path(target)
+    done = 0
+    with open(part, "wb") as out:
+        data = rest
+        while True:
+            if data:
+                out.write(data)
+                done += len(data)
+                if progress:
+                    progress(done, 0)
+            if cancel_event and cancel_event.is_set():
+                break
+            data = read(CHUNK_SIZE)
+            if not data:
+                break
+    if cancel_event and cancel_event.is_set():
+        os.remove(part)
+        raise DownloadCancelled("İndirme iptal edildi")
+    finish(part, target)
+    return target
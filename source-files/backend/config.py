@@ -9,3 +9,6 @@ class ConnConfig:
     port: int = 22
     key_path: str = ""
     use_sudo_nopass: bool = True
+    use_agent: bool = False  # keep one helper process per connection (SSH only)
+    keepalive_interval: int = 15  # seconds between SSH keepalives, 0 = off
+    reconnect_attempts: int = 5  # per dropped session, with exponential backoff
@@ -0,0 +1,228 @@
+"""
+Fleet mode: the same operation on many servers at once.
+
+HostInventory is the list of servers (kept in settings.json), ConnectionPool
+keeps one live SSHBackend (one paramiko transport) per host between runs,
+and fan_out() runs an operation on every selected host with a bounded
+number of threads, reporting each host's result as soon as it is known.
+HostBackoff keeps unreachable hosts out of periodic rounds for a while.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, asdict, fields
+from typing import Callable
+
+from .base import BackendError
+from .config import ConnConfig
+from .local import NGINX_ERROR
+from .logsearch import SCOPE_TAIL
+from .probe import active_state_from_status
+from .ssh import SSHBackend
+
+DEFAULT_CONCURRENCY = 8
+# Wait before a failed host is tried again; doubles with each failure in a row
+BACKOFF_MIN = 10.0
+BACKOFF_MAX = 300.0
+
+
+@dataclass
+class FleetHost:
+    name: str
+    host: str
+    user: str = "pi"
+    port: int = 22
+    key_path: str = ""
+    use_sudo_nopass: bool = True
+    use_agent: bool = False
+
+    def to_config(self, password: str = "") -> ConnConfig:
+        return ConnConfig(mode="ssh", host=self.host, user=self.user, password=password, port=self.port,
+                          key_path=self.key_path, use_sudo_nopass=self.use_sudo_nopass, use_agent=self.use_agent)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "FleetHost":
+        known = {f.name for f in fields(cls)}
+        host = cls(**{k: v for k, v in data.items() if k in known})
+        host.port = int(host.port or 22)
+        return host
+
+
+class HostInventory:
+    def __init__(self, hosts: list[FleetHost] | None = None):
+        self.hosts: list[FleetHost] = list(hosts or [])
+
+    @classmethod
+    def load(cls) -> "HostInventory":
+        from .settings import SettingsManager
+        return cls([FleetHost.from_dict(d) for d in SettingsManager.load_fleet_hosts()])
+
+    def save(self):
+        from .settings import SettingsManager
+        SettingsManager.save_fleet_hosts([asdict(h) for h in self.hosts])
+
+
+@dataclass
+class HostResult:
+    name: str
+    ok: bool
+    output: object  # what the operation returned (a summary string for most), the error message when not ok
+    elapsed_ms: float
+
+
+class ConnectionPool:
+    """One SSHBackend per host, reconnected only when its transport died"""
+
+    def __init__(self, password: str = ""):
+        self.password = password
+        self._backends: dict[str, SSHBackend] = {}
+        self._locks: dict[str, threading.Lock] = {}
+        self._guard = threading.Lock()
+
+    def get(self, host: FleetHost) -> SSHBackend:
+        with self._guard:
+            lock = self._locks.setdefault(host.name, threading.Lock())
+        # Per host lock: two operations on the same host never connect twice
+        with lock:
+            backend = self._backends.get(host.name)
+            if backend is not None and backend.cfg == host.to_config(self.password) and self._alive(backend):
+                return backend
+            if backend is not None:
+                self._close(backend)
+            backend = SSHBackend(host.to_config(self.password))
+            self._backends[host.name] = backend
+            return backend
+
+    @staticmethod
+    def _alive(backend: SSHBackend) -> bool:
+        transport = backend.client.get_transport() if backend.client else None
+        return bool(transport and transport.is_active())
+
+    @staticmethod
+    def _close(backend: SSHBackend):
+        try:
+            if backend.agent:
+                backend.agent.close()
+            if backend.client:
+                backend.client.close()
+        except Exception:
+            pass
+
+    def drop(self, name: str):
+        with self._guard:
+            backend = self._backends.pop(name, None)
+        if backend is not None:
+            self._close(backend)
+
+    def close_all(self):
+        with self._guard:
+            backends = list(self._backends.values())
+            self._backends.clear()
+        for backend in backends:
+            self._close(backend)
+
+    def connected(self) -> list[str]:
+        return [name for name, b in list(self._backends.items()) if self._alive(b)]
+
+
+class HostBackoff:
+    """
+    Hosts whose last operation failed, with the time they may be tried again.
+    A periodic round leaves them out: an unreachable host costs a connect
+    timeout per attempt, and the round waits for its slowest host.
+    """
+
+    def __init__(self, minimum: float = BACKOFF_MIN, maximum: float = BACKOFF_MAX):
+        self.minimum = minimum
+        self.maximum = maximum
+        self._hosts: dict[str, tuple[float, float]] = {}  # name -> (retry at, last wait), monotonic
+
+    def __len__(self) -> int:
+        return len(self._hosts)
+
+    def record(self, result: HostResult):
+        if result.ok:
+            self._hosts.pop(result.name, None)
+            return
+        previous = self._hosts.get(result.name)
+        wait = min(self.maximum, previous[1] * 2) if previous else self.minimum
+        self._hosts[result.name] = (time.monotonic() + wait, wait)
+
+    def waiting(self, name: str) -> bool:
+        return name in self._hosts
+
+    def due(self, name: str) -> bool:
+        """Waiting, and its retry time has come"""
+        entry = self._hosts.get(name)
+        return entry is not None and entry[0] <= time.monotonic()
+
+
+def fan_out(pool: ConnectionPool, hosts: list[FleetHost], operation: Callable[[SSHBackend], object],
+            max_workers: int = DEFAULT_CONCURRENCY, cancel_event: threading.Event | None = None,
+            on_result: Callable[[HostResult], None] | None = None) -> list[HostResult]:
+    """
+    Runs operation(backend) on every host, at most max_workers at a time.
+    on_result is called from worker threads as each host finishes. Hosts not
+    started yet are skipped once cancel_event is set.
+    """
+    def run(host: FleetHost) -> HostResult:
+        t0 = time.perf_counter()
+        if cancel_event and cancel_event.is_set():
+            return HostResult(host.name, False, "cancelled", 0.0)
+        try:
+            output = operation(pool.get(host))
+            ok = True
+        except Exception as e:
+            output, ok = str(e), False
+            if not isinstance(e, BackendError):
+                pool.drop(host.name)  # unknown state, reconnect next time
+        return HostResult(host.name, ok, output, (time.perf_counter() - t0) * 1000)
+
+    results = []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(hosts) or 1)),
+                            thread_name_prefix="fleet") as executor:
+        futures = [executor.submit(run, h) for h in hosts]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if on_result:
+                on_result(result)
+    order = {h.name: i for i, h in enumerate(hosts)}
+    results.sort(key=lambda r: order.get(r.name, 0))
+    return results
+
+
+# --- Operations: backend -> one summary string per host ---
+
+def op_status(backend: SSHBackend) -> str:
+    snap = backend.probe_all()
+    php = snap.php_fpm_service or "php-fpm"
+    return (f"nginx {active_state_from_status(snap.nginx_status)}, "
+            f"{php} {active_state_from_status(snap.php_fpm_status)}, "
+            f"{snap.mysql_service} {snap.mysql_status or '?'}")
+
+
+def op_nginx_test(backend: SSHBackend) -> str:
+    out = backend.check_nginx_config().strip()
+    if "test is successful" not in out and "syntax is ok" not in out:
+        raise BackendError(out)
+    return out
+
+
+def op_search(backend: SSHBackend, pattern: str, path: str = NGINX_ERROR, tail_lines: int = 5000,
+              max_hits: int = 1000) -> str:
+    hits = list(backend.search_stream(path, pattern, SCOPE_TAIL, tail_lines, max_hits=max_hits))
+    if not hits:
+        return "0"
+    line_no, _, line = hits[-1]
+    return f"{len(hits)}{'+' if len(hits) >= max_hits else ''} | {line_no}:{line}"
+
+
+def op_control_service(backend: SSHBackend, service: str, action: str) -> str:
+    # "php-fpm" / "mysql" are resolved per host, versions differ across the fleet
+    if service in ("php-fpm", "mysql"):
+        snap = backend.probe_all()
+        service = snap.php_fpm_service if service == "php-fpm" else snap.mysql_service
+        if not service:
+            raise BackendError("Servis adı belirlenemedi")
+    return (backend.control_service(service, action) or "").strip() or f"{service} {action} OK"
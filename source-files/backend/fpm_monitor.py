@@ -0,0 +1,187 @@
+"""
+Rolling PHP-FPM pool metrics on top of fpm_status.collect_pools().
+
+Each sample of a pool becomes an FpmPoint: process counts, the listen queue,
+and how often pm.max_children was hit since the previous sample (the status
+page only has the running total). A pool counts as saturated when requests
+wait in its listen queue, when it hit max_children during the interval, or
+when every allowed worker is busy. FpmMonitor keeps the last `capacity`
+points per pool, so the PHP tab can chart when pools run out of workers.
+"""
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+DEFAULT_INTERVAL = 5  # seconds between samples
+DEFAULT_CAPACITY = 360  # points kept per pool
+
+
+@dataclass
+class FpmPoolStatus:
+    """One pool as discovered in pool.d, with its status page (or why it could not be read)"""
+    pool: str
+    version: str = ""
+    listen: str = ""
+    config: str = ""
+    status_path: str = ""
+    pm: str = ""
+    max_children: int = 0
+    error: str = ""
+    active: int = 0
+    idle: int = 0
+    total: int = 0
+    listen_queue: int = 0
+    max_listen_queue: int = 0
+    listen_queue_len: int = 0
+    max_children_reached: int = 0
+    accepted_conn: int = 0
+    slow_requests: int = 0
+    start_time: int = 0
+
+    @property
+    def key(self) -> str:
+        # The same pool name ("www") usually exists once per PHP version
+        return f"{self.version}/{self.pool}" if self.version else self.pool
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "FpmPoolStatus":
+        status = d.get("status") or {}
+        return cls(
+            pool=d.get("pool", ""), version=d.get("version", ""), listen=d.get("listen", ""),
+            config=d.get("config", ""), status_path=d.get("status_path", ""), pm=d.get("pm", ""),
+            max_children=int(d.get("max_children") or 0), error=d.get("error", ""),
+            active=int(status.get("active_processes", 0)), idle=int(status.get("idle_processes", 0)),
+            total=int(status.get("total_processes", 0)), listen_queue=int(status.get("listen_queue", 0)),
+            max_listen_queue=int(status.get("max_listen_queue", 0)),
+            listen_queue_len=int(status.get("listen_queue_len", 0)),
+            max_children_reached=int(status.get("max_children_reached", 0)),
+            accepted_conn=int(status.get("accepted_conn", 0)), slow_requests=int(status.get("slow_requests", 0)),
+            start_time=int(status.get("start_time", 0)),
+        )
+
+
+@dataclass
+class FpmPoint:
+    ts: float
+    active: int = 0
+    idle: int = 0
+    total: int = 0
+    listen_queue: int = 0
+    max_children_hits: int = 0  # times max_children was reached during the interval
+    requests_per_s: float | None = None
+    saturated: bool = False
+
+
+def is_saturated(status: FpmPoolStatus, hits: int) -> bool:
+    if status.listen_queue > 0 or hits > 0:
+        return True
+    return bool(status.max_children) and status.idle == 0 and status.active >= status.max_children
+
+
+@dataclass
+class FpmPoolHistory:
+    latest: FpmPoolStatus
+    points: deque = field(default_factory=deque)
+    saturated_since: float | None = None
+    last_ts: float = 0.0
+
+
+class FpmMonitor:
+    """Feeds collect_pools() results in; keeps per-pool points, oldest first"""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.pools: dict[str, FpmPoolHistory] = {}
+
+    def feed(self, statuses: list[FpmPoolStatus], ts: float | None = None) -> list[FpmPoolHistory]:
+        ts = time.time() if ts is None else ts
+        seen = []
+        for status in statuses:
+            history = self.pools.get(status.key)
+            if history is None:
+                history = self.pools[status.key] = FpmPoolHistory(status, deque(maxlen=self.capacity))
+                prev = None
+            else:
+                prev = history.latest
+            seen.append(history)
+            if status.error:
+                history.latest = status
+                continue
+            point = FpmPoint(ts, status.active, status.idle, status.total, status.listen_queue)
+            # start_time changes when php-fpm restarts; its counters start over then
+            if prev is not None and not prev.error and prev.start_time == status.start_time:
+                point.max_children_hits = max(0, status.max_children_reached - prev.max_children_reached)
+                elapsed = ts - history.last_ts
+                if elapsed > 0:
+                    point.requests_per_s = max(0, status.accepted_conn - prev.accepted_conn) / elapsed
+            point.saturated = is_saturated(status, point.max_children_hits)
+            if point.saturated and history.saturated_since is None:
+                history.saturated_since = ts
+            elif not point.saturated:
+                history.saturated_since = None
+            history.points.append(point)
+            history.latest = status
+            history.last_ts = ts
+        return seen
+
+    def series(self, key: str, name: str) -> list[float | None]:
+        history = self.pools.get(key)
+        return [getattr(point, name) for point in history.points] if history else []
+
+
+if __name__ == "__main__":
+    # FastCGI stub standing in for php-fpm: python -m backend.fpm_monitor
+    import json
+    import os
+    import random
+    import socket
+    import struct
+    import tempfile
+    import threading
+    from . import fpm_status
+
+    tmp = tempfile.mkdtemp()
+    sock_path = os.path.join(tmp, "www.sock")
+    pool_dir = os.path.join(tmp, "php", "8.2", "fpm", "pool.d")
+    os.makedirs(pool_dir)
+    with open(os.path.join(pool_dir, "www.conf"), "w") as f:
+        f.write(f"[www]\nlisten = {tmp}/$pool.sock\npm = dynamic\npm.max_children = 5\npm.status_path = /status\n"
+                "[nostatus]\nlisten = 127.0.0.1:1\n")
+    state = {"accepted": 0, "reached": 0}
+
+    def serve(listener):
+        while True:
+            conn, _ = listener.accept()
+            with conn:
+                while True:  # read up to the empty STDIN record
+                    _, kind, _, length, padding = fpm_status.FCGI_HEADER.unpack(
+                        fpm_status._recv_exact(conn, fpm_status.FCGI_HEADER.size))
+                    fpm_status._recv_exact(conn, length + padding)
+                    if kind == fpm_status.FCGI_STDIN and length == 0:
+                        break
+                state["accepted"] += random.randint(20, 60)
+                active = random.randint(1, 5)
+                state["reached"] += active == 5 and random.random() < 0.5
+                body = json.dumps({"pool": "www", "start time": 1700000000, "accepted conn": state["accepted"],
+                                   "listen queue": random.choice([0, 0, 0, 2]), "idle processes": 5 - active,
+                                   "active processes": active, "total processes": 5,
+                                   "max children reached": state["reached"]}).encode()
+                conn.sendall(fpm_status._record(fpm_status.FCGI_STDOUT,
+                                                b"Content-Type: application/json\r\n\r\n" + body)
+                             + fpm_status._record(fpm_status.FCGI_END_REQUEST, struct.pack("!IB3x", 0, 0)))
+
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(sock_path)
+    listener.listen(4)
+    threading.Thread(target=serve, args=(listener,), daemon=True).start()
+
+    monitor = FpmMonitor(capacity=5)
+    for i in range(6):
+        raw = fpm_status.collect_pools(os.path.join(tmp, "php", "*", "fpm", "pool.d", "*.conf"))
+        for history in monitor.feed([FpmPoolStatus.from_dict(d) for d in raw], ts=i * 5.0):
+            s = history.latest
+            point = history.points[-1] if history.points and not s.error else None
+            print(f"{s.key:<14} {s.error or ''}" + (
+                f"active={point.active}/{s.max_children} queue={point.listen_queue} hits={point.max_children_hits} "
+                f"req/s={point.requests_per_s} saturated={point.saturated}" if point else ""))
+    print("series", monitor.series("8.2/www", "active"))
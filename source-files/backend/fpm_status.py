@@ -0,0 +1,212 @@
+"""
+PHP-FPM pool discovery and status pages read over FastCGI.
+
+Pools come from the pool.d configuration (one [section] per pool). Each
+pool's pm.status_path is requested on its listen address, a unix socket or
+host:port, by speaking FastCGI to php-fpm directly: no web server and no
+HTTP location for the status page are needed. `?json` makes php-fpm answer
+in JSON; keys are returned with spaces as underscores ("listen queue" ->
+"listen_queue").
+
+Like aggregate, this module is shipped to the server inside remote scripts,
+so it must stay stdlib only and compatible with older python3 releases.
+"""
+import glob
+import json
+import re
+import socket
+import struct
+import sys
+
+POOL_GLOB = "/etc/php/*/fpm/pool.d/*.conf"
+CONNECT_TIMEOUT = 3
+MAX_RESPONSE = 1024 * 1024
+
+FCGI_VERSION = 1
+FCGI_BEGIN_REQUEST = 1
+FCGI_END_REQUEST = 3
+FCGI_PARAMS = 4
+FCGI_STDIN = 5
+FCGI_STDOUT = 6
+FCGI_STDERR = 7
+FCGI_RESPONDER = 1
+FCGI_HEADER = struct.Struct("!BBHHBx")
+
+_VERSION_IN_PATH = re.compile(r"/php/([0-9.]+)/")
+_SECTION = re.compile(r"^\[([^\]]+)\]$")
+
+
+def parse_pool_config(text, version=""):
+    """Pools of one pool.d file: [{pool, version, listen, status_path, pm, max_children}]"""
+    pools = []
+    current = None
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line or line[0] in ";#":
+            continue
+        m = _SECTION.match(line)
+        if m:
+            name = m.group(1).strip()
+            current = None if name == "global" else {
+                "pool": name, "version": version, "listen": "", "status_path": "", "pm": "", "max_children": 0}
+            if current is not None:
+                pools.append(current)
+            continue
+        if current is None or "=" not in line:
+            continue
+        key, _, value = line.partition("=")
+        key = key.strip()
+        value = value.split(";", 1)[0].strip().strip("\"'").replace("$pool", current["pool"])
+        if key == "listen":
+            current["listen"] = value
+        elif key == "pm.status_path":
+            current["status_path"] = value
+        elif key == "pm":
+            current["pm"] = value
+        elif key == "pm.max_children":
+            try:
+                current["max_children"] = int(value)
+            except ValueError:
+                pass
+    return pools
+
+
+def discover_pools(pattern=POOL_GLOB):
+    pools = []
+    for path in sorted(glob.glob(pattern)):
+        m = _VERSION_IN_PATH.search(path)
+        try:
+            with open(path) as f:
+                text = f.read()
+        except (IOError, OSError):
+            continue
+        for pool in parse_pool_config(text, m.group(1) if m else ""):
+            pool["config"] = path
+            pools.append(pool)
+    return pools
+
+
+def _address(listen):
+    """'/run/php/x.sock' | '127.0.0.1:9000' | '[::1]:9000' | '9000' -> (family, address)"""
+    if listen.startswith("/"):
+        return socket.AF_UNIX, listen
+    host, sep, port = listen.rpartition(":")
+    if not sep:
+        return socket.AF_INET, ("127.0.0.1", int(listen))
+    host = host.strip("[]")
+    if host in ("", "0.0.0.0", "*"):
+        host = "127.0.0.1"
+    elif host == "::":
+        host = "::1"
+    return (socket.AF_INET6 if ":" in host else socket.AF_INET), (host, int(port))
+
+
+def _record(kind, content, request_id=1):
+    padding = -len(content) % 8
+    return FCGI_HEADER.pack(FCGI_VERSION, kind, request_id, len(content), padding) + content + b"\0" * padding
+
+
+def _pair_length(n):
+    return struct.pack("!B", n) if n < 128 else struct.pack("!I", n | 0x80000000)
+
+
+def _params(params):
+    body = b""
+    for name, value in params.items():
+        name, value = name.encode(), value.encode()
+        body += _pair_length(len(name)) + _pair_length(len(value)) + name + value
+    return body
+
+
+def _recv_exact(sock, n):
+    data = b""
+    while len(data) < n:
+        chunk = sock.recv(n - len(data))
+        if not chunk:
+            raise IOError("FastCGI connection closed early")
+        data += chunk
+    return data
+
+
+def fcgi_get(listen, path, query="", timeout=CONNECT_TIMEOUT):
+    """GET `path` from the FastCGI responder at `listen`: returns (status, headers, body)"""
+    family, address = _address(listen)
+    params = {
+        "GATEWAY_INTERFACE": "CGI/1.1", "REQUEST_METHOD": "GET", "SCRIPT_NAME": path, "SCRIPT_FILENAME": path,
+        "REQUEST_URI": path + ("?" + query if query else ""), "QUERY_STRING": query, "SERVER_PROTOCOL": "HTTP/1.1",
+        "SERVER_SOFTWARE": "rsc-fpm-status", "REMOTE_ADDR": "127.0.0.1", "CONTENT_LENGTH": "0",
+    }
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(address)
+        sock.sendall(_record(FCGI_BEGIN_REQUEST, struct.pack("!HB5x", FCGI_RESPONDER, 0))
+                     + _record(FCGI_PARAMS, _params(params)) + _record(FCGI_PARAMS, b"")
+                     + _record(FCGI_STDIN, b""))
+        out = b""
+        err = b""
+        while True:
+            _, kind, _, length, padding = FCGI_HEADER.unpack(_recv_exact(sock, FCGI_HEADER.size))
+            content = _recv_exact(sock, length + padding)[:length]
+            if kind == FCGI_STDOUT:
+                out += content
+            elif kind == FCGI_STDERR:
+                err += content
+            elif kind == FCGI_END_REQUEST:
+                break
+            if len(out) + len(err) > MAX_RESPONSE:
+                raise IOError("FastCGI response too large")
+    finally:
+        sock.close()
+    head, _, body = out.partition(b"\r\n\r\n")
+    headers = {}
+    for line in head.decode("latin-1").split("\r\n"):
+        name, sep, value = line.partition(":")
+        if sep:
+            headers[name.strip().lower()] = value.strip()
+    status = int(headers.get("status", "200").split()[0])
+    if err and status == 200 and not body:
+        status = 500
+    return status, headers, body
+
+
+def parse_status(body):
+    """php-fpm status page (?json) -> dict with underscore keys"""
+    data = json.loads(body.decode("utf-8", "replace"))
+    return dict((key.replace(" ", "_"), value) for key, value in data.items())
+
+
+def query_pool(pool):
+    result = dict(pool)
+    if not pool.get("status_path"):
+        result["error"] = "pm.status_path not set"
+        return result
+    if not pool.get("listen"):
+        result["error"] = "listen not set"
+        return result
+    try:
+        status, _, body = fcgi_get(pool["listen"], pool["status_path"], "json")
+        if status != 200:
+            result["error"] = "HTTP %d: %s" % (status, body[:200].decode("utf-8", "replace").strip())
+        else:
+            result["status"] = parse_status(body)
+    except (IOError, OSError, ValueError, struct.error) as e:
+        result["error"] = "%s: %s" % (type(e).__name__, e)
+    return result
+
+
+def collect_pools(pattern=POOL_GLOB):
+    """Every pool found under `pattern` with its status or the error that prevented reading it"""
+    return [query_pool(pool) for pool in discover_pools(pattern)]
+
+
+def run_tool(argv):
+    """python3 -c <source> '<json arguments of collect_pools>'"""
+    try:
+        args = json.loads(argv[1]) if len(argv) > 1 else {}
+        result = collect_pools(**args)
+    except Exception as e:
+        sys.stderr.write("%s: %s\n" % (type(e).__name__, e))
+        sys.exit(2)
+    sys.stdout.write(json.dumps({"result": result}) + "\n")
+    sys.stdout.flush()
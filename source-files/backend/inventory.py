@@ -0,0 +1,121 @@
+"""
+Recursive log inventory with delta refresh.
+
+The server keeps the last listing it sent, tagged with a token. When the
+client presents the token of that snapshot, only the files whose
+size, mtime or inode changed, plus the removed paths, come back; otherwise
+the full listing does. LogInventory is the client side cache those deltas
+are applied to.
+"""
+import os
+import shlex
+import threading
+from dataclasses import dataclass, field
+
+INVENTORY_ROOT = "/var/log"
+INVENTORY_MARK = "@@INVENTORY"
+
+
+@dataclass(frozen=True)
+class LogFileInfo:
+    path: str  # relative to the inventory root, e.g. "nginx/access.log.2.gz"
+    size: int
+    mtime: float
+    inode: int
+
+
+@dataclass
+class InventoryDelta:
+    token: str | None
+    full: bool  # upserts is the whole tree, anything missing from it is gone
+    upserts: list[LogFileInfo] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    changed: int = 0  # upserts that replaced a known path (set by LogInventory)
+
+
+def build_inventory_script(root: str, old_token: str | None, new_token: str) -> str:
+    root_q = shlex.quote(root)
+    old_q = shlex.quote(old_token or "")
+    # Rows: "+\t<path>\t<size>\t<mtime>\t<inode>" or "-\t<path>"
+    return (
+        f"dir=\"$HOME/.rsc\"; mkdir -p \"$dir\" || exit 1; snap=\"$dir/inventory\"; new=\"$snap.$$\"; "
+        f"find {root_q} -type f -printf '%P\\t%s\\t%T@\\t%i\\n' > \"$new\" 2>/dev/null; "
+        f"if [ -n {old_q} ] && [ -f \"$snap\" ] && [ \"$(cat \"$snap.token\" 2>/dev/null)\" = {old_q} ]; then "
+        f"echo '{INVENTORY_MARK} {new_token} delta'; "
+        "awk -F'\\t' 'FILENAME == ARGV[1] { old[$1] = $0; next } "
+        "{ if (old[$1] != $0) print \"+\\t\" $0; delete old[$1] } "
+        "END { for (k in old) print \"-\\t\" k }' \"$snap\" \"$new\"; "
+        f"else echo '{INVENTORY_MARK} {new_token} full'; sed 's/^/+\\t/' \"$new\"; fi; "
+        f"mv \"$new\" \"$snap\" && echo {shlex.quote(new_token)} > \"$snap.token\""
+    )
+
+
+def parse_inventory_output(out: str) -> InventoryDelta:
+    lines = out.splitlines()
+    head = lines[0].split() if lines else []
+    if len(head) != 3 or head[0] != INVENTORY_MARK:
+        raise ValueError(f"inventory header: {out[:200]!r}")
+    delta = InventoryDelta(token=head[1], full=head[2] == "full")
+    for line in lines[1:]:
+        parts = line.split("\t")
+        try:
+            if parts[0] == "+" and len(parts) == 5:
+                delta.upserts.append(LogFileInfo(parts[1], int(parts[2]), float(parts[3]), int(parts[4])))
+            elif parts[0] == "-" and len(parts) == 2:
+                delta.removed.append(parts[1])
+        except ValueError:
+            continue
+    return delta
+
+
+def scan_tree(root: str) -> list[LogFileInfo]:
+    """Local equivalent of the find listing"""
+    found = []
+    for dirpath, _dirs, files in os.walk(root):
+        for name in files:
+            full = os.path.join(dirpath, name)
+            try:
+                st = os.lstat(full)
+            except OSError:
+                continue
+            if not os.path.isfile(full) or os.path.islink(full):
+                continue
+            rel = os.path.relpath(full, root).replace(os.sep, "/")
+            found.append(LogFileInfo(rel, st.st_size, st.st_mtime, st.st_ino))
+    return found
+
+
+class LogInventory:
+    """Client side cache of one host's log tree, keyed by relative path"""
+
+    def __init__(self, root: str = INVENTORY_ROOT):
+        self.root = root
+        self.entries: dict[str, LogFileInfo] = {}
+        self.token: str | None = None
+        self._lock = threading.Lock()
+
+    def refresh(self, backend) -> InventoryDelta:
+        """
+        Fetches changes from the backend and applies them. The returned delta
+        is always relative to the previous cache content, also when the
+        backend sent a full listing (first call, other client, local mode).
+        """
+        with self._lock:
+            delta = backend.log_inventory(self.token)
+            return self.apply(delta)
+
+    def apply(self, delta: InventoryDelta) -> InventoryDelta:
+        fresh = {e.path: e for e in delta.upserts}
+        if delta.full:
+            removed = [p for p in self.entries if p not in fresh]
+        else:
+            removed = [p for p in delta.removed if p in self.entries and p not in fresh]
+        upserts = [e for p, e in fresh.items() if self.entries.get(p) != e]
+        changed = sum(1 for e in upserts if e.path in self.entries)
+
+        for p in removed:
+            del self.entries[p]
+        for e in upserts:
+            self.entries[e.path] = e
+        self.token = delta.token
+        return InventoryDelta(delta.token, False, upserts, removed, changed)
@@ -0,0 +1,159 @@
+import itertools
+import threading
+import time
+from typing import Callable
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+
+class Job:
+    """
+    Handle for one background call.
+    Workers can poll `cancelled` and push partial results with `report()`.
+    """
+
+    def __init__(self, key: str, on_result=None, on_error=None, on_progress=None):
+        self.key = key
+        self.on_result = on_result
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.started_at = 0.0
+        self._cancel_event = threading.Event()
+        self._signals: "_JobSignals | None" = None
+        self._runnable: "_JobRunnable | None" = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    @property
+    def cancel_event(self) -> threading.Event:
+        return self._cancel_event
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def report(self, value):
+        """Called from the worker thread; delivered on the UI thread via on_progress"""
+        if self._signals and not self.cancelled:
+            self._signals.progress.emit(self, value)
+
+
+class _JobSignals(QObject):
+    done = Signal(object, object, object, float)  # job, result, error, elapsed_ms
+    progress = Signal(object, object)  # job, value
+
+
+class _JobRunnable(QRunnable):
+    def __init__(self, job: Job, fn: Callable, args: tuple, kwargs: dict):
+        super().__init__()
+        self.job = job
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        # The executor keeps its own references, Qt must not delete us under Python
+        self.setAutoDelete(False)
+
+    def run(self):
+        job = self.job
+        t0 = time.perf_counter()
+        result, error = None, None
+        if not job.cancelled:
+            try:
+                result = self.fn(*self.args, **self.kwargs)
+            except Exception as e:
+                error = e
+        elapsed_ms = (time.perf_counter() - t0) * 1000
+        job._signals.done.emit(job, result, error, elapsed_ms)
+
+
+class JobExecutor(QObject):
+    """
+    Runs blocking Backend calls on a QThreadPool and delivers results
+    back on the GUI thread.
+
+    Jobs are keyed: submitting a new job with the same key supersedes the
+    previous one (its result is dropped, and it is removed from the queue
+    if it has not started yet).
+    """
+
+    job_finished = Signal(str, float)  # key, latency in ms
+    busy_changed = Signal(int)  # number of jobs still pending
+
+    def __init__(self, parent=None, max_threads: int = 4):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)
+        self._active: dict[str, Job] = {}
+        self._runnables: set[_JobRunnable] = set()
+        self._anon = itertools.count(1)
+        self._signals = _JobSignals()
+        # Receiver lives on the GUI thread, so these become queued connections
+        self._signals.done.connect(self._on_done)
+        self._signals.progress.connect(self._on_progress)
+
+    def submit(self, key: str | None, fn: Callable, *args,
+               on_result=None, on_error=None, on_progress=None,
+               pass_job: bool = False, **kwargs) -> Job:
+        """
+        Schedules fn(*args, **kwargs). With pass_job=True the Job handle is
+        passed as the first argument so the worker can check cancellation
+        or report progress.
+        """
+        if key is None:
+            key = f"job-{next(self._anon)}"
+        self.cancel(key)
+
+        job = Job(key, on_result, on_error, on_progress)
+        job._signals = self._signals
+        job.started_at = time.perf_counter()
+        if pass_job:
+            args = (job,) + args
+        runnable = _JobRunnable(job, fn, args, kwargs)
+        job._runnable = runnable
+        self._runnables.add(runnable)
+        self._active[key] = job
+        self.busy_changed.emit(len(self._active))
+        self.pool.start(runnable)
+        return job
+
+    def cancel(self, key: str):
+        job = self._active.pop(key, None)
+        if job is None:
+            return
+        job.cancel()
+        if job._runnable and self.pool.tryTake(job._runnable):
+            self._runnables.discard(job._runnable)
+        self.busy_changed.emit(len(self._active))
+
+    def cancel_all(self):
+        for key in list(self._active):
+            self.cancel(key)
+
+    def is_running(self, key: str) -> bool:
+        return key in self._active
+
+    def current(self, key: str) -> Job | None:
+        return self._active.get(key)
+
+    def _on_progress(self, job: Job, value):
+        if job.cancelled or self._active.get(job.key) is not job:
+            return
+        if job.on_progress:
+            job.on_progress(value)
+
+    def _on_done(self, job: Job, result, error, elapsed_ms: float):
+        self._runnables.discard(job._runnable)
+        # Stale (superseded or cancelled) results are dropped silently
+        if job.cancelled or self._active.get(job.key) is not job:
+            return
+        del self._active[job.key]
+        self.busy_changed.emit(len(self._active))
+        self.job_finished.emit(job.key, elapsed_ms)
+
+        if error is not None:
+            if job.on_error:
+                job.on_error(error)
+            else:
+                print(f"[JOB] {job.key} failed: {error}")
+        elif job.on_result:
+            job.on_result(result)
@@ -0,0 +1,473 @@
+"""
+Request latency from nginx access logs ($request_time and
+$upstream_response_time).
+
+Durations go into LatencySketch, a log-linear histogram in the style of
+HdrHistogram: values are bucketed with a bounded relative error (<1%),
+so memory is capped whatever the number of requests, and two sketches
+merge by adding bucket counts. That is what lets the live tail, each log
+file and each rotated archive be summarised separately and combined.
+
+LatencyTracker keeps one pair of sketches (request, upstream) overall, per
+URI prefix and per minute, plus the slowest requests seen.
+"""
+import heapq
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+
+from .access_log import COMBINED_FORMAT, TIME_FIELDS, backend_log_format, compile_log_format, field_time
+from .rotation import ChainMember, select_members
+
+# Widely used "combined + timings" layout; assumed when the configured format has no timings
+TIMED_FORMAT = COMBINED_FORMAT + " $request_time $upstream_response_time"
+TIMING_FIELDS = {"request", "request_uri", "status", "request_time", "upstream_response_time"} | set(TIME_FIELDS)
+
+SUB_BUCKET_BITS = 7  # 64 sub-buckets per power of two: bucket middles are within 1/128
+_SUB_COUNT = 1 << SUB_BUCKET_BITS
+_SUB_HALF = _SUB_COUNT >> 1
+
+PREFIX_SEGMENTS = 2  # "/api/v1/users/42" -> "/api/v1"
+MAX_PREFIXES = 200  # further prefixes are counted under OTHER_PREFIX
+OTHER_PREFIX = "(other)"
+MAX_MINUTES = 180  # per-minute sketches kept, oldest dropped first
+MAX_OUTLIERS = 50
+CACHE_LIMIT = 100000  # distinct raw values remembered per parse cache
+
+
+def _bucket(us: int) -> int:
+    if us < _SUB_COUNT:
+        return us
+    shift = us.bit_length() - SUB_BUCKET_BITS
+    return _SUB_COUNT + (shift - 1) * _SUB_HALF + ((us >> shift) - _SUB_HALF)
+
+
+def _bucket_value(index: int) -> float:
+    """Middle of the bucket, in microseconds"""
+    if index < _SUB_COUNT:
+        return float(index)
+    shift = (index - _SUB_COUNT) // _SUB_HALF + 1
+    low = ((index - _SUB_COUNT) % _SUB_HALF + _SUB_HALF) << shift
+    return low + ((1 << shift) - 1) / 2
+
+
+class LatencySketch:
+    """Mergeable fixed-error histogram of durations in seconds"""
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts: dict[int, int] = {}  # bucket -> count; at most a few hundred buckets in practice
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float, n: int = 1):
+        b = _bucket(int(seconds * 1e6 + 0.5))
+        self.counts[b] = self.counts.get(b, 0) + n
+        self.count += n
+        self.total += seconds * n
+        if seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other: "LatencySketch"):
+        for b, n in other.counts.items():
+            self.counts[b] = self.counts.get(b, 0) + n
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> float:
+        """Duration in seconds below which a fraction q of the values lie"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for b in sorted(self.counts):
+            seen += self.counts[b]
+            if seen >= rank:
+                return min(_bucket_value(b) / 1e6, self.max)
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def to_dict(self) -> dict:
+        return {"counts": {str(b): n for b, n in self.counts.items()}, "count": self.count,
+                "total": self.total, "max": self.max}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LatencySketch":
+        sketch = cls()
+        sketch.counts = {int(b): int(n) for b, n in data.get("counts", {}).items()}
+        sketch.count = int(data.get("count", 0))
+        sketch.total = float(data.get("total", 0.0))
+        sketch.max = float(data.get("max", 0.0))
+        return sketch
+
+
+class LatencyPair:
+    """Request and upstream sketches of one group of requests"""
+
+    __slots__ = ("request", "upstream")
+
+    def __init__(self):
+        self.request = LatencySketch()
+        self.upstream = LatencySketch()
+
+    def merge(self, other: "LatencyPair"):
+        self.request.merge(other.request)
+        self.upstream.merge(other.upstream)
+
+    def to_dict(self) -> dict:
+        return {"request": self.request.to_dict(), "upstream": self.upstream.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LatencyPair":
+        pair = cls()
+        pair.request = LatencySketch.from_dict(data.get("request", {}))
+        pair.upstream = LatencySketch.from_dict(data.get("upstream", {}))
+        return pair
+
+
+@dataclass(frozen=True, order=True)
+class SlowRequest:
+    # Ordered by request_time alone: upstream_time is None for requests nginx served itself
+    request_time: float
+    upstream_time: float | None = field(compare=False)
+    minute: int = field(compare=False)  # epoch minutes, 0 when unknown
+    status: str = field(compare=False)
+    uri: str = field(compare=False)
+
+
+def upstream_seconds(value: str) -> float | None:
+    """
+    $upstream_response_time: "0.012", "-", or several attempts
+    ("0.500, 0.012" across servers, "0.010 : 0.020" across redirects), summed.
+    """
+    total, seen = 0.0, False
+    for part in value.replace(":", ",").split(","):
+        part = part.strip()
+        if part and part != "-":
+            try:
+                total += float(part)
+                seen = True
+            except ValueError:
+                pass
+    return total if seen else None
+
+
+def uri_prefix(uri: str, segments: int = PREFIX_SEGMENTS) -> str:
+    path = uri.partition("?")[0]
+    parts = [p for p in path.split("/") if p][:segments]
+    return "/" + "/".join(parts)
+
+
+def has_timings(log_format: str) -> bool:
+    _, names = compile_log_format(log_format, {"request_time", "upstream_response_time"})
+    return bool(names)
+
+
+class LatencyTracker:
+    """
+    Latency sketches of an access log, fed with raw text as it arrives.
+    With `since`, requests logged before that minute are left out.
+    """
+
+    def __init__(self, log_format: str = TIMED_FORMAT, since: float | None = None):
+        if not has_timings(log_format):
+            log_format = TIMED_FORMAT
+        self.log_format = log_format
+        self._since_minute = int(since // 60) if since is not None else 0
+        self.pattern, names = compile_log_format(log_format, TIMING_FIELDS)
+        self._group: dict[str, int] = {}
+        for i, name in enumerate(names):
+            self._group.setdefault(name, i)
+        self._time_field = next((n for n in TIME_FIELDS if n in self._group), None)
+        self._uri_field = "request_uri" if "request_uri" in self._group else "request"
+        # Raw field value -> parsed value; logs repeat the same strings over and over
+        self._minutes: dict[str, int] = {}
+        self._durations: dict[str, float | None] = {}
+        self._uri_prefixes: dict[str, str] = {}
+        self._carry = ""
+
+        self.total = LatencyPair()
+        self.prefixes: dict[str, LatencyPair] = {}
+        self.minutes: dict[int, LatencyPair] = {}
+        self.slowest: list[SlowRequest] = []  # min-heap of the MAX_OUTLIERS slowest
+        self.lines = 0
+
+    def feed_text(self, data: str):
+        """Takes any chunk of log output; a trailing partial line waits for the next chunk"""
+        data = self._carry + data
+        nl = data.rfind("\n")
+        if nl == -1:
+            self._carry = data
+            return
+        self._carry = data[nl + 1:]
+        self.feed_lines(data[:nl + 1])
+
+    def flush(self):
+        """End of input: parses a last line that had no newline"""
+        if self._carry:
+            carry, self._carry = self._carry, ""
+            self.feed_lines(carry + "\n")
+
+    def feed_lines(self, text: str):
+        """
+        Adds a block of whole lines. Durations are logged with millisecond
+        resolution, so a block holds few distinct (group, value) pairs: those
+        are counted in C and each sketch is updated once per pair.
+        """
+        self.lines += text.count("\n")
+        rows = self.pattern.findall(text)
+        if not rows:
+            return
+        if not isinstance(rows[0], tuple):
+            rows = [(r,) for r in rows]
+        g = self._group
+        if self._time_field:
+            at = g[self._time_field]
+            minutes = [self._minute(r[at]) for r in rows]
+            if self._since_minute:
+                keep = [i for i, m in enumerate(minutes) if not m or m >= self._since_minute]
+                rows = [rows[i] for i in keep]
+                minutes = [minutes[i] for i in keep]
+                if not rows:
+                    return
+        else:
+            minutes = [0] * len(rows)
+        columns = list(zip(*rows))
+        uris = columns[g[self._uri_field]] if self._uri_field in g else ("",) * len(rows)
+        prefixes = list(map(self._prefix_of, uris))
+
+        for name, side in (("request_time", "request"), ("upstream_response_time", "upstream")):
+            if name not in g:
+                continue
+            values = columns[g[name]]
+            seconds = self._request_seconds if side == "request" else self._upstream_seconds
+            self._add_counts(Counter(values), seconds, lambda _key: getattr(self.total, side))
+            self._add_counts(Counter(zip(prefixes, values)), seconds,
+                             lambda key: getattr(self._prefix_pair(key), side))
+            if self._time_field:
+                self._add_counts(Counter(zip(minutes, values)), seconds,
+                                 lambda key: getattr(self._minute_pair(key), side) if key else None)
+            if side == "request":
+                self._note_slowest(values, rows, minutes, uris)
+
+    def _add_counts(self, counts: Counter, seconds, sketch_of):
+        for key, n in counts.items():
+            group, value = key if isinstance(key, tuple) else (None, key)
+            duration = seconds(value)
+            if duration is None:
+                continue
+            sketch = sketch_of(group)
+            if sketch is not None:
+                sketch.add(duration, n)
+
+    def _note_slowest(self, values, rows, minutes, uris):
+        threshold = self.slowest[0].request_time if len(self.slowest) >= MAX_OUTLIERS else -1.0
+        slow = {v for v in set(values) if (self._request_seconds(v) or -1.0) > threshold}
+        if not slow:
+            return
+        g = self._group
+        at = g.get("upstream_response_time")
+        status = g.get("status")
+        for i, value in enumerate(values):
+            if value not in slow:
+                continue
+            row = rows[i]
+            entry = SlowRequest(self._request_seconds(value),
+                                self._upstream_seconds(row[at]) if at is not None else None,
+                                minutes[i], row[status] if status is not None else "", uris[i])
+            if len(self.slowest) < MAX_OUTLIERS:
+                heapq.heappush(self.slowest, entry)
+            elif entry > self.slowest[0]:
+                heapq.heapreplace(self.slowest, entry)
+
+    def _request_seconds(self, value: str) -> float | None:
+        seconds = self._durations.get(value, False)
+        if seconds is False:
+            try:
+                seconds = float(value)
+            except ValueError:
+                seconds = None
+            self._remember(self._durations, value, seconds)
+        return seconds
+
+    def _upstream_seconds(self, value: str) -> float | None:
+        seconds = self._durations.get(value, False)
+        if seconds is False:
+            seconds = upstream_seconds(value)
+            self._remember(self._durations, value, seconds)
+        return seconds
+
+    def _prefix_of(self, uri: str) -> str:
+        prefix = self._uri_prefixes.get(uri)
+        if prefix is None:
+            prefix = uri_prefix(uri)
+            self._remember(self._uri_prefixes, uri, prefix)
+        return prefix
+
+    @staticmethod
+    def _remember(cache: dict, key, value):
+        if len(cache) >= CACHE_LIMIT:
+            cache.clear()
+        cache[key] = value
+
+    def _minute(self, value: str) -> int:
+        minute = self._minutes.get(value)
+        if minute is None:
+            ts = field_time(self._time_field, value)
+            minute = int(ts // 60) if ts else 0
+            self._remember(self._minutes, value, minute)
+        return minute
+
+    def _prefix_pair(self, prefix: str) -> LatencyPair:
+        pair = self.prefixes.get(prefix)
+        if pair is None:
+            if len(self.prefixes) >= MAX_PREFIXES:
+                prefix = OTHER_PREFIX
+            pair = self.prefixes.setdefault(prefix, LatencyPair())
+        return pair
+
+    def _minute_pair(self, minute: int) -> LatencyPair:
+        pair = self.minutes.get(minute)
+        if pair is None:
+            pair = self.minutes[minute] = LatencyPair()
+            while len(self.minutes) > MAX_MINUTES:
+                del self.minutes[min(self.minutes)]
+        return pair
+
+    def merge(self, other: "LatencyTracker"):
+        """Adds another tracker's requests (another file, an archive, another host)"""
+        self.total.merge(other.total)
+        for prefix, pair in other.prefixes.items():
+            self._prefix_pair(prefix).merge(pair)
+        for minute, pair in other.minutes.items():
+            self._minute_pair(minute).merge(pair)
+        for slow in other.slowest:
+            if len(self.slowest) < MAX_OUTLIERS:
+                heapq.heappush(self.slowest, slow)
+            elif slow > self.slowest[0]:
+                heapq.heapreplace(self.slowest, slow)
+        self.lines += other.lines
+
+    def outliers(self) -> list[SlowRequest]:
+        return sorted(self.slowest, reverse=True)
+
+    def to_dict(self) -> dict:
+        return {
+            "total": self.total.to_dict(),
+            "prefixes": {p: pair.to_dict() for p, pair in self.prefixes.items()},
+            "minutes": {str(m): pair.to_dict() for m, pair in self.minutes.items()},
+            "slowest": [[s.request_time, s.upstream_time, s.minute, s.status, s.uri] for s in self.slowest],
+            "lines": self.lines,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, log_format: str = TIMED_FORMAT) -> "LatencyTracker":
+        tracker = cls(log_format)
+        tracker.total = LatencyPair.from_dict(data.get("total", {}))
+        tracker.prefixes = {p: LatencyPair.from_dict(d) for p, d in data.get("prefixes", {}).items()}
+        tracker.minutes = {int(m): LatencyPair.from_dict(d) for m, d in data.get("minutes", {}).items()}
+        tracker.slowest = [SlowRequest(*s) for s in data.get("slowest", [])]
+        heapq.heapify(tracker.slowest)
+        tracker.lines = int(data.get("lines", 0))
+        return tracker
+
+
+class LatencyHistory:
+    """
+    Trackers of the members of a rotation chain. Rotated archives do not
+    change, so each is parsed once and kept (keyed by inode, size, mtime);
+    a refresh only reads the live file again and merges everything.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.log_format: str | None = None
+        self._members: dict[str, tuple[tuple, LatencyTracker]] = {}
+        self._lock = threading.Lock()
+
+    def load(self, backend, since: float | None = None,
+             cancel_event: threading.Event | None = None) -> LatencyTracker | None:
+        """Merged tracker of the chain from `since` on (everything when None); None once cancelled"""
+        with self._lock:
+            if self.log_format is None:
+                self.log_format = backend_log_format(backend, self.path, TIMED_FORMAT)
+            merged = LatencyTracker(self.log_format)
+            for member, needs_check in select_members(backend.rotation_chain(self.path, spans=since is not None), since):
+                tracker = self._member(backend, member, since if needs_check else None, cancel_event)
+                if tracker is None:
+                    return None
+                merged.merge(tracker)
+            return merged
+
+    def _member(self, backend, member: ChainMember, since: float | None,
+                cancel_event: threading.Event | None) -> LatencyTracker | None:
+        cached = self._members.get(member.path)
+        if cached and cached[0] == (member.key, since):
+            return cached[1]
+        tracker = LatencyTracker(self.log_format, since)
+        for block in backend.read_blocks(member.path, cancel_event):
+            tracker.feed_text(block)
+        if cancel_event and cancel_event.is_set():
+            return None
+        tracker.flush()
+        self._members[member.path] = ((member.key, since), tracker)
+        return tracker
+
+
+if __name__ == "__main__":
+    # Benchmark: python -m backend.latency [lines]
+    import random
+    import re
+    import sys
+    import time
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    rnd = random.Random(1)
+    uris = [f"/api/v{v}/item/{i}" for v in (1, 2) for i in range(500)] + ["/", "/login", "/static/app.js"]
+    start = 1698400000
+    lines = []
+    for i in range(count):
+        ts = time.strftime("%d/%b/%Y:%H:%M:%S +0000", time.gmtime(start + i // 60))
+        upstream = rnd.lognormvariate(-3, 1)
+        lines.append(f'10.0.0.{i % 250} - - [{ts}] "GET {rnd.choice(uris)} HTTP/1.1" 200 512 "-" "bench" '
+                     f'{upstream + 0.001:.3f} {upstream:.3f}\n')
+    text = "".join(lines)
+    del lines
+
+    tracker = LatencyTracker()
+    t0 = time.perf_counter()
+    for pos in range(0, len(text), 1024 * 1024):
+        tracker.feed_text(text[pos:pos + 1024 * 1024])
+    elapsed = time.perf_counter() - t0
+    buckets = sum(len(p.request.counts) + len(p.upstream.counts)
+                  for p in [tracker.total, *tracker.prefixes.values(), *tracker.minutes.values()])
+    print(f"{tracker.total.request.count} requests in {elapsed:.2f}s "
+          f"({elapsed / max(1, count) * 1e6:.2f} us/line), {buckets} buckets in "
+          f"{1 + len(tracker.prefixes) + len(tracker.minutes)} sketch pairs")
+
+    exact = sorted(float(v) for v in re.findall(r" (\S+) \S+$", text, re.M))
+    for q in (0.5, 0.95, 0.99):
+        true = exact[min(len(exact) - 1, int(q * len(exact)))]
+        est = tracker.total.request.quantile(q)
+        print(f"p{int(q * 100)}: {est * 1000:.2f} ms (exact {true * 1000:.2f} ms, error {abs(est - true) / true:.2%})")
+
+    halves = LatencyTracker(), LatencyTracker()
+    cut = text.find("\n", len(text) // 2) + 1
+    halves[0].feed_text(text[:cut])
+    halves[1].feed_text(text[cut:])
+    halves[0].merge(halves[1])
+    print(f"merged halves p99: {halves[0].total.request.quantile(0.99) * 1000:.2f} ms")
+
+    # Equal request times, upstream "-" (static files) next to numbers: the outlier heap must cope
+    mixed = LatencyTracker()
+    mixed.feed_text("".join(
+        f'10.0.0.1 - - [{time.strftime("%d/%b/%Y:%H:%M:%S +0000", time.gmtime(start))}] "GET /f{i} HTTP/1.1" '
+        f'200 512 "-" "bench" 0.500 {"0.499" if i % 2 else "-"}\n' for i in range(60)))
+    print(f"mixed upstream: {len(mixed.outliers())} outliers, "
+          f"{sum(s.upstream_time is None for s in mixed.outliers())} without upstream")
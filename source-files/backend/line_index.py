@@ -0,0 +1,251 @@
+"""
+Sparse line-offset index for large log files.
+
+One checkpoint (byte offset, line number) is kept per `step` bytes, each at
+the start of a line, so a 500 MB log needs only ~500 entries. Seeking to a
+line reads at most one step forward from the nearest checkpoint. Given a
+parse_time function, each checkpoint also records the time of the first
+dated line after it, which makes seeking to a timestamp a bisection too.
+
+Indexes are saved as sidecar files under INDEX_DIR (on the machine the log
+lives on) and extended from where they stopped when the file has grown.
+A different inode or a changed file head (copytruncate) starts over.
+
+This module is also shipped to the server as part of the remote agent, so it
+must stay stdlib only and compatible with older python3 releases.
+"""
+import bisect
+import hashlib
+import os
+import zlib
+from array import array
+
+INDEX_STEP = 1024 * 1024
+INDEX_DIR = "~/.rsc/index"
+INDEX_MAGIC = b"RSCIDX1"
+HEAD_BYTES = 4096  # file head checksummed to notice a file rewritten under the same inode
+TIME_PROBE_LINES = 50  # lines read after a checkpoint looking for a timestamp
+NO_TIME = -1.0
+
+
+class LineIndex(object):
+    def __init__(self, step=INDEX_STEP, parse_time=None):
+        self.step = step
+        self.parse_time = parse_time
+        self.reset(None)
+
+    def reset(self, inode):
+        self.inode = inode
+        self.offsets = array("Q", [0])  # byte offset of a line start
+        self.lines = array("Q", [0])  # line number (0 based) at that offset
+        self.times = array("d")  # first timestamp after each checkpoint, NO_TIME if none found
+        self.indexed_end = 0  # everything before this offset is indexed
+        self.indexed_lines = 0  # complete lines before indexed_end
+        self.size = 0
+        self.head_len = 0
+        self.head_crc = 0
+
+    @property
+    def total_lines(self):
+        # A trailing line without newline still counts as a line
+        return self.indexed_lines + (1 if self.size > self.indexed_end else 0)
+
+    def update(self, f, inode, size):
+        """Extends the index up to `size`; starts over after rotation or truncation"""
+        if inode != self.inode or size < self.indexed_end or self._head_crc(f, self.head_len) != self.head_crc:
+            self.reset(inode)
+        self.size = size
+        pos, line = self.indexed_end, self.indexed_lines
+        f.seek(pos)
+        while pos < size:
+            chunk = f.read(min(self.step, size - pos))
+            if not chunk:
+                break
+            nl = chunk.rfind(b"\n")
+            # Very long line: keep reading until it ends
+            while nl == -1 and pos + len(chunk) < size:
+                more = f.read(min(self.step, size - pos - len(chunk)))
+                if not more:
+                    break
+                chunk += more
+                nl = chunk.rfind(b"\n")
+            if nl == -1:
+                break  # partial last line, indexed on a later update
+            line += chunk.count(b"\n", 0, nl + 1)
+            pos += nl + 1
+            f.seek(pos)
+            if pos < size and pos - self.offsets[-1] >= self.step:
+                self.offsets.append(pos)
+                self.lines.append(line)
+        self.indexed_end, self.indexed_lines = pos, line
+        if self.head_len < HEAD_BYTES and pos > self.head_len:
+            self.head_len = min(HEAD_BYTES, pos)
+            self.head_crc = self._head_crc(f, self.head_len)
+        if self.parse_time is not None:
+            self._stamp_checkpoints(f)
+
+    @staticmethod
+    def _head_crc(f, length):
+        if not length:
+            return 0
+        f.seek(0)
+        return zlib.crc32(f.read(length)) & 0xffffffff
+
+    def _stamp_checkpoints(self, f):
+        # The last checkpoint may have had no dated line yet: look again
+        if self.times and self.times[-1] == NO_TIME:
+            self.times.pop()
+        while len(self.times) < len(self.offsets):
+            i = len(self.times)
+            f.seek(self.offsets[i])
+            ts = NO_TIME
+            for _ in range(TIME_PROBE_LINES):
+                raw = f.readline()
+                if not raw or f.tell() > self.indexed_end:
+                    break
+                found = self.parse_time(raw.decode("utf-8", "replace"))
+                if found is not None:
+                    ts = found
+                    break
+            self.times.append(ts)
+
+    def seek_line(self, f, line_no):
+        """Positions f at the start of line `line_no` (0 based) and returns that offset"""
+        i = bisect.bisect_right(self.lines, line_no) - 1
+        f.seek(self.offsets[i])
+        for _ in range(line_no - self.lines[i]):
+            if not f.readline():
+                break
+        return f.tell()
+
+    def line_at(self, f, offset):
+        """Number of complete lines before byte `offset` (0 based line number of a line starting there)"""
+        i = bisect.bisect_right(self.offsets, offset) - 1
+        f.seek(self.offsets[i])
+        line, pos = self.lines[i], self.offsets[i]
+        while pos < offset:
+            chunk = f.read(min(self.step, offset - pos))
+            if not chunk:
+                break
+            line += chunk.count(b"\n")
+            pos += len(chunk)
+        return line
+
+    def tail_start(self, f, lines):
+        """(line number, byte offset) where the last `lines` lines of the indexed file start"""
+        end = self.size
+        f.seek(max(0, end - 1))
+        if end and f.read(1) == b"\n":
+            end -= 1  # the final newline does not start a line
+        need = lines
+        while need > 0 and end > 0:
+            start = max(0, end - self.step)
+            f.seek(start)
+            block = f.read(end - start)
+            found = block.count(b"\n")
+            if found >= need:
+                idx = len(block)
+                for _ in range(need):
+                    idx = block.rfind(b"\n", 0, idx)
+                offset = start + idx + 1
+                return self.line_at(f, offset), offset
+            need -= found
+            end = start
+        return 0, 0
+
+    def seek_time(self, f, ts):
+        """
+        Line number (0 based) and byte offset of the first line logged at or
+        after `ts`; the end of the indexed part when there is none. Lines
+        without a timestamp are skipped. Needs an index built with parse_time.
+        """
+        dated = [(t, i) for i, t in enumerate(self.times) if t != NO_TIME]
+        # Last checkpoint known to start before ts; the answer lies after it
+        k = bisect.bisect_left(dated, (ts, -1)) - 1
+        i = dated[k][1] if k >= 0 else 0
+        f.seek(self.offsets[i])
+        line, pos = self.lines[i], self.offsets[i]
+        while pos < self.indexed_end:
+            raw = f.readline()
+            if not raw:
+                break
+            found = self.parse_time(raw.decode("utf-8", "replace"))
+            if found is not None and found >= ts:
+                return line, pos
+            line += 1
+            pos += len(raw)
+        return self.indexed_lines, self.indexed_end
+
+    def read_range(self, f, start_line, count):
+        self.seek_line(f, max(0, start_line))
+        out = []
+        for _ in range(max(0, count)):
+            line = f.readline()
+            if not line:
+                break
+            out.append(line.rstrip(b"\r\n").decode("utf-8", "replace"))
+        return out
+
+    def save(self, path):
+        """Writes the index to `path` (through a temporary file, readers never see half of it)"""
+        head = "%d %d %d %d %d %d %d %d %d\n" % (
+            self.step, self.inode or 0, self.indexed_end, self.indexed_lines, self.size,
+            self.head_len, self.head_crc, len(self.offsets), len(self.times))
+        tmp = "%s.%d" % (path, os.getpid())
+        with open(tmp, "wb") as out:
+            out.write(INDEX_MAGIC + b" " + head.encode("ascii"))
+            out.write(self.offsets.tobytes())
+            out.write(self.lines.tobytes())
+            out.write(self.times.tobytes())
+        os.replace(tmp, path)
+
+    def load(self, path):
+        """Restores a saved index; returns False (and leaves it empty) when there is none usable"""
+        try:
+            with open(path, "rb") as src:
+                magic, _, head = src.readline().partition(b" ")
+                fields = [int(v) for v in head.split()]
+                if magic != INDEX_MAGIC or len(fields) != 9 or fields[0] != self.step:
+                    return False
+                offsets, lines, times = array("Q"), array("Q"), array("d")
+                offsets.frombytes(src.read(fields[7] * offsets.itemsize))
+                lines.frombytes(src.read(fields[7] * lines.itemsize))
+                times.frombytes(src.read(fields[8] * times.itemsize))
+        except (IOError, OSError, ValueError):
+            return False
+        if len(offsets) != fields[7] or len(lines) != fields[7] or len(times) != fields[8]:
+            return False
+        (_, self.inode, self.indexed_end, self.indexed_lines, self.size,
+         self.head_len, self.head_crc, _, _) = fields
+        self.offsets, self.lines = offsets, lines
+        self.times = times if self.parse_time is not None else array("d")
+        return True
+
+
+def sidecar_path(path, folder=INDEX_DIR):
+    name = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()[:20]
+    return os.path.join(os.path.expanduser(folder), name + ".idx")
+
+
+def indexed(cache, f, path, parse_time=None, folder=INDEX_DIR):
+    """
+    The index of `path` (open as f) from `cache`, loaded from its sidecar on
+    first use and brought up to date with the file. The sidecar is rewritten
+    when checkpoints were added, not on every appended line.
+    """
+    idx = cache.get(path)
+    if idx is None:
+        idx = cache[path] = LineIndex(parse_time=parse_time)
+        if folder:
+            idx.load(sidecar_path(path, folder))
+    st = os.fstat(f.fileno())
+    before = (idx.inode, len(idx.offsets), len(idx.times))
+    idx.update(f, st.st_ino, st.st_size)
+    if folder and (idx.inode, len(idx.offsets), len(idx.times)) != before:
+        try:
+            if not os.path.isdir(os.path.expanduser(folder)):
+                os.makedirs(os.path.expanduser(folder))
+            idx.save(sidecar_path(path, folder))
+        except (IOError, OSError):
+            pass  # read-only home: the index just lives in memory
+    return idx
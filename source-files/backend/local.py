@@ -1,8 +1,26 @@
+import gzip
 import os
-import shlex
+import re
 import shutil
 import subprocess
-from .base import Backend, BackendError
+import tempfile
+import threading
+from typing import Callable, Iterator
+from .access_log import aggregate_args
+from .aggregate import aggregate_paths
+from .base import Backend, BackendError, cut_at_last_line, line_blocks
+from .bundle import build_bundle_script, save_bundle
+from .fpm_monitor import FpmPoolStatus
+from .fpm_status import collect_pools
+from .inventory import InventoryDelta, scan_tree
+from .line_index import LineIndex, indexed
+from .logtime import parse_log_time
+from .logsearch import SCOPE_TAIL
+from .resources import ResourceReading, parse_resource_output, resource_script
+from .mysql_metrics import SOCKET_PATHS, PyMySQLSource, metrics_script, parse_metrics_output
+from .rotation import ChainMember, SpanIndex, list_chain, read_span
+from .search_engine import search_file, last_matching_lines
+from .transfer import DownloadCancelled, ProgressFn, copy_chunks, finish, part_path, resume_offset
 
 NGINX_ERROR = "/var/log/nginx/error.log"
 NGINX_ACCESS = "/var/log/nginx/access.log"
@@ -10,23 +28,139 @@ VAR_LOG_DIR = "/var/log"
 
 
 class LocalBackend(Backend):
+    def __init__(self):
+        # path -> sparse line/time index, also saved as a sidecar under ~/.rsc/index
+        self._line_indexes: dict[str, LineIndex] = {}
+        self._index_lock = threading.Lock()
+        self._spans = SpanIndex()
+
+    def _indexed(self, f, path: str) -> LineIndex:
+        return indexed(self._line_indexes, f, path, parse_log_time)
+
+    def line_count(self, path: str) -> int:
+        try:
+            with self._index_lock, open(path, "rb") as f:
+                return self._indexed(f, path).total_lines
+        except OSError as e:
+            raise BackendError(f"Dosya okunamadı: {e}")
+
+    def read_range(self, path: str, start_line: int, count: int) -> list[str]:
+        try:
+            with self._index_lock, open(path, "rb") as f:
+                return self._indexed(f, path).read_range(f, start_line, count)
+        except OSError as e:
+            raise BackendError(f"Dosya okunamadı: {e}")
+
+    def seek_line(self, path: str, line_no: int) -> int:
+        try:
+            with self._index_lock, open(path, "rb") as f:
+                return self._indexed(f, path).seek_line(f, max(0, int(line_no)))
+        except OSError as e:
+            raise BackendError(f"Dosya okunamadı: {e}")
+
+    def tail_start(self, path: str, lines: int) -> tuple[int, int]:
+        try:
+            with self._index_lock, open(path, "rb") as f:
+                return self._indexed(f, path).tail_start(f, max(0, lines))
+        except OSError as e:
+            raise BackendError(f"Dosya okunamadı: {e}")
+
+    def seek_time(self, path: str, ts: float) -> tuple[int, int]:
+        try:
+            with self._index_lock, open(path, "rb") as f:
+                return self._indexed(f, path).seek_time(f, ts)
+        except OSError as e:
+            raise BackendError(f"Dosya okunamadı: {e}")
+
     def tail(self, path: str, lines: int) -> str:
         if not os.path.exists(path):
             raise BackendError(f"Dosya bulunamadı: {path}")
         cmd = ["tail", "-n", str(lines), path]
         return subprocess.check_output(cmd, text=True, errors="replace")
 
+    def tail_with_cursor(self, path: str, lines: int) -> tuple[str, int, int]:
+        try:
+            with open(path, "rb") as f:
+                st = os.fstat(f.fileno())
+                # Back from the size seen by fstat, not from the end, which may have moved on
+                pos, data = st.st_size, b""
+                while pos > 0 and data.count(b"\n") <= lines:
+                    step = min(65536, pos)
+                    pos -= step
+                    f.seek(pos)
+                    data = f.read(step) + data
+        except OSError as e:
+            raise BackendError(f"Dosya okunamadı: {e}")
+        text = b"".join(data.splitlines(True)[-lines:]) if lines > 0 else b""
+        return text.decode("utf-8", errors="replace"), st.st_ino, st.st_size
+
     def size_bytes(self, path: str) -> int:
         if not os.path.exists(path):
             raise BackendError(f"Dosya bulunamadı: {path}")
         return os.path.getsize(path)
 
+    def read_since(self, path: str, offset: int, max_bytes: int = 1024 * 1024,
+                   inode: int | None = None) -> tuple[str, int, int, int]:
+        try:
+            with open(path, "rb") as f:
+                st = os.fstat(f.fileno())
+                if (inode is not None and st.st_ino != inode) or st.st_size < offset:
+                    offset = 0  # rotated or truncated
+                f.seek(offset)
+                raw = f.read(max(0, max_bytes))
+        except OSError as e:
+            raise BackendError(f"Dosya okunamadı: {e}")
+        raw = cut_at_last_line(raw)
+        return raw.decode("utf-8", errors="replace"), offset + len(raw), st.st_ino, st.st_size
+
     def search(self, path: str, pattern: str, tail_lines: int = 5000, max_hits: int = 300) -> str:
+        hits = self.search_stream(path, pattern, SCOPE_TAIL, tail_lines, max_hits=max_hits)
+        return "".join(f"{line_no}:{line}\n" for line_no, _, line in hits)
+
+    def search_stream(self, path: str, pattern: str, scope: str = SCOPE_TAIL, tail_lines: int = 5000,
+                      since: float | None = None, max_hits: int = 300,
+                      cancel_event: threading.Event | None = None) -> Iterator[tuple[int, int, str]]:
         if not os.path.exists(path):
             raise BackendError(f"Dosya bulunamadı: {path}")
-        # Hız: son N satır içinde arama
-        cmd = f"tail -n {tail_lines} {shlex.quote(path)} | grep -n --color=never -i {shlex.quote(pattern)} | head -n {max_hits}"
-        return subprocess.check_output(cmd, shell=True, text=True, errors="replace")
+
+        def line_at(offset: int) -> int:
+            # Line number of the scan start, from the cached line index
+            with self._index_lock, open(path, "rb") as f:
+                return self._indexed(f, path).line_at(f, offset)
+
+        try:
+            yield from search_file(path, [pattern], scope, tail_lines, since, max_hits, cancel_event, line_at)
+        except OSError as e:
+            raise BackendError(f"Dosya okunamadı: {e}")
+        except re.error as e:
+            raise BackendError(f"Geçersiz arama ifadesi: {e}")
+
+    def rotation_chain(self, path: str, spans: bool = True) -> list[ChainMember]:
+        chain = list_chain(path)
+        if not spans:
+            return chain
+        return self._spans.resolve(chain, lambda members: {m.path: read_span(m) for m in members})
+
+    def read_blocks(self, path: str, cancel_event: threading.Event | None = None) -> Iterator[str]:
+        try:
+            with (gzip.open(path, "rb") if path.endswith(".gz") else open(path, "rb")) as f:
+                for block in line_blocks(f.read):
+                    if cancel_event and cancel_event.is_set():
+                        return
+                    yield block
+        except (OSError, EOFError) as e:
+            raise BackendError(f"Dosya okunamadı: {e}")
+
+    def aggregate(self, paths: list[str], group_by: list[str], pattern: str | None = None,
+                  log_format: str | None = None, since: float | None = None, top: int = 50,
+                  progress: Callable[[int, int, str], None] | None = None,
+                  cancel_event: threading.Event | None = None) -> dict:
+        args = aggregate_args(paths, group_by, pattern, log_format, since, top)
+        try:
+            return aggregate_paths(parse_time=parse_log_time, progress=progress,
+                                   cancelled=cancel_event.is_set if cancel_event else None, **args)
+        except re.error as e:
+            raise BackendError(f"Geçersiz arama ifadesi: {e}")
 
     def truncate(self, path: str) -> str:
         if not os.path.exists(path):
@@ -36,39 +170,60 @@ class LocalBackend(Backend):
         subprocess.check_call(cmd)
         return "Log temizlendi."
 
-    def list_var_log(self) -> list[tuple[str, int, str]]:
-        if not os.path.isdir(VAR_LOG_DIR):
-            # If not found, create it for testing if on Windows, else raise error
-            if os.name == 'nt':
-                 os.makedirs(VAR_LOG_DIR, exist_ok=True)
-            else:
-                 raise BackendError(f"Klasör bulunamadı: {VAR_LOG_DIR}")
-        
-        items = []
-        try:
-            for name in sorted(os.listdir(VAR_LOG_DIR)):
-                full = os.path.join(VAR_LOG_DIR, name)
-                if os.path.isfile(full):
-                    try:
-                        st = os.stat(full)
-                        items.append((name, st.st_size, str(int(st.st_mtime))))
-                    except OSError:
-                        pass # Skip files we can't stat
+    def log_inventory(self, token: str | None = None) -> InventoryDelta:
+        # A local walk is cheap, LogInventory turns the full listing into a delta
+        try:
+            return InventoryDelta(token=None, full=True, upserts=scan_tree(VAR_LOG_DIR))
         except OSError as e:
-             raise BackendError(f"Klasör okuma hatası: {e}")
-             
-        return items
+            raise BackendError(f"Klasör okuma hatası: {e}")
 
-    def download_file(self, remote_path: str, local_path: str) -> str:
-        # Local mode: simple copy
+    def download_file(self, remote_path: str, local_path: str, progress: ProgressFn | None = None,
+                      cancel_event: threading.Event | None = None) -> str:
+        # Local mode: chunked copy, same .part / progress behaviour as SSH
         if not os.path.exists(remote_path):
             raise BackendError(f"Kaynak dosya yok: {remote_path}")
+        part = part_path(local_path)
         try:
-            shutil.copy2(remote_path, local_path)
+            with open(remote_path, "rb") as src:
+                total = os.fstat(src.fileno()).st_size
+                done = resume_offset(part, total)
+                src.seek(done)
+                with open(part, "ab" if done else "wb") as out:
+                    copy_chunks(src.read, out, done, total, progress, cancel_event, limit=total)
+            shutil.copystat(remote_path, part)
+            finish(part, local_path)
             return f"Dosya kopyalandı: {local_path}"
+        except BackendError:
+            raise
         except Exception as e:
             raise BackendError(f"Kopyalama hatası: {e}")
 
+    def download_bundle(self, paths: list[str], local_path: str, compression: str = "zst",
+                        since: float | None = None, progress: ProgressFn | None = None,
+                        cancel_event: threading.Event | None = None) -> str:
+        # Same script as over SSH, only without sudo
+        script = build_bundle_script(paths, compression, since)
+        with tempfile.TemporaryFile() as err:
+            proc = subprocess.Popen(["sh", "-c", script], stdout=subprocess.PIPE, stderr=err)
+            try:
+                target = save_bundle(proc.stdout.read1, local_path, progress, cancel_event)
+                status = proc.wait()
+            except BackendError as e:
+                proc.kill()
+                proc.wait()
+                if isinstance(e, DownloadCancelled):
+                    raise
+                err.seek(0)
+                msg = err.read().decode("utf-8", errors="replace").strip()
+                raise BackendError(f"{e}: {msg}" if msg else str(e))
+            finally:
+                proc.stdout.close()
+            if status != 0:
+                os.remove(target)  # broken or truncated archive
+                err.seek(0)
+                raise BackendError(f"Arşiv Hatası: {err.read().decode('utf-8', errors='replace').strip()}")
+        return f"Arşiv oluşturuldu: {target}"
+
     def get_nginx_version(self) -> str:
         if os.name == 'nt':
             return "Nginx (Local/Win: Not Installed)"
@@ -107,6 +262,15 @@ class LocalBackend(Backend):
         except Exception as e:
             return f"Error checking config: {e}"
 
+    def dump_nginx_config(self) -> str:
+        try:
+            p = subprocess.run(["sudo", "nginx", "-T"], capture_output=True, text=True, errors="replace")
+        except OSError as e:
+            raise BackendError(f"nginx -T çalıştırılamadı: {e}")
+        if p.returncode != 0:
+            raise BackendError(p.stderr.strip() or "nginx -T başarısız")
+        return p.stdout
+
     def get_php_version(self) -> str:
         if os.name == 'nt':
             return "PHP 8.2 (Simulated)"
@@ -158,14 +322,25 @@ class LocalBackend(Backend):
              return "Log dosyası yok"
              
         try:
-            # grep -i php log_path | tail -n 20
-            # Local pipe simulation
-            p1 = subprocess.Popen(["grep", "-i", "php", log_path], stdout=subprocess.PIPE, text=True)
-            p2 = subprocess.run(["tail", "-n", "20"], stdin=p1.stdout, capture_output=True, text=True)
-            return p2.stdout
+            # grep -i php log_path | tail -n 20, continuing into error.log.1 / .gz when needed
+            lines = last_matching_lines(log_path, ["php"], 20)
+            return "".join(line + "\n" for line in lines)
         except Exception as e:
             return f"Hata tarama başarısız: {e}"
 
+    def fpm_pool_status(self) -> list[FpmPoolStatus]:
+        # Pool sockets are often www-data only: unreadable pools come back with their error
+        return [FpmPoolStatus.from_dict(d) for d in collect_pools()]
+
+    def sample_resources(self) -> ResourceReading:
+        if os.name == 'nt':
+            raise BackendError("Kaynak ölçümü Windows'ta desteklenmiyor")
+        res = subprocess.run(["sh", "-c", resource_script()], capture_output=True, text=True, errors="replace")
+        try:
+            return parse_resource_output(res.stdout)
+        except ValueError as e:
+            raise BackendError(f"Kaynak ölçümü başarısız: {res.stderr.strip() or e}")
+
     def control_service(self, service_name: str, action: str) -> str:
         if os.name == 'nt':
             return f"Simulated: sudo systemctl {action} {service_name}"
@@ -209,6 +384,19 @@ class LocalBackend(Backend):
         if os.name == 'nt': return "/etc/mysql/mariadb.conf.d/50-server.cnf: bind-address = 0.0.0.0"
         return "Local implementation needed"
 
+    def fetch_mysql_metrics(self) -> tuple[dict[str, str], list[dict]]:
+        if os.name == 'nt':
+            raise BackendError("MySQL metrikleri Windows'ta desteklenmiyor")
+        res = subprocess.run(["sudo", "-n", "sh", "-c", metrics_script()], capture_output=True, text=True,
+                             errors="replace")
+        if res.returncode != 0 and not res.stdout:
+            raise BackendError(f"MySQL durumu okunamadı: {res.stderr.strip()}")
+        return parse_metrics_output(res.stdout)
+
+    def mysql_client_source(self, user: str, password: str = "") -> PyMySQLSource:
+        sock = next((p for p in SOCKET_PATHS if os.path.exists(p)), None)
+        return PyMySQLSource(user, password, unix_socket=sock)
+
     def search_db_errors_in_nginx(self) -> str:
         if os.name == 'nt': return "Simulated: No DB errors in nginx log"
         return "Local implementation needed"
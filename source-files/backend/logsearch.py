@@ -0,0 +1,115 @@
+"""
+Streaming grep shared by the local and SSH backends.
+
+The search runs as one shell script whose first output line is a header
+"@@BASE <line> <offset>" giving the position the scan started from; every
+following line is grep's "<line>:<byte offset>:<text>" relative to that
+position. Backends read the output as it arrives and turn it into absolute
+(line_no, byte_offset, line) tuples with parse_hit().
+
+A time bounded scan that cannot start at the window (no index) also gets
+grep's context lines "<line>-<byte offset>-<text>": an undated hit (a stack
+trace line) then takes the time of the dated line before it.
+"""
+import re
+import shlex
+import time
+
+from .logtime import TimeFilter
+
+SCOPE_TAIL = "tail"    # last N lines
+SCOPE_FULL = "full"    # whole file
+SCOPE_SINCE = "since"  # lines logged at or after a timestamp
+
+BASE_MARK = "@@BASE"
+# Patterns are Python regular expressions everywhere (search_engine matches with re);
+# Perl-compatible is the grep dialect that reads them the same way ("a|b", "\d", "(?:...)")
+GREP = "grep -P -i --color=never"
+CONTEXT_LINES = 20  # lines before each hit a time bounded scan looks back for a timestamp
+_CONTEXT = re.compile(r"^\d+-\d+-")
+
+
+def build_search_script(path: str, pattern: str, scope: str = SCOPE_TAIL,
+                        tail_lines: int = 5000, max_hits: int = 300,
+                        start: tuple[int, int] | None = None) -> str:
+    """
+    `start` is a known (line, offset) to scan from, from Backend.seek_time or
+    Backend.tail_start. Without it the tail scope numbers lines from where the
+    tail begins: counting the lines before it would read the whole file.
+    """
+    path_q = shlex.quote(path)
+    grep = f"{GREP} -n -b --line-buffered -e {shlex.quote(pattern)}"
+    if scope != SCOPE_SINCE:
+        # With a time bound, hits are filtered afterwards; the limit applies then
+        grep += f" -m {int(max_hits)}"
+    elif start is None:
+        grep += f" -B {CONTEXT_LINES}"
+
+    if start is not None:
+        line, offset = start
+        return (f"[ -r {path_q} ] || {{ echo 'No such file: '{path_q} >&2; exit 2; }}; "
+                f"echo '{BASE_MARK} {int(line)} {int(offset)}'; tail -c +{int(offset) + 1} {path_q} | {grep}")
+
+    if scope != SCOPE_TAIL:
+        return f"[ -r {path_q} ] || {{ echo 'No such file: '{path_q} >&2; exit 2; }}; echo '{BASE_MARK} 0 0'; {grep} -- {path_q}"
+
+    # Find where the last N lines start so hits get absolute byte offsets
+    return (
+        f"sz=$(stat -c %s {path_q}) || exit 2; "
+        f"tb=$(tail -n {int(tail_lines)} {path_q} | wc -c); "
+        f"off=$((sz - tb)); [ $off -lt 0 ] && off=0; "
+        f"echo \"{BASE_MARK} 0 $off\"; "
+        f"tail -c +$((off + 1)) {path_q} | {grep}"
+    )
+
+
+def parse_base(line: str) -> tuple[int, int] | None:
+    if not line.startswith(BASE_MARK):
+        return None
+    _, ln, off = line.split()
+    return int(ln), int(off)
+
+
+def parse_hit(line: str, base: tuple[int, int]) -> tuple[int, int, str] | None:
+    """'12:3456:text' -> (absolute line number (1 based), absolute byte offset, text)"""
+    parts = line.split(":", 2)
+    if len(parts) != 3 or not parts[0].isdigit() or not parts[1].isdigit():
+        return None
+    return base[0] + int(parts[0]), base[1] + int(parts[1]), parts[2]
+
+
+def parse_context(line: str) -> str | None:
+    """'12-3456-text' (a context line grep -B printed) -> text"""
+    return line.split("-", 2)[2] if _CONTEXT.match(line) else None
+
+
+def iter_hits(lines, scope: str = SCOPE_TAIL, since: float | None = None, max_hits: int = 300,
+              in_window: bool = False):
+    """
+    Turns raw script output lines into hits, applying the time bound and the
+    hit limit. `in_window`: the scan starts at the first line of the window.
+    """
+    base = (0, 0)
+    time_filter = TimeFilter(since, in_window) if scope == SCOPE_SINCE and since is not None else None
+    count = 0
+    for raw in lines:
+        b = parse_base(raw)
+        if b is not None:
+            base = b
+            continue
+        hit = parse_hit(raw, base)
+        if hit is None:
+            context = parse_context(raw) if time_filter else None
+            if context is not None:
+                time_filter.see(context)
+            continue
+        if time_filter and not time_filter.accept(hit[2]):
+            continue
+        yield hit
+        count += 1
+        if count >= max_hits:
+            return
+
+
+def since_hours(hours: float) -> float:
+    return time.time() - hours * 3600
@@ -0,0 +1,111 @@
+"""
+Timestamp extraction for the log formats found on a typical web server.
+
+parse_log_time(line) returns seconds since the epoch, or None when the line
+carries no recognised timestamp (continuation lines, stack traces...).
+Timestamps without a zone are taken as server local time.
+
+Like line_index, this module can be shipped to the server inside remote
+scripts, so it must stay stdlib only and compatible with older python3.
+"""
+import calendar
+import re
+import time
+
+MONTHS = {m: i for i, m in enumerate(
+    ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"], 1)}
+
+# nginx/apache access log: [27/Oct/2023:10:00:00 +0000]
+_ACCESS = re.compile(r"\[(\d{2})/([A-Za-z]{3})/(\d{4}):(\d{2}):(\d{2}):(\d{2}) ([+-])(\d{2})(\d{2})\]")
+# nginx error log: 2023/10/27 10:00:00
+_SLASHED = re.compile(r"^(\d{4})/(\d{2})/(\d{2}) (\d{2}):(\d{2}):(\d{2})")
+# ISO 8601, MariaDB and most application logs: 2023-10-27T10:00:00.123+02:00, 2023-10-27 10:00:00
+_ISO = re.compile(r"^\[?(\d{4})-(\d{2})-(\d{2})[T ](\d{2}):(\d{2}):(\d{2})(?:[.,]\d+)?(Z|[+-]\d{2}:?\d{2})?")
+# syslog: Oct 27 10:00:00 (no year)
+_SYSLOG = re.compile(r"^([A-Za-z]{3}) +(\d{1,2}) (\d{2}):(\d{2}):(\d{2})")
+# old MySQL: 231027 10:00:00
+_MYSQL_OLD = re.compile(r"^(\d{2})(\d{2})(\d{2}) +(\d{1,2}):(\d{2}):(\d{2})")
+# PHP-FPM: [27-Oct-2023 10:00:00]
+_PHP = re.compile(r"^\[(\d{2})-([A-Za-z]{3})-(\d{4}) (\d{2}):(\d{2}):(\d{2})")
+
+
+def _local(year, month, day, hour, minute, second):
+    return time.mktime((year, month, day, hour, minute, second, 0, 0, -1))
+
+
+def _zoned(year, month, day, hour, minute, second, offset_sec):
+    return calendar.timegm((year, month, day, hour, minute, second, 0, 0, 0)) - offset_sec
+
+
+def _zone_offset(zone):
+    if not zone or zone == "Z":
+        return 0
+    sign = -1 if zone[0] == "-" else 1
+    digits = zone[1:].replace(":", "")
+    return sign * (int(digits[:2]) * 3600 + int(digits[2:4]) * 60)
+
+
+def parse_log_time(line, now=None):
+    try:
+        m = _SLASHED.match(line)
+        if m:
+            return _local(*(int(g) for g in m.groups()))
+        m = _ISO.match(line)
+        if m:
+            parts = [int(g) for g in m.groups()[:6]]
+            if m.group(7):
+                return _zoned(*parts, offset_sec=_zone_offset(m.group(7)))
+            return _local(*parts)
+        m = _ACCESS.search(line)
+        if m:
+            day, mon, year, hh, mm, ss, sign, zh, zm = m.groups()
+            offset = (int(zh) * 3600 + int(zm) * 60) * (-1 if sign == "-" else 1)
+            return _zoned(int(year), MONTHS[mon.lower()], int(day), int(hh), int(mm), int(ss), offset)
+        m = _PHP.match(line)
+        if m:
+            day, mon, year, hh, mm, ss = m.groups()
+            return _local(int(year), MONTHS[mon.lower()], int(day), int(hh), int(mm), int(ss))
+        m = _SYSLOG.match(line)
+        if m:
+            mon, day, hh, mm, ss = m.groups()
+            month = MONTHS.get(mon.lower())
+            if month is None:
+                return None
+            now = time.time() if now is None else now
+            year = time.localtime(now).tm_year
+            ts = _local(year, month, int(day), int(hh), int(mm), int(ss))
+            # December lines read in January belong to the previous year
+            if ts > now + 86400:
+                ts = _local(year - 1, month, int(day), int(hh), int(mm), int(ss))
+            return ts
+        m = _MYSQL_OLD.match(line)
+        if m:
+            yy, mo, dd, hh, mm, ss = (int(g) for g in m.groups())
+            return _local(2000 + yy, mo, dd, hh, mm, ss)
+    except (KeyError, ValueError, OverflowError):
+        pass
+    return None
+
+
+class TimeFilter(object):
+    """
+    Keeps lines logged at or after `since`. Lines without a timestamp follow
+    the decision taken for the last timestamped line before them, so multi
+    line entries (PHP stack traces...) stay whole. Scans that start where the
+    window starts (seek_time, time_offset) pass keep=True; scans that only
+    see matching lines pass the lines around them to see().
+    """
+
+    def __init__(self, since, keep=False):
+        self.since = since
+        self.keep = keep
+
+    def see(self, line):
+        """A line that is not itself a candidate: only its timestamp counts"""
+        ts = parse_log_time(line)
+        if ts is not None:
+            self.keep = ts >= self.since
+
+    def accept(self, line):
+        self.see(line)
+        return self.keep
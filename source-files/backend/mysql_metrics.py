@@ -0,0 +1,284 @@
+"""
+MySQL / MariaDB metrics sampled straight from the server: SHOW GLOBAL STATUS
+and SHOW FULL PROCESSLIST, turned into per-interval rates and kept in a
+fixed-size ring for the charts.
+
+Where the numbers come from is a fetch() callable returning
+(status, processes): status is {variable: value}, processes one dict per
+processlist row. Backends provide one that runs the server's own mysql client
+over its unix socket (Backend.fetch_mysql_metrics, no credentials needed when
+root may log in through the socket); PyMySQLSource speaks the client protocol
+directly, to a unix socket or to a TCP port (SSH-forwarded for remote hosts).
+A stub fetch makes the collector easy to drive without a server.
+"""
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable
+from .base import BackendError
+from .probe import build_section_script, split_sections
+
+DEFAULT_INTERVAL = 5  # seconds between samples
+DEFAULT_CAPACITY = 360  # points kept, 30 min at the default interval
+SOCKET_PATHS = ("/run/mysqld/mysqld.sock", "/var/run/mysqld/mysqld.sock", "/var/lib/mysql/mysql.sock",
+                "/tmp/mysql.sock")
+PROCESSLIST_COLUMNS = ("Id", "User", "Host", "db", "Command", "Time", "State", "Info")
+
+# Sections for the server's mysql client; -B -N gives tab separated rows without headers
+# and escapes newlines inside values, so one row is one line
+MYSQL_CLI = "mysql -B -N -e"
+METRICS_SECTIONS = {
+    "status": f"{MYSQL_CLI} 'SHOW GLOBAL STATUS'",
+    "processlist": f"{MYSQL_CLI} 'SHOW FULL PROCESSLIST'",
+}
+
+Fetch = Callable[[], tuple[dict[str, str], list[dict]]]
+
+
+def metrics_script() -> str:
+    return build_section_script(METRICS_SECTIONS)
+
+
+def parse_metrics_output(output: str) -> tuple[dict[str, str], list[dict]]:
+    """Output of metrics_script() -> (status, processes)"""
+    sec = split_sections(output)
+    status = {}
+    for line in sec.get("status", "").splitlines():
+        name, sep, value = line.partition("\t")
+        if sep:
+            status[name] = value
+    if "Uptime" not in status:
+        # No status rows: the client's error message is all there is
+        raise BackendError(f"MySQL durumu okunamadı: {sec.get('status', '').strip()[:300]}")
+    processes = []
+    for line in sec.get("processlist", "").splitlines():
+        cells = line.split("\t")
+        if len(cells) >= len(PROCESSLIST_COLUMNS):
+            processes.append(dict(zip(PROCESSLIST_COLUMNS, cells)))
+    return status, processes
+
+
+class PyMySQLSource:
+    """
+    fetch() over the MySQL client protocol with PyMySQL (optional dependency,
+    imported on first use). Keeps one connection and reopens it after an error.
+    `tunnel` (anything with close(), e.g. an SSH port forward) is closed with it.
+    close() waits for a fetch() in progress; nothing is fetched after it.
+    """
+
+    def __init__(self, user: str, password: str = "", host: str = "127.0.0.1", port: int = 3306,
+                 unix_socket: str | None = None, connect_timeout: int = 5, tunnel=None):
+        self.kwargs = dict(user=user, password=password, host=host, port=port, unix_socket=unix_socket,
+                           connect_timeout=connect_timeout, autocommit=True)
+        self.tunnel = tunnel
+        self.conn = None
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _connect(self):
+        try:
+            import pymysql
+        except ImportError:
+            raise BackendError("PyMySQL yüklü değil (pip install pymysql)")
+        try:
+            self.conn = pymysql.connect(**self.kwargs)
+        except pymysql.MySQLError as e:
+            # A tunnel that could not reach the server only shows up here as a lost connection
+            reason = getattr(self.tunnel, "error", None)
+            raise BackendError(f"MySQL bağlantı hatası: {reason or e}") from e
+
+    def fetch(self) -> tuple[dict[str, str], list[dict]]:
+        with self._lock:
+            if self._closed:
+                raise BackendError("MySQL bağlantısı kapatıldı")
+            if self.conn is None:
+                self._connect()
+            try:
+                with self.conn.cursor() as cur:
+                    cur.execute("SHOW GLOBAL STATUS")
+                    status = {str(name): str(value) for name, value in cur.fetchall()}
+                    cur.execute("SHOW FULL PROCESSLIST")
+                    columns = [d[0] for d in cur.description]
+                    processes = [dict(zip(columns, ("" if v is None else str(v) for v in row)))
+                                 for row in cur.fetchall()]
+            except Exception as e:
+                self._close_conn()
+                raise BackendError(f"MySQL sorgu hatası: {e}") from e
+            return status, processes
+
+    def _close_conn(self):
+        if self.conn is not None:
+            try:
+                self.conn.close()
+            except Exception:
+                pass
+        self.conn = None
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            self._close_conn()
+            if self.tunnel is not None:
+                self.tunnel.close()
+                self.tunnel = None
+
+
+@dataclass
+class MetricsSample:
+    """One raw reading"""
+    ts: float
+    status: dict[str, int]
+    processes: list[dict]
+
+
+@dataclass
+class MetricsPoint:
+    """Rates over the interval ending at ts (None on the first sample and after a server restart)"""
+    ts: float
+    uptime: int = 0
+    qps: float | None = None
+    slow_per_s: float | None = None
+    slow_queries: int = 0  # slow queries counted during the interval
+    buffer_pool_hit: float | None = None  # % of page reads served from the buffer pool
+    rows_read_per_s: float | None = None
+    rows_changed_per_s: float | None = None
+    threads_running: int = 0
+    threads_connected: int = 0
+    dirty_pages_pct: float | None = None
+    processes: int = 0
+    active_queries: int = 0  # processlist rows not sleeping (daemons excluded)
+    longest_query_s: int = 0
+
+
+def _numeric(status: dict[str, str]) -> dict[str, int]:
+    values = {}
+    for name, value in status.items():
+        try:
+            values[name] = int(value)
+        except (TypeError, ValueError):
+            pass  # ON/OFF and version strings
+    return values
+
+
+IDLE_COMMANDS = ("Sleep", "Daemon", "Binlog Dump", "Binlog Dump GTID")
+
+
+def compute_point(prev: MetricsSample | None, cur: MetricsSample) -> MetricsPoint:
+    s = cur.status
+    point = MetricsPoint(ts=cur.ts, uptime=s.get("Uptime", 0),
+                         threads_running=s.get("Threads_running", 0),
+                         threads_connected=s.get("Threads_connected", 0))
+    total_pages = s.get("Innodb_buffer_pool_pages_total", 0)
+    if total_pages:
+        point.dirty_pages_pct = 100.0 * s.get("Innodb_buffer_pool_pages_dirty", 0) / total_pages
+    active = [p for p in cur.processes if p.get("Command") not in IDLE_COMMANDS]
+    point.processes = len(cur.processes)
+    point.active_queries = len(active)
+    point.longest_query_s = max((int(p["Time"]) for p in active if str(p.get("Time", "")).isdigit()), default=0)
+
+    if prev is None or point.uptime < prev.status.get("Uptime", 0):
+        return point  # nothing to diff against, or counters restarted with the server
+    p = prev.status
+    elapsed = cur.ts - prev.ts
+    if elapsed <= 0:
+        return point
+
+    def delta(name: str) -> int:
+        return max(0, s.get(name, 0) - p.get(name, 0))
+
+    # Questions excludes statements run by stored programs, like most dashboards' QPS
+    point.qps = delta("Questions" if "Questions" in s else "Queries") / elapsed
+    point.slow_queries = delta("Slow_queries")
+    point.slow_per_s = point.slow_queries / elapsed
+    point.rows_read_per_s = delta("Innodb_rows_read") / elapsed
+    point.rows_changed_per_s = sum(delta(f"Innodb_rows_{kind}") for kind in ("inserted", "updated", "deleted")) / elapsed
+    requests = delta("Innodb_buffer_pool_read_requests")
+    if requests:
+        point.buffer_pool_hit = 100.0 * (1 - min(delta("Innodb_buffer_pool_reads"), requests) / requests)
+    return point
+
+
+@dataclass
+class MetricsRing:
+    """The last `capacity` points, oldest first"""
+    capacity: int = DEFAULT_CAPACITY
+    points: deque = field(default_factory=deque)
+
+    def __post_init__(self):
+        self.points = deque(self.points, maxlen=self.capacity)
+
+    def append(self, point: MetricsPoint):
+        self.points.append(point)
+
+    def latest(self) -> MetricsPoint | None:
+        return self.points[-1] if self.points else None
+
+    def series(self, name: str) -> list[float | None]:
+        return [getattr(point, name) for point in self.points]
+
+    def resize(self, capacity: int):
+        self.capacity = capacity
+        self.points = deque(self.points, maxlen=capacity)
+
+
+class MySQLMetricsCollector:
+    """
+    Calls fetch() once per sample() and appends the rates since the previous
+    sample to the ring. Scheduling is the caller's: the MySQL tab runs
+    sample() as a background job every `interval` seconds.
+    """
+
+    def __init__(self, fetch: Fetch, interval: float = DEFAULT_INTERVAL, capacity: int = DEFAULT_CAPACITY):
+        self.fetch = fetch
+        self.interval = interval
+        self.ring = MetricsRing(capacity)
+        self.last: MetricsSample | None = None
+
+    def sample(self) -> MetricsPoint:
+        status, processes = self.fetch()
+        cur = MetricsSample(time.time(), _numeric(status), processes)
+        point = compute_point(self.last, cur)
+        self.last = cur
+        self.ring.append(point)
+        return point
+
+    def reset(self):
+        self.last = None
+        self.ring = MetricsRing(self.ring.capacity)
+
+
+if __name__ == "__main__":
+    # Drives the collector with a stub server: python -m backend.mysql_metrics
+    import random
+
+    class StubServer:
+        def __init__(self):
+            self.status = {"Uptime": 1000, "Questions": 0, "Slow_queries": 0, "Innodb_rows_read": 0,
+                           "Innodb_rows_inserted": 0, "Innodb_rows_updated": 0, "Innodb_rows_deleted": 0,
+                           "Innodb_buffer_pool_read_requests": 0, "Innodb_buffer_pool_reads": 0,
+                           "Innodb_buffer_pool_pages_total": 8192, "Innodb_buffer_pool_pages_dirty": 0,
+                           "Threads_running": 1, "Threads_connected": 5}
+
+        def fetch(self):
+            s = self.status
+            s["Uptime"] += 1
+            s["Questions"] += random.randint(80, 120)
+            s["Slow_queries"] += random.random() < 0.2
+            s["Innodb_rows_read"] += 5000
+            s["Innodb_rows_updated"] += 40
+            s["Innodb_buffer_pool_read_requests"] += 10000
+            s["Innodb_buffer_pool_reads"] += random.randint(0, 50)
+            s["Innodb_buffer_pool_pages_dirty"] = random.randint(0, 400)
+            s["Threads_running"] = random.randint(1, 8)
+            processes = [{"Id": "1", "Command": "Sleep", "Time": "30"},
+                         {"Id": "2", "Command": "Query", "Time": str(random.randint(0, 3))}]
+            return {k: str(v) for k, v in s.items()}, processes
+
+    collector = MySQLMetricsCollector(StubServer().fetch, interval=0.1, capacity=5)
+    for _ in range(8):
+        point = collector.sample()
+        print(f"qps={point.qps if point.qps is None else round(point.qps)} hit={point.buffer_pool_hit} "
+              f"running={point.threads_running} slow/s={point.slow_per_s} active={point.active_queries}")
+        time.sleep(collector.interval)
+    print("ring", len(collector.ring.points), collector.ring.series("threads_running"))
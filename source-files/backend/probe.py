@@ -0,0 +1,169 @@
+import re
+from dataclasses import dataclass
+
+# Marker line that separates the output of each command in a composite script
+SECTION_MARK = "@@RSC@@"
+
+PHP_VERSION_RE = re.compile(r"PHP (\d+\.\d+)")
+
+
+def build_section_script(sections: dict[str, str]) -> str:
+    """
+    Joins {name: shell command} into one remote script.
+    Every command's output is preceded by a '@@RSC@@ <name>' marker line.
+    """
+    parts = []
+    for name, cmd in sections.items():
+        parts.append(f"echo '{SECTION_MARK} {name}'; {{ {cmd} ; }} 2>&1")
+    return "; ".join(parts)
+
+
+def split_sections(output: str) -> dict[str, str]:
+    """Parses the output of build_section_script back into {name: output}"""
+    result: dict[str, str] = {}
+    current = None
+    buf: list[str] = []
+    for line in output.splitlines():
+        if line.startswith(SECTION_MARK):
+            if current is not None:
+                result[current] = "\n".join(buf).strip()
+            current = line[len(SECTION_MARK):].strip()
+            buf = []
+        elif current is not None:
+            buf.append(line)
+    if current is not None:
+        result[current] = "\n".join(buf).strip()
+    return result
+
+
+def mysql_service_from_units(units: str) -> str:
+    """Same preference as get_mysql_service_name: mariadb first, then mysql"""
+    if "mariadb" in units:
+        return "mariadb"
+    if "mysql" in units:
+        return "mysql"
+    return "mariadb"
+
+
+def php_fpm_service_name(php_version: str) -> str | None:
+    """'PHP 8.2.7 (cli) ...' -> 'php8.2-fpm'"""
+    match = PHP_VERSION_RE.search(php_version or "")
+    if match:
+        return f"php{match.group(1)}-fpm"
+    return None
+
+
+def active_state_from_status(status_output: str) -> str:
+    """Reduces 'systemctl status' output to an 'is-active' like word"""
+    s_lower = (status_output or "").lower()
+    if "active: active" in s_lower:
+        return "active"
+    if "active: inactive" in s_lower or "dead" in s_lower:
+        return "inactive"
+    return s_lower.strip()
+
+
+@dataclass
+class StatusSnapshot:
+    """One-shot view of the services shown in the status bar"""
+    nginx_version: str = ""
+    nginx_status: str = ""
+    php_version: str = ""
+    php_fpm_service: str | None = None
+    php_fpm_status: str = ""
+    mysql_service: str = "mariadb"
+    mysql_status: str = ""  # is-active style: active / inactive / failed ...
+    mysql_version: str = ""
+
+
+# Remote script used by SSHBackend.probe_all (one exec_command for everything)
+NGINX_PATHS = ["nginx", "/usr/sbin/nginx", "/usr/local/nginx/sbin/nginx", "/usr/local/sbin/nginx"]
+
+PROBE_SECTIONS = {
+    "nginx_version": (
+        "for p in " + " ".join(NGINX_PATHS) + "; do "
+        "o=$($p -v 2>&1) && case \"$o\" in *'nginx version:'*) echo \"$o\"; break;; esac; done"
+    ),
+    "nginx_status": "systemctl is-active nginx",
+    "php_version": "php -v 2>/dev/null | head -n 1",
+    "php_fpm_status": (
+        "v=$(php -v 2>/dev/null | sed -n '1s/^PHP \\([0-9]*\\.[0-9]*\\).*/\\1/p'); "
+        "[ -n \"$v\" ] && systemctl is-active php$v-fpm"
+    ),
+    "mysql_units": "systemctl list-units --type=service --all 2>/dev/null | grep -E 'mariadb|mysql'",
+    "mariadb_status": "systemctl is-active mariadb",
+    "mysql_status": "systemctl is-active mysql",
+    "mysql_version": "mysql --version || mariadb --version",
+}
+
+
+def parse_probe_output(output: str) -> StatusSnapshot:
+    sec = split_sections(output)
+    snap = StatusSnapshot()
+
+    nginx_ver = sec.get("nginx_version", "")
+    if "nginx version:" in nginx_ver:
+        snap.nginx_version = nginx_ver.replace("nginx version:", "").strip()
+    snap.nginx_status = sec.get("nginx_status", "")
+
+    php_ver = sec.get("php_version", "")
+    if php_ver.startswith("PHP"):
+        snap.php_version = php_ver
+        snap.php_fpm_service = php_fpm_service_name(php_ver)
+        snap.php_fpm_status = sec.get("php_fpm_status", "")
+    else:
+        snap.php_version = "PHP bulunamadı"
+        snap.php_fpm_status = "PHP yok"
+
+    snap.mysql_service = mysql_service_from_units(sec.get("mysql_units", ""))
+    snap.mysql_status = sec.get(f"{snap.mysql_service}_status", "")
+    snap.mysql_version = sec.get("mysql_version", "")
+    return snap
+
+
+@dataclass
+class MySQLDiagnostics:
+    """Everything the MySQL tab's info panel shows"""
+    service: str = "mariadb"
+    version: str = ""
+    status: str = ""  # full 'systemctl status' output
+    port: str = ""  # 'ss -lntp' lines mentioning 3306
+    socket: str = ""  # listing of the mysqld run directory
+    bind_address: str = ""  # grep hits for bind-address in the server config
+
+
+# Remote script used by SSHBackend.collect_mysql_diagnostics. Sections share one
+# shell, so "service" leaves $svc set for "status".
+MYSQL_SERVICE_DETECT = (
+    "u=$(systemctl list-units --type=service --all 2>/dev/null | grep -E 'mariadb|mysql'); "
+    "case \"$u\" in *mariadb*) svc=mariadb;; *mysql*) svc=mysql;; *) svc=mariadb;; esac; echo $svc"
+)
+
+MYSQL_SECTIONS = {
+    "service": MYSQL_SERVICE_DETECT,
+    "version": "mysql --version || mariadb --version",
+    "status": "systemctl status \"$svc\"",
+    "port": "ss -lntp | grep 3306",
+    "socket": "ls -lh /var/run/mysqld/ || ls -lh /run/mysqld/",
+    "bind_address": 'grep -Rin "bind-address" /etc/mysql/ /etc/my.cnf /etc/my.cnf.d 2>/dev/null',
+}
+
+
+def mysql_sections(service: str | None = None) -> dict[str, str]:
+    """MYSQL_SECTIONS, skipping the unit listing when the service name is already known"""
+    sections = dict(MYSQL_SECTIONS)
+    if service:
+        sections["service"] = f"svc={service}; echo $svc"
+    return sections
+
+
+def parse_mysql_diagnostics(output: str) -> MySQLDiagnostics:
+    sec = split_sections(output)
+    return MySQLDiagnostics(
+        service=sec.get("service") or "mariadb",
+        version=sec.get("version", ""),
+        status=sec.get("status", ""),
+        port=sec.get("port", ""),
+        socket=sec.get("socket", ""),
+        bind_address=sec.get("bind_address", ""),
+    )
@@ -0,0 +1,254 @@
+"""
+Host resource sampling: CPU (steal and iowait included), memory, load, disk
+I/O and SoC temperature from /proc and /sys/class/thermal.
+
+Everything is read by one awk over all the files (one exec per sample, about
+1 KB back): /proc/stat is cut to its "cpu " and procs_ lines, /proc/meminfo to
+the fields used, and loop/ram devices are dropped from /proc/diskstats on the
+server. Counters become rates on the client, from the difference between two
+readings, and the results are kept in ResourceRing: one preallocated float32
+array per metric, so a host costs 4 bytes per metric per sample however long
+it is watched.
+"""
+import math
+import re
+import time
+from array import array
+from dataclasses import dataclass, field, fields
+
+from .probe import SECTION_MARK, split_sections
+
+DEFAULT_INTERVAL = 2  # seconds between samples
+DEFAULT_CAPACITY = 900  # samples kept per host, 30 min at the default interval
+
+STAT_FILES = ("/proc/stat", "/proc/meminfo", "/proc/diskstats", "/proc/loadavg")
+OPTIONAL_FILES = ("/sys/class/thermal/thermal_zone*/type", "/sys/class/thermal/thermal_zone*/temp",
+                  "/proc/pressure/memory", "/proc/pressure/io")
+
+# Whole devices only: partitions would count the same I/O twice
+WHOLE_DISK = re.compile(r"^(sd[a-z]+|hd[a-z]+|vd[a-z]+|xvd[a-z]+|mmcblk\d+|nvme\d+n\d+|md\d+)$")
+_ZONE = re.compile(r"/thermal_zone(\d+)/(type|temp)$")
+_PSI_AVG10 = re.compile(r"^some avg10=([0-9.]+)", re.M)
+SECTOR_BYTES = 512
+
+
+def resource_script() -> str:
+    """One awk over every file that exists; each file's lines follow a section marker with its path"""
+    optional = " ".join(OPTIONAL_FILES)
+    awk = (
+        f"FNR == 1 {{ print \"{SECTION_MARK} \" FILENAME }} "
+        "FILENAME == \"/proc/stat\" && !/^(cpu |procs_)/ { next } "
+        "FILENAME == \"/proc/meminfo\" && !/^(MemTotal|MemFree|MemAvailable|Buffers|Cached|SwapTotal|SwapFree):/ "
+        "{ next } "
+        "FILENAME == \"/proc/diskstats\" && $3 ~ /^(loop|ram|zram)/ { next } "
+        "{ print }"
+    )
+    return (f"set -- {' '.join(STAT_FILES)}; for f in {optional}; do [ -r \"$f\" ] && set -- \"$@\" \"$f\"; done; "
+            f"awk '{awk}' \"$@\"")
+
+
+@dataclass
+class ResourceReading:
+    """Raw counters of one read; rates need two of them"""
+    ts: float
+    cpu: tuple[int, ...] = ()  # user nice system idle iowait irq softirq steal
+    procs_running: int = 0
+    procs_blocked: int = 0  # tasks in uninterruptible sleep, mostly waiting for I/O
+    meminfo: dict[str, int] = field(default_factory=dict)  # kB
+    disks: dict[str, tuple[int, int, int]] = field(default_factory=dict)  # sectors read, written, ms doing I/O
+    load: tuple[float, float, float] = (0.0, 0.0, 0.0)
+    temps: dict[str, float] = field(default_factory=dict)  # zone type -> °C
+    psi_memory: float | None = None  # "some avg10" %, kernels with PSI only
+    psi_io: float | None = None
+
+
+def parse_resource_output(output: str, ts: float | None = None) -> ResourceReading:
+    sec = split_sections(output)
+    reading = ResourceReading(time.time() if ts is None else ts)
+    for line in sec.get("/proc/stat", "").splitlines():
+        parts = line.split()
+        if parts[0] == "cpu":
+            reading.cpu = tuple(int(v) for v in parts[1:9])
+        elif parts[0] == "procs_running":
+            reading.procs_running = int(parts[1])
+        elif parts[0] == "procs_blocked":
+            reading.procs_blocked = int(parts[1])
+    for line in sec.get("/proc/meminfo", "").splitlines():
+        name, _, value = line.partition(":")
+        if value:
+            reading.meminfo[name] = int(value.split()[0])
+    for line in sec.get("/proc/diskstats", "").splitlines():
+        parts = line.split()
+        if len(parts) >= 13 and WHOLE_DISK.match(parts[2]):
+            reading.disks[parts[2]] = (int(parts[5]), int(parts[9]), int(parts[12]))
+    load = sec.get("/proc/loadavg", "").split()
+    if len(load) >= 3:
+        reading.load = (float(load[0]), float(load[1]), float(load[2]))
+
+    zones: dict[str, dict[str, str]] = {}
+    for name, text in sec.items():
+        m = _ZONE.search(name)
+        if m:
+            zones.setdefault(m.group(1), {})[m.group(2)] = text.strip()
+    for number, zone in sorted(zones.items()):
+        try:
+            reading.temps[zone.get("type") or f"zone{number}"] = int(zone["temp"]) / 1000
+        except (KeyError, ValueError):
+            pass
+    for name, attr in (("/proc/pressure/memory", "psi_memory"), ("/proc/pressure/io", "psi_io")):
+        m = _PSI_AVG10.search(sec.get(name, ""))
+        if m:
+            setattr(reading, attr, float(m.group(1)))
+    if not reading.cpu:
+        raise ValueError(f"/proc/stat okunamadı: {output[:200]!r}")
+    return reading
+
+
+@dataclass
+class ResourceSample:
+    """One point of the charts; rates are None on the first reading"""
+    ts: float
+    cpu_pct: float | None = None
+    steal_pct: float | None = None
+    iowait_pct: float | None = None
+    mem_used_pct: float | None = None
+    mem_available_mb: float | None = None
+    swap_used_pct: float | None = None
+    load1: float | None = None
+    procs_blocked: float | None = None
+    disk_read_kbs: float | None = None
+    disk_write_kbs: float | None = None
+    disk_busy_pct: float | None = None  # busiest device
+    temp_c: float | None = None  # hottest zone
+    psi_memory: float | None = None
+    psi_io: float | None = None
+
+
+SAMPLE_FIELDS = tuple(f.name for f in fields(ResourceSample) if f.name != "ts")
+
+
+def compute_sample(prev: ResourceReading | None, cur: ResourceReading) -> ResourceSample:
+    mem = cur.meminfo
+    sample = ResourceSample(cur.ts, load1=cur.load[0], procs_blocked=cur.procs_blocked,
+                            temp_c=max(cur.temps.values()) if cur.temps else None,
+                            psi_memory=cur.psi_memory, psi_io=cur.psi_io)
+    total = mem.get("MemTotal", 0)
+    if total:
+        # Kernels before 3.14 have no MemAvailable
+        available = mem.get("MemAvailable", mem.get("MemFree", 0) + mem.get("Buffers", 0) + mem.get("Cached", 0))
+        sample.mem_available_mb = available / 1024
+        sample.mem_used_pct = 100.0 * (1 - available / total)
+    if mem.get("SwapTotal"):
+        sample.swap_used_pct = 100.0 * (1 - mem.get("SwapFree", 0) / mem["SwapTotal"])
+
+    if prev is None or len(prev.cpu) != len(cur.cpu):
+        return sample
+    delta = [max(0, c - p) for c, p in zip(cur.cpu, prev.cpu)]
+    ticks = sum(delta)
+    if ticks:
+        idle, iowait, steal = delta[3], delta[4], delta[7] if len(delta) > 7 else 0
+        sample.cpu_pct = 100.0 * (ticks - idle - iowait) / ticks
+        sample.iowait_pct = 100.0 * iowait / ticks
+        sample.steal_pct = 100.0 * steal / ticks
+    elapsed = cur.ts - prev.ts
+    if elapsed > 0:
+        read = written = 0
+        busy = 0.0
+        for name, (sectors_read, sectors_written, io_ms) in cur.disks.items():
+            before = prev.disks.get(name)
+            if before is None:
+                continue
+            read += max(0, sectors_read - before[0])
+            written += max(0, sectors_written - before[1])
+            busy = max(busy, max(0, io_ms - before[2]) / (elapsed * 1000))
+        sample.disk_read_kbs = read * SECTOR_BYTES / 1024 / elapsed
+        sample.disk_write_kbs = written * SECTOR_BYTES / 1024 / elapsed
+        sample.disk_busy_pct = min(100.0, 100.0 * busy)
+    return sample
+
+
+class ResourceRing:
+    """
+    Fixed-size ring of ResourceSamples stored column-wise: one preallocated
+    array per field (float64 timestamps, float32 metrics, NaN for None).
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.ts = array("d", [0.0]) * capacity
+        self.columns = {name: array("f", [math.nan]) * capacity for name in SAMPLE_FIELDS}
+        self.count = 0
+        self._next = 0  # slot the next sample goes into
+
+    def __len__(self) -> int:
+        return self.count
+
+    def append(self, sample: ResourceSample):
+        i = self._next
+        self.ts[i] = sample.ts
+        for name, column in self.columns.items():
+            value = getattr(sample, name)
+            column[i] = math.nan if value is None else value
+        self._next = (i + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def _order(self, column: array) -> list[float]:
+        if self.count < self.capacity:
+            return column[:self.count].tolist()
+        return column[self._next:].tolist() + column[:self._next].tolist()
+
+    def series(self, name: str) -> list[float | None]:
+        """Oldest first; missing values as None"""
+        return [None if math.isnan(v) else v for v in self._order(self.columns[name])]
+
+    def latest(self) -> ResourceSample | None:
+        if not self.count:
+            return None
+        i = (self._next - 1) % self.capacity
+        values = {name: (None if math.isnan(col[i]) else col[i]) for name, col in self.columns.items()}
+        return ResourceSample(self.ts[i], **values)
+
+    def nbytes(self) -> int:
+        return self.ts.itemsize * len(self.ts) + sum(c.itemsize * len(c) for c in self.columns.values())
+
+
+class ResourceSampler:
+    """Readings of one host in, samples into its ring"""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.ring = ResourceRing(capacity)
+        self.last: ResourceReading | None = None
+
+    def feed(self, reading: ResourceReading) -> ResourceSample:
+        sample = compute_sample(self.last, reading)
+        self.last = reading
+        self.ring.append(sample)
+        return sample
+
+
+if __name__ == "__main__":
+    # Cost of one sampling round: python -m backend.resources [hosts]
+    import subprocess
+    import sys
+
+    hosts = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    t0 = time.perf_counter()
+    output = subprocess.run(["sh", "-c", resource_script()], capture_output=True, text=True).stdout
+    read_ms = (time.perf_counter() - t0) * 1000
+    samplers = [ResourceSampler() for _ in range(hosts)]
+    for s in samplers:
+        s.feed(parse_resource_output(output))
+    time.sleep(1)
+    output = subprocess.run(["sh", "-c", resource_script()], capture_output=True, text=True).stdout
+    rounds = 50
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        for s in samplers:
+            s.feed(parse_resource_output(output))
+    client_ms = (time.perf_counter() - t0) * 1000 / rounds
+    print(f"remote read: {read_ms:.1f} ms, {len(output.encode())} bytes")
+    print(f"parse + rates for {hosts} hosts: {client_ms:.2f} ms per round")
+    print(f"ring: {samplers[0].ring.nbytes() / 1024:.0f} KB per host ({DEFAULT_CAPACITY} samples), "
+          f"{hosts * samplers[0].ring.nbytes() / 1024 / 1024:.1f} MB for {hosts} hosts")
+    print(samplers[0].feed(parse_resource_output(
+        subprocess.run(["sh", "-c", resource_script()], capture_output=True, text=True).stdout)))
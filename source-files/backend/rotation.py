@@ -0,0 +1,296 @@
+"""
+Logical logs: a live file plus the copies logrotate left next to it
+(error.log.1, error.log.2.gz ...), read as one log, oldest member first.
+
+The first and last timestamp of every member is kept in a SpanIndex.
+Rotated members do not change any more, so their span is read once per
+session; a time bounded search then skips the archives that ended before
+the window without decompressing them, and only the member the window
+starts in needs a per line time check.
+"""
+import gzip
+import os
+import re
+import shlex
+import threading
+from collections import deque
+from dataclasses import dataclass, replace
+from typing import Callable, Iterator
+
+from .logsearch import CONTEXT_LINES, GREP, parse_context, parse_hit
+from .logtime import TimeFilter, parse_log_time
+
+ROTATED_SUFFIX = re.compile(r"\.(\d+)(\.gz)?$")
+FILE_MARK = "@@FILE"
+SPAN_MARK = "@@SPAN"
+SPAN_SAMPLE_LINES = 20  # lines read at both ends of a member to find its span
+SPAN_SAMPLE_BYTES = 64 * 1024
+
+ChainHit = tuple[str, int, int, str]  # (member path, line number 1 based, byte offset, line)
+
+
+@dataclass(frozen=True)
+class ChainMember:
+    path: str
+    inode: int
+    size: int
+    mtime: float
+    first_ts: float | None = None
+    last_ts: float | None = None
+
+    @property
+    def compressed(self) -> bool:
+        return self.path.endswith(".gz")
+
+    @property
+    def key(self) -> tuple[int, int, float]:
+        return self.inode, self.size, self.mtime
+
+
+def rotation_number(path: str, member: str) -> int | None:
+    """0 for the live file, N for path.N / path.N.gz, None for anything else"""
+    if member == path:
+        return 0
+    if not member.startswith(path + "."):
+        return None
+    m = ROTATED_SUFFIX.match(member[len(path):])
+    return int(m.group(1)) if m else None
+
+
+def order_chain(path: str, members: list[ChainMember]) -> list[ChainMember]:
+    """Members of path's rotation chain, oldest first: path.N.gz ... path.1, path"""
+    numbered = [(rotation_number(path, m.path), m) for m in members]
+    # error.log.1 next to a stale error.log.1.gz: keep the first one seen
+    seen = set()
+    chain = []
+    for number, m in sorted((p for p in numbered if p[0] is not None), key=lambda p: -p[0]):
+        if number not in seen:
+            seen.add(number)
+            chain.append(m)
+    return chain
+
+
+def span_of(head: list[str], tail: list[str]) -> tuple[float | None, float | None]:
+    """First timestamp found in the head lines, last one found in the tail lines"""
+    first = next((ts for ts in map(parse_log_time, head) if ts is not None), None)
+    last = next((ts for ts in map(parse_log_time, reversed(tail)) if ts is not None), None)
+    return first, last
+
+
+class SpanIndex:
+    """
+    (first, last) timestamps of chain members, keyed by path and checked
+    against (inode, size, mtime): a live file that grew, or an archive that
+    logrotate replaced, is read again.
+    """
+
+    def __init__(self):
+        self._spans: dict[str, tuple[tuple, tuple[float | None, float | None]]] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, members: list[ChainMember],
+                read_spans: Callable[[list[ChainMember]], dict[str, tuple]]) -> list[ChainMember]:
+        """Returns members with their span filled in; read_spans is only called for unknown ones"""
+        with self._lock:
+            missing = [m for m in members if self._spans.get(m.path, (None,))[0] != m.key]
+        fresh = read_spans(missing) if missing else {}
+        with self._lock:
+            for m in missing:
+                self._spans[m.path] = (m.key, fresh.get(m.path, (None, None)))
+            return [replace(m, first_ts=self._spans[m.path][1][0], last_ts=self._spans[m.path][1][1])
+                    for m in members]
+
+
+def select_members(chain: list[ChainMember], since: float | None) -> list[tuple[ChainMember, bool]]:
+    """
+    Members a query for lines at or after `since` has to read, oldest first,
+    each with whether its lines still need a time check. Members whose first
+    line is already inside the window are read without one.
+    """
+    if since is None:
+        return [(m, False) for m in chain]
+    selected = []
+    last = len(chain) - 1
+    for i, m in enumerate(chain):
+        ended = m.last_ts if m.last_ts is not None else m.mtime
+        # The live file is always read: its last line is "now"
+        if i != last and ended < since:
+            continue
+        selected.append((m, m.first_ts is None or m.first_ts < since))
+    return selected
+
+
+# --- remote side (shell) ---
+
+def build_chain_listing_script(path: str) -> str:
+    """Prints "<path>\\t<inode>\\t<size>\\t<mtime>" for path and path.<N>[.gz]"""
+    path_q = shlex.quote(path)
+    return f"stat --printf '%n\\t%i\\t%s\\t%Y\\n' -- {path_q} {path_q}.[0-9]* 2>/dev/null; true"
+
+
+def parse_chain_listing(path: str, out: str) -> list[ChainMember]:
+    members = []
+    for line in out.splitlines():
+        parts = line.split("\t")
+        if len(parts) != 4:
+            continue
+        try:
+            members.append(ChainMember(parts[0], int(parts[1]), int(parts[2]), float(parts[3])))
+        except ValueError:
+            continue
+    return order_chain(path, members)
+
+
+def _cat(member: ChainMember) -> str:
+    path_q = shlex.quote(member.path)
+    return f"gzip -dc -- {path_q}" if member.compressed else f"cat -- {path_q}"
+
+
+def build_span_script(members: list[ChainMember]) -> str:
+    parts = []
+    for m in members:
+        path_q = shlex.quote(m.path)
+        # A newline before each mark, the sample may end without one
+        tail = f"gzip -dc -- {path_q} | tail -n {SPAN_SAMPLE_LINES}" if m.compressed \
+            else f"tail -n {SPAN_SAMPLE_LINES} -- {path_q}"
+        parts.append(
+            f"printf '\\n{SPAN_MARK} head %s\\n' {path_q}; {_cat(m)} 2>/dev/null | head -n {SPAN_SAMPLE_LINES}; "
+            f"printf '\\n{SPAN_MARK} tail %s\\n' {path_q}; {tail} 2>/dev/null"
+        )
+    return "; ".join(parts) + "; true"
+
+
+def parse_span_output(out: str) -> dict[str, tuple[float | None, float | None]]:
+    samples: dict[str, dict[str, list[str]]] = {}
+    current = None
+    for line in out.splitlines():
+        if line.startswith(SPAN_MARK + " "):
+            _, end, path = line.split(" ", 2)
+            current = samples.setdefault(path, {"head": [], "tail": []})[end]
+        elif line and current is not None:
+            current.append(line)
+    return {path: span_of(s["head"], s["tail"]) for path, s in samples.items()}
+
+
+def keep_newest(members, max_hits: int) -> list[ChainHit]:
+    """
+    members: (path, its hits in file order), newest member first. Returns the
+    last max_hits hits across them, oldest first; the members behind the
+    ones that filled the limit are never searched.
+    """
+    kept: list[deque] = []
+    room = max_hits
+    for path, hits in members:
+        if room <= 0:
+            break
+        kept.append(deque(((path,) + hit for hit in hits), maxlen=room))
+        room -= len(kept[-1])
+    return [hit for block in reversed(kept) for hit in block]
+
+
+def build_chain_search_script(selected: list[tuple[ChainMember, bool]], pattern: str, max_hits: int = 300) -> str:
+    """
+    One grep per member, newest first, each preceded by "@@FILE <path>".
+    Only the last max_hits hits of a member are sent; the member the window
+    starts in sends all of them with grep's context lines, for the time check.
+    Archives are inflated on the fly; nothing is written on the server.
+    """
+    parts = []
+    for m, filtered in reversed(selected):
+        grep = f"{GREP} -n -b --line-buffered -e {shlex.quote(pattern)}"
+        if filtered:
+            grep += f" -B {CONTEXT_LINES}"
+        else:
+            grep += f" | tail -n {int(max_hits)}"
+        parts.append(f"printf '{FILE_MARK} %s\\n' {shlex.quote(m.path)}; {_cat(m)} 2>/dev/null | {grep}")
+    # grep exits 1 when the last member had no match; that is not a failure
+    return "; ".join(parts) + "; true"
+
+
+def iter_chain_hits(lines, selected: list[tuple[ChainMember, bool]], since: float | None,
+                    max_hits: int = 300) -> Iterator[ChainHit]:
+    """The newest max_hits hits of build_chain_search_script's output, oldest first"""
+    filtered = {m.path for m, needs_check in selected if needs_check}
+    kept: list[deque] = []
+    path, time_filter = None, None
+    room = max_hits
+    for raw in lines:
+        if raw.startswith(FILE_MARK + " "):
+            room -= len(kept[-1]) if kept else 0
+            if room <= 0:
+                break
+            path = raw[len(FILE_MARK) + 1:]
+            time_filter = TimeFilter(since) if since is not None and path in filtered else None
+            kept.append(deque(maxlen=room))
+            continue
+        hit = parse_hit(raw, (0, 0)) if path else None
+        if hit is None:
+            context = parse_context(raw) if time_filter else None
+            if context is not None:
+                time_filter.see(context)
+            continue
+        if time_filter and not time_filter.accept(hit[2]):
+            continue
+        kept[-1].append((path,) + hit)
+    yield from (hit for block in reversed(kept) for hit in block)
+
+
+def build_last_matches_script(chain: list[ChainMember], pattern: str, count: int) -> str:
+    """
+    The last `count` lines matching pattern across the chain, oldest first.
+    Members are read newest first and backwards, one at a time: once enough
+    lines matched, the archives behind are never opened (tac reads a whole
+    member before grep can stop it).
+    """
+    count = int(count)
+    grep = f"{GREP} -m $(({count} - n)) -e {shlex.quote(pattern)}"
+    # add: puts a member's matches (already oldest first) before the newer ones collected so far
+    parts = ["n=0; acc=''; add() { [ -n \"$1\" ] || return 0; acc=\"$1\n$acc\"; "
+             "n=$((n + $(printf '%s\\n' \"$1\" | wc -l))); }"]
+    for i, m in enumerate(reversed(chain)):
+        path_q = shlex.quote(m.path)
+        reader = f"gzip -dc -- {path_q} 2>/dev/null | tac" if m.compressed else f"tac -- {path_q} 2>/dev/null"
+        parts.append(f"{'' if i == 0 else f'[ $n -ge {count} ] || '}add \"$({reader} | {grep} | tac)\"")
+    parts.append("printf '%s' \"$acc\"")
+    return "; ".join(parts)
+
+
+# --- local side ---
+
+def list_chain(path: str) -> list[ChainMember]:
+    folder, name = os.path.split(path)
+    try:
+        entries = os.listdir(folder or ".")
+    except OSError:
+        return []
+    members = []
+    for entry in entries:
+        if entry != name and not entry.startswith(name + "."):
+            continue
+        full = os.path.join(folder, entry)
+        try:
+            st = os.stat(full)
+        except OSError:
+            continue
+        members.append(ChainMember(full, st.st_ino, st.st_size, st.st_mtime))
+    return order_chain(path, members)
+
+
+def read_span(member: ChainMember) -> tuple[float | None, float | None]:
+    try:
+        if member.compressed:
+            head, tail = [], deque(maxlen=SPAN_SAMPLE_LINES)
+            with gzip.open(member.path, "rb") as f:
+                for raw in f:
+                    line = raw.decode("utf-8", "replace")
+                    if len(head) < SPAN_SAMPLE_LINES:
+                        head.append(line)
+                    tail.append(line)
+            return span_of(head, list(tail))
+        with open(member.path, "rb") as f:
+            head = f.read(SPAN_SAMPLE_BYTES).decode("utf-8", "replace").splitlines()[:SPAN_SAMPLE_LINES]
+            f.seek(max(0, member.size - SPAN_SAMPLE_BYTES))
+            tail = f.read(SPAN_SAMPLE_BYTES).decode("utf-8", "replace").splitlines()[-SPAN_SAMPLE_LINES:]
+        return span_of(head, tail)
+    except (OSError, EOFError):
+        return None, None
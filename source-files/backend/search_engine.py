@@ -0,0 +1,417 @@
+"""
+In-process log search used by LocalBackend (app running on the server itself).
+
+Plain files are mmap'ed and scanned in large line-aligned blocks, so no
+shell pipeline is spawned and nothing is read that the scope does not need:
+the start of the last N lines is found by scanning backwards from EOF, and a
+time bound is turned into a start offset by bisecting over timestamps.
+Rotated archives (error.log.1, error.log.2.gz ...) are read as streams.
+
+Patterns are matched case-insensitively on bytes (ASCII case folding).
+Patterns without regex metacharacters take a literal fast path
+(bytes.find on the lowercased block); several patterns are matched in the
+same pass.
+"""
+import gzip
+import mmap
+import os
+import re
+import threading
+from collections import deque
+from typing import Callable, Iterator
+
+from .logsearch import CONTEXT_LINES, SCOPE_TAIL, SCOPE_FULL, SCOPE_SINCE
+from .logtime import TimeFilter, parse_log_time
+from .rotation import ROTATED_SUFFIX
+
+BLOCK_SIZE = 4 * 1024 * 1024
+_REGEX_META = set(".^$*+?{}[]\\|()")
+
+Hit = tuple[int, int, str]  # (line number 1 based, byte offset, line)
+
+
+class Matcher:
+    """Finds lines containing any of the patterns inside a block of whole lines"""
+
+    def __init__(self, patterns: list[str]):
+        self.patterns = [p for p in patterns if p]
+        if not self.patterns:
+            raise ValueError("empty pattern")
+        if all(not (set(p) & _REGEX_META) for p in self.patterns):
+            # Literal fast path: one bytes.find pass per needle, on the
+            # lowercased block only when a needle has letters
+            self._needles = [p.lower().encode("utf-8") for p in self.patterns]
+            self._fold = any(n != n.upper() for n in self._needles)
+            self._regex = None
+        else:
+            self._needles = []
+            self._fold = False
+            self._regex = re.compile(b"|".join(b"(?:" + p.encode("utf-8") + b")" for p in self.patterns),
+                                     re.IGNORECASE | re.MULTILINE)
+
+    def lines(self, block: bytes) -> list[tuple[int, int]]:
+        """(start, end) of each matching line, in order; end excludes the newline"""
+        spans: dict[int, int] = {}
+        if self._regex is not None:
+            pos = 0
+            while True:
+                m = self._regex.search(block, pos)
+                if not m:
+                    break
+                pos = self._add_line(spans, block, m.start())
+            return list(spans.items())
+
+        hay = block.lower() if self._fold else block
+        for needle in self._needles:
+            pos = hay.find(needle)
+            while pos != -1:
+                pos = hay.find(needle, self._add_line(spans, block, pos))
+        return sorted(spans.items()) if len(self._needles) > 1 else list(spans.items())
+
+    @staticmethod
+    def _add_line(spans: dict[int, int], block: bytes, at: int) -> int:
+        start = block.rfind(b"\n", 0, at) + 1
+        end = block.find(b"\n", at)
+        if end == -1:
+            end = len(block)
+        spans[start] = end
+        return end + 1
+
+
+def _aligned_blocks(buf, start: int, end: int, block_size: int = BLOCK_SIZE) -> Iterator[tuple[int, bytes]]:
+    """Splits buf[start:end] into blocks that end on a newline (or at `end`)"""
+    pos = start
+    while pos < end:
+        stop = min(end, pos + block_size)
+        if stop < end:
+            nl = buf.rfind(b"\n", pos, stop)
+            if nl == -1:
+                nl = buf.find(b"\n", stop, end)  # line longer than a block
+            stop = end if nl == -1 else nl + 1
+        yield pos, buf[pos:stop]
+        pos = stop
+
+
+def _stream_blocks(f, block_size: int = BLOCK_SIZE) -> Iterator[tuple[int, bytes]]:
+    """Same as _aligned_blocks for a file object that cannot be mmap'ed (gzip)"""
+    pos, carry = 0, b""
+    while True:
+        chunk = f.read(block_size)
+        if not chunk:
+            if carry:
+                yield pos, carry
+            return
+        data = carry + chunk
+        nl = data.rfind(b"\n")
+        if nl == -1:
+            carry = data
+            continue
+        yield pos, data[:nl + 1]
+        pos += nl + 1
+        carry = data[nl + 1:]
+
+
+def tail_offset(buf, lines: int, block_size: int = BLOCK_SIZE) -> int:
+    """Byte offset where the last `lines` lines of buf start, scanning backwards from EOF"""
+    end = len(buf)
+    if end and buf[end - 1:end] == b"\n":
+        end -= 1  # the final newline does not start a line
+    need = lines
+    while need > 0 and end > 0:
+        start = max(0, end - block_size)
+        block = buf[start:end]
+        found = block.count(b"\n")
+        if found >= need:
+            idx = len(block)
+            for _ in range(need):
+                idx = block.rfind(b"\n", 0, idx)
+            return start + idx + 1
+        need -= found
+        end = start
+    return 0
+
+
+def time_offset(buf, since: float, probe_lines: int = 50) -> int:
+    """
+    Bisects buf for the first line logged at or after `since`. Lines without
+    a timestamp are skipped while probing; the result may start slightly
+    early, callers still filter each line.
+    """
+    def stamp_after(pos: int) -> tuple[float | None, int]:
+        # Timestamp of the first dated line at or after pos, and that line's start
+        if pos:
+            nl = buf.find(b"\n", pos - 1)
+            pos = len(buf) if nl == -1 else nl + 1
+        for _ in range(probe_lines):
+            if pos >= len(buf):
+                return None, len(buf)
+            nl = buf.find(b"\n", pos)
+            end = len(buf) if nl == -1 else nl
+            ts = parse_log_time(buf[pos:end].decode("utf-8", "replace"))
+            if ts is not None:
+                return ts, pos
+            pos = end + 1
+        return None, pos
+
+    lo, hi = 0, len(buf)
+    while hi - lo > 4096:
+        mid = (lo + hi) // 2
+        ts, _ = stamp_after(mid)
+        if ts is None or ts >= since:
+            hi = mid
+        else:
+            lo = mid
+    return 0 if lo == 0 else stamp_after(lo)[1]
+
+
+def _count_lines(buf, end: int) -> int:
+    return sum(block.count(b"\n") for _, block in _aligned_blocks(buf, 0, end))
+
+
+def _dated_before(block: bytes, pos: int, max_lines: int = CONTEXT_LINES) -> str | None:
+    """The closest line before `pos` (a line start) in block that carries a timestamp"""
+    end = pos - 1  # newline ending the previous line
+    for _ in range(max_lines):
+        if end < 0:
+            return None
+        start = block.rfind(b"\n", 0, end) + 1
+        line = block[start:end].decode("utf-8", "replace")
+        if parse_log_time(line) is not None:
+            return line
+        end = start - 1
+    return None
+
+
+def _scan(blocks, matcher: Matcher, first_line: int, time_filter: TimeFilter | None,
+          cancel_event: threading.Event | None,
+          line_at: Callable[[int], int] | None = None) -> Iterator[Hit]:
+    """
+    Matches every block. Line numbers come from a running newline count, or,
+    with line_at, are looked up only for blocks that contain a hit.
+    """
+    line_no = first_line
+    for block_off, block in blocks:
+        if cancel_event and cancel_event.is_set():
+            return
+        spans = matcher.lines(block)
+        if not spans:
+            if line_at is None:
+                line_no += block.count(b"\n")
+            continue
+        if line_at is not None:
+            line_no = line_at(block_off)
+        counted = 0
+        for start, end in spans:
+            line_no += block.count(b"\n", counted, start)
+            counted = start
+            line = block[start:end].rstrip(b"\r").decode("utf-8", "replace")
+            if time_filter:
+                # Only matching lines pass by: an undated one takes the time of the dated line before it
+                if parse_log_time(line) is None:
+                    dated = _dated_before(block, start)
+                    if dated is not None:
+                        time_filter.see(dated)
+                if not time_filter.accept(line):
+                    continue
+            yield line_no + 1, block_off + start, line
+        line_no += block.count(b"\n", counted)
+
+
+def search_file(path: str, patterns: list[str], scope: str = SCOPE_TAIL, tail_lines: int = 5000,
+                since: float | None = None, max_hits: int = 300,
+                cancel_event: threading.Event | None = None,
+                line_at: Callable[[int], int] | None = None) -> Iterator[Hit]:
+    """
+    Yields (line_no, byte_offset, line) like Backend.search_stream.
+    `line_at(offset)` may supply the line number at a byte offset (from a
+    line index) instead of counting newlines up to the scan start.
+    """
+    matcher = Matcher(patterns)
+    time_filter = TimeFilter(since) if scope == SCOPE_SINCE and since is not None else None
+    hits = 0
+    if path.endswith(".gz"):
+        source = _search_gz(path, matcher, scope, tail_lines, time_filter, cancel_event)
+    else:
+        source = _search_plain(path, matcher, scope, tail_lines, since, time_filter, cancel_event, line_at)
+    for hit in source:
+        yield hit
+        hits += 1
+        if hits >= max_hits:
+            return
+
+
+def _search_plain(path, matcher, scope, tail_lines, since, time_filter, cancel_event, line_at):
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if scope == SCOPE_TAIL:
+                start = tail_offset(mm, tail_lines)
+            elif scope == SCOPE_SINCE and since is not None:
+                start = time_offset(mm, since)
+                # The scan starts at the window only if a dated line opens it; a log
+                # without timestamps has no line known to be in the window (as on the server)
+                nl = mm.find(b"\n", start)
+                time_filter.see(mm[start:size if nl == -1 else nl].decode("utf-8", "replace"))
+            else:
+                start = 0
+            first_line = 0 if start == 0 or line_at else _count_lines(mm, start)
+            yield from _scan(_aligned_blocks(mm, start, size), matcher, first_line, time_filter, cancel_event,
+                             line_at)
+
+
+def _search_gz(path, matcher, scope, tail_lines, time_filter, cancel_event):
+    with gzip.open(path, "rb") as f:
+        if scope != SCOPE_TAIL:
+            yield from _scan(_stream_blocks(f), matcher, 0, time_filter, cancel_event)
+            return
+        # Line count is only known at the end: keep hits that may be in the last N lines
+        window: deque[Hit] = deque()
+        total = 0
+
+        def counting_blocks():
+            nonlocal total
+            for off, block in _stream_blocks(f):
+                total += block.count(b"\n") + (0 if block.endswith(b"\n") else 1)
+                while window and window[0][0] <= total - tail_lines:
+                    window.popleft()
+                yield off, block
+
+        for hit in _scan(counting_blocks(), matcher, 0, None, cancel_event):
+            window.append(hit)
+        for hit in window:
+            if hit[0] > total - tail_lines:
+                yield hit
+
+
+def rotated_siblings(path: str) -> list[str]:
+    """Rotated copies of path, newest first: path.1, path.2.gz, path.3.gz ..."""
+    folder, name = os.path.split(path)
+    found = []
+    try:
+        entries = os.listdir(folder or ".")
+    except OSError:
+        return []
+    for entry in entries:
+        if not entry.startswith(name + "."):
+            continue
+        m = ROTATED_SUFFIX.match(entry[len(name):])
+        if m:
+            found.append((int(m.group(1)), os.path.join(folder, entry)))
+    return [p for _, p in sorted(found)]
+
+
+def last_matching_lines(path: str, patterns: list[str], count: int, include_rotated: bool = True) -> list[str]:
+    """
+    The last `count` lines matching any pattern, oldest first. The current
+    file is scanned backwards from EOF and rotated archives are only opened
+    when it holds fewer matches.
+    """
+    matcher = Matcher(patterns)
+    found: list[list[str]] = []  # newest file first
+    need = count
+    for file_path in [path] + (rotated_siblings(path) if include_rotated else []):
+        if need <= 0:
+            break
+        try:
+            lines = _last_in_file(file_path, matcher, need)
+        except OSError:
+            continue
+        found.append(lines)
+        need -= len(lines)
+    out = [line for lines in reversed(found) for line in lines]
+    return out[-count:] if count else []
+
+
+def _last_in_file(path: str, matcher: Matcher, need: int) -> list[str]:
+    if path.endswith(".gz"):
+        last = deque(maxlen=need)
+        with gzip.open(path, "rb") as f:
+            for _, block in _stream_blocks(f):
+                for start, end in matcher.lines(block):
+                    last.append(block[start:end])
+        return [b.rstrip(b"\r").decode("utf-8", "replace") for b in last]
+
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            chunks: list[list[bytes]] = []
+            got, end = 0, size
+            while end > 0 and got < need:
+                start = max(0, end - BLOCK_SIZE)
+                if start:
+                    nl = mm.rfind(b"\n", 0, start)  # back up to a line start
+                    start = nl + 1
+                block = mm[start:end]
+                hits = [block[s:e] for s, e in matcher.lines(block)]
+                chunks.append(hits)
+                got += len(hits)
+                end = start
+    lines = [b for hits in reversed(chunks) for b in hits][-need:]
+    return [b.rstrip(b"\r").decode("utf-8", "replace") for b in lines]
+
+
+if __name__ == "__main__":
+    # Benchmark against the shell pipeline: python -m backend.search_engine [size_mb | path]
+    import shlex
+    import subprocess
+    import sys
+    import tempfile
+    import time
+    from .line_index import LineIndex
+
+    arg = sys.argv[1] if len(sys.argv) > 1 else "1024"
+    tmp = None
+    if os.path.exists(arg):
+        target = arg
+    else:
+        size_mb = int(arg)
+        tmp = tempfile.NamedTemporaryFile(prefix="rsc_bench_", suffix=".log", delete=False)
+        target = tmp.name
+        line = (b'192.168.1.20 - - [27/Oct/2023:10:00:00 +0000] "GET /api/item?id=42 HTTP/1.1" 200 512 '
+                b'"-" "Mozilla/5.0"\n')
+        rare = b"2023/10/27 10:00:00 [error] 1234#0: *1 upstream timed out while reading response header\n"
+        block = line * 9999 + rare
+        with tmp:
+            for _ in range(size_mb * 1024 * 1024 // len(block) + 1):
+                tmp.write(block)
+        print(f"generated {os.path.getsize(target) / 1024 ** 2:.0f} MB in {target}")
+
+    def timed(label, fn):
+        t0 = time.perf_counter()
+        n = fn()
+        print(f"  {label:<34} {time.perf_counter() - t0:8.3f}s  {n} hits")
+
+    q = shlex.quote(target)
+    pipe = lambda cmd: len(subprocess.run(cmd, shell=True, capture_output=True).stdout.splitlines())
+    bench_file = open(target, "rb")
+    try:
+        # Warm the page cache so both sides read from memory
+        pipe(f"cat {q} > /dev/null")
+        index = LineIndex()
+        timed("line index build (once per file)", lambda: index.update(
+            bench_file, os.fstat(bench_file.fileno()).st_ino, os.path.getsize(target)) or 0)
+        line_at = lambda offset: index.line_at(bench_file, offset)
+
+        print("last 5000 lines, 'error':")
+        timed("tail | grep -n -i | head", lambda: pipe(f"tail -n 5000 {q} | grep -n --color=never -i error | head -n 300"))
+        timed("search_file (tail)", lambda: len(list(search_file(target, ["error"], SCOPE_TAIL, 5000))))
+        timed("search_file (tail, indexed)", lambda: len(list(search_file(target, ["error"], SCOPE_TAIL, 5000, line_at=line_at))))
+        print("whole file, rare literal:")
+        timed("grep -n -i | head", lambda: pipe(f"grep -n --color=never -i 'timed out' {q} | head -n 100000"))
+        timed("search_file (full)", lambda: len(list(search_file(target, ["timed out"], SCOPE_FULL, max_hits=100000))))
+        timed("search_file (full, indexed)", lambda: len(list(search_file(target, ["timed out"], SCOPE_FULL, max_hits=100000, line_at=line_at))))
+        print("whole file, two patterns:")
+        timed("grep -E -n -i | head", lambda: pipe(f"grep -E -n --color=never -i 'timed out|refused' {q} | head -n 100000"))
+        timed("search_file (full, 2 literals)", lambda: len(list(search_file(target, ["timed out", "refused"], SCOPE_FULL, max_hits=100000, line_at=line_at))))
+        timed("search_file (full, regex)", lambda: len(list(search_file(target, ["timed (out|in)"], SCOPE_FULL, max_hits=100000, line_at=line_at))))
+        print("last 20 matching lines (check_php_errors):")
+        timed("grep -i | tail", lambda: pipe(f"grep -i timed {q} | tail -n 20"))
+        timed("last_matching_lines", lambda: len(last_matching_lines(target, ["timed"], 20)))
+    finally:
+        bench_file.close()
+        if tmp is not None:
+            os.unlink(target)
@@ -46,7 +46,10 @@ class SettingsManager:
             user=last.get("user", "pi"),
             port=last.get("port", 22),
             key_path=last.get("key_path", ""),
-            use_sudo_nopass=last.get("use_sudo_nopass", True)
+            use_sudo_nopass=last.get("use_sudo_nopass", True),
+            use_agent=last.get("use_agent", False),
+            keepalive_interval=last.get("keepalive_interval", 15),
+            reconnect_attempts=last.get("reconnect_attempts", 5)
             # Password is deliberately NOT saved for security, user asked for it to be requested
         )
 
@@ -59,8 +62,22 @@ class SettingsManager:
             "user": cfg.user,
             "port": cfg.port,
             "key_path": cfg.key_path,
-            "use_sudo_nopass": cfg.use_sudo_nopass
+            "use_sudo_nopass": cfg.use_sudo_nopass,
+            "use_agent": cfg.use_agent,
+            "keepalive_interval": cfg.keepalive_interval,
+            "reconnect_attempts": cfg.reconnect_attempts
             # No password saved
         }
         SettingsManager.save_settings(data)
 
+    @staticmethod
+    def load_fleet_hosts() -> list[dict]:
+        data = SettingsManager.load_settings()
+        return data.get("fleet_hosts", [])
+
+    @staticmethod
+    def save_fleet_hosts(hosts: list[dict]):
+        # Same rule as last_connection: no passwords on disk
+        data = SettingsManager.load_settings()
+        data["fleet_hosts"] = hosts
+        SettingsManager.save_settings(data)
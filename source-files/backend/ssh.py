@@ -1,7 +1,119 @@
 import paramiko
+import json
 import os
-from .base import Backend, BackendError
+import select
+import shlex
+import socket
+import threading
+import time
+import uuid
+import zlib
+from typing import Callable, Iterator
+from .base import DB_ERROR_PATTERN, PHP_ERROR_LOG, Backend, BackendError, cut_at_last_line, line_blocks
 from .config import ConnConfig
+from .access_log import aggregate_args
+from .agent import AGGREGATE_TOOL_SOURCE, FPM_TOOL_SOURCE, INDEX_TOOL_SOURCE, RemoteAgent
+from .fpm_monitor import FpmPoolStatus
+from .resources import ResourceReading, parse_resource_output, resource_script
+from .mysql_metrics import PyMySQLSource, metrics_script, parse_metrics_output
+from .logsearch import GREP, SCOPE_TAIL, SCOPE_SINCE, build_search_script, iter_hits
+from .bundle import build_bundle_script, save_bundle
+from .rotation import (
+    ChainHit, ChainMember, SpanIndex, build_chain_listing_script, build_chain_search_script,
+    build_last_matches_script, build_span_script, iter_chain_hits, parse_chain_listing, parse_span_output,
+    select_members,
+)
+from .inventory import INVENTORY_ROOT, InventoryDelta, build_inventory_script, parse_inventory_output
+from .transfer import DownloadCancelled, ProgressFn, copy_chunks, finish, part_path, resume_offset
+from .probe import (
+    MySQLDiagnostics, StatusSnapshot, PROBE_SECTIONS, build_section_script, mysql_sections,
+    mysql_service_from_units, parse_mysql_diagnostics, parse_probe_output,
+)
+
+# Streaming commands (search...)
+STREAM_RECV_SIZE = 64 * 1024
+STREAM_POLL = 0.2  # seconds between cancellation checks when idle
+
+# Connection upkeep
+CONNECT_TIMEOUT = 10
+CHANNEL_OPEN_TIMEOUT = 10
+HEALTH_CHECK_TIMEOUT = 5
+HEALTH_CHECK_IDLE = 30  # seconds without traffic before a transport is probed before use
+RECONNECT_BASE_DELAY = 0.5  # doubled after every failed attempt
+RECONNECT_MAX_DELAY = 8.0
+
+# Downloads
+DOWNLOAD_WINDOW = 16 * 1024 * 1024  # SSH channel window, avoids stalling on flow control
+# SFTP reads are prefetched (all requests in flight at once) one span at a time;
+# a cancel then leaves at most one span of requests behind
+DOWNLOAD_SPAN = 8 * 1024 * 1024
+
+class PortForward:
+    """
+    Local TCP port (127.0.0.1, chosen by the OS) tunnelled to
+    remote_host:remote_port on the server through direct-tcpip channels of
+    the shared transport, like 'ssh -L'. Each accepted client gets its own
+    channel and pump thread. A client whose channel cannot be opened is
+    disconnected; `error` then says why, for the caller to report.
+    """
+
+    def __init__(self, transport: Callable[[], paramiko.Transport], remote_host: str, remote_port: int):
+        self.transport = transport
+        self.remote = (remote_host, int(remote_port))
+        self.error: str | None = None  # why the last client could not be forwarded
+        self._closed = threading.Event()
+        self._listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._listener.bind(("127.0.0.1", 0))
+        self._listener.listen(4)
+        self.port = self._listener.getsockname()[1]
+        threading.Thread(target=self._accept, name=f"forward-{self.port}", daemon=True).start()
+
+    def _accept(self):
+        while not self._closed.is_set():
+            try:
+                client, origin = self._listener.accept()
+            except OSError:
+                break  # listener closed
+            try:
+                chan = self.transport().open_channel("direct-tcpip", self.remote, origin,
+                                                     timeout=CHANNEL_OPEN_TIMEOUT)
+            except Exception as e:
+                # Set before the client sees the connection drop
+                self.error = f"SSH yönlendirmesi açılamadı {self.remote[0]}:{self.remote[1]}: {e}"
+                client.close()
+                continue
+            self.error = None
+            threading.Thread(target=self._pump, args=(client, chan), daemon=True).start()
+
+    def _pump(self, client: socket.socket, chan: paramiko.Channel):
+        try:
+            while not self._closed.is_set():
+                readable, _, _ = select.select([client, chan], [], [], STREAM_POLL)
+                if client in readable:
+                    data = client.recv(STREAM_RECV_SIZE)
+                    if not data:
+                        break
+                    chan.sendall(data)
+                if chan in readable:
+                    data = chan.recv(STREAM_RECV_SIZE)
+                    if not data:
+                        break
+                    client.sendall(data)
+        except (OSError, EOFError, paramiko.SSHException):
+            pass
+        finally:
+            chan.close()
+            client.close()
+
+    def close(self):
+        self._closed.set()
+        try:
+            # close() alone does not wake the accept() blocked in _accept on Linux
+            self._listener.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._listener.close()
+
 
 class SSHBackend(Backend):
     """
@@ -11,6 +123,17 @@ class SSHBackend(Backend):
     def __init__(self, cfg: ConnConfig):
         self.cfg = cfg
         self.client = None
+        self.agent: RemoteAgent | None = None
+        # Metrics, see connection_stats()
+        self.handshake_ms = 0.0
+        self.reconnects = 0
+        self.last_drop = ""
+        self._conn_lock = threading.RLock()
+        self._agent_lock = threading.Lock()  # jobs run in parallel: only one may start the agent
+        self._last_ok = 0.0
+        self._spans = SpanIndex()
+        self._mysql_service: str | None = None  # detected once per connection
+        self._sudo_nginx_version: str | None = None  # sudo fallback's answer, found or not
         self._connect()
 
     def _connect(self):
@@ -22,7 +145,7 @@ class SSHBackend(Backend):
                 "hostname": self.cfg.host,
                 "port": self.cfg.port,
                 "username": self.cfg.user,
-                "timeout": 10
+                "timeout": CONNECT_TIMEOUT
             }
             
             if self.cfg.password:
@@ -36,26 +159,147 @@ class SSHBackend(Backend):
             if self.cfg.key_path:
                 connect_kwargs["key_filename"] = self.cfg.key_path
                 
+            t0 = time.perf_counter()
             self.client.connect(**connect_kwargs)
+            self.handshake_ms = (time.perf_counter() - t0) * 1000
+            # Keepalives stop NAT boxes / Wi-Fi power saving from silently dropping an idle session
+            if self.cfg.keepalive_interval > 0:
+                self.client.get_transport().set_keepalive(self.cfg.keepalive_interval)
+            self._last_ok = time.monotonic()
             
         except Exception as e:
-            raise BackendError(f"SSH Bağlantı Hatası: {e}")
+            raise BackendError(f"SSH Bağlantı Hatası: {e}") from e
+
+    def _close_client(self):
+        if self.agent is not None:
+            self.agent.close()
+            self.agent = None
+        if self.client is not None:
+            try:
+                self.client.close()
+            except Exception:
+                pass
+        self.client = None
+
+    def reconnect(self):
+        """
+        Replaces the transport with a fresh one, retrying with exponential
+        backoff. Wrong credentials are not retried.
+        """
+        with self._conn_lock:
+            self._close_client()
+            attempts = max(1, self.cfg.reconnect_attempts)
+            delay = RECONNECT_BASE_DELAY
+            for attempt in range(attempts):
+                try:
+                    self._connect()
+                    self.reconnects += 1
+                    return
+                except BackendError as e:
+                    if isinstance(e.__cause__, paramiko.AuthenticationException) or attempt + 1 == attempts:
+                        raise
+                    print(f"[SSH] yeniden bağlanma denemesi {attempt + 1}/{attempts}: {e}")
+                time.sleep(delay)
+                delay = min(delay * 2, RECONNECT_MAX_DELAY)
+
+    def is_alive(self) -> bool:
+        transport = self.client.get_transport() if self.client else None
+        return bool(transport and transport.is_active())
+
+    def health_check(self) -> bool:
+        """
+        Round trip on the transport (a channel open/close). A transport that
+        does not answer is closed so every user of it sees the drop.
+        """
+        if not self.is_alive():
+            return False
+        transport = self.client.get_transport()
+        try:
+            transport.open_session(timeout=HEALTH_CHECK_TIMEOUT).close()
+        except Exception as e:
+            self.last_drop = str(e) or type(e).__name__
+            transport.close()
+            return False
+        self._last_ok = time.monotonic()
+        return True
+
+    def _transport(self) -> paramiko.Transport:
+        """Live transport for a new channel; reconnects if the session dropped"""
+        with self._conn_lock:
+            alive = self.is_alive()
+            if alive and time.monotonic() - self._last_ok < HEALTH_CHECK_IDLE:
+                return self.client.get_transport()
+            # Idle for a while: a dead TCP session still reports active until a write fails
+            if not self.health_check():
+                if not alive:
+                    self.last_drop = "transport kapandı"
+                self.reconnect()
+            return self.client.get_transport()
+
+    def open_channel(self, **kwargs) -> paramiko.Channel:
+        """
+        New session channel on the shared transport (no new handshake).
+        Retried once on a fresh transport if the old one died in between,
+        the command has not started at that point so retrying is safe.
+        """
+        try:
+            return self._transport().open_session(timeout=CHANNEL_OPEN_TIMEOUT, **kwargs)
+        except BackendError:
+            raise
+        except Exception as e:
+            if self.is_alive():
+                raise BackendError(f"Kanal açılamadı: {e}")
+            self.last_drop = str(e) or type(e).__name__
+        return self._transport().open_session(timeout=CHANNEL_OPEN_TIMEOUT, **kwargs)
+
+    def _exec(self, command: str) -> tuple[bytes, bytes, int]:
+        """Runs command on its own channel, returns (stdout, stderr, exit status)"""
+        channel = self.open_channel()
+        try:
+            channel.exec_command(command)
+            stdout = channel.makefile("rb")
+            stderr = channel.makefile_stderr("rb")
+            out = stdout.read()
+            err = stderr.read()
+            status = channel.recv_exit_status()
+        finally:
+            channel.close()
+        self._last_ok = time.monotonic()
+        return out, err, status
+
+    def connection_stats(self) -> dict:
+        return {"handshake_ms": self.handshake_ms, "reconnects": self.reconnects, "last_drop": self.last_drop}
+
+    def _get_agent(self) -> RemoteAgent | None:
+        """Returns the running helper process in agent mode, starting it on first use"""
+        if not self.cfg.use_agent:
+            return None
+        with self._agent_lock:
+            if self.agent is not None and self.agent.alive:
+                return self.agent
+            self._transport()
+            agent = RemoteAgent(self.client, self.cfg)
+            try:
+                agent.start()
+            except BackendError as e:
+                # No python3 on the server or sudo refused: fall back to plain commands
+                print(f"[AGENT] {e}")
+                return None
+            self.agent = agent
+            return agent
 
     def _run(self, command: str) -> str:
-        if not self.client:
-            self._connect()
         try:
-            # exec_command returns (stdin, stdout, stderr)
-            stdin, stdout, stderr = self.client.exec_command(command)
-            out = stdout.read().decode('utf-8', errors='replace')
-            err = stderr.read().decode('utf-8', errors='replace')
+            out, err, status = self._exec(command)
+            out = out.decode('utf-8', errors='replace')
+            err = err.decode('utf-8', errors='replace')
             
             if err and not out: 
                  # Some commands write to stderr even on success, but usually empty stdout + stderr means error
                  # However, warnings might also be in stderr. 
                  # Let's return out if present, else err if it looks like a failure?
                  # ideally exit_status check
-                 if stdout.channel.recv_exit_status() != 0:
+                 if status != 0:
                      raise BackendError(f"Komut Hatası ({command}): {err}")
                  else:
                      # Exit code 0, but content in stderr (like nginx -v)
@@ -66,7 +310,134 @@ class SSHBackend(Backend):
         except Exception as e:
             raise BackendError(f"Komut Çalıştırma Hatası: {e}")
 
+    def _run_bytes(self, command: str) -> bytes:
+        """Like _run but returns raw stdout bytes and fails on non-zero exit status"""
+        try:
+            out, err, status = self._exec(command)
+            if status != 0:
+                raise BackendError(err.decode('utf-8', errors='replace').strip() or "exit status != 0")
+            return out
+        except Exception as e:
+            raise BackendError(f"Komut Çalıştırma Hatası: {e}")
+
+    def _sudo_wrap(self, script: str) -> str:
+        """Wraps a multi-command shell script so the whole script runs under sudo"""
+        script_q = shlex.quote(script)
+        if self.cfg.use_sudo_nopass:
+            return f"sudo -n sh -c {script_q}"
+        if self.cfg.password:
+            return f"echo '{self.cfg.password}' | sudo -S -p '' sh -c {script_q}"
+        return f"sh -c {script_q}"
+
+    def read_since(self, path: str, offset: int, max_bytes: int = 1024 * 1024,
+                   inode: int | None = None) -> tuple[str, int, int, int]:
+        agent = self._get_agent()
+        if agent:
+            res = agent.call("read_since", path=path, offset=int(offset),
+                             max_bytes=int(max_bytes), inode=inode)
+            return res["data"], res["offset"], res["inode"], res["size"]
+
+        path_q = shlex.quote(path)
+        # Header line: "<inode> <size> <effective offset>", then the raw bytes
+        script = (
+            f"st=$(stat -c '%i %s' {path_q}) || exit 1; set -- $st; off={int(offset)}; "
+            f"if [ \"$2\" -lt \"$off\" ]; then off=0; fi; "
+            + (f"if [ \"$1\" != \"{int(inode)}\" ]; then off=0; fi; " if inode is not None else "")
+            + f"echo \"$1 $2 $off\"; "
+            f"[ {int(max_bytes)} -gt 0 ] && tail -c +$((off + 1)) {path_q} | head -c {int(max_bytes)}; true"
+        )
+        out = self._run_bytes(self._sudo_wrap(script))
+        header, _, raw = out.partition(b"\n")
+        try:
+            ino, size, off = (int(x) for x in header.split())
+        except ValueError:
+            raise BackendError(f"read_since çıktısı anlaşılamadı: {header[:200]!r}")
+        raw = cut_at_last_line(raw)
+        return raw.decode("utf-8", errors="replace"), off + len(raw), ino, size
+
+    def tail_with_cursor(self, path: str, lines: int) -> tuple[str, int, int]:
+        agent = self._get_agent()
+        if agent:
+            res = agent.call("tail_cursor", path=path, lines=int(lines))
+            return res["data"], res["inode"], res["size"]
+
+        # The file is opened once on fd 3: stat and both reads see the same inode even if it rotates,
+        # and the text is cut at the size in the "<inode> <size>" header line
+        script = (
+            f"exec 3< {shlex.quote(path)} || exit 1; f=/proc/$$/fd/3; "
+            "st=$(stat -L -c '%i %s' $f) || exit 1; set -- $st; "
+            f"off=$(( $2 - $(tail -n {int(lines)} $f | wc -c) )); [ $off -lt 0 ] && off=0; "
+            "echo \"$1 $2\"; tail -c +$((off + 1)) $f | head -c $(( $2 - off )); true"
+        )
+        out = self._run_bytes(self._sudo_wrap(script))
+        header, _, raw = out.partition(b"\n")
+        try:
+            ino, size = (int(x) for x in header.split())
+        except ValueError:
+            raise BackendError(f"tail çıktısı anlaşılamadı: {header[:200]!r}")
+        # Lines appended between stat and tail -n only move the start back; drop the extra ones
+        text = b"".join(raw.splitlines(True)[-lines:]) if lines > 0 else b""
+        return text.decode("utf-8", errors="replace"), ino, size
+
+    def line_count(self, path: str) -> int:
+        agent = self._get_agent()
+        if agent:
+            return int(agent.call("line_count", path=path))
+        # awk also counts a trailing line without newline
+        out = self._run_bytes(self._sudo_wrap(f"awk 'END {{ print NR }}' {shlex.quote(path)}"))
+        try:
+            return int(out.strip() or 0)
+        except ValueError:
+            raise BackendError(f"Satır sayısı okunamadı: {out[:200]!r}")
+
+    def read_range(self, path: str, start_line: int, count: int) -> list[str]:
+        agent = self._get_agent()
+        if agent:
+            return agent.call("read_range", path=path, start_line=int(start_line), count=int(count))
+        if count <= 0:
+            return []
+        # Without the agent's index sed scans from the top, but only the window is transferred
+        first = max(0, int(start_line)) + 1
+        last = first + int(count) - 1
+        out = self._run_bytes(self._sudo_wrap(f"sed -n '{first},{last}p;{last}q' {shlex.quote(path)}"))
+        return out.decode("utf-8", errors="replace").splitlines()
+
+    def seek_line(self, path: str, line_no: int) -> int:
+        agent = self._get_agent()
+        if agent:
+            return int(agent.call("seek_line", path=path, line_no=int(line_no)))
+        return int(self._index_tool("seek_line", path, int(line_no)))
+
+    def tail_start(self, path: str, lines: int) -> tuple[int, int]:
+        agent = self._get_agent()
+        if agent:
+            line_no, offset = agent.call("tail_start", path=path, lines=int(lines))
+        else:
+            line_no, offset = self._index_tool("tail_start", path, int(lines))
+        return int(line_no), int(offset)
+
+    def seek_time(self, path: str, ts: float) -> tuple[int, int]:
+        agent = self._get_agent()
+        if agent:
+            line_no, offset = agent.call("seek_time", path=path, ts=float(ts))
+        else:
+            line_no, offset = self._index_tool("seek_time", path, float(ts))
+        return int(line_no), int(offset)
+
+    def _index_tool(self, op: str, path: str, arg):
+        """Runs one index op on the server without the agent; the sidecar index stays there for next time"""
+        script = f"python3 -c {shlex.quote(INDEX_TOOL_SOURCE)} {op} {shlex.quote(path)} {arg}"
+        out = self._run_bytes(self._sudo_wrap(script))
+        try:
+            return json.loads(out)
+        except ValueError:
+            raise BackendError(f"İndeks çıktısı anlaşılamadı: {out[:200]!r}")
+
     def tail(self, path: str, lines: int) -> str:
+        agent = self._get_agent()
+        if agent:
+            return agent.call("tail", path=path, lines=int(lines))
+
         # quote path manually since shlex is local
         path_q =f"'{path}'"
         cmd = f"tail -n {int(lines)} {path_q}"
@@ -80,6 +451,10 @@ class SSHBackend(Backend):
         return self._run(cmd)
 
     def size_bytes(self, path: str) -> int:
+        agent = self._get_agent()
+        if agent:
+            return int(agent.call("stat", path=path)["size"])
+
         path_q = f"'{path}'"
         cmd = f"stat -c %s {path_q}"
         
@@ -97,6 +472,11 @@ class SSHBackend(Backend):
             raise BackendError(f"Boyut okunamadı: {out}")
 
     def search(self, path: str, pattern: str, tail_lines: int = 5000, max_hits: int = 300) -> str:
+        agent = self._get_agent()
+        if agent:
+            return agent.call("search", path=path, pattern=pattern,
+                              tail_lines=int(tail_lines), max_hits=int(max_hits))
+
         path_q = f"'{path}'"
         # escape single quotes in pattern for bash single-quoted string
         pat_escaped = pattern.replace("'", "'\\''")
@@ -115,10 +495,130 @@ class SSHBackend(Backend):
         elif self.cfg.password:
              tail_cmd = f"echo '{self.cfg.password}' | sudo -S {tail_cmd}"
              
-        full_cmd = f"{tail_cmd} | grep -n --color=never -i {pat_q} | head -n {int(max_hits)}"
+        full_cmd = f"{tail_cmd} | {GREP} -n -e {pat_q} | head -n {int(max_hits)}"
         return self._run(full_cmd)
 
+    def search_stream(self, path: str, pattern: str, scope: str = SCOPE_TAIL, tail_lines: int = 5000,
+                      since: float | None = None, max_hits: int = 300,
+                      cancel_event: threading.Event | None = None) -> Iterator[tuple[int, int, str]]:
+        start = None
+        try:
+            if scope == SCOPE_SINCE and since is not None:
+                # Jump over everything logged before the window instead of grepping it
+                start = self.seek_time(path, since)
+            elif scope == SCOPE_TAIL:
+                # Line numbers from the index instead of counting every line before the tail
+                start = self.tail_start(path, tail_lines)
+        except BackendError as e:
+            print(f"[INDEX] {e}")
+        script = build_search_script(path, pattern, scope, tail_lines, max_hits, start)
+        yield from iter_hits(self._stream_lines(self._sudo_wrap(script), cancel_event),
+                             scope, since, max_hits, in_window=start is not None)
+
+    def rotation_chain(self, path: str, spans: bool = True) -> list[ChainMember]:
+        out = self._run_bytes(self._sudo_wrap(build_chain_listing_script(path))).decode("utf-8", errors="replace")
+        chain = parse_chain_listing(path, out)
+        return self._spans.resolve(chain, self._read_spans) if spans else chain
+
+    def _read_spans(self, members: list[ChainMember]) -> dict[str, tuple]:
+        out = self._run_bytes(self._sudo_wrap(build_span_script(members)))
+        return parse_span_output(out.decode("utf-8", errors="replace"))
+
+    def search_rotated(self, path: str, pattern: str, since: float | None = None, max_hits: int = 300,
+                       cancel_event: threading.Event | None = None) -> Iterator[ChainHit]:
+        selected = select_members(self.rotation_chain(path, spans=since is not None), since)
+        if not selected:
+            return
+        script = build_chain_search_script(selected, pattern, max_hits)
+        yield from iter_chain_hits(self._stream_lines(self._sudo_wrap(script), cancel_event),
+                                   selected, since, max_hits)
+
+    def _stream_lines(self, command: str, cancel_event: threading.Event | None = None) -> Iterator[str]:
+        """
+        Runs command on its own channel and yields stdout lines as they arrive.
+        The channel is closed (killing the remote command) when the consumer
+        stops early or cancel_event is set.
+        """
+        try:
+            channel = self.open_channel()
+            channel.exec_command(command)
+        except Exception as e:
+            raise BackendError(f"Komut Çalıştırma Hatası: {e}")
+
+        buf = bytearray()
+        try:
+            while not (cancel_event and cancel_event.is_set()):
+                readable, _, _ = select.select([channel], [], [], STREAM_POLL)
+                if not readable:
+                    continue
+                data = channel.recv(STREAM_RECV_SIZE)
+                if not data:
+                    break
+                buf += data
+                cut = buf.rfind(b"\n")
+                if cut == -1:
+                    continue
+                chunk = bytes(buf[:cut])
+                del buf[:cut + 1]
+                yield from chunk.decode("utf-8", errors="replace").split("\n")
+            if cancel_event and cancel_event.is_set():
+                return
+
+            if buf:
+                yield buf.decode("utf-8", errors="replace")
+            # grep exits 1 when nothing matched; only 2+ is a real failure
+            status = channel.recv_exit_status()
+            if status > 1:
+                err = channel.recv_stderr(65536).decode("utf-8", errors="replace").strip()
+                raise BackendError(f"Arama Hatası: {err or f'exit status {status}'}")
+        finally:
+            channel.close()
+
+    def read_blocks(self, path: str, cancel_event: threading.Event | None = None) -> Iterator[str]:
+        """Sent gzipped either way: archives as they are, live files compressed on the fly"""
+        path_q = shlex.quote(path)
+        script = f"cat -- {path_q}" if path.endswith(".gz") else f"gzip -1c -- {path_q}"
+        channel = self.open_channel(window_size=DOWNLOAD_WINDOW)
+        try:
+            channel.exec_command(self._sudo_wrap(script))
+            inflate = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            yield from line_blocks(self._channel_reader(channel, cancel_event, inflate))
+            if cancel_event and cancel_event.is_set():
+                return
+            status = channel.recv_exit_status()
+            if status != 0 or not inflate.eof:
+                err = channel.recv_stderr(65536).decode("utf-8", errors="replace").strip()
+                raise BackendError(f"Dosya okunamadı: {err or f'exit status {status}'}")
+        finally:
+            channel.close()
+
+    def aggregate(self, paths: list[str], group_by: list[str], pattern: str | None = None,
+                  log_format: str | None = None, since: float | None = None, top: int = 50,
+                  progress: Callable[[int, int, str], None] | None = None,
+                  cancel_event: threading.Event | None = None) -> dict:
+        args = json.dumps(aggregate_args(paths, group_by, pattern, log_format, since, top))
+        script = f"python3 -c {shlex.quote(AGGREGATE_TOOL_SOURCE)} {shlex.quote(args)}"
+        # JSON lines: {"progress": [done, total, path]} per file, then {"result": {...}}
+        for line in self._stream_lines(self._sudo_wrap(script), cancel_event):
+            if not line.strip():
+                continue
+            try:
+                frame = json.loads(line)
+            except ValueError:
+                raise BackendError(f"Özet çıktısı anlaşılamadı: {line[:200]!r}")
+            if "result" in frame:
+                return frame["result"]
+            if progress is not None and "progress" in frame:
+                progress(*frame["progress"])
+        if cancel_event and cancel_event.is_set():
+            return {}
+        raise BackendError("Özet sonucu alınamadı")
+
     def truncate(self, path: str) -> str:
+        agent = self._get_agent()
+        if agent:
+            return agent.call("truncate", path=path) or "Log temizlendi (remote)."
+
         path_q = f"'{path}'"
         if self.cfg.use_sudo_nopass:
             cmd = f"sudo -n truncate -s 0 {path_q}"
@@ -132,52 +632,129 @@ class SSHBackend(Backend):
         
         return self._run(cmd).strip() or "Log temizlendi (remote)."
 
-    def list_var_log(self) -> list[tuple[str, int, str]]:
-        out = self._run(
-            "find /var/log -maxdepth 1 -type f -printf '%f\\t%s\\t%TY-%Tm-%Td %TH:%TM\\n' | sort"
-        )
-        items: list[tuple[str, int, str]] = []
-        for line in out.splitlines():
-            parts = line.split("\t")
-            if len(parts) != 3:
-                continue
-            name, sz, mtime = parts
-            try:
-                items.append((name, int(sz), mtime))
-            except ValueError:
-                continue
-        return items
+    def log_inventory(self, token: str | None = None) -> InventoryDelta:
+        script = build_inventory_script(INVENTORY_ROOT, token, uuid.uuid4().hex)
+        out = self._run_bytes(self._sudo_wrap(script)).decode("utf-8", errors="replace")
+        try:
+            return parse_inventory_output(out)
+        except ValueError as e:
+            raise BackendError(f"Log listesi anlaşılamadı: {e}")
 
-    def download_file(self, remote_path: str, local_path: str) -> str:
-        if not self.client:
-            self._connect()
+    def download_file(self, remote_path: str, local_path: str, progress: ProgressFn | None = None,
+                      cancel_event: threading.Event | None = None) -> str:
+        part = part_path(local_path)
         try:
-            sftp = self.client.open_sftp()
-            sftp.get(remote_path, local_path)
-            sftp.close()
+            self._download_sftp(remote_path, part, progress, cancel_event)
+            finish(part, local_path)
             return f"İndirildi: {local_path}"
+        except BackendError:
+            raise
         except Exception as e:
-            # Fallback: Try reading via sudo cat if SFTP fails (likely permission denied)
+            # Fallback: stream via sudo if SFTP fails (likely permission denied)
             try:
-                # Use cat with sudo support
-                path_q = f"'{remote_path}'"
-                cmd = f"cat {path_q}"
-                
-                if self.cfg.use_sudo_nopass:
-                    cmd = f"sudo -n {cmd}"
-                elif self.cfg.password:
-                    cmd = f"echo '{self.cfg.password}' | sudo -S {cmd}"
-                
-                # self._run returns decoded string (utf-8)
-                content = self._run(cmd)
-                
-                # Write to local file
-                with open(local_path, 'w', encoding='utf-8') as f:
-                    f.write(content)
+                self._download_sudo(remote_path, part, progress, cancel_event)
+                finish(part, local_path)
                 return f"İndirildi (sudo ile okundu): {local_path}"
+            except DownloadCancelled:
+                raise
             except Exception as e2:
                 raise BackendError(f"SFTP İndirme Hatası: {e}\nAlternatif yöntem (sudo cat) de başarısız: {e2}")
 
+    def _download_sftp(self, remote_path: str, part: str, progress: ProgressFn | None,
+                       cancel_event: threading.Event | None):
+        # Own SFTP session with a large window so prefetched reads are not throttled
+        sftp = paramiko.SFTPClient.from_transport(self._transport(), window_size=DOWNLOAD_WINDOW)
+        try:
+            with sftp.open(remote_path, "rb") as rf:
+                total = rf.stat().st_size
+                done = resume_offset(part, total)
+                rf.seek(done)
+                with open(part, "ab" if done else "wb") as out:
+                    while done < total:
+                        end = min(total, done + DOWNLOAD_SPAN)
+                        rf.prefetch(end)
+                        done = copy_chunks(rf.read, out, done, total, progress, cancel_event, limit=end)
+                        if done < end:
+                            break  # truncated while downloading
+        finally:
+            sftp.close()
+
+    def _download_sudo(self, remote_path: str, part: str, progress: ProgressFn | None,
+                       cancel_event: threading.Event | None):
+        """sudo tail -c +N | gzip on the server, raw bytes in, inflated while writing"""
+        path_q = shlex.quote(remote_path)
+        # Checked up front: in "tail | gzip" only gzip's exit status comes back
+        out = self._run_bytes(self._sudo_wrap(f"test -r {path_q} && stat -L -c %s {path_q}"))
+        try:
+            total = int(out.strip())
+        except ValueError:
+            raise BackendError(f"Boyut okunamadı: {out[:200]!r}")
+        done = resume_offset(part, total)
+        # Compressed logs would only grow when gzipped again
+        compress = not remote_path.endswith(".gz")
+        script = f"tail -c +{done + 1} {path_q}" + (" | gzip -1" if compress else "")
+
+        channel = self.open_channel(window_size=DOWNLOAD_WINDOW)
+        try:
+            channel.exec_command(self._sudo_wrap(script))
+            inflate = zlib.decompressobj(16 + zlib.MAX_WBITS) if compress else None
+            read = self._channel_reader(channel, cancel_event, inflate)
+            with open(part, "ab" if done else "wb") as f:
+                done = copy_chunks(read, f, done, total, progress, cancel_event)
+                if cancel_event and cancel_event.is_set():
+                    raise DownloadCancelled("İndirme iptal edildi")
+                if inflate is not None:
+                    f.write(inflate.flush())
+            # stderr alone is not a failure (sudo hostname warnings on renamed Pis)
+            status = channel.recv_exit_status()
+            if status != 0 or (inflate is not None and not inflate.eof):
+                err = channel.recv_stderr(65536).decode("utf-8", errors="replace").strip()
+                raise BackendError(err or f"exit status {status}")
+        finally:
+            channel.close()
+
+    @staticmethod
+    def _channel_reader(channel: paramiko.Channel, cancel_event: threading.Event | None = None, inflate=None):
+        """read(n) over a channel's stdout: b"" at EOF or once cancel_event is set"""
+        def read(n: int) -> bytes:
+            while True:
+                if cancel_event and cancel_event.is_set():
+                    return b""
+                readable, _, _ = select.select([channel], [], [], STREAM_POLL)
+                if not readable:
+                    continue
+                data = channel.recv(n)
+                if inflate is None or not data:
+                    return data
+                data = inflate.decompress(data)
+                if data:
+                    return data
+        return read
+
+    def download_bundle(self, paths: list[str], local_path: str, compression: str = "zst",
+                        since: float | None = None, progress: ProgressFn | None = None,
+                        cancel_event: threading.Event | None = None) -> str:
+        script = build_bundle_script(paths, compression, since)
+        channel = self.open_channel(window_size=DOWNLOAD_WINDOW)
+        try:
+            channel.exec_command(self._sudo_wrap(script))
+            try:
+                target = save_bundle(self._channel_reader(channel, cancel_event), local_path, progress, cancel_event)
+            except DownloadCancelled:
+                raise
+            except BackendError as e:
+                err = channel.recv_stderr(65536).decode("utf-8", errors="replace").strip()
+                raise BackendError(f"{e}: {err}" if err else str(e))
+            status = channel.recv_exit_status()
+            if status != 0:
+                # The stream ended early or holds a broken archive: do not leave it as the result
+                os.remove(target)
+                err = channel.recv_stderr(65536).decode("utf-8", errors="replace").strip()
+                raise BackendError(f"Arşiv Hatası: {err or f'exit status {status}'}")
+        finally:
+            channel.close()
+        return f"Arşiv indirildi: {target}"
+
     def get_nginx_version(self) -> str:
         # Helper to execute and catch
         def try_cmd(cmd_str):
@@ -213,6 +790,19 @@ class SSHBackend(Backend):
 
         return "Nginx bulunamadı"
 
+    def probe_all(self) -> StatusSnapshot:
+        # One channel for the whole status bar instead of 8-12 round trips
+        out = self._run(build_section_script(PROBE_SECTIONS))
+        snap = parse_probe_output(out)
+        self._mysql_service = snap.mysql_service
+        if not snap.nginx_version:
+            # nginx binary might only be readable via sudo, rare path: asked once per connection,
+            # hosts without nginx would otherwise pay up to 8 more round trips on every refresh
+            if self._sudo_nginx_version is None:
+                self._sudo_nginx_version = self.get_nginx_version()
+            snap.nginx_version = self._sudo_nginx_version
+        return snap
+
     def get_nginx_status(self) -> str:
         try:
             return self._run("systemctl is-active nginx")
@@ -224,6 +814,10 @@ class SSHBackend(Backend):
         # Redirect stderr to stdout because nginx -t writes success/fail msg to stderr
         cmd = "nginx -t 2>&1"
         return self._sudo_run(cmd)
+    def dump_nginx_config(self) -> str:
+        # Configuration goes to stdout, the syntax check messages to stderr
+        return self._run_bytes(self._sudo_wrap("nginx -T 2>/dev/null")).decode("utf-8", errors="replace")
+
     def get_php_version(self) -> str:
         try:
             # php -v
@@ -261,24 +855,46 @@ class SSHBackend(Backend):
         except Exception as e:
             return f"Liste alınamadı: {e}"
 
+    def fpm_pool_status(self) -> list[FpmPoolStatus]:
+        # FastCGI is spoken on the server, to the pool sockets; only the status JSON comes back
+        out = self._run_bytes(self._sudo_wrap(f"python3 -c {shlex.quote(FPM_TOOL_SOURCE)}"))
+        try:
+            pools = json.loads(out.decode("utf-8", errors="replace").strip().splitlines()[-1])["result"]
+        except (ValueError, KeyError, IndexError):
+            raise BackendError(f"PHP-FPM durum çıktısı anlaşılamadı: {out[:200]!r}")
+        return [FpmPoolStatus.from_dict(d) for d in pools]
+
+    def sample_resources(self) -> ResourceReading:
+        # Everything is world-readable: no sudo, one exec_command per sample
+        try:
+            return parse_resource_output(self._run(resource_script()))
+        except ValueError as e:
+            raise BackendError(f"Kaynak ölçümü başarısız: {e}")
+
+    def control_service(self, service_name: str, action: str) -> str:
+        agent = self._get_agent()
+        try:
+            if agent:
+                out = agent.call("systemctl", action=action, unit=service_name)
+            else:
+                out = self._sudo_run(f"systemctl {action} {service_name}")
+                if out.startswith("Error:"):
+                    raise BackendError(out)
         except Exception as e:
              raise BackendError(f"{action} hatası: {e}")
+        return out.strip() or f"{service_name} {action} başarılı."
 
     # MySQL / MariaDB
     def get_mysql_service_name(self) -> str:
-        # Try to detect service name
-        try:
-            # Check for mariadb first
-            out = self._run("systemctl list-units --type=service --all | grep mariadb")
-            if "mariadb" in out:
-                return "mariadb"
-            # Check for mysql
-            out = self._run("systemctl list-units --type=service --all | grep mysql")
-            if "mysql" in out:
-                return "mysql"
-            return "mariadb" # Default
-        except:
-             return "mariadb"
+        if self._mysql_service:
+            return self._mysql_service
+        try:
+            # One unit listing, mariadb preferred over mysql
+            out = self._run("systemctl list-units --type=service --all | grep -E 'mariadb|mysql'")
+        except Exception:
+            return "mariadb"  # not cached, next call retries
+        self._mysql_service = mysql_service_from_units(out)
+        return self._mysql_service
 
     def get_mysql_version(self) -> str:
         # sudo mysql --version || sudo mariadb --version
@@ -292,6 +908,13 @@ class SSHBackend(Backend):
     def check_mysql_port(self) -> str:
         return self._sudo_run("ss -lntp | grep 3306")
 
+    def collect_mysql_diagnostics(self) -> MySQLDiagnostics:
+        # One channel for the whole info panel instead of 6-8 round trips
+        out = self._run(self._sudo_wrap(build_section_script(mysql_sections(self._mysql_service))))
+        diag = parse_mysql_diagnostics(out)
+        self._mysql_service = diag.service
+        return diag
+
     def check_mysql_socket(self) -> str:
         # sudo ls -lh /var/run/mysqld/ || sudo ls -lh /run/mysqld/
         return self._sudo_run("ls -lh /var/run/mysqld/ || ls -lh /run/mysqld/")
@@ -306,6 +929,17 @@ class SSHBackend(Backend):
         cmd = 'grep -Rin "bind-address" /etc/mysql/ /etc/my.cnf /etc/my.cnf.d 2>/dev/null'
         return self._sudo_run(cmd)
 
+    def fetch_mysql_metrics(self) -> tuple[dict[str, str], list[dict]]:
+        # Both statements in one exec_command
+        return parse_metrics_output(self._run(self._sudo_wrap(metrics_script())))
+
+    def forward_port(self, remote_port: int, remote_host: str = "127.0.0.1") -> PortForward:
+        return PortForward(self._transport, remote_host, remote_port)
+
+    def mysql_client_source(self, user: str, password: str = "") -> PyMySQLSource:
+        tunnel = self.forward_port(3306)
+        return PyMySQLSource(user, password, port=tunnel.port, tunnel=tunnel)
+
     def search_db_errors_in_nginx(self) -> str:
         # sudo grep -Ei "php|fastcgi|mysqli|pdo|sql|mysql|mariadb|denied|permission" /var/log/nginx/error.log
         pat = "php|fastcgi|mysqli|pdo|sql|mysql|mariadb|denied|permission"
@@ -314,8 +948,7 @@ class SSHBackend(Backend):
 
     def search_db_errors_in_varlog(self) -> str:
         # sudo grep -Rin "SQLSTATE|mysql|mysqli|pdo" /var/log 2>/dev/null | head -n 50
-        pat = "SQLSTATE|mysql|mysqli|pdo"
-        cmd = f"grep -Rin \"{pat}\" /var/log 2>/dev/null | head -n 50"
+        cmd = f"grep -Rin \"{DB_ERROR_PATTERN}\" /var/log 2>/dev/null | head -n 50"
         return self._sudo_run(cmd)
 
     def truncate_all_nginx_logs(self) -> str:
@@ -336,8 +969,16 @@ class SSHBackend(Backend):
     def check_php_errors(self) -> str:
         # Refined as requested: just grep php, but we'll limit output to avoid UI freeze
         # User asked: sudo grep -i php /var/log/nginx/error.log
-        cmd = "grep -i php /var/log/nginx/error.log | tail -n 200"
-        return self._sudo_run(cmd)
+        # Continues into error.log.1 / .gz when the live file holds fewer than 200 matches
+        log_path = PHP_ERROR_LOG
+        try:
+            listing = self._run(self._sudo_wrap(build_chain_listing_script(log_path)))
+            chain = parse_chain_listing(log_path, listing)
+            if not chain:
+                return "Log dosyası yok"
+            return self._run(self._sudo_wrap(build_last_matches_script(chain, "php", 200))).strip()
+        except Exception as e:
+            return f"Error: {e}"
 
     def _sudo_run(self, cmd: str) -> str:
         """Helper for simple sudo commands"""
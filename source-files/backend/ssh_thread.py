@@ -1,67 +1,226 @@
+import select
+import shlex
 import threading
 import time
 from PySide6.QtCore import QThread, Signal
-from backend.ssh import SSHBackend
+from backend.ssh import SSHBackend, RECONNECT_MAX_DELAY
+
+# Receive side tuning for busy logs
+RECV_SIZE = 256 * 1024
+WINDOW_SIZE = 4 * 1024 * 1024
+IDLE_WAKEUP = 0.5  # seconds, only to notice stop() when nothing arrives
+STATS_INTERVAL = 1.0
+HEALTH_INTERVAL = 30.0  # seconds of silence before the session is probed
+INITIAL_LINES = 10  # same start as plain tail -f
+
+OFFSET_MARK = b"@@OFFSET"
+
+
+def build_follow_script(path: str, offset: int | None = None, inode: int | None = None) -> str:
+    """
+    tail -f that starts at a byte offset and first prints
+    "@@OFFSET <inode> <offset>" so the reader knows where the stream begins.
+    Without an offset it starts INITIAL_LINES lines before the end. A resume
+    on a rotated (other inode) or truncated file starts from 0.
+    """
+    path_q = shlex.quote(path)
+    if offset is None:
+        start = f"off=$(( $2 - $(tail -n {INITIAL_LINES} {path_q} | wc -c) )); "
+    else:
+        start = f"off={int(offset)}; if [ \"$2\" -lt \"$off\" ]"
+        if inode is not None:
+            start += f" || [ \"$1\" != \"{int(inode)}\" ]"
+        start += "; then off=0; fi; "
+    # The pty would turn \n into \r\n and the byte count would drift from the file
+    return (f"stty -onlcr </dev/tty 2>/dev/null; st=$(stat -L -c '%i %s' {path_q}) || exit 1; set -- $st; "
+            + start + f"echo \"@@OFFSET $1 $off\"; exec tail -c +$((off + 1)) -f {path_q}")
 
 class SSHLogThread(QThread):
     log_output = Signal(str)
     error_occurred = Signal(str)
+    # {"bytes", "lines", "batches", "bytes_per_sec", "lines_per_sec", "avg_latency_ms", "max_latency_ms"}
+    stats_updated = Signal(dict)
+    # (reconnect count, byte offset the tail resumed at)
+    reconnected = Signal(int, int)
 
-    def __init__(self, backend: SSHBackend, path: str):
+    def __init__(self, backend: SSHBackend, path: str, flush_interval_ms: int = 100):
         super().__init__()
         self.backend = backend
         self.path = path
+        self.flush_interval = flush_interval_ms / 1000.0
         self.running = False
+        self.channel = None
+        # File position right after the last emitted byte; a reconnect resumes here
+        self.offset: int | None = None
+        self.inode: int | None = None
         self._stop_event = threading.Event()
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self.bytes_total = 0
+        self.lines_total = 0
+        self.batches = 0
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+        self._started = time.monotonic()
+        self._last_stats = self._started
+        self._window_bytes = 0
+        self._window_lines = 0
+
+    def _open(self):
+        script = build_follow_script(self.path, self.offset, self.inode)
+        # Outer stty covers sudo setups with their own pty (Defaults use_pty)
+        cmd = "stty -onlcr 2>/dev/null; " + self.backend._sudo_wrap(script)
+        # Large window so a busy log is not throttled by flow control
+        channel = self.backend.open_channel(window_size=WINDOW_SIZE)
+        channel.get_pty()
+        channel.exec_command(cmd)
+        return channel
 
     def run(self):
         self.running = True
-        client = self.backend.client
-        if not client:
-            try:
-                self.backend._connect()
-                client = self.backend.client
-            except Exception as e:
-                self.error_occurred.emit(str(e))
-                return
-
-        # tail -f komutunu çalıştır
-        cmd = f"tail -f '{self.path}'"
-        if self.backend.cfg.use_sudo_nopass:
-            cmd = f"sudo -n {cmd}"
-        elif self.backend.cfg.password:
-             # Interactive sudo handling in a thread is complex. 
-             # For now, we rely on passwordless sudo or user rights.
-             # If we really need to support password sudo here, we'd need to write to stdin.
-             pass
-        
+        self._reset_stats()
+        dropped = False
+        error_shown = False
         try:
-            self.stdin, self.stdout, self.stderr = client.exec_command(cmd, get_pty=True)
-            self.channel = self.stdout.channel
-            
-            # Non-blocking read loop
             while self.running and not self._stop_event.is_set():
-                if self.channel.recv_ready():
-                    line = self.channel.recv(1024).decode('utf-8', errors='replace')
-                    if line:
-                        self.log_output.emit(line)
-                
-                if self.channel.exit_status_ready():
+                try:
+                    self.channel = self._open()
+                    if dropped:
+                        self.reconnected.emit(self.backend.reconnects, self.offset or 0)
+                        dropped = error_shown = False
+                    self._read_loop(self.channel)
+                except Exception as e:
+                    if self._stop_event.is_set():
+                        break
+                    if self.backend.is_alive():
+                        # Session is fine, the command itself failed
+                        self.error_occurred.emit(str(e))
+                        break
+                    dropped = True
+                    if not error_shown:
+                        self.error_occurred.emit(str(e))
+                        error_shown = True
+                    self._stop_event.wait(RECONNECT_MAX_DELAY)
+                    continue
+                if self._stop_event.is_set():
+                    break
+                if self.backend.is_alive():
+                    # tail ended on its own (sudo refused, file missing...)
+                    err = self.channel.recv_stderr(4096).decode("utf-8", errors="replace").strip()
+                    if err:
+                        self.error_occurred.emit(err)
                     break
-                
-                time.sleep(0.1)
-                
-        except Exception as e:
-            self.error_occurred.emit(str(e))
+                # Session dropped: the next _open() reconnects and resumes at self.offset
+                dropped = True
         finally:
             self.running = False
 
+    def _read_loop(self, channel):
+        buf = bytearray()
+        pending_since = None  # arrival time of the oldest byte not yet emitted
+        last_flush = time.monotonic()
+        last_data = last_flush
+        header = True  # first line is the @@OFFSET header
+
+        while self.running and not self._stop_event.is_set():
+            # Sleep in select until data arrives or the next flush is due
+            if buf and not header:
+                timeout = max(0.0, last_flush + self.flush_interval - time.monotonic())
+            else:
+                timeout = IDLE_WAKEUP
+            readable, _, _ = select.select([channel], [], [], timeout)
+
+            eof = False
+            if readable:
+                while channel.recv_ready():
+                    data = channel.recv(RECV_SIZE)
+                    if not data:
+                        break
+                    last_data = time.monotonic()
+                    if pending_since is None:
+                        pending_since = last_data
+                    buf += data
+                    self.bytes_total += len(data)
+                    self._window_bytes += len(data)
+            if channel.closed or (channel.exit_status_ready() and not channel.recv_ready()):
+                eof = True
+
+            if header:
+                nl = buf.find(b"\n")
+                if nl == -1:
+                    if eof:
+                        break
+                    continue
+                self._parse_header(bytes(buf[:nl]))
+                del buf[:nl + 1]
+                header = False
+                if not buf:
+                    pending_since = None
+
+            now = time.monotonic()
+            # A silent log and a dead link look the same; ask the transport
+            if not eof and now - last_data >= HEALTH_INTERVAL:
+                last_data = now
+                if not self.backend.health_check():
+                    eof = True
+            if buf and (eof or now - last_flush >= self.flush_interval):
+                # Emit whole lines only; keep a partial last line for the next batch
+                cut = buf.rfind(b"\n")
+                if eof and self.backend.is_alive():
+                    cut = len(buf) - 1
+                elif cut == -1 and len(buf) >= RECV_SIZE:
+                    cut = len(buf) - 1
+                if cut >= 0:
+                    chunk = bytes(buf[:cut + 1])
+                    del buf[:cut + 1]
+                    self._emit_batch(chunk, pending_since, now)
+                    pending_since = now if buf else None
+                last_flush = now
+
+            if now - self._last_stats >= STATS_INTERVAL:
+                self._emit_stats(now)
+            if eof:
+                break
+
+    def _parse_header(self, line: bytes):
+        parts = line.strip().split()
+        if len(parts) == 3 and parts[0] == OFFSET_MARK:
+            self.inode, self.offset = int(parts[1]), int(parts[2])
+
+    def _emit_batch(self, chunk: bytes, pending_since: float | None, now: float):
+        lines = chunk.count(b"\n")
+        self.lines_total += lines
+        self._window_lines += lines
+        self.batches += 1
+        if self.offset is not None:
+            self.offset += len(chunk)
+        if pending_since is not None:
+            latency = now - pending_since
+            self.latency_sum += latency
+            self.latency_max = max(self.latency_max, latency)
+        self.log_output.emit(chunk.decode('utf-8', errors='replace'))
+
+    def _emit_stats(self, now: float):
+        elapsed = now - self._last_stats
+        self.stats_updated.emit({
+            "bytes": self.bytes_total,
+            "lines": self.lines_total,
+            "batches": self.batches,
+            "bytes_per_sec": self._window_bytes / elapsed if elapsed else 0.0,
+            "lines_per_sec": self._window_lines / elapsed if elapsed else 0.0,
+            "avg_latency_ms": (self.latency_sum / self.batches * 1000) if self.batches else 0.0,
+            "max_latency_ms": self.latency_max * 1000,
+        })
+        self._last_stats = now
+        self._window_bytes = 0
+        self._window_lines = 0
 
     def stop(self):
         self.running = False
         self._stop_event.set()
         # Force close channel to break potential blocking
-        if hasattr(self, 'channel') and self.channel:
+        if self.channel:
             try:
                 self.channel.close()
             except:
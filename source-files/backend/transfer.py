@@ -0,0 +1,64 @@
+"""
+Pieces shared by the download implementations: the .part file convention
+used for resuming, and a chunked copy loop with progress and cancellation.
+Memory use stays at one chunk whatever the file size.
+"""
+import os
+import threading
+from typing import Callable
+from .base import BackendError
+
+PART_SUFFIX = ".part"
+CHUNK_SIZE = 1024 * 1024
+
+# progress(bytes_done, bytes_total); total is 0 when unknown
+ProgressFn = Callable[[int, int], None]
+
+
+class DownloadCancelled(BackendError):
+    pass
+
+
+def part_path(local_path: str) -> str:
+    return local_path + PART_SUFFIX
+
+
+def resume_offset(part: str, total: int) -> int:
+    """
+    Where an interrupted download continues: the size of the .part file,
+    or 0 when there is none or it is larger than the source (rotated or
+    truncated in the meantime, the old bytes no longer belong to it).
+    """
+    try:
+        done = os.path.getsize(part)
+    except OSError:
+        return 0
+    if total and done > total:
+        os.remove(part)
+        return 0
+    return done
+
+
+def copy_chunks(read: Callable[[int], bytes], out, done: int, total: int,
+                progress: ProgressFn | None = None, cancel_event: threading.Event | None = None,
+                limit: int | None = None) -> int:
+    """
+    Copies read(n) into out until EOF (or `limit` bytes overall).
+    Returns the new byte count. The partial output is kept on cancel.
+    """
+    while limit is None or done < limit:
+        if cancel_event and cancel_event.is_set():
+            raise DownloadCancelled("İndirme iptal edildi")
+        want = CHUNK_SIZE if limit is None else min(CHUNK_SIZE, limit - done)
+        data = read(want)
+        if not data:
+            break
+        out.write(data)
+        done += len(data)
+        if progress:
+            progress(done, total)
+    return done
+
+
+def finish(part: str, local_path: str):
+    os.replace(part, local_path)
@@ -0,0 +1,103 @@
+import time
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QGridLayout, QGroupBox, QLabel, QSpinBox, QPushButton, QCheckBox,
+    QTableWidget, QTableWidgetItem, QHeaderView
+)
+from backend.access_log import AccessSummary, aggregate_backend_log, analyze_backend_log
+from backend.lang_manager import trans
+
+TOP_ROWS = 20
+RATE_MINUTES = 60  # most recent minutes listed in the rate table
+
+
+class AccessAnalyticsDialog(QDialog):
+    """Status codes, top URIs / client IPs and request rate of an nginx access log"""
+
+    def __init__(self, main_window, backend, path: str, parent=None):
+        super().__init__(parent)
+        self.main_window = main_window
+        self.backend = backend
+        self.path = path
+        self.setWindowTitle(f"{trans('analytics_title')} - {path}")
+        self.resize(1000, 700)
+        layout = QVBoxLayout(self)
+
+        bar = QHBoxLayout()
+        self.lines_spin = QSpinBox()
+        self.lines_spin.setRange(1000, 5000000)
+        self.lines_spin.setSingleStep(50000)
+        self.lines_spin.setValue(100000)
+        self.server_check = QCheckBox(trans("analytics_server"))
+        self.server_check.setToolTip(trans("tip_analytics_server"))
+        self.server_check.toggled.connect(lambda on: self.lines_spin.setEnabled(not on))
+        self.run_btn = QPushButton(trans("analytics_run"))
+        self.summary_label = QLabel("")
+        bar.addWidget(QLabel(trans("lines_label")))
+        bar.addWidget(self.lines_spin)
+        bar.addWidget(self.server_check)
+        bar.addWidget(self.run_btn)
+        bar.addWidget(self.summary_label, 1)
+        layout.addLayout(bar)
+
+        grid = QGridLayout()
+        self.status_table = self._add_table(grid, 0, 0, "analytics_status", [trans("col_status"), trans("col_count")])
+        self.rate_table = self._add_table(grid, 0, 1, "analytics_rate", [trans("col_minute"), trans("col_count")])
+        self.uri_table = self._add_table(grid, 1, 0, "analytics_uris", [trans("col_uri"), trans("col_count")])
+        self.ip_table = self._add_table(grid, 1, 1, "analytics_ips", [trans("col_ip"), trans("col_count")])
+        layout.addLayout(grid, 1)
+
+        self.run_btn.clicked.connect(self.run)
+        self.run()
+
+    @staticmethod
+    def _add_table(grid: QGridLayout, row: int, col: int, title_key: str, headers: list[str]) -> QTableWidget:
+        group = QGroupBox(trans(title_key))
+        group_layout = QVBoxLayout(group)
+        table = QTableWidget(0, len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeToContents)
+        table.verticalHeader().setVisible(False)
+        table.setEditTriggers(QTableWidget.NoEditTriggers)
+        group_layout.addWidget(table)
+        grid.addWidget(group, row, col)
+        return table
+
+    def run(self):
+        self.run_btn.setEnabled(False)
+        self.summary_label.setText(trans("search_running"))
+
+        def failed(e):
+            self.run_btn.setEnabled(True)
+            self.summary_label.setText(str(e))
+
+        key = f"analytics:{self.path}"
+        if self.server_check.isChecked():
+            self.main_window.run_job(
+                key, lambda job: aggregate_backend_log(self.backend, self.path, TOP_ROWS, cancel_event=job.cancel_event),
+                pass_job=True, on_result=self._show, on_error=failed)
+        else:
+            self.main_window.run_job(
+                key, analyze_backend_log, self.backend, self.path, self.lines_spin.value(), TOP_ROWS,
+                on_result=self._show, on_error=failed)
+
+    def _show(self, summary: AccessSummary):
+        self.run_btn.setEnabled(True)
+        self.summary_label.setText(trans("analytics_summary").format(
+            requests=summary.requests, unparsed=summary.unparsed, mb=summary.bytes_total / 1048576,
+            mean=summary.mean_per_minute, peak=summary.peak_per_minute))
+        self._fill(self.status_table, [(str(status), n) for status, n in summary.statuses])
+        self._fill(self.uri_table, summary.top_uris)
+        self._fill(self.ip_table, summary.top_ips)
+        recent = summary.per_minute[-RATE_MINUTES:][::-1]
+        self._fill(self.rate_table, [(time.strftime("%Y-%m-%d %H:%M", time.localtime(m * 60)), n) for m, n in recent])
+
+    @staticmethod
+    def _fill(table: QTableWidget, rows: list[tuple[str, int]]):
+        table.setRowCount(len(rows))
+        for r, (label, count) in enumerate(rows):
+            table.setItem(r, 0, QTableWidgetItem(label))
+            count_item = QTableWidgetItem(str(count))
+            count_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+            table.setItem(r, 1, count_item)
@@ -0,0 +1,84 @@
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QGroupBox, QListWidget, QListWidgetItem, QCheckBox,
+    QComboBox, QLabel, QDialogButtonBox
+)
+from backend.bundle import BUNDLE_PRESETS
+from backend.lang_manager import trans
+from backend.logsearch import since_hours
+
+# (label key, hours back or None for whole files)
+BUNDLE_WINDOWS = [
+    ("bundle_window_all", None),
+    ("scope_1h", 1),
+    ("scope_24h", 24),
+    ("scope_7d", 24 * 7),
+]
+
+
+class BundleDialog(QDialog):
+    """Picks what goes into a log bundle: table selection, presets, compression, time window"""
+
+    def __init__(self, paths: list[str], parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(trans("bundle_title"))
+        self.resize(520, 460)
+        layout = QVBoxLayout(self)
+
+        files_group = QGroupBox(trans("bundle_files"))
+        files_layout = QVBoxLayout(files_group)
+        self.file_list = QListWidget()
+        for path in paths:
+            item = QListWidgetItem(path)
+            item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+            item.setCheckState(Qt.Checked)
+            self.file_list.addItem(item)
+        files_layout.addWidget(self.file_list)
+        layout.addWidget(files_group, 1)
+
+        presets_group = QGroupBox(trans("bundle_presets"))
+        presets_layout = QVBoxLayout(presets_group)
+        self.preset_checks: list[tuple[QCheckBox, list[str]]] = []
+        for key, patterns in BUNDLE_PRESETS:
+            chk = QCheckBox(trans(key))
+            chk.setToolTip(" ".join(patterns))
+            presets_layout.addWidget(chk)
+            self.preset_checks.append((chk, patterns))
+        layout.addWidget(presets_group)
+
+        opts = QHBoxLayout()
+        self.compression_combo = QComboBox()
+        self.compression_combo.addItem("tar.zst", "zst")
+        self.compression_combo.addItem("tar.gz", "gz")
+        self.window_combo = QComboBox()
+        for key, hours in BUNDLE_WINDOWS:
+            self.window_combo.addItem(trans(key), hours)
+        opts.addWidget(QLabel(trans("bundle_compression")))
+        opts.addWidget(self.compression_combo)
+        opts.addWidget(QLabel(trans("bundle_window")))
+        opts.addWidget(self.window_combo)
+        opts.addStretch(1)
+        layout.addLayout(opts)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+
+    def selected_paths(self) -> list[str]:
+        paths = []
+        for i in range(self.file_list.count()):
+            item = self.file_list.item(i)
+            if item.checkState() == Qt.Checked:
+                paths.append(item.text())
+        for chk, patterns in self.preset_checks:
+            if chk.isChecked():
+                paths.extend(patterns)
+        return paths
+
+    def compression(self) -> str:
+        return self.compression_combo.currentData()
+
+    def since(self) -> float | None:
+        hours = self.window_combo.currentData()
+        return since_hours(hours) if hours else None
@@ -39,6 +39,8 @@ class ConnectionBar(QWidget):
         self.connect_btn.setStyleSheet("font-weight: bold; background-color: #264f78;")
         self.sudo_nopass_chk = QCheckBox(trans("chk_sudo_nopass"))
         self.sudo_nopass_chk.setChecked(True)
+        self.agent_chk = QCheckBox(trans("chk_agent"))
+        self.agent_chk.setToolTip(trans("tip_agent"))
 
         # Row 0
         self.layout.addWidget(QLabel(trans("lbl_mode")), 0, 0)
@@ -60,7 +62,8 @@ class ConnectionBar(QWidget):
 
         # Row 2
         self.layout.addWidget(self.sudo_nopass_chk, 2, 0, 1, 2)
-        self.layout.addWidget(self.connect_btn, 2, 2, 1, 5)
+        self.layout.addWidget(self.agent_chk, 2, 2)
+        self.layout.addWidget(self.connect_btn, 2, 3, 1, 4)
 
         # signals
         self.key_btn.clicked.connect(self.pick_key)
@@ -88,6 +91,7 @@ class ConnectionBar(QWidget):
             self.port_spin.setValue(cfg.port)
             self.key_edit.setText(cfg.key_path)
             self.sudo_nopass_chk.setChecked(cfg.use_sudo_nopass)
+            self.agent_chk.setChecked(cfg.use_agent)
         
         self._mode_changed(self.mode_combo.currentText())
 
@@ -104,6 +108,7 @@ class ConnectionBar(QWidget):
         self.key_edit.setEnabled(is_ssh)
         self.key_btn.setEnabled(is_ssh)
         self.sudo_nopass_chk.setEnabled(is_ssh)
+        self.agent_chk.setEnabled(is_ssh)
 
     def pick_key(self):
         path, _ = QFileDialog.getOpenFileName(self, trans("select_key"), os.path.expanduser("~"))
@@ -120,7 +125,9 @@ class ConnectionBar(QWidget):
         mode = self.mode_combo.currentText().strip().lower()
         if mode == "local":
             return ConnConfig(mode="local")
-        
+
+        # Keepalive / reconnect tuning has no widgets, it is edited in settings.json
+        saved = SettingsManager.load_last_config() or ConnConfig(mode="ssh")
         return ConnConfig(
             mode="ssh",
             host=self.host_edit.text().strip(),
@@ -129,4 +136,7 @@ class ConnectionBar(QWidget):
             port=int(self.port_spin.value()),
             key_path=self.key_edit.text().strip(),
             use_sudo_nopass=self.sudo_nopass_chk.isChecked(),
+            use_agent=self.agent_chk.isChecked(),
+            keepalive_interval=saved.keepalive_interval,
+            reconnect_attempts=saved.reconnect_attempts,
         )
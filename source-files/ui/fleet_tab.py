@@ -0,0 +1,306 @@
+from functools import partial
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QColor
+from PySide6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QLineEdit, QComboBox, QSpinBox,
+    QTableWidget, QTableWidgetItem, QHeaderView, QGroupBox, QMessageBox, QSplitter, QStyle
+)
+from backend.fleet import (
+    FleetHost, HostInventory, HostResult, ConnectionPool, fan_out, DEFAULT_CONCURRENCY,
+    op_status, op_nginx_test, op_search, op_control_service
+)
+from backend.local import NGINX_ERROR, NGINX_ACCESS
+from backend.lang_manager import trans
+from .utils import show_error, show_info
+
+HOST_COLUMNS = ["name", "host", "port", "user", "key_path"]
+# (label key, service name resolved per host by op_control_service)
+FLEET_SERVICES = [("nginx", "nginx"), ("PHP-FPM", "php-fpm"), ("MySQL/MariaDB", "mysql")]
+
+
+class FleetTab(QWidget):
+    """Runs one operation on many servers in parallel and lists the result per host"""
+
+    def __init__(self, main_window):
+        super().__init__()
+        self.main_window = main_window
+        self.inventory = HostInventory.load()
+        self.pool = ConnectionPool()
+        self._result_rows: dict[str, int] = {}
+
+        layout = QVBoxLayout(self)
+        splitter = QSplitter(Qt.Vertical)
+        layout.addWidget(splitter, 1)
+
+        # 1. Hosts
+        hosts_group = QGroupBox(trans("fleet_hosts"))
+        hosts_layout = QVBoxLayout(hosts_group)
+        bar = QHBoxLayout()
+        self.add_btn = QPushButton(trans("fleet_add"))
+        self.add_btn.setIcon(self.style().standardIcon(QStyle.SP_FileDialogNewFolder))
+        self.remove_btn = QPushButton(trans("fleet_remove"))
+        self.remove_btn.setIcon(self.style().standardIcon(QStyle.SP_TrashIcon))
+        self.save_btn = QPushButton(trans("fleet_save"))
+        self.save_btn.setIcon(self.style().standardIcon(QStyle.SP_DialogSaveButton))
+        bar.addWidget(self.add_btn)
+        bar.addWidget(self.remove_btn)
+        bar.addWidget(self.save_btn)
+        bar.addStretch(1)
+        hosts_layout.addLayout(bar)
+
+        self.host_table = QTableWidget(0, len(HOST_COLUMNS))
+        self.host_table.setHorizontalHeaderLabels(
+            [trans("col_name"), trans("host"), trans("port"), trans("user"), trans("key_path")])
+        self.host_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.host_table.setSelectionBehavior(QTableWidget.SelectRows)
+        hosts_layout.addWidget(self.host_table)
+        splitter.addWidget(hosts_group)
+
+        # 2. Operation
+        op_group = QGroupBox(trans("fleet_operation"))
+        op_outer = QVBoxLayout(op_group)
+        op_bar = QHBoxLayout()
+        self.op_combo = QComboBox()
+        self.op_combo.addItem(trans("fleet_op_status"), "status")
+        self.op_combo.addItem(trans("fleet_op_nginx_test"), "nginx_test")
+        self.op_combo.addItem(trans("fleet_op_search"), "search")
+        self.op_combo.addItem(trans("fleet_op_service"), "service")
+
+        self.pattern_edit = QLineEdit()
+        self.pattern_edit.setPlaceholderText(trans("filter_placeholder"))
+        self.log_combo = QComboBox()
+        self.log_combo.addItem("nginx error.log", NGINX_ERROR)
+        self.log_combo.addItem("nginx access.log", NGINX_ACCESS)
+        self.service_combo = QComboBox()
+        for label, service in FLEET_SERVICES:
+            self.service_combo.addItem(label, service)
+        self.action_combo = QComboBox()
+        self.action_combo.addItems(["reload", "restart", "start", "stop"])
+
+        self.concurrency_spin = QSpinBox()
+        self.concurrency_spin.setRange(1, 64)
+        self.concurrency_spin.setValue(DEFAULT_CONCURRENCY)
+        self.run_btn = QPushButton(trans("fleet_run"))
+        self.run_btn.setIcon(self.style().standardIcon(QStyle.SP_MediaPlay))
+        self.run_btn.setStyleSheet("font-weight: bold;")
+        self.stop_btn = QPushButton("■ " + trans("stop_search"))
+        self.stop_btn.setEnabled(False)
+
+        op_bar.addWidget(self.op_combo)
+        op_bar.addWidget(self.pattern_edit, 1)
+        op_bar.addWidget(self.log_combo)
+        op_bar.addWidget(self.service_combo)
+        op_bar.addWidget(self.action_combo)
+        op_bar.addWidget(QLabel(trans("fleet_concurrency")))
+        op_bar.addWidget(self.concurrency_spin)
+        op_bar.addWidget(self.run_btn)
+        op_bar.addWidget(self.stop_btn)
+        op_outer.addLayout(op_bar)
+
+        # 3. Results
+        self.summary_label = QLabel("")
+        self.summary_label.setStyleSheet("color: gray;")
+        op_outer.addWidget(self.summary_label)
+        self.result_table = QTableWidget(0, 4)
+        self.result_table.setHorizontalHeaderLabels(
+            [trans("host"), trans("col_state"), trans("col_time"), trans("col_result")])
+        header = self.result_table.horizontalHeader()
+        header.setSectionResizeMode(0, QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(1, QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(2, QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(3, QHeaderView.Stretch)
+        self.result_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.result_table.setSelectionBehavior(QTableWidget.SelectRows)
+        op_outer.addWidget(self.result_table, 1)
+        splitter.addWidget(op_group)
+        splitter.setSizes([200, 400])
+
+        self.add_btn.clicked.connect(self.add_host)
+        self.remove_btn.clicked.connect(self.remove_hosts)
+        self.save_btn.clicked.connect(self.save_hosts)
+        self.op_combo.currentIndexChanged.connect(self._update_op_fields)
+        self.run_btn.clicked.connect(self.run_operation)
+        self.stop_btn.clicked.connect(self.stop_operation)
+        self.result_table.doubleClicked.connect(self._show_result_detail)
+
+        self._fill_host_table()
+        self._update_op_fields()
+
+    # --- Hosts ---
+
+    def _fill_host_table(self):
+        self.host_table.setRowCount(0)
+        for host in self.inventory.hosts:
+            self._append_host_row(host)
+
+    def _append_host_row(self, host: FleetHost):
+        r = self.host_table.rowCount()
+        self.host_table.insertRow(r)
+        for c, attr in enumerate(HOST_COLUMNS):
+            item = QTableWidgetItem(str(getattr(host, attr)))
+            if c == 0:
+                item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+                item.setCheckState(Qt.Checked)
+            self.host_table.setItem(r, c, item)
+
+    def add_host(self):
+        # Prefill from the connection bar, the usual starting point
+        bar = self.main_window.conn_bar
+        # Results, samplers and pooled connections are keyed by name: never reuse one
+        taken = {self.host_table.item(r, 0).text().strip() for r in range(self.host_table.rowCount())
+                 if self.host_table.item(r, 0)}
+        n = self.host_table.rowCount() + 1
+        while f"pi{n}" in taken:
+            n += 1
+        self._append_host_row(FleetHost(name=f"pi{n}", host=bar.host_edit.text().strip(),
+                                        user=bar.user_edit.text().strip() or "pi", port=bar.port_spin.value(),
+                                        key_path=bar.key_edit.text().strip(),
+                                        use_sudo_nopass=bar.sudo_nopass_chk.isChecked(),
+                                        use_agent=bar.agent_chk.isChecked()))
+
+    def remove_hosts(self):
+        for index in sorted(self.host_table.selectionModel().selectedRows(), key=lambda i: -i.row()):
+            self.host_table.removeRow(index.row())
+
+    def _hosts_from_table(self, checked_only: bool = False) -> list[FleetHost]:
+        """Raises ValueError when two rows end up with the same name"""
+        previous = {h.name: h for h in self.inventory.hosts}
+        hosts = []
+        names = set()
+        for r in range(self.host_table.rowCount()):
+            values = [(self.host_table.item(r, c).text().strip() if self.host_table.item(r, c) else "")
+                      for c in range(len(HOST_COLUMNS))]
+            name, addr, port, user, key = values
+            if not addr:
+                continue
+            if (name or addr) in names:
+                raise ValueError(trans("fleet_duplicate_name").format(name=name or addr))
+            names.add(name or addr)
+            if checked_only and self.host_table.item(r, 0).checkState() != Qt.Checked:
+                continue
+            old = previous.get(name)
+            bar = self.main_window.conn_bar
+            hosts.append(FleetHost(
+                name=name or addr, host=addr, port=int(port) if port.isdigit() else 22, user=user or "pi",
+                key_path=key,
+                use_sudo_nopass=old.use_sudo_nopass if old else bar.sudo_nopass_chk.isChecked(),
+                use_agent=old.use_agent if old else bar.agent_chk.isChecked()))
+        return hosts
+
+    def checked_hosts(self) -> list[FleetHost]:
+        """Hosts ticked in the table, as edited (saved or not)"""
+        return self._hosts_from_table(checked_only=True)
+
+    def save_hosts(self):
+        try:
+            self.inventory.hosts = self._hosts_from_table()
+        except ValueError as e:
+            show_error(self, trans("error"), str(e))
+            return
+        self.inventory.save()
+        show_info(self, trans("info"), trans("fleet_saved").format(count=len(self.inventory.hosts)))
+
+    # --- Operations ---
+
+    def _update_op_fields(self):
+        op = self.op_combo.currentData()
+        self.pattern_edit.setVisible(op == "search")
+        self.log_combo.setVisible(op == "search")
+        self.service_combo.setVisible(op == "service")
+        self.action_combo.setVisible(op == "service")
+
+    def _build_operation(self, hosts: list[FleetHost]):
+        op = self.op_combo.currentData()
+        if op == "status":
+            return op_status
+        if op == "nginx_test":
+            return op_nginx_test
+        if op == "search":
+            pattern = self.pattern_edit.text().strip()
+            if not pattern:
+                show_info(self, trans("info"), trans("enter_keyword"))
+                return None
+            return partial(op_search, pattern=pattern, path=self.log_combo.currentData())
+        service, action = self.service_combo.currentData(), self.action_combo.currentText()
+        confirm = QMessageBox.question(self, trans("confirmation"), trans("fleet_confirm_service").format(
+            action=action, service=self.service_combo.currentText(), count=len(hosts)))
+        if confirm != QMessageBox.Yes:
+            return None
+        return partial(op_control_service, service=service, action=action)
+
+    def run_operation(self):
+        try:
+            hosts = self._hosts_from_table(checked_only=True)
+        except ValueError as e:
+            show_error(self, trans("error"), str(e))
+            return
+        if not hosts:
+            show_info(self, trans("info"), trans("fleet_no_hosts"))
+            return
+        operation = self._build_operation(hosts)
+        if operation is None:
+            return
+
+        # Same password for every host (key auth needs none)
+        self.pool.password = self.main_window.conn_bar.password_edit.text()
+        self.result_table.setRowCount(0)
+        self._result_rows.clear()
+        for host in hosts:
+            self._set_result_row(host.name, "…", "", "")
+        self.summary_label.setText(trans("search_running"))
+        self.run_btn.setEnabled(False)
+        self.stop_btn.setEnabled(True)
+
+        self.main_window.run_job("fleet.run", self._work, hosts, operation, self.concurrency_spin.value(),
+                                 pass_job=True, on_progress=self._on_host_result,
+                                 on_result=self._on_finished, on_error=self._on_failed)
+
+    def stop_operation(self):
+        # Hosts already running finish in the background, their results are dropped
+        self.main_window.jobs.cancel("fleet.run")
+        self.summary_label.setText("")
+        self._reset_buttons()
+
+    def _work(self, job, hosts, operation, max_workers):
+        return fan_out(self.pool, hosts, operation, max_workers, job.cancel_event, on_result=job.report)
+
+    def _set_result_row(self, name: str, state: str, elapsed: str, output: str, ok: bool | None = None):
+        r = self._result_rows.get(name)
+        if r is None:
+            r = self.result_table.rowCount()
+            self.result_table.insertRow(r)
+            self._result_rows[name] = r
+        first_line = output.strip().splitlines()[0] if output.strip() else ""
+        items = [QTableWidgetItem(name), QTableWidgetItem(state), QTableWidgetItem(elapsed),
+                 QTableWidgetItem(first_line)]
+        items[2].setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+        items[3].setToolTip(output)
+        items[3].setData(Qt.UserRole, output)
+        if ok is not None:
+            items[1].setForeground(QColor("#008000" if ok else "red"))
+        for c, item in enumerate(items):
+            self.result_table.setItem(r, c, item)
+
+    def _on_host_result(self, result: HostResult):
+        self._set_result_row(result.name, "OK" if result.ok else trans("error"), f"{result.elapsed_ms:.0f}",
+                             result.output, result.ok)
+
+    def _on_finished(self, results: list[HostResult]):
+        self._reset_buttons()
+        ok = sum(1 for r in results if r.ok)
+        slowest = max((r.elapsed_ms for r in results), default=0)
+        self.summary_label.setText(trans("fleet_summary").format(ok=ok, failed=len(results) - ok, ms=slowest))
+
+    def _on_failed(self, e):
+        self._reset_buttons()
+        show_error(self, trans("error"), str(e))
+
+    def _reset_buttons(self):
+        self.run_btn.setEnabled(True)
+        self.stop_btn.setEnabled(False)
+
+    def _show_result_detail(self, index):
+        item = self.result_table.item(index.row(), 3)
+        host = self.result_table.item(index.row(), 0)
+        if item and host:
+            show_info(self, host.text(), item.data(Qt.UserRole) or "")
@@ -1,47 +1,132 @@
+import re
+from collections import OrderedDict
 from PySide6.QtCore import Qt, QRegularExpression
-from PySide6.QtGui import QSyntaxHighlighter, QTextCharFormat, QColor, QFont
-
-class LogHighlighter(QSyntaxHighlighter):
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.rules = []
-
-        # Error / Failed / Exception -> Red & Bold
-        err_fmt = QTextCharFormat()
-        err_fmt.setForeground(QColor("red"))
-        err_fmt.setFontWeight(QFont.Bold)
-        self.rules.append((QRegularExpression(r"(?i)\b(error|failed|failure|exception|critical|fatal)\b"), err_fmt))
-
-        # Warning -> Orange / Dark Yellow
-        warn_fmt = QTextCharFormat()
-        warn_fmt.setForeground(QColor("#FF8C00")) # DarkOrange
-        warn_fmt.setFontWeight(QFont.Bold)
-        self.rules.append((QRegularExpression(r"(?i)\b(warn|warning)\b"), warn_fmt))
-
-        # Info -> Green
-        info_fmt = QTextCharFormat()
-        info_fmt.setForeground(QColor("#008000")) # Green
-        self.rules.append((QRegularExpression(r"(?i)\b(info|success)\b"), info_fmt))
-
-        # Debug -> Gray
-        debug_fmt = QTextCharFormat()
-        debug_fmt.setForeground(QColor("gray"))
-        self.rules.append((QRegularExpression(r"(?i)\b(debug)\b"), debug_fmt))
-
-        # IP Address -> Cyan / Blue
-        ip_fmt = QTextCharFormat()
-        ip_fmt.setForeground(QColor("#00FFFF"))
-        self.rules.append((QRegularExpression(r"\b\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}\b"), ip_fmt))
-
-        # Date/Time (Start of line usually) -> Dark Magenta
-        date_fmt = QTextCharFormat()
-        date_fmt.setForeground(QColor("darkmagenta"))
-        self.rules.append((QRegularExpression(r"^\d{4}/\d{2}/\d{2} \d{2}:\d{2}:\d{2}"), date_fmt))
-        self.rules.append((QRegularExpression(r"^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}"), date_fmt))
-
-    def highlightBlock(self, text: str):
-        for pattern, fmt in self.rules:
+from PySide6.QtGui import QTextCharFormat, QColor, QFont
+
+# Lines longer than this are left plain (minified JSON, stack dumps...)
+MAX_HIGHLIGHT_LEN = 2000
+# Format spans of recently seen lines, keyed by hash(text)
+SPAN_CACHE_SIZE = 20000
+
+# One alternation, one pass per line; the group name selects the format.
+# The lookahead lets the scan skip characters no token can start with.
+COMBINED_PATTERN = re.compile(
+    r"(?=[\dEFWISDC])\b(?:"
+    r"(?P<date>^\d{4}([/-])\d{2}\2\d{2} \d{2}:\d{2}:\d{2})"
+    r"|(?P<error>(?:error|failed|failure|exception|critical|fatal)\b)"
+    r"|(?P<warn>warn(?:ing)?\b)"
+    r"|(?P<info>(?:info|success)\b)"
+    r"|(?P<debug>debug\b)"
+    r"|(?P<ip>\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}\b))",
+    re.IGNORECASE,
+)
+_NON_BMP = re.compile("[\U00010000-\U0010FFFF]")
+
+
+def _make_format(color: str, bold: bool = False) -> QTextCharFormat:
+    fmt = QTextCharFormat()
+    fmt.setForeground(QColor(color))
+    if bold:
+        fmt.setFontWeight(QFont.Bold)
+    return fmt
+
+
+def make_formats() -> dict[str, QTextCharFormat]:
+    """Format of each find_spans kind"""
+    return {
+        "error": _make_format("red", bold=True),       # Error / Failed / Exception
+        "warn": _make_format("#FF8C00", bold=True),    # DarkOrange
+        "info": _make_format("#008000"),               # Green
+        "debug": _make_format("gray"),
+        "ip": _make_format("#00FFFF"),                 # Cyan
+        "date": _make_format("darkmagenta"),           # Date/Time at line start
+    }
+
+
+def find_spans(text: str) -> tuple[tuple[int, int, str], ...]:
+    """Returns (start, length, kind) for every highlighted token in one line"""
+    spans = tuple((m.start(), m.end() - m.start(), m.lastgroup) for m in COMBINED_PATTERN.finditer(text))
+    if spans and _NON_BMP.search(text):
+        # Qt counts UTF-16 code units, Python counts code points
+        def utf16(i):
+            return len(text[:i].encode("utf-16-le")) // 2
+        spans = tuple((utf16(s), utf16(s + n) - utf16(s), kind) for s, n, kind in spans)
+    return spans
+
+
+class SpanCache:
+    """find_spans of recently seen lines; the least recently used are dropped first"""
+
+    def __init__(self, size: int = SPAN_CACHE_SIZE):
+        self.size = size
+        self._spans: OrderedDict[int, tuple] = OrderedDict()
+
+    def spans_for(self, text: str) -> tuple:
+        key = hash(text)
+        spans = self._spans.get(key)
+        if spans is not None:
+            self._spans.move_to_end(key)
+        else:
+            spans = find_spans(text)
+            self._spans[key] = spans
+            if len(self._spans) > self.size:
+                self._spans.popitem(last=False)
+        return spans
+
+
+if __name__ == "__main__":
+    # Micro-benchmark of the matching step: python -m ui.highlighter [lines]
+    import random
+    import sys
+    import time
+    from PySide6.QtGui import QGuiApplication
+
+    app = QGuiApplication(sys.argv[:1])
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rnd = random.Random(1)
+    samples = [
+        '192.168.1.{ip} - - [27/Oct/2023:10:{m:02d}:00 +0000] "GET /api/item?id={n} HTTP/1.1" 200 {n} "-" "curl/8.0"',
+        "2023/10/27 10:{m:02d}:00 [error] 1234#0: *{n} connect() failed (111: Connection refused) while connecting to upstream, client: 10.0.0.{ip}",
+        "2023-10-27 10:{m:02d}:00 0 [Warning] Aborted connection {n} to db: 'app' user: 'web' host: '10.0.0.{ip}'",
+        "Oct 27 10:{m:02d}:00 raspberrypi systemd[1]: Started Session {n} of user pi (info).",
+    ]
+    lines = [
+        rnd.choice(samples).format(ip=rnd.randint(1, 254), m=rnd.randint(0, 59), n=rnd.randint(1, 99999))
+        for _ in range(count)
+    ]
+
+    # Previous implementation: one QRegularExpression globalMatch pass per rule
+    legacy_rules = [
+        (QRegularExpression(r"(?i)\b(error|failed|failure|exception|critical|fatal)\b"), "error"),
+        (QRegularExpression(r"(?i)\b(warn|warning)\b"), "warn"),
+        (QRegularExpression(r"(?i)\b(info|success)\b"), "info"),
+        (QRegularExpression(r"(?i)\b(debug)\b"), "debug"),
+        (QRegularExpression(r"\b\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}\b"), "ip"),
+        (QRegularExpression(r"^\d{4}/\d{2}/\d{2} \d{2}:\d{2}:\d{2}"), "date"),
+        (QRegularExpression(r"^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}"), "date"),
+    ]
+
+    def legacy_spans(text):
+        spans = []
+        for pattern, kind in legacy_rules:
             match_iter = pattern.globalMatch(text)
             while match_iter.hasNext():
                 match = match_iter.next()
-                self.setFormat(match.capturedStart(), match.capturedLength(), fmt)
+                spans.append((match.capturedStart(), match.capturedLength(), kind))
+        return spans
+
+    def timed(fn, subset=None) -> float:
+        t0 = time.perf_counter()
+        for line in subset or lines:
+            fn(line)
+        return time.perf_counter() - t0
+
+    hl = SpanCache()
+    legacy = timed(legacy_spans)
+    cold = timed(hl.spans_for)
+    # Re-highlighting lines still in the cache (scrolling back, live view redraws)
+    window = lines[-SPAN_CACHE_SIZE:]
+    warm = timed(hl.spans_for, window) * len(lines) / len(window)
+    mismatch = sum(sorted(legacy_spans(line)) != sorted(find_spans(line)) for line in lines[:1000])
+    print(f"{count} lines: legacy {legacy:.3f}s, combined {cold:.3f}s (x{legacy / cold:.1f}), "
+          f"cached {warm:.3f}s (x{legacy / warm:.1f}), span mismatches in first 1000: {mismatch}")
@@ -0,0 +1,103 @@
+import time
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex, QSortFilterProxyModel
+from backend.inventory import InventoryDelta, LogFileInfo
+from backend.lang_manager import trans
+
+PATH_ROLE = Qt.UserRole  # full remote path, same role the old QTableWidget used
+SORT_ROLE = Qt.UserRole + 1  # raw value so sizes and dates sort numerically
+
+COLUMNS = ("col_file", "col_size", "col_date")
+
+
+class LogInventoryModel(QAbstractTableModel):
+    """
+    Rows of a LogInventory. apply() takes the delta of one refresh and only
+    touches the rows it names: changed rows get dataChanged, new ones are
+    appended, removed ones are taken out in contiguous runs.
+    """
+
+    def __init__(self, root: str, parent=None):
+        super().__init__(parent)
+        self.root = root.rstrip("/")
+        self._rows: list[LogFileInfo] = []
+        self._row_of: dict[str, int] = {}
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return trans(COLUMNS[section])
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        entry = self._rows[index.row()]
+        col = index.column()
+        if role == Qt.DisplayRole:
+            if col == 0:
+                return entry.path
+            if col == 1:
+                return f"{entry.size / 1024:.2f}"
+            return time.strftime("%Y-%m-%d %H:%M", time.localtime(entry.mtime))
+        if role == SORT_ROLE:
+            return (entry.path, entry.size, entry.mtime)[col]
+        if role == PATH_ROLE:
+            return f"{self.root}/{entry.path}"
+        if role == Qt.TextAlignmentRole and col == 1:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+    def clear(self):
+        self.beginResetModel()
+        self._rows = []
+        self._row_of = {}
+        self.endResetModel()
+
+    def apply(self, delta: InventoryDelta):
+        if delta.removed:
+            doomed = sorted((self._row_of[p] for p in delta.removed if p in self._row_of), reverse=True)
+            # Remove from the bottom up, one beginRemoveRows per contiguous run
+            i = 0
+            while i < len(doomed):
+                last = first = doomed[i]
+                while i + 1 < len(doomed) and doomed[i + 1] == first - 1:
+                    i += 1
+                    first = doomed[i]
+                self.beginRemoveRows(QModelIndex(), first, last)
+                del self._rows[first:last + 1]
+                self.endRemoveRows()
+                i += 1
+            self._row_of = {e.path: r for r, e in enumerate(self._rows)}
+
+        added = []
+        for entry in delta.upserts:
+            row = self._row_of.get(entry.path)
+            if row is None:
+                added.append(entry)
+                continue
+            self._rows[row] = entry
+            self.dataChanged.emit(self.index(row, 0), self.index(row, len(COLUMNS) - 1))
+
+        if added:
+            start = len(self._rows)
+            self.beginInsertRows(QModelIndex(), start, start + len(added) - 1)
+            for offset, entry in enumerate(added):
+                self._rows.append(entry)
+                self._row_of[entry.path] = start + offset
+            self.endInsertRows()
+
+
+def make_inventory_proxy(model: LogInventoryModel, parent=None) -> QSortFilterProxyModel:
+    """Sorts on raw values and filters on the file column, case-insensitive"""
+    proxy = QSortFilterProxyModel(parent)
+    proxy.setSourceModel(model)
+    proxy.setSortRole(SORT_ROLE)
+    proxy.setFilterKeyColumn(0)
+    proxy.setFilterCaseSensitivity(Qt.CaseInsensitive)
+    proxy.setDynamicSortFilter(True)
+    return proxy
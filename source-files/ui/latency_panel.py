@@ -0,0 +1,169 @@
+import time
+from PySide6.QtCore import Qt, QTimer
+from PySide6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QGridLayout, QGroupBox, QLabel, QSpinBox, QPushButton,
+    QTableWidget, QTableWidgetItem, QHeaderView
+)
+from backend.latency import LatencySketch, LatencyTracker
+from backend.lang_manager import trans
+
+REFRESH_MS = 2000
+PREFIX_ROWS = 50
+RECENT_MINUTES = 60
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def _ms(seconds: float | None) -> str:
+    return "-" if seconds is None else f"{seconds * 1000:.1f}"
+
+
+class LatencyDialog(QDialog):
+    """
+    p50/p95/p99 of $request_time and $upstream_response_time, overall, per
+    URI prefix and per minute, plus the slowest requests. The live tail of
+    the nginx tab keeps feeding its tracker; loaded history (rotated
+    archives included) is merged into what is shown. History reads the live
+    file to its end, so the live tracker starts over when it is loaded.
+    """
+
+    def __init__(self, main_window, tab, backend, path: str, parent=None):
+        super().__init__(parent)
+        self.main_window = main_window
+        self.tab = tab
+        self.backend = backend
+        self.path = path
+        self.history: LatencyTracker | None = None
+        self.setWindowTitle(f"{trans('latency_title')} - {path}")
+        self.resize(1100, 750)
+        layout = QVBoxLayout(self)
+
+        bar = QHBoxLayout()
+        self.hours_spin = QSpinBox()
+        self.hours_spin.setRange(1, 24 * 60)
+        self.hours_spin.setValue(24)
+        self.load_btn = QPushButton(trans("latency_load"))
+        self.load_btn.setToolTip(trans("tip_latency_load"))
+        self.summary_label = QLabel("")
+        bar.addWidget(QLabel(trans("latency_hours")))
+        bar.addWidget(self.hours_spin)
+        bar.addWidget(self.load_btn)
+        bar.addWidget(self.summary_label, 1)
+        layout.addLayout(bar)
+
+        quantile_cols = [f"p{int(q * 100)} (ms)" for q in QUANTILES]
+        grid = QGridLayout()
+        self.overall_table = self._add_table(grid, 0, 0, "latency_overall", [
+            trans("col_kind"), trans("col_count"), trans("col_mean"), *quantile_cols, trans("col_max")])
+        self.slow_table = self._add_table(grid, 0, 1, "latency_slowest", [
+            trans("col_uri"), trans("col_request_time"), trans("col_upstream_time"), trans("col_status"),
+            trans("col_minute")])
+        self.prefix_table = self._add_table(grid, 1, 0, "latency_prefixes", [
+            trans("col_prefix"), trans("col_count"), *quantile_cols, trans("col_upstream_p95")])
+        self.minute_table = self._add_table(grid, 1, 1, "latency_minutes", [
+            trans("col_minute"), trans("col_count"), *quantile_cols, trans("col_upstream_p95")])
+        layout.addLayout(grid, 1)
+
+        self.load_btn.clicked.connect(self.load_history)
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(REFRESH_MS)
+        self.refresh()
+
+    @staticmethod
+    def _add_table(grid: QGridLayout, row: int, col: int, title_key: str, headers: list[str]) -> QTableWidget:
+        group = QGroupBox(trans(title_key))
+        group_layout = QVBoxLayout(group)
+        table = QTableWidget(0, len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        table.verticalHeader().setVisible(False)
+        table.setEditTriggers(QTableWidget.NoEditTriggers)
+        group_layout.addWidget(table)
+        grid.addWidget(group, row, col)
+        return table
+
+    def load_history(self):
+        self.load_btn.setEnabled(False)
+        self.summary_label.setText(trans("search_running"))
+        since = time.time() - self.hours_spin.value() * 3600
+
+        def work(job):
+            return self.tab.latency_history.load(self.backend, since, job.cancel_event)
+
+        def loaded(tracker):
+            self.load_btn.setEnabled(True)
+            if tracker is not None:
+                self.history = tracker
+                if self.tab.latency_path == self.path and self.tab.latency is not None:
+                    # Its lines are in the history now; only newer ones are added from here on
+                    self.tab.latency = LatencyTracker(self.tab.latency.log_format)
+            self.refresh()
+
+        def failed(e):
+            self.load_btn.setEnabled(True)
+            self.summary_label.setText(str(e))
+
+        self.main_window.run_job(f"latency:{self.path}", work, pass_job=True, on_result=loaded, on_error=failed)
+
+    def done(self, result):
+        self.timer.stop()
+        self.main_window.jobs.cancel(f"latency:{self.path}")
+        super().done(result)
+
+    def _combined(self) -> LatencyTracker:
+        # Merging copies bucket counts only; cheap next to parsing
+        live = self.tab.latency if self.tab.latency_path == self.path else None
+        combined = LatencyTracker()
+        for part in (self.history, live):
+            if part is not None:
+                combined.merge(part)
+        return combined
+
+    def refresh(self):
+        if not self.load_btn.isEnabled():
+            return
+        live = self.tab.latency if self.tab.latency_path == self.path else None
+        data = self._combined()
+        self.summary_label.setText(trans("latency_summary").format(
+            requests=data.total.request.count,
+            live=live.total.request.count if live else 0,
+            history=self.history.total.request.count if self.history else 0,
+        ) + ("" if live else "  " + trans("latency_live_off")))
+
+        self._fill(self.overall_table, [
+            [trans("latency_request"), *self._overall(data.total.request)],
+            [trans("latency_upstream"), *self._overall(data.total.upstream)],
+        ])
+        prefixes = sorted(data.prefixes.items(), key=lambda item: -item[1].request.count)[:PREFIX_ROWS]
+        self._fill(self.prefix_table, [[prefix, *self._quantiles(pair)] for prefix, pair in prefixes])
+        minutes = sorted(data.minutes.items(), reverse=True)[:RECENT_MINUTES]
+        self._fill(self.minute_table, [
+            [time.strftime("%Y-%m-%d %H:%M", time.localtime(minute * 60)), *self._quantiles(pair)]
+            for minute, pair in minutes])
+        self._fill(self.slow_table, [
+            [s.uri, _ms(s.request_time), _ms(s.upstream_time), s.status,
+             time.strftime("%m-%d %H:%M", time.localtime(s.minute * 60)) if s.minute else "-"]
+            for s in data.outliers()])
+
+    @staticmethod
+    def _overall(sketch: LatencySketch) -> list[str]:
+        if not sketch.count:
+            return [str(0), "-", *["-"] * len(QUANTILES), "-"]
+        return [str(sketch.count), _ms(sketch.mean), *(_ms(sketch.quantile(q)) for q in QUANTILES), _ms(sketch.max)]
+
+    @staticmethod
+    def _quantiles(pair) -> list[str]:
+        request, upstream = pair.request, pair.upstream
+        return [str(request.count), *(_ms(request.quantile(q)) if request.count else "-" for q in QUANTILES),
+                _ms(upstream.quantile(0.95)) if upstream.count else "-"]
+
+    @staticmethod
+    def _fill(table: QTableWidget, rows: list[list[str]]):
+        table.setRowCount(len(rows))
+        for r, row in enumerate(rows):
+            for c, text in enumerate(row):
+                item = QTableWidgetItem(text)
+                if c:
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                table.setItem(r, c, item)
@@ -0,0 +1,87 @@
+import time
+from collections import deque
+from PySide6.QtCore import QObject, QTimer, Signal
+
+DEFAULT_MAX_LINES = 5000
+FRAME_MS = 33  # ~30 fps
+
+
+class LiveLogBuffer(QObject):
+    """
+    Fixed-capacity line ring buffer between a live tail source and a LogView.
+
+    Incoming chunks are split into lines and queued; a frame timer appends
+    everything queued in one insert. When more lines arrive between two frames
+    than the view can hold, the oldest are dropped and counted instead of being
+    rendered. The view is capped at max_lines blocks while live, so memory
+    stays bounded however long the tail runs.
+    """
+
+    # dropped lines so far, lines/s rendered over the last second
+    stats_changed = Signal(int, float)
+
+    def __init__(self, text_edit, max_lines: int = DEFAULT_MAX_LINES, parent=None):
+        super().__init__(parent)
+        self.text_edit = text_edit
+        self.max_lines = max_lines
+        self._pending: deque[str] = deque(maxlen=max_lines)
+        self._partial = ""
+        self.dropped = 0
+        self._rate_lines = 0
+        self._rate_started = time.monotonic()
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(FRAME_MS)
+        self._timer.timeout.connect(self.flush)
+
+    def start(self):
+        self.reset()
+        self.text_edit.set_block_limit(self.max_lines)
+        self._timer.start()
+
+    def stop(self):
+        """Renders what is left and restores the view's normal (non-live) block cap"""
+        if self._partial:
+            self._pending.append(self._partial)
+            self._partial = ""
+        self.flush()
+        self._timer.stop()
+        self.text_edit.set_block_limit(None)
+
+    def reset(self):
+        self._pending.clear()
+        self._partial = ""
+        self.dropped = 0
+        self._rate_lines = 0
+        self._rate_started = time.monotonic()
+
+    def set_max_lines(self, max_lines: int):
+        self.max_lines = max_lines
+        self._pending = deque(self._pending, maxlen=max_lines)
+        if self._timer.isActive():
+            self.text_edit.set_block_limit(max_lines)
+
+    def feed(self, text: str):
+        if not text:
+            return
+        lines = (self._partial + text).replace("\r\n", "\n").split("\n")
+        self._partial = lines.pop()
+        overflow = len(self._pending) + len(lines) - self.max_lines
+        if overflow > 0:
+            self.dropped += overflow
+        self._pending.extend(lines)
+
+    def flush(self):
+        if self._pending:
+            count = len(self._pending)
+            text = "\n".join(self._pending) + "\n"
+            self._pending.clear()
+            self.text_edit.append_text(text)
+            self._rate_lines += count
+
+        now = time.monotonic()
+        if now - self._rate_started >= 1.0:
+            rate = self._rate_lines / (now - self._rate_started)
+            self._rate_lines = 0
+            self._rate_started = now
+            self.stats_changed.emit(self.dropped, rate)
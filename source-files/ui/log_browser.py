@@ -0,0 +1,154 @@
+from collections import OrderedDict
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex, QDateTime
+from PySide6.QtGui import QFont
+from PySide6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QListView, QSpinBox, QPushButton, QAbstractItemView,
+    QDateTimeEdit
+)
+from backend.lang_manager import trans
+
+PAGE_LINES = 500
+MAX_CACHED_PAGES = 24  # ~12k lines in memory whatever the file size
+LOADING_TEXT = "…"
+
+
+class LogLineModel(QAbstractListModel):
+    """
+    List model over a (possibly huge) log file. Only the pages the view asks
+    for are fetched, through Backend.read_range in the background, and kept in
+    a small LRU cache. Neighbouring pages are prefetched.
+    """
+
+    def __init__(self, main_window, backend, path: str, parent=None):
+        super().__init__(parent)
+        self.main_window = main_window
+        self.backend = backend
+        self.path = path
+        self.total = 0
+        self._pages: OrderedDict[int, list[str]] = OrderedDict()
+        self._loading: set[int] = set()
+
+    def reload(self, on_done=None):
+        def done(total):
+            self.beginResetModel()
+            self.total = total
+            self._pages.clear()
+            self._loading.clear()
+            self.endResetModel()
+            if on_done:
+                on_done(total)
+
+        self.main_window.run_job(f"browse.count:{self.path}", self.backend.line_count, self.path, on_result=done)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.total
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        row = index.row()
+        page_no = row // PAGE_LINES
+        page = self._pages.get(page_no)
+        if page is None:
+            self._request(page_no)
+            self._request(page_no + 1)
+            if page_no:
+                self._request(page_no - 1)
+            return LOADING_TEXT
+        self._pages.move_to_end(page_no)
+        offset = row - page_no * PAGE_LINES
+        return page[offset] if offset < len(page) else ""
+
+    def _request(self, page_no: int):
+        if page_no in self._pages or page_no in self._loading or page_no * PAGE_LINES >= self.total:
+            return
+        self._loading.add(page_no)
+        self.main_window.run_job(
+            f"browse.page:{self.path}:{page_no}",
+            self.backend.read_range, self.path, page_no * PAGE_LINES, PAGE_LINES,
+            on_result=lambda lines, p=page_no: self._page_loaded(p, lines),
+            on_error=lambda e, p=page_no: self._loading.discard(p),
+        )
+
+    def _page_loaded(self, page_no: int, lines: list[str]):
+        self._loading.discard(page_no)
+        self._pages[page_no] = lines
+        while len(self._pages) > MAX_CACHED_PAGES:
+            self._pages.popitem(last=False)
+        first = page_no * PAGE_LINES
+        last = min(self.total, first + PAGE_LINES) - 1
+        if last >= first:
+            self.dataChanged.emit(self.index(first), self.index(last))
+
+
+class LogBrowserDialog(QDialog):
+    """Scrolls through a whole log file with constant memory"""
+
+    def __init__(self, main_window, backend, path: str, parent=None):
+        super().__init__(parent)
+        self.main_window = main_window
+        self.backend = backend
+        self.path = path
+        self.setWindowTitle(f"{trans('browse_title')} - {path}")
+        self.resize(1000, 650)
+        layout = QVBoxLayout(self)
+
+        bar = QHBoxLayout()
+        self.info_label = QLabel(trans("status_connecting"))
+        self.goto_spin = QSpinBox()
+        self.goto_spin.setRange(1, 1)
+        self.goto_btn = QPushButton(trans("browse_goto"))
+        self.end_btn = QPushButton(trans("browse_end"))
+        self.time_edit = QDateTimeEdit(QDateTime.currentDateTime().addSecs(-3600))
+        self.time_edit.setDisplayFormat("yyyy-MM-dd HH:mm:ss")
+        self.time_edit.setCalendarPopup(True)
+        self.time_btn = QPushButton(trans("browse_goto"))
+        self.time_btn.setToolTip(trans("tip_browse_time"))
+        self.reload_btn = QPushButton(trans("refresh"))
+        bar.addWidget(self.info_label)
+        bar.addStretch(1)
+        bar.addWidget(QLabel(trans("browse_line")))
+        bar.addWidget(self.goto_spin)
+        bar.addWidget(self.goto_btn)
+        bar.addWidget(QLabel(trans("browse_time")))
+        bar.addWidget(self.time_edit)
+        bar.addWidget(self.time_btn)
+        bar.addWidget(self.end_btn)
+        bar.addWidget(self.reload_btn)
+        layout.addLayout(bar)
+
+        self.model = LogLineModel(main_window, backend, path, self)
+        self.view = QListView()
+        self.view.setFont(QFont("Consolas", 10))
+        # Fixed row height lets the view skip measuring millions of rows
+        self.view.setUniformItemSizes(True)
+        self.view.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.view.setModel(self.model)
+        layout.addWidget(self.view, 1)
+
+        self.goto_btn.clicked.connect(lambda: self.scroll_to(self.goto_spin.value() - 1))
+        self.end_btn.clicked.connect(lambda: self.scroll_to(self.model.total - 1))
+        self.time_btn.clicked.connect(self.goto_time)
+        self.reload_btn.clicked.connect(self.reload)
+        self.reload()
+
+    def reload(self):
+        self.model.reload(on_done=self._on_count)
+
+    def _on_count(self, total: int):
+        self.info_label.setText(trans("browse_total").format(lines=total))
+        self.goto_spin.setRange(1, max(1, total))
+
+    def goto_time(self):
+        # Bisection over the server side line/time index, no scan of the file
+        ts = self.time_edit.dateTime().toSecsSinceEpoch()
+        self.main_window.run_job(
+            f"browse.seek:{self.path}", self.backend.seek_time, self.path, ts,
+            on_result=lambda found: self.scroll_to(found[0]))
+
+    def scroll_to(self, row: int):
+        if self.model.total <= 0:
+            return
+        row = max(0, min(row, self.model.total - 1))
+        self.view.scrollTo(self.model.index(row), QAbstractItemView.PositionAtCenter)
+        self.view.setCurrentIndex(self.model.index(row))
@@ -0,0 +1,187 @@
+from PySide6.QtGui import QColor, QFont, QTextCharFormat, QTextCursor, QTextLayout, QTextOption
+from PySide6.QtWidgets import QPlainTextEdit
+from .highlighter import MAX_HIGHLIGHT_LEN, SpanCache, make_formats
+
+# Lines kept by a pane outside live mode; the oldest go first
+DEFAULT_MAX_BLOCKS = 200_000
+HIGHLIGHTED = 1  # QTextBlock.userState() once the block's formats are applied
+
+
+def last_lines(text: str, count: int) -> str:
+    """The last `count` lines of text (a trailing newline does not count as a line)"""
+    end = len(text) - 1 if text.endswith("\n") else len(text)
+    pos = end
+    for _ in range(count):
+        pos = text.rfind("\n", 0, pos)
+        if pos == -1:
+            return text
+    return text[pos + 1:]
+
+
+class LogView(QPlainTextEdit):
+    """
+    Read-only log pane on a plain-text document. QPlainTextEdit lays out only
+    the blocks on screen, lines do not wrap, and the document is capped at
+    `max_blocks` lines. Highlighting is lazy too: a block gets its formats the
+    first time it is shown, so loading 200k lines colours ~50 of them.
+    """
+
+    def __init__(self, parent=None, max_blocks: int = DEFAULT_MAX_BLOCKS, highlight: bool = True):
+        super().__init__(parent)
+        self.max_blocks = max_blocks
+        self.setReadOnly(True)
+        self.setUndoRedoEnabled(False)
+        self.setLineWrapMode(QPlainTextEdit.NoWrap)
+        self.setWordWrapMode(QTextOption.NoWrap)
+        font = QFont("Consolas", 10)
+        font.setStyleHint(QFont.Monospace)
+        font.setFixedPitch(True)
+        self.setFont(font)
+        self.setMaximumBlockCount(max_blocks)
+        self._formats = make_formats() if highlight else None
+        # Live tails and scrolling back show the same lines again
+        self._spans = SpanCache()
+        self._loading = False
+        if highlight:
+            self.updateRequest.connect(self._highlight_visible)
+
+    def set_block_limit(self, count: int | None):
+        """Caps the pane at `count` lines; None restores max_blocks"""
+        self.setMaximumBlockCount(self.max_blocks if count is None else count)
+
+    def set_text(self, text: str):
+        limit = self.maximumBlockCount()
+        if limit and text.count("\n") > limit:
+            # Trim before Qt sees it, rather than building blocks only to drop them
+            text = last_lines(text, limit)
+        # Formats set while setPlainText is still laying out are dropped; colour once it is done
+        self._loading = True
+        try:
+            self.setPlainText(text)
+        finally:
+            self._loading = False
+        self.moveCursor(QTextCursor.End)
+        if self._formats is not None:
+            self._highlight_visible()
+
+    def append_text(self, text: str):
+        """Appends in one insert; the view follows the end only if it was already there"""
+        sb = self.verticalScrollBar()
+        at_bottom = sb.value() >= sb.maximum() - 2
+        # A partial last line grows, so it is coloured again once shown
+        self.document().lastBlock().setUserState(-1)
+        cursor = QTextCursor(self.document())
+        cursor.movePosition(QTextCursor.End)
+        cursor.insertText(text)
+        if at_bottom:
+            sb.setValue(sb.maximum())
+
+    def append_lines(self, lines: list[str]):
+        if lines:
+            self.append_text("\n".join(lines) + "\n")
+
+    def append_message(self, text: str, color: str | None = None):
+        """Adds text as new lines of its own, optionally coloured (output panes)"""
+        cursor = QTextCursor(self.document())
+        cursor.movePosition(QTextCursor.End)
+        if not self.document().isEmpty():
+            cursor.insertBlock()
+        fmt = QTextCharFormat()
+        if color:
+            fmt.setForeground(QColor(color))
+        cursor.insertText(text, fmt)
+        sb = self.verticalScrollBar()
+        sb.setValue(sb.maximum())
+
+    def _highlight_visible(self, *_):
+        if self._loading:
+            return
+        block = self.firstVisibleBlock()
+        offset = self.contentOffset()
+        bottom = self.viewport().height()
+        doc = self.document()
+        while block.isValid():
+            if self.blockBoundingGeometry(block).translated(offset).top() > bottom:
+                break
+            if block.userState() != HIGHLIGHTED:
+                block.setUserState(HIGHLIGHTED)
+                text = block.text()
+                if text and len(text) <= MAX_HIGHLIGHT_LEN:
+                    ranges = []
+                    for start, length, kind in self._spans.spans_for(text):
+                        r = QTextLayout.FormatRange()
+                        r.start, r.length, r.format = start, length, self._formats[kind]
+                        ranges.append(r)
+                    if ranges:
+                        block.layout().setFormats(ranges)
+                        doc.markContentsDirty(block.position(), block.length())
+            block = block.next()
+
+
+if __name__ == "__main__":
+    # Benchmark against the QTextEdit panes: python -m ui.log_view [lines ...]
+    # Each case runs in a fresh process so RSS is its own.
+    import os
+    import subprocess
+    import sys
+    import time
+
+    def rss_kb() -> int:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+        return 0
+
+    if len(sys.argv) > 1 and sys.argv[1] == "--case":
+        from PySide6.QtWidgets import QApplication, QTextEdit
+
+        widget, count = sys.argv[2], int(sys.argv[3])
+        app = QApplication(sys.argv[:1])
+        if widget == "qtextedit":
+            view = QTextEdit()
+            view.setReadOnly(True)
+            view.setFont(QFont("Consolas", 10))
+        else:
+            # No highlighting in either: span matching is measured by python -m ui.highlighter
+            view = LogView(max_blocks=DEFAULT_MAX_BLOCKS if widget == "logview" else 0, highlight=False)
+        view.resize(1000, 700)
+        view.show()
+        app.processEvents()
+        before = rss_kb()
+        line = ('192.168.1.{0} - - [27/Oct/2023:10:00:00 +0000] "GET /api/item?id={0} HTTP/1.1" 200 512 "-" '
+                '"Mozilla/5.0 (X11; Linux x86_64)"')
+        text = "\n".join(line.format(i) for i in range(count)) + "\n"
+        t0 = time.perf_counter()
+        if widget == "qtextedit":
+            view.setPlainText(text)
+        else:
+            view.set_text(text)
+        # QTextEdit finishes its layout in idle time; pageCount() waits for it, as the user would
+        view.document().pageCount()
+        view.viewport().grab()
+        app.processEvents()
+        elapsed = time.perf_counter() - t0
+        del text  # RSS is what the widget keeps
+        print(f"{elapsed:.2f} {(rss_kb() - before) / 1024:.0f} {view.document().blockCount()}")
+        sys.exit(0)
+
+    QTEXTEDIT_MAX_LINES = 500_000
+    counts = [int(a) for a in sys.argv[1:]] or [20_000, 200_000, 2_000_000]
+    widgets = [("qtextedit", "QTextEdit"), ("logview_uncapped", "LogView (no cap)"),
+               ("logview", f"LogView (cap {DEFAULT_MAX_BLOCKS})")]
+    env = dict(os.environ, QT_QPA_PLATFORM=os.environ.get("QT_QPA_PLATFORM", "offscreen"))
+    print(f"{'lines':>10}  {'widget':<24} {'load s':>8} {'RSS MB':>8} {'blocks':>9}")
+    for count in counts:
+        for key, label in widgets:
+            if key == "qtextedit" and count > QTEXTEDIT_MAX_LINES:
+                # ~7 KB per laid out line: 2M lines would need ~14 GB
+                print(f"{count:>10}  {label:<24} {'skipped':>8}", flush=True)
+                continue
+            try:
+                out = subprocess.run([sys.executable, "-m", "ui.log_view", "--case", key, str(count)],
+                                     capture_output=True, text=True, timeout=900, env=env).stdout.split()
+                elapsed, rss, blocks = out[-3:]
+            except (subprocess.TimeoutExpired, ValueError):
+                elapsed, rss, blocks = "timeout", "-", "-"
+            print(f"{count:>10}  {label:<24} {elapsed:>8} {rss:>8} {blocks:>9}", flush=True)
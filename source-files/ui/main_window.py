@@ -4,6 +4,7 @@ from PySide6.QtWidgets import (
 from PySide6.QtCore import QTimer, QDateTime, Qt
 import sys
 import os
+import re
 
 # Allow running this file directly
 if __name__ == "__main__":
@@ -18,6 +19,7 @@ from backend.ssh import SSHBackend
 from backend.config import ConnConfig
 from backend.settings import SettingsManager
 from backend.lang_manager import L, trans
+from backend.jobs import JobExecutor
 
 # Use absolute imports to allow running as main
 from ui.connection_bar import ConnectionBar
@@ -25,6 +27,8 @@ from ui.nginx_tab import NginxTab
 from ui.varlog_tab import VarLogTab
 from ui.php_tab import PHPTab
 from ui.mysql_tab import MySQLTab
+from ui.fleet_tab import FleetTab
+from ui.resources_tab import ResourcesTab
 from ui.utils import show_error, show_info
 from ui.styles import DARK_THEME_QSS
 
@@ -43,6 +47,9 @@ class MainWindow(QMainWindow):
         self.cfg = ConnConfig(mode="local")
         self.backend: Backend | None = None # Start disconnected until user clicks Connect
 
+        # All backend calls run here, off the GUI thread
+        self.jobs = JobExecutor(self)
+
 
         # Set Icon
         from PySide6.QtGui import QIcon
@@ -69,17 +76,23 @@ class MainWindow(QMainWindow):
         self.tab_varlog = VarLogTab(self)
         self.tab_php = PHPTab(self)
         self.tab_mysql = MySQLTab(self)
+        self.tab_fleet = FleetTab(self)
+        self.tab_resources = ResourcesTab(self)
         
         # Add tabs with icons
         icon_nginx = self.style().standardIcon(QStyle.SP_ComputerIcon)
         icon_folder = self.style().standardIcon(QStyle.SP_DirIcon)
         icon_php = self.style().standardIcon(QStyle.SP_FileIcon)
         icon_db = self.style().standardIcon(QStyle.SP_DriveCDIcon)
+        icon_fleet = self.style().standardIcon(QStyle.SP_DriveNetIcon)
+        icon_resources = self.style().standardIcon(QStyle.SP_DriveHDIcon)
 
         self.tabs.addTab(self.tab_nginx, icon_nginx, trans("tab_nginx"))
         self.tabs.addTab(self.tab_varlog, icon_folder, trans("tab_varlog"))
         self.tabs.addTab(self.tab_php, icon_php, trans("tab_php"))
         self.tabs.addTab(self.tab_mysql, icon_db, trans("tab_mysql"))
+        self.tabs.addTab(self.tab_fleet, icon_fleet, trans("tab_fleet"))
+        self.tabs.addTab(self.tab_resources, icon_resources, trans("tab_resources"))
 
         # Custom Status Bar Widget
         self.status_widget = QWidget()
@@ -106,6 +119,8 @@ class MainWindow(QMainWindow):
         self.mysql_stop_btn = QPushButton(trans("btn_stop"))
         
         self.last_update_label = QLabel(trans("lbl_last") + " -")
+        self.latency_label = QLabel(trans("lbl_latency") + " -")
+        self.latency_label.setStyleSheet("color: gray;")
 
         # Style buttons small
         for btn in [self.nginx_reload_btn, self.nginx_restart_btn, self.nginx_stop_btn,
@@ -144,6 +159,7 @@ class MainWindow(QMainWindow):
         self.status_layout.addWidget(self.mysql_stop_btn)
         
         self.status_layout.addStretch()
+        self.status_layout.addWidget(self.latency_label)
         self.status_layout.addWidget(self.last_update_label)
 
         # Connect buttons
@@ -172,6 +188,9 @@ class MainWindow(QMainWindow):
         self.timer = QTimer(self)
         self.timer.timeout.connect(self.update_nginx_status)
 
+        # Per-job latency report
+        self.jobs.job_finished.connect(self._on_job_finished)
+
         # Menu Bar
         self.create_menu()
 
@@ -200,12 +219,33 @@ class MainWindow(QMainWindow):
         if confirm != QMessageBox.Yes:
             return
             
-        try:
-            msg = self.backend.control_service(service_name, action)
+        def done(msg):
             show_info(self, trans("info"), msg)
             self.update_nginx_status() # Refresh status immediately
-        except Exception as e:
-            show_error(self, trans("err_op_failed"), str(e))
+
+        self.run_job(None, self.backend.control_service, service_name, action,
+                     on_result=done,
+                     on_error=lambda e: show_error(self, trans("err_op_failed"), str(e)))
+
+    def run_job(self, key, fn, *args, on_result=None, on_error=None, **kwargs):
+        """Runs a backend call off the GUI thread. Same key supersedes a pending call."""
+        if on_error is None:
+            on_error = lambda e: show_error(self, trans("error"), str(e))
+        return self.jobs.submit(key, fn, *args, on_result=on_result, on_error=on_error, **kwargs)
+
+    def _on_job_finished(self, key: str, elapsed_ms: float):
+        self.latency_label.setText(f"{trans('lbl_latency')} {key} {elapsed_ms:.0f} ms")
+        stats = self.backend.connection_stats() if self.backend else {}
+        if stats:
+            tip = trans("conn_stats").format(handshake=stats["handshake_ms"], reconnects=stats["reconnects"])
+            if stats["last_drop"]:
+                tip += f"\n{stats['last_drop']}"
+            self.latency_label.setToolTip(tip)
+
+    def closeEvent(self, event):
+        self.jobs.cancel_all()
+        self.tab_fleet.pool.close_all()
+        super().closeEvent(event)
 
     def change_language(self, lang_code: str):
         SettingsManager.set_language(lang_code)
@@ -233,55 +273,68 @@ class MainWindow(QMainWindow):
         # I should use self.last_update_label or similar to show "Connecting..."
         self.last_update_label.setText(trans("status_connecting"))
         QApplication.setOverrideCursor(Qt.WaitCursor)
-        QApplication.processEvents()
-        
-        try:
+        self.conn_bar.connect_btn.setEnabled(False)
+
+        def connect():
             if cfg.mode == "local":
-                self.cfg = cfg
-                self.backend = LocalBackend()
-                # show_info(self, "OK", "Local mod aktif.") -> Custom success below
-            else:
-                # SSH
-                try:
-                    self.cfg = cfg
-                    self.backend = SSHBackend(cfg)
-                    # Simple test
-                    _ = self.backend.tail("/etc/hostname", 1)
-                except Exception as e:
-                    show_error(self, trans("err_conn_failed"), str(e))
-                    return
-
-            # Success Dialog with Green Checkmark
-            msg_box = QMessageBox(self)
-            msg_box.setWindowTitle(trans("success"))
-            msg_box.setText(f"{trans('msg_conn_success')}: {cfg.mode}")
-            
-            # Use StandardPixmap for tick if available, mostly DialogApplyButton is a tick
-            msg_box.setIconPixmap(self.style().standardPixmap(QStyle.SP_DialogApplyButton))
-            # Or if we want green specifically, we might need a custom icon or style sheet on the label?
-            # StandardPixmap is safest for native look. SP_DialogApplyButton is usually a check.
-            
-            msg_box.exec()
-            
-            # Start monitoring
-            self.update_nginx_status()
-            self.tab_php.refresh_info() # Refresh PHP info on connect
-            self.tab_mysql.refresh_info() # Refresh MySQL info on connect
-            self.timer.start(60000) # 60 seconds
-            
-        finally:
-              QApplication.restoreOverrideCursor()
+                return LocalBackend()
+            # SSH: handshake + simple test, both off the GUI thread
+            backend = SSHBackend(cfg)
+            _ = backend.tail("/etc/hostname", 1)
+            return backend
+
+        def failed(e):
+            self._connection_finished()
+            self.last_update_label.setText(trans("lbl_last") + " -")
+            show_error(self, trans("err_conn_failed"), str(e))
+
+        self.run_job("connect", connect,
+                     on_result=lambda backend: self._on_connected(cfg, backend),
+                     on_error=failed)
+
+    def _connection_finished(self):
+        QApplication.restoreOverrideCursor()
+        self.conn_bar.connect_btn.setEnabled(True)
+
+    def _on_connected(self, cfg: ConnConfig, backend: Backend):
+        self._connection_finished()
+        self.cfg = cfg
+        self.backend = backend
+
+        # Success Dialog with Green Checkmark
+        msg_box = QMessageBox(self)
+        msg_box.setWindowTitle(trans("success"))
+        msg_box.setText(f"{trans('msg_conn_success')}: {cfg.mode}")
+        
+        # Use StandardPixmap for tick if available, mostly DialogApplyButton is a tick
+        msg_box.setIconPixmap(self.style().standardPixmap(QStyle.SP_DialogApplyButton))
+        # Or if we want green specifically, we might need a custom icon or style sheet on the label?
+        # StandardPixmap is safest for native look. SP_DialogApplyButton is usually a check.
+        
+        msg_box.exec()
+        
+        # Start monitoring
+        self.update_nginx_status()
+        self.tab_php.stop_fpm_monitor() # sampler belongs to the previous connection
+        self.tab_php.refresh_info() # Refresh PHP info on connect
+        self.tab_mysql.stop_metrics() # sampler belongs to the previous connection
+        self.tab_mysql.refresh_info() # Refresh MySQL info on connect
+        self.tab_resources.stop_sampling() # sampler belongs to the previous connection
+        self.timer.start(60000) # 60 seconds
 
     def update_nginx_status(self):
         if not self.backend:
             return
-        
+        # Single batched probe (one SSH round trip) instead of one call per value
+        self.run_job("status", self.backend.probe_all,
+                     on_result=self._apply_status,
+                     on_error=lambda e: self.nginx_label.setText(f"Error: {e}"))
+
+    def _apply_status(self, snap):
         try:
             # Nginx Status
-            ver = self.backend.get_nginx_version()
-            status = self.backend.get_nginx_status()
-            
-            s_lower = status.lower().strip()
+            ver = snap.nginx_version
+            s_lower = snap.nginx_status.lower().strip()
             if "inactive" in s_lower:
                 color = "red"
                 short_status = trans("status_inactive")
@@ -296,24 +349,14 @@ class MainWindow(QMainWindow):
             self.nginx_label.setText(f"{trans('lbl_nginx')} {ver} | <span style='color:{color}; font-weight:bold'>{short_status}</span>")
 
             # PHP Status
-            php_ver_raw = self.backend.get_php_version()
+            php_ver_raw = snap.php_version
             # "PHP 8.2.7 (cli)..." -> "8.2.7"
             php_ver_short = php_ver_raw.split(' ')[1] if len(php_ver_raw.split(' ')) > 1 else "?"
             
-            # Determine PHP Service Name
-            php_status = self.backend.get_php_fpm_status(php_ver_raw)
-            
-            # Simple parsing again to find service name for buttons
-            # We need a robust way. Backend could return name?
-            # For now, replicate logic:
-            import re
-            match = re.search(r"PHP (\d+\.\d+)", php_ver_raw)
-            if match:
-                 self.current_php_service = f"php{match.group(1)}-fpm"
-            else:
-                 self.current_php_service = None
+            # Service name for the buttons, e.g. php8.2-fpm
+            self.current_php_service = snap.php_fpm_service
 
-            p_lower = php_status.lower().strip()
+            p_lower = snap.php_fpm_status.lower().strip()
             
             if "inactive" in p_lower:
                 p_color = "red"
@@ -332,34 +375,23 @@ class MainWindow(QMainWindow):
             self.php_label.setText(f"{trans('lbl_php')} {php_ver_short} | <span style='color:{p_color}; font-weight:bold'>{p_short}</span>")
             
             # MySQL Status
-            mysql_service = self.backend.get_mysql_service_name()
+            mysql_service = snap.mysql_service
             self.current_mysql_service = mysql_service
             
-            # For status bar we just want active/inactive, not full output
-            # But get_mysql_status returns full output. We might need a simpler check or parse it.
-            # LocalBackend.get_mysql_status is simulated. SSHBackend returns `systemctl status`.
-            # Let's use get_mysql_status and parse "Active: active" line or similar.
-            
-            mysql_status_full = self.backend.get_mysql_status()
-            m_lower = mysql_status_full.lower()
-            
-            if "active: active" in m_lower:
-                m_color = "green"
-                m_short = trans("status_active")
-            elif "active: inactive" in m_lower or "dead" in m_lower:
+            m_lower = snap.mysql_status.lower().strip()
+            if m_lower in ("inactive", "failed", "dead"):
                 m_color = "red"
                 m_short = trans("status_inactive")
+            elif m_lower == "active":
+                m_color = "green"
+                m_short = trans("status_active")
             else:
                 m_color = "orange"
                 m_short = trans("status_unknown")
                 
             # Version
-            # get_mysql_version returns full string e.g. "mysql  Ver 15.1 ..."
-            # Let's try to extract shorter version
-            db_ver_raw = self.backend.get_mysql_version()
             # Try to simplify: "mysql Ver 15.1 Distrib 10.5.19-MariaDB" -> "10.5.19-MariaDB"
-            # Split by Distrib? or just take first few words?
-            # Or regex matching \d+\.\d+
+            db_ver_raw = snap.mysql_version
             db_ver_short = "DB"
             match = re.search(r"Distrib (\d+\.\d+\.\d+-MariaDB)", db_ver_raw)
             if match:
@@ -1,9 +1,46 @@
 from PySide6.QtWidgets import (
-    QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QTextEdit, QLabel, QGroupBox, QStyle, QScrollArea, QFrame
+    QWidget, QVBoxLayout, QHBoxLayout, QGridLayout, QPushButton, QLabel, QLineEdit, QSpinBox, QGroupBox, QStyle,
+    QScrollArea, QFrame
 )
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QTimer
 from backend.base import Backend
+from backend.mysql_metrics import DEFAULT_INTERVAL, MetricsPoint, MySQLMetricsCollector
+from backend.probe import MySQLDiagnostics
 from backend.lang_manager import trans
+from .log_view import LogView
+from .sparkline import Sparkline
+from .utils import format_aggregate
+
+# (label key, MetricsPoint field charted, fixed chart maximum)
+METRIC_ROWS = (
+    ("metric_qps", "qps", None),
+    ("metric_hit", "buffer_pool_hit", 100),
+    ("metric_threads", "threads_running", None),
+    ("metric_slow", "slow_per_s", None),
+    ("metric_rows", "rows_read_per_s", None),
+    ("metric_active", "active_queries", None),
+    ("metric_dirty", "dirty_pages_pct", 100),
+)
+
+
+def _num(value: float | None, fmt: str = ".1f") -> str:
+    return "-" if value is None else format(value, fmt)
+
+
+def metric_text(key: str, p: MetricsPoint) -> str:
+    if key == "metric_qps":
+        return _num(p.qps)
+    if key == "metric_hit":
+        return _num(p.buffer_pool_hit, ".2f")
+    if key == "metric_threads":
+        return f"{p.threads_running} / {p.threads_connected}"
+    if key == "metric_slow":
+        return "-" if p.slow_per_s is None else f"{p.slow_per_s:.2f} ({p.slow_queries})"
+    if key == "metric_rows":
+        return f"{_num(p.rows_read_per_s, '.0f')} / {_num(p.rows_changed_per_s, '.0f')}"
+    if key == "metric_active":
+        return f"{p.active_queries} ({p.longest_query_s})"
+    return _num(p.dirty_pages_pct)
 
 class MySQLTab(QWidget):
     def __init__(self, main_window):
@@ -70,13 +107,16 @@ class MySQLTab(QWidget):
         self.btn_error_log = QPushButton(trans("show_error_log"))
         self.btn_nginx_db_err = QPushButton(trans("search_db_nginx"))
         self.btn_sys_db_err = QPushButton(trans("search_db_sys"))
+        self.btn_sys_db_summary = QPushButton(trans("summarize_db_sys"))
+        self.btn_sys_db_summary.setToolTip(trans("tip_summarize_db_sys"))
         
-        for btn in [self.btn_error_log, self.btn_nginx_db_err, self.btn_sys_db_err]:
+        for btn in [self.btn_error_log, self.btn_nginx_db_err, self.btn_sys_db_err, self.btn_sys_db_summary]:
             btn.setIcon(self.style().standardIcon(QStyle.SP_MessageBoxWarning))
             
         self.btn_error_log.clicked.connect(self.get_error_log)
         self.btn_nginx_db_err.clicked.connect(self.search_nginx_db_errors)
         self.btn_sys_db_err.clicked.connect(self.search_sys_db_errors)
+        self.btn_sys_db_summary.clicked.connect(self.summarize_sys_db_errors)
         
         self.btn_clear_logs = QPushButton(trans("clear_mysql_logs"))
         self.btn_clear_logs.setIcon(self.style().standardIcon(QStyle.SP_TrashIcon))
@@ -86,12 +126,58 @@ class MySQLTab(QWidget):
         log_layout.addWidget(self.btn_error_log)
         log_layout.addWidget(self.btn_nginx_db_err)
         log_layout.addWidget(self.btn_sys_db_err)
+        log_layout.addWidget(self.btn_sys_db_summary)
         log_layout.addWidget(self.btn_clear_logs)
         self.layout.addWidget(log_group)
 
+        # 5. Live Metrics Group
+        metrics_group = QGroupBox(trans("mysql_metrics"))
+        metrics_layout = QVBoxLayout(metrics_group)
+        metrics_bar = QHBoxLayout()
+        self.metrics_interval_spin = QSpinBox()
+        self.metrics_interval_spin.setRange(1, 300)
+        self.metrics_interval_spin.setValue(DEFAULT_INTERVAL)
+        self.metrics_user = QLineEdit()
+        self.metrics_user.setPlaceholderText(trans("ph_metrics_user"))
+        self.metrics_password = QLineEdit()
+        self.metrics_password.setPlaceholderText(trans("ph_metrics_password"))
+        self.metrics_password.setEchoMode(QLineEdit.Password)
+        self.btn_metrics = QPushButton(trans("metrics_start"))
+        self.btn_metrics.setIcon(self.style().standardIcon(QStyle.SP_MediaPlay))
+        self.btn_metrics.setToolTip(trans("tip_metrics_start"))
+        self.btn_metrics.clicked.connect(self.toggle_metrics)
+        self.metrics_interval_spin.valueChanged.connect(self._metrics_interval_changed)
+        metrics_bar.addWidget(QLabel(trans("metrics_interval")))
+        metrics_bar.addWidget(self.metrics_interval_spin)
+        metrics_bar.addWidget(self.metrics_user, 2)
+        metrics_bar.addWidget(self.metrics_password, 1)
+        metrics_bar.addWidget(self.btn_metrics)
+        metrics_layout.addLayout(metrics_bar)
+
+        metrics_grid = QGridLayout()
+        self.metric_values: dict[str, QLabel] = {}
+        self.metric_charts: dict[str, Sparkline] = {}
+        for row, (key, _, max_value) in enumerate(METRIC_ROWS):
+            value = QLabel("-")
+            value.setStyleSheet("font-weight: bold;")
+            value.setAlignment(Qt.AlignRight | Qt.AlignVCenter)
+            value.setMinimumWidth(110)
+            self.metric_values[key] = value
+            self.metric_charts[key] = Sparkline(max_value=max_value)
+            metrics_grid.addWidget(QLabel(trans(key)), row, 0)
+            metrics_grid.addWidget(value, row, 1)
+            metrics_grid.addWidget(self.metric_charts[key], row, 2)
+        metrics_grid.setColumnStretch(2, 1)
+        metrics_layout.addLayout(metrics_grid)
+        self.layout.addWidget(metrics_group)
+
+        self.metrics: MySQLMetricsCollector | None = None
+        self._metrics_source = None  # PyMySQLSource when a user is given, closed on stop
+        self.metrics_timer = QTimer(self)
+        self.metrics_timer.timeout.connect(self._sample_metrics)
+
         # Output Area
-        self.output_text = QTextEdit()
-        self.output_text.setReadOnly(True)
+        self.output_text = LogView(highlight=False)
         self.output_text.setPlaceholderText(trans("ph_output"))
         self.layout.addWidget(self.output_text, 1) # Give it stretch
 
@@ -109,72 +195,85 @@ class MySQLTab(QWidget):
             return
             
         self.log(trans("refresh") + "...")
-        try:
-            # Version
-            ver = backend.get_mysql_version()
-            self.lbl_version.setText(trans("mysql_version").format(version=ver))
-            
-            # Port
-            port_out = backend.check_mysql_port()
-            if "3306" in port_out:
-                status_txt = "<span style='color:green'>" + trans("active") + "</span>"
-            else:
-                status_txt = "<span style='color:red'>" + trans("inactive") + "</span>"
-            self.lbl_port.setText(trans("mysql_port").format(status=status_txt))
 
-            # Socket
-            sock = backend.check_mysql_socket()
-            if "mysqld.sock" in sock:
-                 status_txt = "<span style='color:green'>" + trans("success") + "</span>"
-            else:
-                 status_txt = "<span style='color:red'>" + trans("error") + "</span>"
-            self.lbl_socket.setText(trans("mysql_socket").format(path=status_txt))
+        self._run("mysql.info", backend.collect_mysql_diagnostics, self._show_info)
 
-            # Bind Address
-            bind = backend.check_mysql_bind_address()
-            if bind:
-                 self.lbl_bind.setText(trans("mysql_bind").format(addr=bind.strip()))
-            else:
-                 self.lbl_bind.setText(trans("mysql_bind").format(addr="?"))
+    def _show_info(self, diag: MySQLDiagnostics):
+        # Version
+        self.lbl_version.setText(trans("mysql_version").format(version=diag.version))
+        
+        # Port
+        if "3306" in diag.port:
+            status_txt = "<span style='color:green'>" + trans("active") + "</span>"
+        else:
+            status_txt = "<span style='color:red'>" + trans("inactive") + "</span>"
+        self.lbl_port.setText(trans("mysql_port").format(status=status_txt))
 
-            # Status
-            status = backend.get_mysql_status()
-            self.lbl_service_status.setText(status.strip())
-            
-            self.log(trans("success"))
+        # Socket
+        if "mysqld.sock" in diag.socket:
+             status_txt = "<span style='color:green'>" + trans("success") + "</span>"
+        else:
+             status_txt = "<span style='color:red'>" + trans("error") + "</span>"
+        self.lbl_socket.setText(trans("mysql_socket").format(path=status_txt))
 
-        except Exception as e:
-            self.log_error(f"{trans('error')}: {e}")
+        # Bind Address
+        if diag.bind_address:
+             self.lbl_bind.setText(trans("mysql_bind").format(addr=diag.bind_address.strip()))
+        else:
+             self.lbl_bind.setText(trans("mysql_bind").format(addr="?"))
+
+        # Status
+        self.lbl_service_status.setText(diag.status.strip())
+        
+        self.log(trans("success"))
+
+    def _run(self, key: str, fn, on_result=None):
+        """Runs a backend call in the background, errors go to the output pane"""
+        self.main_window.run_job(key, fn, on_result=on_result or self.log,
+                                 on_error=lambda e: self.log_error(f"{trans('error')}: {e}"))
+
+    def _log_or_empty(self, out: str):
+        if not out.strip():
+            self.log(trans("info") + ": Empty")
+        else:
+            self.log(out)
 
     def get_error_log(self):
         self.log(trans("show_error_log") + "...")
         try:
-            out = self.get_backend().get_mysql_error_log()
-            self.log(out)
+            backend = self.get_backend()
         except Exception as e:
             self.log_error(f"{trans('error')}: {e}")
+            return
+        self._run("mysql.error_log", backend.get_mysql_error_log)
 
     def search_nginx_db_errors(self):
         self.log(trans("search_db_nginx") + "...")
         try:
-            out = self.get_backend().search_db_errors_in_nginx()
-            if not out.strip():
-                self.log(trans("info") + ": Empty")
-            else:
-                self.log(out)
+            backend = self.get_backend()
         except Exception as e:
             self.log_error(f"{trans('error')}: {e}")
+            return
+        self._run("mysql.nginx_db_errors", backend.search_db_errors_in_nginx, self._log_or_empty)
 
     def search_sys_db_errors(self):
         self.log(trans("search_db_sys") + "...")
         try:
-            out = self.get_backend().search_db_errors_in_varlog()
-            if not out.strip():
-                self.log(trans("info") + ": Empty")
-            else:
-                self.log(out)
+            backend = self.get_backend()
+        except Exception as e:
+            self.log_error(f"{trans('error')}: {e}")
+            return
+        self._run("mysql.sys_db_errors", backend.search_db_errors_in_varlog, self._log_or_empty)
+
+    def summarize_sys_db_errors(self):
+        self.log(trans("summarize_db_sys") + "...")
+        try:
+            backend = self.get_backend()
         except Exception as e:
             self.log_error(f"{trans('error')}: {e}")
+            return
+        self._run("mysql.sys_db_summary", backend.summarize_db_errors_in_varlog,
+                  lambda result: self.log(format_aggregate(result)))
 
     def clear_mysql_logs(self):
         from PySide6.QtWidgets import QMessageBox
@@ -184,17 +283,68 @@ class MySQLTab(QWidget):
         
         self.log(trans("clear_mysql_logs") + "...")
         try:
-            msg = self.get_backend().truncate_mysql_logs()
-            self.log(msg)
+            backend = self.get_backend()
         except Exception as e:
             self.log_error(f"{trans('error')}: {e}")
+            return
+        self._run("mysql.clear", backend.truncate_mysql_logs)
+
+    def toggle_metrics(self):
+        if self.metrics_timer.isActive():
+            self.stop_metrics()
+            return
+        try:
+            backend = self.get_backend()
+            user = self.metrics_user.text().strip()
+            if user:
+                self._metrics_source = backend.mysql_client_source(user, self.metrics_password.text())
+                fetch = self._metrics_source.fetch
+            else:
+                fetch = backend.fetch_mysql_metrics
+        except Exception as e:
+            self.log_error(f"{trans('error')}: {e}")
+            return
+        self.metrics = MySQLMetricsCollector(fetch, self.metrics_interval_spin.value())
+        self.metrics_timer.start(self.metrics_interval_spin.value() * 1000)
+        self.btn_metrics.setText(trans("metrics_stop"))
+        self.btn_metrics.setIcon(self.style().standardIcon(QStyle.SP_MediaStop))
+        self._sample_metrics()
+
+    def stop_metrics(self):
+        self.metrics_timer.stop()
+        self.main_window.jobs.cancel("mysql.metrics")
+        if self._metrics_source is not None:
+            # A sample may still be querying it; close() waits for that one, off the GUI thread
+            self.main_window.run_job(None, self._metrics_source.close, on_error=lambda e: None)
+            self._metrics_source = None
+        self.btn_metrics.setText(trans("metrics_start"))
+        self.btn_metrics.setIcon(self.style().standardIcon(QStyle.SP_MediaPlay))
+
+    def _metrics_interval_changed(self, seconds: int):
+        if self.metrics is not None:
+            self.metrics.interval = seconds
+        if self.metrics_timer.isActive():
+            self.metrics_timer.setInterval(seconds * 1000)
+
+    def _sample_metrics(self):
+        # A slow server skips ticks instead of piling up queries
+        if self.metrics is None or self.main_window.jobs.is_running("mysql.metrics"):
+            return
+        self.main_window.run_job("mysql.metrics", self.metrics.sample, on_result=self._show_metrics,
+                                 on_error=self._metrics_failed)
+
+    def _show_metrics(self, point: MetricsPoint):
+        ring = self.metrics.ring
+        for key, series, _ in METRIC_ROWS:
+            self.metric_values[key].setText(metric_text(key, point))
+            self.metric_charts[key].set_values(ring.series(series))
+
+    def _metrics_failed(self, e):
+        self.stop_metrics()
+        self.log_error(f"{trans('mysql_metrics')}: {e}")
 
     def log(self, msg: str):
-        self.output_text.append(f"INFO: {msg}\n" + "-"*40)
-        sb = self.output_text.verticalScrollBar()
-        sb.setValue(sb.maximum())
+        self.output_text.append_message(f"INFO: {msg}\n" + "-"*40)
 
     def log_error(self, msg: str):
-        self.output_text.append(f"<span style='color:red'>ERROR: {msg}</span>\n" + "-"*40)
-        sb = self.output_text.verticalScrollBar()
-        sb.setValue(sb.maximum())
+        self.output_text.append_message(f"ERROR: {msg}\n" + "-"*40, "red")
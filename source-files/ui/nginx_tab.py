@@ -1,23 +1,41 @@
 import os
 import shlex
-from PySide6.QtCore import QProcess
-from PySide6.QtGui import QFont, QColor
-from PySide6.QtGui import QTextCursor
+from PySide6.QtCore import Qt, QProcess
+from PySide6.QtGui import QColor
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QSpinBox, QComboBox, 
-    QPushButton, QLineEdit, QTextEdit, QMessageBox, QFileDialog, QStyle
+    QPushButton, QLineEdit, QMessageBox, QFileDialog, QStyle
 )
 from backend.local import NGINX_ERROR, NGINX_ACCESS
-from .highlighter import LogHighlighter
-from .utils import show_error, show_info
+from .access_analytics import AccessAnalyticsDialog
+from .latency_panel import LatencyDialog
+from .live_view import LiveLogBuffer, DEFAULT_MAX_LINES
+from .log_view import LogView
+from .utils import show_error, show_info, make_scope_combo, make_rotated_check, scope_kwargs, stream_search, start_download
+from backend.logsearch import SCOPE_TAIL
+from backend.latency import TIMED_FORMAT, LatencyHistory, LatencyTracker
+from backend.access_log import backend_log_format
 from backend.lang_manager import trans
 
+# Max bytes fetched by one incremental refresh
+REFRESH_MAX_BYTES = 4 * 1024 * 1024
+SEARCH_MAX_HITS = 5000
+
 class NginxTab(QWidget):
     def __init__(self, main_window):
         super().__init__()
         # ... existing init ...
         self.main_window = main_window
         self.live_process: QProcess | None = None
+        # path -> (byte offset, inode) of what is already in the text pane
+        self.cursors: dict[str, tuple[int, int]] = {}
+        self._view_key: tuple[str, int] | None = None
+        # Response time sketches fed by the live tail of the access log
+        self.latency: LatencyTracker | None = None
+        self.latency_path: str | None = None
+        self.latency_history = LatencyHistory(NGINX_ACCESS)
+        self._latency_backend = None
+        self._search_job = None
         
         layout = QVBoxLayout(self)
 
@@ -58,11 +76,21 @@ class NginxTab(QWidget):
         self.test_conf_btn = QPushButton(trans("test_config"))
         self.test_conf_btn.setIcon(self.style().standardIcon(QStyle.SP_MessageBoxInformation))
 
+        self.analytics_btn = QPushButton(trans("analytics_btn"))
+        self.analytics_btn.setIcon(self.style().standardIcon(QStyle.SP_FileDialogDetailedView))
+        self.analytics_btn.setToolTip(trans("tip_analytics"))
+
+        self.latency_btn = QPushButton(trans("latency_btn"))
+        self.latency_btn.setIcon(self.style().standardIcon(QStyle.SP_BrowserReload))
+        self.latency_btn.setToolTip(trans("tip_latency"))
+
         top.addWidget(self.refresh_btn)
         top.addWidget(self.live_btn)
         top.addWidget(self.stop_live_btn)
         top.addWidget(self.download_btn)
         top.addWidget(self.test_conf_btn) 
+        top.addWidget(self.analytics_btn)
+        top.addWidget(self.latency_btn)
         top.addStretch(1)
         top.addWidget(self.clear_btn)
         top.addWidget(self.clear_all_btn)
@@ -77,6 +105,10 @@ class NginxTab(QWidget):
         self.search_limit_spin = QSpinBox()
         self.search_limit_spin.setRange(100, 50000)
         self.search_limit_spin.setValue(5000)
+        self.search_scope_combo = make_scope_combo()
+        self.search_rotated_check = make_rotated_check(self.search_scope_combo)
+        self.search_stop_btn = QPushButton("■ " + trans("stop_search"))
+        self.search_stop_btn.setEnabled(False)
         
         # Quick Filters
         self.filter_error_btn = QPushButton(trans("filter_error_btn"))
@@ -88,9 +120,12 @@ class NginxTab(QWidget):
         search_bar.addWidget(self.search_edit, 1)
         search_bar.addWidget(self.filter_error_btn)
         search_bar.addWidget(self.filter_warn_btn)
+        search_bar.addWidget(self.search_scope_combo)
+        search_bar.addWidget(self.search_rotated_check)
         search_bar.addWidget(QLabel(trans("last_lines_label")))
         search_bar.addWidget(self.search_limit_spin)
         search_bar.addWidget(self.search_btn)
+        search_bar.addWidget(self.search_stop_btn)
         layout.addLayout(search_bar)
 
         # Info
@@ -98,26 +133,44 @@ class NginxTab(QWidget):
         self.size_label = QLabel(trans("log_size_label"))
         info.addWidget(self.size_label)
         info.addStretch(1)
+        self.live_stats_label = QLabel("")
+        self.live_stats_label.setStyleSheet("color: gray;")
+        info.addWidget(self.live_stats_label)
+        self.live_drop_label = QLabel("")
+        self.live_drop_label.setStyleSheet("color: darkorange;")
+        info.addWidget(self.live_drop_label)
+        self.live_max_spin = QSpinBox()
+        self.live_max_spin.setRange(500, 200000)
+        self.live_max_spin.setSingleStep(1000)
+        self.live_max_spin.setValue(DEFAULT_MAX_LINES)
+        info.addWidget(QLabel(trans("live_max_lines")))
+        info.addWidget(self.live_max_spin)
         layout.addLayout(info)
 
-        # Text Area
-        self.text = QTextEdit()
-        self.text.setReadOnly(True)
-        self.text.setFont(QFont("Consolas", 10))
-        # Highlight
-        self.highlighter = LogHighlighter(self.text.document())
+        # Text Area (plain text, highlighted as lines scroll into view)
+        self.text = LogView()
         layout.addWidget(self.text, 1)
 
+        # Live tail goes through a bounded buffer, rendered once per frame
+        self.live_buffer = LiveLogBuffer(self.text, self.live_max_spin.value(), self)
+        self.live_buffer.stats_changed.connect(self._on_live_buffer_stats)
+        self.live_max_spin.valueChanged.connect(self.live_buffer.set_max_lines)
+
         # signals
         self.refresh_btn.clicked.connect(self.show_selected_log)
         self.clear_btn.clicked.connect(self.clear_selected_log)
         self.clear_all_btn.clicked.connect(self.clear_all_logs)
         self.search_btn.clicked.connect(self.search_in_selected_log)
+        self.search_stop_btn.clicked.connect(lambda: self._stop_search())
+        self.search_scope_combo.currentIndexChanged.connect(
+            lambda: self.search_limit_spin.setEnabled(self.search_scope_combo.currentData()[0] == SCOPE_TAIL))
         self.live_btn.clicked.connect(self.start_live)
         self.stop_live_btn.clicked.connect(self.stop_live)
         
         # New buttons
         self.download_btn.clicked.connect(self.download_log)
+        self.analytics_btn.clicked.connect(self.show_access_analytics)
+        self.latency_btn.clicked.connect(self.show_latency)
         self.test_conf_btn.clicked.connect(self.test_nginx_config)
         self.filter_error_btn.clicked.connect(lambda: self.quick_filter("error"))
         self.filter_warn_btn.clicked.connect(lambda: self.quick_filter("warn"))
@@ -128,25 +181,80 @@ class NginxTab(QWidget):
         return NGINX_ACCESS
 
     def set_text(self, s: str):
-        self.text.setPlainText(s)
-        self.text.moveCursor(QTextCursor.End)
+        self._view_key = None # pane no longer holds a plain tail, next "show" reloads
+        self.text.set_text(s)
+
+    def append_text(self, s: str):
+        self.text.append_text(s)
 
     def show_size_for(self, path: str):
         try:
-            sz = self.main_window.get_valid_backend().size_bytes(path)
+            backend = self.main_window.get_valid_backend()
+        except Exception:
+            self.size_label.setText("Log Size: ?")
+            return
+        self.main_window.run_job("nginx.size", backend.size_bytes, path,
+                                 on_result=self._set_size,
+                                 on_error=lambda e: self._set_size(None))
+
+    def _set_size(self, sz: int | None):
+        if sz is None:
+            self.size_label.setText("Log Size: ?")
+        else:
             self.size_label.setText(f"Log Size: {sz / 1024:.2f} KB")
-        except Exception as e:
-            self.size_label.setText(f"Log Size: ?")
+
+    @staticmethod
+    def _with_size(backend, path: str, fn, *args):
+        """Runs fn in the worker and fetches the log size in the same job"""
+        out = fn(*args)
+        try:
+            sz = backend.size_bytes(path)
+        except Exception:
+            sz = None
+        return out, sz
+
+    def _show_result(self, result):
+        out, sz = result
+        self.set_text(out)
+        self._set_size(sz)
 
     def show_selected_log(self):
-        path = self.selected_path()
-        lines = int(self.lines_spin.value())
         try:
-            out = self.main_window.get_valid_backend().tail(path, lines)
-            self.set_text(out)
-            self.show_size_for(path)
+            backend = self.main_window.get_valid_backend()
         except Exception as e:
             show_error(self, trans("error"), str(e))
+            return
+        path = self.selected_path()
+        lines = int(self.lines_spin.value())
+        view_key = (path, lines)
+
+        # "nginx.view" key: a second click supersedes the pending request
+        if self._view_key == view_key and path in self.cursors:
+            # Same file already shown: only fetch bytes appended since then
+            offset, inode = self.cursors[path]
+            self.main_window.run_job("nginx.view", backend.read_since, path, offset, REFRESH_MAX_BYTES, inode,
+                                     on_result=lambda r: self._append_since(path, offset, inode, r))
+            return
+
+        def done(result):
+            out, inode, size = result
+            self.set_text(out)
+            self._set_size(size)
+            self.cursors[path] = (size, inode)
+            self._view_key = view_key
+
+        # Text and cursor from one read: nothing appended in between is skipped or shown twice
+        self.main_window.run_job("nginx.view", backend.tail_with_cursor, path, lines,
+                                 on_result=done)
+
+    def _append_since(self, path: str, old_offset: int, old_inode: int, result):
+        data, new_offset, inode, size = result
+        if inode != old_inode or size < old_offset:
+            self.append_text(f"\n{trans('log_rotated')}\n")
+        if data:
+            self.append_text(data)
+        self.cursors[path] = (new_offset, inode)
+        self._set_size(size)
 
     def clear_selected_log(self):
         try:
@@ -159,12 +267,8 @@ class NginxTab(QWidget):
         confirm = QMessageBox.question(self, trans("confirmation"), trans("msg_confirm_clear").format(path=path))
         if confirm != QMessageBox.Yes:
             return
-        try:
-            msg = backend.truncate(path)
-            self.set_text(msg)
-            self.show_size_for(path)
-        except Exception as e:
-            show_error(self, trans("error"), str(e))
+        self.main_window.run_job("nginx.view", self._with_size, backend, path, backend.truncate, path,
+                                 on_result=self._show_result)
 
     def clear_all_logs(self):
         try:
@@ -176,13 +280,12 @@ class NginxTab(QWidget):
         confirm = QMessageBox.question(self, trans("confirmation"), trans("msg_confirm_clear_all_nginx"))
         if confirm != QMessageBox.Yes:
             return
-            
-        try:
-            msg = backend.truncate_all_nginx_logs()
+
+        def done(msg):
             show_info(self, trans("success"), msg)
             self.show_selected_log() # Refresh current view
-        except Exception as e:
-            show_error(self, trans("error"), str(e))
+
+        self.main_window.run_job("nginx.clear_all", backend.truncate_all_nginx_logs, on_result=done)
 
     def search_in_selected_log(self):
         try:
@@ -197,14 +300,35 @@ class NginxTab(QWidget):
             show_info(self, trans("info"), trans("filter_placeholder")) # Using placeholder as "Enter keyword" msg
             return
         tail_lines = int(self.search_limit_spin.value())
-        try:
-            out = backend.search(path, pattern, tail_lines=tail_lines)
-            if not out.strip():
-                out = trans("no_match")
-            self.set_text(out)
-            self.show_size_for(path)
-        except Exception as e:
-            QMessageBox.critical(self, trans("error"), str(e))
+
+        def done(count):
+            self._stop_search(count)
+            if not count:
+                self.set_text(trans("no_match"))
+
+        # Hits are appended batch by batch while the server-side grep runs
+        self.set_text("")
+        self.live_stats_label.setText(trans("search_running"))
+        self.search_stop_btn.setEnabled(True)
+        self._search_job = self.main_window.run_job(
+            "nginx.view", stream_search, backend, path, pattern,
+            tail_lines=tail_lines, max_hits=SEARCH_MAX_HITS, **scope_kwargs(self.search_scope_combo, self.search_rotated_check),
+            pass_job=True, on_progress=self._append_hits, on_result=done, on_error=self._search_failed)
+        self.show_size_for(path)
+
+    def _append_hits(self, rows: list[str]):
+        self.text.append_lines(rows)
+
+    def _stop_search(self, count: int | None = None):
+        if count is None and self.main_window.jobs.current("nginx.view") is self._search_job:
+            self.main_window.jobs.cancel("nginx.view")
+        self._search_job = None
+        self.search_stop_btn.setEnabled(False)
+        self.live_stats_label.setText("" if count is None else trans("search_hits").format(count=count))
+
+    def _search_failed(self, e):
+        self._stop_search()
+        show_error(self, trans("error"), str(e))
             
     def quick_filter(self, keyword):
         self.search_edit.setText(keyword)
@@ -221,11 +345,15 @@ class NginxTab(QWidget):
             return
 
         path = self.selected_path()
-        self.text.clear()
+        self.set_text("")
+        self.live_drop_label.setText("")
+        self.live_buffer.start()
         self.stop_live_btn.setEnabled(True)
         self.live_btn.setEnabled(False)
+        self._start_latency(backend, path)
 
-        cfg = backend.cfg
+        # LocalBackend has no cfg of its own, the main window knows the mode
+        cfg = self.main_window.cfg
         
         if cfg.mode == "local":
             self.live_process = QProcess(self)
@@ -240,6 +368,8 @@ class NginxTab(QWidget):
             self.live_process = SSHLogThread(backend, path)
             self.live_process.log_output.connect(self._on_thread_output)
             self.live_process.error_occurred.connect(self._on_thread_error)
+            self.live_process.stats_updated.connect(self._on_thread_stats)
+            self.live_process.reconnected.connect(self._on_thread_reconnected)
             self.live_process.finished.connect(self._on_live_finished)
             self.live_process.start()
 
@@ -250,22 +380,60 @@ class NginxTab(QWidget):
         if not self.live_process or not isinstance(self.live_process, QProcess):
             return
         data = bytes(self.live_process.readAllStandardOutput()).decode("utf-8", errors="replace")
-        self.text.moveCursor(QTextCursor.End)
-        self.text.insertPlainText(data)
-        self.text.moveCursor(QTextCursor.End)
+        self.live_buffer.feed(data)
+        if self.latency is not None:
+            self.latency.feed_text(data)
 
     def _on_thread_output(self, line: str):
         # For SSHLogThread
-        self.text.moveCursor(QTextCursor.End)
-        self.text.insertPlainText(line)
-        self.text.moveCursor(QTextCursor.End)
+        self.live_buffer.feed(line)
+        if self.latency is not None:
+            self.latency.feed_text(line)
+
+    def _start_latency(self, backend, path: str):
+        """Access log tails also feed the latency sketches; the log format is looked up meanwhile"""
+        self._reset_latency_for(backend)
+        if path != NGINX_ACCESS:
+            return
+        if self.latency is None or self.latency_path != path:
+            self.latency = LatencyTracker()
+            self.latency_path = path
+
+        def use_format(log_format: str):
+            if self.latency is not None and self.latency.log_format != log_format:
+                # Sketches merge whatever format the lines came in
+                tracker = LatencyTracker(log_format)
+                tracker.merge(self.latency)
+                self.latency = tracker
+            self.latency_history.log_format = log_format
+
+        self.main_window.run_job("nginx.latency_format", backend_log_format, backend, path, TIMED_FORMAT,
+                                 on_result=use_format, on_error=lambda e: None)
+
+    def _reset_latency_for(self, backend):
+        if backend is not self._latency_backend:
+            self.latency = None
+            self.latency_path = None
+            self.latency_history = LatencyHistory(NGINX_ACCESS)
+            self._latency_backend = backend
+
+    def _on_live_buffer_stats(self, dropped: int, lines_per_sec: float):
+        if dropped:
+            self.live_drop_label.setText(trans("live_dropped").format(dropped=dropped, lps=lines_per_sec))
+
+    def _on_thread_stats(self, stats: dict):
+        self.live_stats_label.setText(trans("live_stats").format(
+            kbps=stats["bytes_per_sec"] / 1024, lps=stats["lines_per_sec"],
+            avg=stats["avg_latency_ms"], max=stats["max_latency_ms"]))
 
     def _on_thread_error(self, err: str):
-        self.text.moveCursor(QTextCursor.End)
-        self.text.insertPlainText(f"\n[HATA] {err}\n")
-        self.text.moveCursor(QTextCursor.End)
+        self.live_buffer.feed(f"\n[HATA] {err}\n")
+
+    def _on_thread_reconnected(self, count: int, offset: int):
+        self.live_buffer.feed(f"\n{trans('live_reconnected').format(count=count, offset=offset)}\n")
 
     def _on_live_finished(self):
+        self.live_buffer.stop()
         self.live_process = None
         self.stop_live_btn.setEnabled(False)
         self.live_btn.setEnabled(True)
@@ -278,6 +446,7 @@ class NginxTab(QWidget):
                 # SSHLogThread
                 self.live_process.stop()
             self.live_process = None
+        self.live_buffer.stop()
         self.stop_live_btn.setEnabled(False)
         self.live_btn.setEnabled(True)
         
@@ -294,10 +463,8 @@ class NginxTab(QWidget):
         save_path, _ = QFileDialog.getSaveFileName(self, trans("download_open"), filename)
         if not save_path:
             return
-            
-        try:
-            msg = backend.download_file(path, save_path)
-            
+
+        def done(msg):
             # Ask to open
             box = QMessageBox()
             box.setText(f"{msg}\n{trans('open_file_ask')}")
@@ -305,12 +472,39 @@ class NginxTab(QWidget):
             if box.exec() == QMessageBox.Yes:
                 # Open file with default OS editor
                 os.startfile(save_path) # Windows only? For cross platform `os.startfile` is windows specific.
+
+        start_download(self, self.main_window, "nginx.download", backend, path, save_path, done)
+
+    def show_access_analytics(self):
+        try:
+            backend = self.main_window.get_valid_backend()
+        except Exception as e:
+            show_error(self, trans("error"), str(e))
+            return
+        # Non-modal, the log view stays usable next to it
+        dlg = AccessAnalyticsDialog(self.main_window, backend, NGINX_ACCESS, self)
+        dlg.setAttribute(Qt.WA_DeleteOnClose)
+        dlg.show()
+
+    def show_latency(self):
+        try:
+            backend = self.main_window.get_valid_backend()
         except Exception as e:
             show_error(self, trans("error"), str(e))
+            return
+        self._reset_latency_for(backend)
+        dlg = LatencyDialog(self.main_window, self, backend, NGINX_ACCESS, self)
+        dlg.setAttribute(Qt.WA_DeleteOnClose)
+        dlg.show()
 
     def test_nginx_config(self):
         try:
-            out = self.main_window.get_valid_backend().check_nginx_config()
+            backend = self.main_window.get_valid_backend()
+        except Exception as e:
+            show_error(self, trans("error"), str(e))
+            return
+
+        def done(out):
             # Show result
             if "syntax is ok" in out and "test is successful" in out:
                 show_info(self, trans("success"), out)
@@ -319,5 +513,5 @@ class NginxTab(QWidget):
                      show_info(self, trans("info"), out)
                 else:
                      show_error(self, trans("error"), out)
-        except Exception as e:
-            show_error(self, trans("error"), str(e))
+
+        self.main_window.run_job("nginx.test", backend.check_nginx_config, on_result=done)
@@ -1,9 +1,20 @@
+import time
 from PySide6.QtWidgets import (
-    QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QTextEdit, QLabel, QGroupBox, QStyle
+    QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QGroupBox, QStyle, QSpinBox, QTableWidget,
+    QTableWidgetItem, QHeaderView
 )
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QTimer
+from PySide6.QtGui import QColor
 from backend.base import Backend
+from backend.fpm_monitor import DEFAULT_INTERVAL, FpmMonitor, FpmPoolHistory
 from backend.lang_manager import trans
+from .log_view import LogView
+from .sparkline import Sparkline
+from .utils import format_aggregate
+
+FPM_COLUMNS = ("col_pool", "col_listen", "col_active", "col_idle", "col_total", "col_max_children",
+               "col_listen_queue", "col_max_reached", "col_state", "col_trend")
+FPM_TREND_COL = FPM_COLUMNS.index("col_trend")
 
 class PHPTab(QWidget):
     def __init__(self, main_window):
@@ -43,8 +54,13 @@ class PHPTab(QWidget):
         self.btn_check_errors = QPushButton(trans("check_php_errors"))
         self.btn_check_errors.setIcon(self.style().standardIcon(QStyle.SP_MessageBoxCritical))
         
+        self.btn_summarize_errors = QPushButton(trans("summarize_php_errors"))
+        self.btn_summarize_errors.setIcon(self.style().standardIcon(QStyle.SP_MessageBoxCritical))
+        self.btn_summarize_errors.setToolTip(trans("tip_summarize_php_errors"))
+
         self.btn_list_web.clicked.connect(self.list_web_root)
         self.btn_check_errors.clicked.connect(self.check_php_errors)
+        self.btn_summarize_errors.clicked.connect(self.summarize_php_errors)
         
         self.btn_clear_logs = QPushButton(trans("clear_php_logs"))
         self.btn_clear_logs.setIcon(self.style().standardIcon(QStyle.SP_TrashIcon))
@@ -53,13 +69,47 @@ class PHPTab(QWidget):
 
         ctrl_layout.addWidget(self.btn_list_web)
         ctrl_layout.addWidget(self.btn_check_errors)
+        ctrl_layout.addWidget(self.btn_summarize_errors)
         ctrl_layout.addWidget(self.btn_clear_logs)
         
         self.layout.addWidget(ctrl_group)
+
+        # 3. PHP-FPM Pools Group
+        fpm_group = QGroupBox(trans("php_fpm_pools"))
+        fpm_layout = QVBoxLayout(fpm_group)
+        fpm_bar = QHBoxLayout()
+        self.fpm_interval_spin = QSpinBox()
+        self.fpm_interval_spin.setRange(1, 300)
+        self.fpm_interval_spin.setValue(DEFAULT_INTERVAL)
+        self.fpm_interval_spin.valueChanged.connect(self._fpm_interval_changed)
+        self.btn_fpm_monitor = QPushButton(trans("fpm_monitor_start"))
+        self.btn_fpm_monitor.setIcon(self.style().standardIcon(QStyle.SP_MediaPlay))
+        self.btn_fpm_monitor.setToolTip(trans("tip_fpm_monitor"))
+        self.btn_fpm_monitor.clicked.connect(self.toggle_fpm_monitor)
+        self.lbl_fpm_summary = QLabel("")
+        fpm_bar.addWidget(QLabel(trans("metrics_interval")))
+        fpm_bar.addWidget(self.fpm_interval_spin)
+        fpm_bar.addWidget(self.btn_fpm_monitor)
+        fpm_bar.addWidget(self.lbl_fpm_summary, 1)
+        fpm_layout.addLayout(fpm_bar)
+
+        self.fpm_table = QTableWidget(0, len(FPM_COLUMNS))
+        self.fpm_table.setHorizontalHeaderLabels([trans(key) for key in FPM_COLUMNS])
+        self.fpm_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.fpm_table.horizontalHeader().setSectionResizeMode(FPM_TREND_COL, QHeaderView.Stretch)
+        self.fpm_table.verticalHeader().setVisible(False)
+        self.fpm_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.fpm_table.setMinimumHeight(140)
+        fpm_layout.addWidget(self.fpm_table)
+        self.layout.addWidget(fpm_group)
+
+        self.fpm_monitor: FpmMonitor | None = None
+        self._fpm_charts: dict[str, Sparkline] = {}
+        self.fpm_timer = QTimer(self)
+        self.fpm_timer.timeout.connect(self._sample_fpm)
         
-        # 3. Output Area
-        self.output_text = QTextEdit()
-        self.output_text.setReadOnly(True)
+        # 4. Output Area
+        self.output_text = LogView(highlight=False)
         self.output_text.setPlaceholderText(trans("ph_output"))
         self.layout.addWidget(self.output_text)
         
@@ -75,75 +125,177 @@ class PHPTab(QWidget):
             self.log_error(f"{trans('error')}: {e}")
             return
 
-        try:
-            # 1. Get Version
-            ver_raw = backend.get_php_version()
-            # "PHP 8.2.7 (cli)..." -> "PHP 8.2.7"
-            ver_short = ver_raw.split('(')[0].strip() if '(' in ver_raw else ver_raw
-            self.lbl_version.setText(trans("php_version").format(version=ver_short))
-            
-            # 2. Get FPM Status
+        def work():
             # We need full version string for backend to parse "PHP 8.2..."
-            status = backend.get_php_fpm_status(ver_raw)
-            
-            color = "orange"
-            if "active" in status.lower() and "inactive" not in status.lower():
-                color = "green"
-                status_dsl = trans("active")
-            elif "inactive" in status.lower() or "failed" in status.lower():
-                color = "red"
-                status_dsl = trans("inactive")
-            else:
-                status_dsl = status
-                
-            status_html = f"<span style='color:{color}'>{status_dsl}</span>"
-            self.lbl_fpm.setText(trans("php_fpm_status").format(status=status_html))
-            
-            self.log(f"{trans('info')}: {ver_raw}\nSTATUS: {status}")
-            
-        except Exception as e:
+            ver_raw = backend.get_php_version()
+            return ver_raw, backend.get_php_fpm_status(ver_raw)
+
+        def failed(e):
             self.lbl_version.setText("Sürüm: Hata")
             self.lbl_fpm.setText("FPM: Hata")
             self.log_error(f"{trans('error')}: {e}")
 
+        self.main_window.run_job("php.info", work, on_result=self._show_info, on_error=failed)
+
+    def _show_info(self, result):
+        ver_raw, status = result
+        # "PHP 8.2.7 (cli)..." -> "PHP 8.2.7"
+        ver_short = ver_raw.split('(')[0].strip() if '(' in ver_raw else ver_raw
+        self.lbl_version.setText(trans("php_version").format(version=ver_short))
+
+        color = "orange"
+        if "active" in status.lower() and "inactive" not in status.lower():
+            color = "green"
+            status_dsl = trans("active")
+        elif "inactive" in status.lower() or "failed" in status.lower():
+            color = "red"
+            status_dsl = trans("inactive")
+        else:
+            status_dsl = status
+            
+        status_html = f"<span style='color:{color}'>{status_dsl}</span>"
+        self.lbl_fpm.setText(trans("php_fpm_status").format(status=status_html))
+        
+        self.log(f"{trans('info')}: {ver_raw}\nSTATUS: {status}")
+
+    def _run(self, key: str, fn, on_result=None):
+        """Runs a backend call in the background, errors go to the output pane"""
+        self.main_window.run_job(key, fn, on_result=on_result or self.log,
+                                 on_error=lambda e: self.log_error(f"{trans('error')}: {e}"))
+
     def list_web_root(self):
         self.log(trans("list_web_root") + "...")
         try:
-            out = self.get_backend().list_web_root()
-            self.log(out)
+            backend = self.get_backend()
         except Exception as e:
             self.log_error(f"{trans('error')}: {e}")
+            return
+        self._run("php.web_root", backend.list_web_root)
 
     def check_php_errors(self):
         self.log(trans("check_php_errors") + "...")
         try:
-            out = self.get_backend().check_php_errors()
+            backend = self.get_backend()
+        except Exception as e:
+            self.log_error(f"{trans('error')}: {e}")
+            return
+
+        def done(out):
             if not out.strip():
                 self.log(trans("info") + ": Empty")
             else:
                 self.log(out)
+
+        self._run("php.errors", backend.check_php_errors, done)
+
+    def summarize_php_errors(self):
+        self.log(trans("summarize_php_errors") + "...")
+        try:
+            backend = self.get_backend()
         except Exception as e:
             self.log_error(f"{trans('error')}: {e}")
+            return
+        self._run("php.errors_summary", backend.summarize_php_errors, lambda result: self.log(format_aggregate(result)))
 
     def clear_php_logs(self):
         from PySide6.QtWidgets import QMessageBox
         confirm = QMessageBox.question(self, trans("confirmation"), trans("msg_confirm_clear_php"))
         if confirm != QMessageBox.Yes:
             return
-            
+
         try:
-            msg = self.get_backend().truncate_php_logs()
-            self.log(msg)
+            backend = self.get_backend()
         except Exception as e:
             self.log_error(f"{trans('error')}: {e}")
+            return
+        self._run("php.clear", backend.truncate_php_logs)
+
+    def toggle_fpm_monitor(self):
+        if self.fpm_timer.isActive():
+            self.stop_fpm_monitor()
+            return
+        try:
+            self.get_backend()
+        except Exception as e:
+            self.log_error(f"{trans('error')}: {e}")
+            return
+        self.fpm_monitor = FpmMonitor()
+        self.fpm_timer.start(self.fpm_interval_spin.value() * 1000)
+        self.btn_fpm_monitor.setText(trans("fpm_monitor_stop"))
+        self.btn_fpm_monitor.setIcon(self.style().standardIcon(QStyle.SP_MediaStop))
+        self._sample_fpm()
+
+    def stop_fpm_monitor(self):
+        self.fpm_timer.stop()
+        self.main_window.jobs.cancel("php.fpm")
+        self.btn_fpm_monitor.setText(trans("fpm_monitor_start"))
+        self.btn_fpm_monitor.setIcon(self.style().standardIcon(QStyle.SP_MediaPlay))
+
+    def _fpm_interval_changed(self, seconds: int):
+        if self.fpm_timer.isActive():
+            self.fpm_timer.setInterval(seconds * 1000)
+
+    def _sample_fpm(self):
+        # A slow server skips ticks instead of piling up requests
+        if self.fpm_monitor is None or self.main_window.jobs.is_running("php.fpm"):
+            return
+        try:
+            backend = self.get_backend()
+        except Exception as e:
+            self._fpm_failed(e)
+            return
+        monitor = self.fpm_monitor
+
+        def work():
+            return monitor.feed(backend.fpm_pool_status())
+
+        self.main_window.run_job("php.fpm", work, on_result=self._show_fpm, on_error=self._fpm_failed)
+
+    def _fpm_failed(self, e):
+        self.stop_fpm_monitor()
+        self.log_error(f"{trans('php_fpm_pools')}: {e}")
+
+    def _show_fpm(self, histories: list[FpmPoolHistory]):
+        if histories:
+            saturated = sum(1 for h in histories if h.saturated_since is not None)
+            self.lbl_fpm_summary.setText(trans("fpm_summary").format(pools=len(histories), saturated=saturated))
+        else:
+            self.lbl_fpm_summary.setText(trans("fpm_no_pools"))
+
+        keys = [h.latest.key for h in histories]
+        if keys != list(self._fpm_charts):
+            self.fpm_table.setRowCount(len(keys))
+            self._fpm_charts = {}
+            for row, key in enumerate(keys):
+                self._fpm_charts[key] = Sparkline()
+                self.fpm_table.setCellWidget(row, FPM_TREND_COL, self._fpm_charts[key])
+
+        for row, history in enumerate(histories):
+            s = history.latest
+            point = history.points[-1] if history.points and not s.error else None
+            if s.error:
+                state, color = s.error, "red"
+            elif history.saturated_since is not None:
+                since = time.strftime("%H:%M:%S", time.localtime(history.saturated_since))
+                state, color = trans("fpm_saturated").format(time=since), "darkorange"
+            else:
+                state, color = trans("fpm_ok"), None
+            numbers = ["-"] * 6 if point is None else [
+                str(s.active), str(s.idle), str(s.total), str(s.max_children or "-"), str(s.listen_queue),
+                f"{point.max_children_hits} ({s.max_children_reached})"]
+            for col, text in enumerate([s.key, s.listen, *numbers, state]):
+                item = QTableWidgetItem(text)
+                if 2 <= col < 8:
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                if col == 8 and color:
+                    item.setForeground(QColor(color))
+                self.fpm_table.setItem(row, col, item)
+            chart = self._fpm_charts[s.key]
+            chart.max_value = s.max_children or None
+            chart.set_values(self.fpm_monitor.series(s.key, "active"))
 
     def log(self, msg: str):
-        self.output_text.append(f"INFO: {msg}\n" + "-"*40)
-        # Scroll to bottom
-        sb = self.output_text.verticalScrollBar()
-        sb.setValue(sb.maximum())
+        self.output_text.append_message(f"INFO: {msg}\n" + "-"*40)
 
     def log_error(self, msg: str):
-        self.output_text.append(f"<span style='color:red'>ERROR: {msg}</span>\n" + "-"*40)
-        sb = self.output_text.verticalScrollBar()
-        sb.setValue(sb.maximum())
+        self.output_text.append_message(f"ERROR: {msg}\n" + "-"*40, "red")
@@ -0,0 +1,285 @@
+import time
+from PySide6.QtCore import Qt, QTimer
+from PySide6.QtGui import QColor
+from PySide6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QGridLayout, QPushButton, QLabel, QComboBox, QSpinBox, QGroupBox,
+    QTableWidget, QTableWidgetItem, QHeaderView, QSplitter, QStyle
+)
+from backend.fleet import HostBackoff, HostResult, fan_out
+from backend.lang_manager import trans
+from backend.resources import DEFAULT_INTERVAL, ResourceSample, ResourceSampler
+from .sparkline import Sparkline
+from .utils import show_error, show_info
+
+JOB_KEY = "resources.sample"
+RETRY_JOB_KEY = "resources.retry"  # fleet hosts back from their backoff, sampled apart from the round
+# (sample field, header key, format) for the host table; the CPU trend follows in the last column
+TABLE_COLUMNS = [
+    ("cpu_pct", "col_cpu", "{:.0f}"), ("steal_pct", "col_steal", "{:.1f}"), ("iowait_pct", "col_iowait", "{:.1f}"),
+    ("mem_used_pct", "col_mem", "{:.0f}"), ("load1", "col_load", "{:.2f}"), ("procs_blocked", "col_blocked", "{:.0f}"),
+    ("disk_read_kbs", "col_disk_read", "{:.0f}"), ("disk_write_kbs", "col_disk_write", "{:.0f}"),
+    ("disk_busy_pct", "col_disk_busy", "{:.0f}"), ("temp_c", "col_temp", "{:.1f}"),
+]
+STATE_COL = len(TABLE_COLUMNS) + 1
+TREND_COL = STATE_COL + 1
+# (sample field, title key, fixed maximum, color) for the selected host's charts
+DETAIL_CHARTS = [
+    ("cpu_pct", "col_cpu", 100, "#4aa3df"), ("iowait_pct", "col_iowait", 100, "#e67e22"),
+    ("steal_pct", "col_steal", 100, "#c0392b"), ("mem_used_pct", "col_mem", 100, "#27ae60"),
+    ("load1", "col_load", None, "#8e44ad"), ("disk_busy_pct", "col_disk_busy", 100, "#d35400"),
+    ("disk_read_kbs", "col_disk_read", None, "#16a085"), ("disk_write_kbs", "col_disk_write", None, "#2c3e50"),
+    ("temp_c", "col_temp", None, "#e74c3c"),
+]
+# Cells worth a second look: (field, threshold)
+WARN_AT = {"cpu_pct": 90, "steal_pct": 10, "iowait_pct": 20, "mem_used_pct": 90, "disk_busy_pct": 80, "temp_c": 75}
+
+
+def connection_name(backend) -> str:
+    cfg = getattr(backend, "cfg", None)
+    return cfg.host if cfg is not None else "localhost"
+
+
+class ResourcesTab(QWidget):
+    """
+    CPU, memory, load, disk I/O and temperature of the connected server or of
+    the fleet's ticked hosts, sampled every few seconds into per-host rings
+    """
+
+    def __init__(self, main_window):
+        super().__init__()
+        self.main_window = main_window
+        self.samplers: dict[str, ResourceSampler] = {}
+        self.backoff = HostBackoff()
+        self._rows: dict[str, int] = {}
+        self._trends: dict[str, Sparkline] = {}
+
+        layout = QVBoxLayout(self)
+        bar = QHBoxLayout()
+        self.source_combo = QComboBox()
+        self.source_combo.addItem(trans("res_source_connection"), "connection")
+        self.source_combo.addItem(trans("res_source_fleet"), "fleet")
+        self.interval_spin = QSpinBox()
+        self.interval_spin.setRange(1, 300)
+        self.interval_spin.setValue(DEFAULT_INTERVAL)
+        self.interval_spin.valueChanged.connect(self._interval_changed)
+        self.start_btn = QPushButton(trans("res_start"))
+        self.start_btn.setIcon(self.style().standardIcon(QStyle.SP_MediaPlay))
+        self.start_btn.setToolTip(trans("tip_res_start"))
+        self.start_btn.clicked.connect(self.toggle_sampling)
+        self.summary_label = QLabel("")
+        self.summary_label.setStyleSheet("color: gray;")
+        bar.addWidget(self.source_combo)
+        bar.addWidget(QLabel(trans("metrics_interval")))
+        bar.addWidget(self.interval_spin)
+        bar.addWidget(self.start_btn)
+        bar.addWidget(self.summary_label, 1)
+        layout.addLayout(bar)
+
+        splitter = QSplitter(Qt.Vertical)
+        layout.addWidget(splitter, 1)
+
+        self.table = QTableWidget(0, TREND_COL + 1)
+        self.table.setHorizontalHeaderLabels(
+            [trans("host")] + [trans(key) for _, key, _ in TABLE_COLUMNS] + [trans("col_state"), trans("col_trend")])
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(TREND_COL, QHeaderView.Stretch)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.table.setSelectionMode(QTableWidget.SingleSelection)
+        self.table.itemSelectionChanged.connect(self._show_detail)
+        splitter.addWidget(self.table)
+
+        self.detail_group = QGroupBox(trans("res_detail"))
+        grid = QGridLayout(self.detail_group)
+        self.detail_charts: dict[str, Sparkline] = {}
+        self.detail_values: dict[str, QLabel] = {}
+        for i, (name, key, max_value, color) in enumerate(DETAIL_CHARTS):
+            row, col = divmod(i, 3)
+            title = QLabel(trans(key))
+            value = QLabel("-")
+            value.setStyleSheet("font-weight: bold;")
+            chart = Sparkline(color=color, max_value=max_value)
+            chart.setMinimumHeight(48)
+            cell = QVBoxLayout()
+            head = QHBoxLayout()
+            head.addWidget(title)
+            head.addStretch(1)
+            head.addWidget(value)
+            cell.addLayout(head)
+            cell.addWidget(chart)
+            grid.addLayout(cell, row, col)
+            self.detail_charts[name] = chart
+            self.detail_values[name] = value
+        splitter.addWidget(self.detail_group)
+        splitter.setSizes([300, 260])
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self._sample)
+
+    # --- Sampling ---
+
+    def toggle_sampling(self):
+        if self.timer.isActive():
+            self.stop_sampling()
+            return
+        if self.source_combo.currentData() == "fleet":
+            try:
+                hosts = self.main_window.tab_fleet.checked_hosts()
+            except ValueError as e:
+                show_error(self, trans("error"), str(e))
+                return
+            if not hosts:
+                show_info(self, trans("info"), trans("fleet_no_hosts"))
+                return
+            names = [h.name for h in hosts]
+        else:
+            try:
+                names = [connection_name(self.main_window.get_valid_backend())]
+            except Exception as e:
+                self.summary_label.setText(f"{trans('error')}: {e}")
+                return
+        self.samplers = {name: ResourceSampler() for name in names}
+        self.backoff = HostBackoff()
+        self._build_rows(names)
+        self.source_combo.setEnabled(False)
+        self.timer.start(self.interval_spin.value() * 1000)
+        self.start_btn.setText(trans("res_stop"))
+        self.start_btn.setIcon(self.style().standardIcon(QStyle.SP_MediaStop))
+        self._sample()
+
+    def stop_sampling(self):
+        self.timer.stop()
+        self.main_window.jobs.cancel(JOB_KEY)
+        self.main_window.jobs.cancel(RETRY_JOB_KEY)
+        self.source_combo.setEnabled(True)
+        self.start_btn.setText(trans("res_start"))
+        self.start_btn.setIcon(self.style().standardIcon(QStyle.SP_MediaPlay))
+
+    def _interval_changed(self, seconds: int):
+        if self.timer.isActive():
+            self.timer.setInterval(seconds * 1000)
+
+    def _sample(self):
+        if not self.samplers:
+            return
+        if self.source_combo.currentData() == "fleet":
+            self._sample_fleet()
+            return
+        # A slow host delays the round; ticks are skipped instead of piling up reads
+        if self.main_window.jobs.is_running(JOB_KEY):
+            return
+        try:
+            backend = self.main_window.get_valid_backend()
+        except Exception as e:
+            self._failed(e)
+            return
+        self.main_window.run_job(JOB_KEY, self._work_connection, backend, next(iter(self.samplers)),
+                                 on_result=self._show_results, on_error=self._failed)
+
+    def _sample_fleet(self):
+        fleet = self.main_window.tab_fleet
+        jobs = self.main_window.jobs
+        try:
+            hosts = [h for h in fleet.checked_hosts() if h.name in self.samplers]
+        except ValueError as e:
+            self._failed(e)
+            return
+        fleet.pool.password = self.main_window.conn_bar.password_edit.text()
+        # Hosts that failed are retried in a job of their own, so their connect timeout never holds up the round
+        retry = [h for h in hosts if self.backoff.due(h.name)]
+        if retry and not jobs.is_running(RETRY_JOB_KEY):
+            self.main_window.run_job(RETRY_JOB_KEY, self._work_fleet, fleet.pool, retry,
+                                     fleet.concurrency_spin.value(), pass_job=True,
+                                     on_result=self._apply_results, on_error=self._failed)
+        hosts = [h for h in hosts if not self.backoff.waiting(h.name)]
+        if hosts and not jobs.is_running(JOB_KEY):
+            self.main_window.run_job(JOB_KEY, self._work_fleet, fleet.pool, hosts,
+                                     fleet.concurrency_spin.value(), pass_job=True,
+                                     on_result=self._show_results, on_error=self._failed)
+
+    def _feed(self, results: list[HostResult]) -> list[HostResult]:
+        # Worker thread; the GUI reads the rings only once the job is over
+        for result in results:
+            if result.ok:
+                self.samplers[result.name].feed(result.output)
+        return results
+
+    def _work_connection(self, backend, name: str) -> list[HostResult]:
+        t0 = time.perf_counter()
+        reading = backend.sample_resources()
+        return self._feed([HostResult(name, True, reading, (time.perf_counter() - t0) * 1000)])
+
+    def _work_fleet(self, job, pool, hosts, max_workers) -> list[HostResult]:
+        return self._feed(fan_out(pool, hosts, lambda backend: backend.sample_resources(), max_workers,
+                                  job.cancel_event))
+
+    def _failed(self, e):
+        self.stop_sampling()
+        self.summary_label.setText(f"{trans('error')}: {e}")
+
+    # --- Display ---
+
+    def _build_rows(self, names: list[str]):
+        self.table.setRowCount(len(names))
+        self._rows = {}
+        self._trends = {}
+        for row, name in enumerate(names):
+            self._rows[name] = row
+            self.table.setItem(row, 0, QTableWidgetItem(name))
+            for col in range(1, TREND_COL):
+                self.table.setItem(row, col, QTableWidgetItem(""))
+            self._trends[name] = Sparkline(max_value=100)
+            self.table.setCellWidget(row, TREND_COL, self._trends[name])
+        if names:
+            self.table.selectRow(0)
+
+    def _show_results(self, results: list[HostResult]):
+        self._apply_results(results)
+        ok = sum(1 for r in results if r.ok)
+        slowest = max((r.elapsed_ms for r in results), default=0)
+        # Hosts waiting out their backoff count as failed too
+        failed = len(self.backoff) if self.source_combo.currentData() == "fleet" else len(results) - ok
+        self.summary_label.setText(trans("res_summary").format(ok=ok, failed=failed, ms=slowest))
+
+    def _apply_results(self, results: list[HostResult]):
+        for result in results:
+            self.backoff.record(result)
+            row = self._rows.get(result.name)
+            if row is None:
+                continue
+            sampler = self.samplers[result.name]
+            if result.ok:
+                self._fill_row(row, sampler.ring.latest())
+                state = QTableWidgetItem("OK")
+                state.setForeground(QColor("#008000"))
+            else:
+                state = QTableWidgetItem(str(result.output).strip().splitlines()[0] if result.output else "")
+                state.setForeground(QColor("red"))
+                state.setToolTip(str(result.output))
+            self.table.setItem(row, STATE_COL, state)
+            self._trends[result.name].set_values(sampler.ring.series("cpu_pct"))
+        self._show_detail()
+
+    def _fill_row(self, row: int, sample: ResourceSample):
+        for col, (name, _, fmt) in enumerate(TABLE_COLUMNS, start=1):
+            value = getattr(sample, name)
+            item = QTableWidgetItem("-" if value is None else fmt.format(value))
+            item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+            if value is not None and name in WARN_AT and value >= WARN_AT[name]:
+                item.setForeground(QColor("darkorange"))
+            self.table.setItem(row, col, item)
+
+    def _show_detail(self):
+        rows = self.table.selectionModel().selectedRows()
+        name_item = self.table.item(rows[0].row(), 0) if rows else None
+        sampler = self.samplers.get(name_item.text()) if name_item else None
+        if sampler is None:
+            return
+        self.detail_group.setTitle(f"{trans('res_detail')}: {name_item.text()}")
+        latest = sampler.ring.latest()
+        for name, chart in self.detail_charts.items():
+            chart.set_values(sampler.ring.series(name))
+            value = getattr(latest, name) if latest else None
+            self.detail_values[name].setText("-" if value is None else f"{value:.1f}")
@@ -0,0 +1,59 @@
+from PySide6.QtCore import QPointF, Qt
+from PySide6.QtGui import QColor, QPainter, QPainterPath, QPen
+from PySide6.QtWidgets import QSizePolicy, QWidget
+
+DEFAULT_COLOR = "#4aa3df"
+
+
+class Sparkline(QWidget):
+    """
+    Small line chart of a series, oldest value on the left. None values
+    (no rate yet, server restarted) leave a gap. The scale runs from 0 to the
+    series maximum unless `max_value` fixes it (e.g. 100 for percentages).
+    """
+
+    def __init__(self, parent=None, color: str = DEFAULT_COLOR, max_value: float | None = None):
+        super().__init__(parent)
+        self.values: list[float | None] = []
+        self.color = QColor(color)
+        self.max_value = max_value
+        self.setMinimumSize(120, 28)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+
+    def set_values(self, values: list[float | None]):
+        self.values = list(values)
+        self.update()
+
+    def paintEvent(self, event):
+        points = [v for v in self.values if v is not None]
+        if not points:
+            return
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        rect = self.rect().adjusted(2, 3, -4, -3)
+        low = min(0.0, min(points))
+        high = self.max_value if self.max_value is not None else max(points)
+        span = (high - low) or 1.0
+        step = rect.width() / max(1, len(self.values) - 1)
+
+        path = QPainterPath()
+        pen_down = False
+        last = None
+        for i, value in enumerate(self.values):
+            if value is None:
+                pen_down = False
+                continue
+            last = QPointF(rect.left() + i * step,
+                           rect.bottom() - (min(value, high) - low) / span * rect.height())
+            if pen_down:
+                path.lineTo(last)
+            else:
+                path.moveTo(last)
+                pen_down = True
+        painter.setPen(QPen(self.color, 1.5))
+        painter.drawPath(path)
+        if last is not None:
+            painter.setBrush(self.color)
+            painter.setPen(Qt.NoPen)
+            painter.drawEllipse(last, 2.5, 2.5)
+        painter.end()
@@ -1,6 +1,10 @@
-from PySide6.QtWidgets import QMessageBox
+import os
+from PySide6.QtWidgets import QMessageBox, QComboBox, QCheckBox, QProgressDialog
 from PySide6.QtCore import Qt
 import sys
+import time
+from backend.lang_manager import trans
+from backend.logsearch import SCOPE_TAIL, SCOPE_FULL, SCOPE_SINCE, since_hours
 
 def show_error(parent, title: str, message: str):
     """
@@ -28,3 +32,140 @@ def show_info(parent, title: str, message: str):
     msg_box.setText(message)
     msg_box.setTextInteractionFlags(Qt.TextSelectableByMouse)
     msg_box.exec()
+
+# (label key, scope, hours back for SCOPE_SINCE)
+SEARCH_SCOPES = [
+    ("scope_tail", SCOPE_TAIL, None),
+    ("scope_full", SCOPE_FULL, None),
+    ("scope_1h", SCOPE_SINCE, 1),
+    ("scope_24h", SCOPE_SINCE, 24),
+    ("scope_7d", SCOPE_SINCE, 24 * 7),
+]
+SEARCH_BATCH_INTERVAL = 0.1  # seconds between two UI updates while hits stream in
+DOWNLOAD_REPORT_INTERVAL = 0.2  # seconds between two progress dialog updates
+
+def make_scope_combo() -> QComboBox:
+    combo = QComboBox()
+    for key, scope, hours in SEARCH_SCOPES:
+        combo.addItem(trans(key), (scope, hours))
+    return combo
+
+def scope_kwargs(combo: QComboBox, rotated_check: QCheckBox | None = None) -> dict:
+    """stream_search keyword arguments for the selected scope"""
+    scope, hours = combo.currentData()
+    # The last N lines always come from the live file
+    rotated = rotated_check is not None and rotated_check.isChecked() and scope != SCOPE_TAIL
+    return {"scope": scope, "since": since_hours(hours) if hours else None, "rotated": rotated}
+
+def make_rotated_check(combo: QComboBox) -> QCheckBox:
+    """"Include rotated" box, only enabled for scopes that can span the rotation chain"""
+    check = QCheckBox(trans("search_rotated"))
+    check.setToolTip(trans("tip_search_rotated"))
+    check.setChecked(True)
+    check.setEnabled(combo.currentData()[0] != SCOPE_TAIL)
+    combo.currentIndexChanged.connect(lambda: check.setEnabled(combo.currentData()[0] != SCOPE_TAIL))
+    return check
+
+def stream_search(job, backend, path: str, pattern: str, rotated: bool = False, **kwargs) -> int:
+    """
+    Job worker: runs backend.search_stream and reports hits to the UI in
+    batches of formatted "line:text" rows. Returns the number of hits.
+    With rotated, the whole rotation chain is searched (backend.search_rotated)
+    and rows are "file:line:text".
+    """
+    if rotated:
+        found = backend.search_rotated(path, pattern, since=kwargs.get("since"),
+                                       max_hits=kwargs.get("max_hits", 300), cancel_event=job.cancel_event)
+        hits = ((f"{os.path.basename(member)}:{line_no}", line) for member, line_no, _offset, line in found)
+    else:
+        found = backend.search_stream(path, pattern, cancel_event=job.cancel_event, **kwargs)
+        hits = ((line_no, line) for line_no, _offset, line in found)
+    batch, count = [], 0
+    last = time.monotonic()
+    for where, line in hits:
+        batch.append(f"{where}:{line}")
+        count += 1
+        now = time.monotonic()
+        if now - last >= SEARCH_BATCH_INTERVAL:
+            job.report(batch)
+            batch, last = [], now
+    if batch:
+        job.report(batch)
+    return count
+
+def format_aggregate(result: dict) -> str:
+    """Text of a backend.aggregate() result for the output panes: signatures with a sample line, then the files"""
+    groups = result.get("groups", {})
+    out = [trans("aggregate_header").format(
+        matched=result.get("matched", 0), lines=result.get("lines", 0), files=result.get("files", 0))]
+    samples = result.get("samples", {})
+    for key, count in groups.get("signature", []):
+        out.append(f"{count:>8}  {key}")
+        sample = samples.get(key)
+        if sample and sample != key:
+            out.append(f"{'':>8}  {sample}")
+    if groups.get("file"):
+        out.append("")
+        out.extend(f"{count:>8}  {path}" for path, count in groups["file"])
+    minutes = groups.get("minute")
+    if minutes:
+        peak_minute, peak = max(minutes, key=lambda kv: kv[1])
+        out.append("")
+        out.append(trans("aggregate_minutes").format(
+            first=time.strftime("%Y-%m-%d %H:%M", time.localtime(minutes[0][0] * 60)),
+            last=time.strftime("%Y-%m-%d %H:%M", time.localtime(minutes[-1][0] * 60)),
+            peak=peak, at=time.strftime("%Y-%m-%d %H:%M", time.localtime(peak_minute * 60))))
+    return "\n".join(out)
+
+def start_transfer(parent, main_window, key: str, name: str, fn, on_done):
+    """
+    Runs fn(progress, cancel_event) as a job behind a progress dialog.
+    Cancel stops the transfer through the job's cancel event.
+    """
+    dialog = QProgressDialog(name, trans("btn_cancel"), 0, 1000, parent)
+    dialog.setWindowTitle(trans("download_open"))
+    dialog.setWindowModality(Qt.WindowModal)
+    dialog.setMinimumDuration(500)
+    dialog.setAutoReset(False)
+    dialog.setAutoClose(False)
+
+    def work(job):
+        last = 0.0
+
+        def progress(done: int, total: int):
+            nonlocal last
+            now = time.monotonic()
+            if now - last >= DOWNLOAD_REPORT_INTERVAL:
+                last = now
+                job.report((done, total))
+
+        return fn(progress, job.cancel_event)
+
+    def on_progress(value):
+        done, total = value
+        if total:
+            dialog.setValue(min(1000, int(done * 1000 / total)))
+            dialog.setLabelText(trans("download_progress").format(
+                name=name, done=done / 1048576, total=total / 1048576))
+        else:
+            # Size not known up front (archives built on the fly): busy bar
+            dialog.setRange(0, 0)
+            dialog.setLabelText(trans("download_progress_open").format(name=name, done=done / 1048576))
+
+    def finished(result):
+        dialog.close()
+        on_done(result)
+
+    def failed(e):
+        dialog.close()
+        show_error(parent, trans("error"), str(e))
+
+    dialog.canceled.connect(lambda: main_window.jobs.cancel(key))
+    main_window.run_job(key, work, pass_job=True, on_result=finished, on_error=failed, on_progress=on_progress)
+
+def start_download(parent, main_window, key: str, backend, remote_path: str, local_path: str, on_done):
+    """backend.download_file behind a progress dialog; the .part file stays on cancel so the next try resumes"""
+    start_transfer(parent, main_window, key, os.path.basename(remote_path),
+                   lambda progress, cancel_event: backend.download_file(
+                       remote_path, local_path, progress=progress, cancel_event=cancel_event),
+                   on_done)
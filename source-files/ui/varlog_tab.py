@@ -1,19 +1,35 @@
 import os
+import time
 from PySide6.QtCore import Qt
-from PySide6.QtGui import QFont, QTextCursor
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QLineEdit, 
-    QSpinBox, QTableWidget, QTableWidgetItem, QTextEdit, QMessageBox, QHeaderView, QFileDialog, QStyle
+    QSpinBox, QTableView, QMessageBox, QHeaderView, QFileDialog, QStyle
 )
+from backend.inventory import LogInventory
 from backend.local import VAR_LOG_DIR
-from .highlighter import LogHighlighter
-from .utils import show_error, show_info
+from .log_browser import LogBrowserDialog
+from .log_view import LogView
+from .bundle_dialog import BundleDialog
+from .inventory_model import LogInventoryModel, PATH_ROLE, make_inventory_proxy
+from .utils import show_error, show_info, make_scope_combo, make_rotated_check, scope_kwargs, stream_search, start_download, start_transfer
 from backend.lang_manager import trans
 
+# Max bytes fetched by one incremental refresh
+REFRESH_MAX_BYTES = 4 * 1024 * 1024
+SEARCH_TAIL_LINES = 8000
+SEARCH_MAX_HITS = 2000
+
 class VarLogTab(QWidget):
     def __init__(self, main_window):
         super().__init__()
         self.main_window = main_window
+        # path -> (byte offset, inode) of what is already in the text pane
+        self.cursors: dict[str, tuple[int, int]] = {}
+        self._view_key: tuple[str, int] | None = None
+        self._search_job = None
+        # Cached tree of the connected host, refreshed with deltas
+        self.inventory = LogInventory(VAR_LOG_DIR)
+        self._inventory_backend = None
         
         layout = QVBoxLayout(self)
 
@@ -24,13 +40,25 @@ class VarLogTab(QWidget):
         self.varlog_view_btn = QPushButton(trans("varlog_view"))
         self.varlog_view_btn.setIcon(self.style().standardIcon(QStyle.SP_FileIcon))
         
+        self.varlog_browse_btn = QPushButton(trans("varlog_browse"))
+        self.varlog_browse_btn.setIcon(self.style().standardIcon(QStyle.SP_FileDialogContentsView))
+        self.varlog_browse_btn.setToolTip(trans("tip_browse"))
+
         self.varlog_download_btn = QPushButton(trans("varlog_download"))
         self.varlog_download_btn.setIcon(self.style().standardIcon(QStyle.SP_DialogSaveButton))
+
+        self.varlog_bundle_btn = QPushButton(trans("varlog_bundle"))
+        self.varlog_bundle_btn.setIcon(self.style().standardIcon(QStyle.SP_DirLinkIcon))
+        self.varlog_bundle_btn.setToolTip(trans("tip_bundle"))
         
         self.varlog_search_edit = QLineEdit()
         self.varlog_search_edit.setPlaceholderText(trans("filter_placeholder"))
         self.varlog_search_btn = QPushButton(trans("filter_btn"))
         self.varlog_search_btn.setIcon(self.style().standardIcon(QStyle.SP_MessageBoxInformation))
+        self.varlog_scope_combo = make_scope_combo()
+        self.varlog_rotated_check = make_rotated_check(self.varlog_scope_combo)
+        self.varlog_search_stop_btn = QPushButton("■ " + trans("stop_search"))
+        self.varlog_search_stop_btn.setEnabled(False)
         self.varlog_lines_spin = QSpinBox()
         self.varlog_lines_spin.setRange(10, 20000)
         self.varlog_lines_spin.setValue(200)
@@ -39,7 +67,9 @@ class VarLogTab(QWidget):
         bar.addWidget(QLabel(trans("lines")))
         bar.addWidget(self.varlog_lines_spin)
         bar.addWidget(self.varlog_view_btn)
+        bar.addWidget(self.varlog_browse_btn)
         bar.addWidget(self.varlog_download_btn)
+        bar.addWidget(self.varlog_bundle_btn)
         
         self.varlog_clear_btn = QPushButton(trans("varlog_clear"))
         self.varlog_clear_btn.setIcon(self.style().standardIcon(QStyle.SP_TrashIcon))
@@ -49,66 +79,80 @@ class VarLogTab(QWidget):
         
         bar.addStretch(1)
         bar.addWidget(self.varlog_search_edit, 1)
+        bar.addWidget(self.varlog_scope_combo)
+        bar.addWidget(self.varlog_rotated_check)
         bar.addWidget(self.varlog_search_btn)
+        bar.addWidget(self.varlog_search_stop_btn)
         layout.addLayout(bar)
 
-        self.table = QTableWidget(0, 3)
-        self.table.setHorizontalHeaderLabels([trans("col_file"), trans("col_size"), trans("col_date")])
+        self.varlog_filter_edit = QLineEdit()
+        self.varlog_filter_edit.setPlaceholderText(trans("ph_filter_files"))
+        self.varlog_filter_edit.setClearButtonEnabled(True)
+        layout.addWidget(self.varlog_filter_edit)
+
+        self.inventory_model = LogInventoryModel(VAR_LOG_DIR, self)
+        self.inventory_proxy = make_inventory_proxy(self.inventory_model, self)
+        self.table = QTableView()
+        self.table.setModel(self.inventory_proxy)
+        self.table.setSortingEnabled(True)
+        self.table.sortByColumn(0, Qt.AscendingOrder)
+        self.table.verticalHeader().setVisible(False)
         self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
         self.table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeToContents)
         self.table.horizontalHeader().setSectionResizeMode(2, QHeaderView.ResizeToContents)
-        self.table.setSelectionBehavior(QTableWidget.SelectRows)
-        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableView.SelectRows)
+        self.table.setSelectionMode(QTableView.ExtendedSelection)
+        self.table.setEditTriggers(QTableView.NoEditTriggers)
         layout.addWidget(self.table, 1)
 
-        self.varlog_text = QTextEdit()
-        self.varlog_text.setReadOnly(True)
-        self.varlog_text.setFont(QFont("Consolas", 10))
-        # Highlight
-        self.highlighter = LogHighlighter(self.varlog_text.document())
+        self.varlog_text = LogView()
         layout.addWidget(self.varlog_text, 1)
 
         self.varlog_refresh_btn.clicked.connect(self.refresh_varlog)
         self.varlog_view_btn.clicked.connect(self.view_selected_varlog_file)
+        self.varlog_browse_btn.clicked.connect(self.browse_selected_varlog_file)
         self.varlog_download_btn.clicked.connect(self.download_selected_varlog_file)
+        self.varlog_bundle_btn.clicked.connect(self.download_bundle)
         self.varlog_search_btn.clicked.connect(self.search_selected_varlog_file)
+        self.varlog_search_stop_btn.clicked.connect(lambda: self._stop_search())
         self.table.doubleClicked.connect(lambda: self.view_selected_varlog_file())
+        self.varlog_filter_edit.textChanged.connect(self.inventory_proxy.setFilterFixedString)
 
     def refresh_varlog(self):
         try:
-            items = self.main_window.get_valid_backend().list_var_log()
-            self.table.setRowCount(0)
-            for name, size_b, mtime in items:
-                r = self.table.rowCount()
-                self.table.insertRow(r)
-
-                it_name = QTableWidgetItem(name)
-                # Force forward slashes for Linux paths, even if running on Windows
-                full_path = f"{VAR_LOG_DIR}/{name}"
-                it_name.setData(Qt.UserRole, full_path)
-
-                it_size = QTableWidgetItem(f"{size_b / 1024:.2f}")
-                it_size.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-
-                it_time = QTableWidgetItem(str(mtime))
-
-                self.table.setItem(r, 0, it_name)
-                self.table.setItem(r, 1, it_size)
-                self.table.setItem(r, 2, it_time)
-
-            self.varlog_text.setPlainText(trans("msg_files_listed").format(path=VAR_LOG_DIR, count=len(items)))
+            backend = self.main_window.get_valid_backend()
         except Exception as e:
             show_error(self, trans("error"), str(e))
+            return
+        # Not superseded: a dropped delta would leave the table behind the cache
+        if self.main_window.jobs.is_running("varlog.list"):
+            return
+        if backend is not self._inventory_backend:
+            # Other host (or reconnect): start from a full listing
+            self.inventory = LogInventory(VAR_LOG_DIR)
+            self._inventory_backend = backend
+            self.inventory_model.clear()
+        self.main_window.run_job("varlog.list", self.inventory.refresh, backend, on_result=self._apply_inventory)
+
+    def _apply_inventory(self, delta):
+        self.inventory_model.apply(delta)
+        self.set_text(trans("msg_inventory_delta").format(
+            path=VAR_LOG_DIR, count=len(self.inventory.entries), added=len(delta.upserts) - delta.changed,
+            changed=delta.changed, removed=len(delta.removed)))
+
+    def set_text(self, s: str):
+        self._view_key = None # pane no longer holds a plain tail, next "view" reloads
+        self.varlog_text.set_text(s)
 
     def _selected_varlog_path(self) -> str | None:
         sel = self.table.selectionModel().selectedRows()
         if not sel:
             return None
-        row = sel[0].row()
-        item = self.table.item(row, 0)
-        if not item:
-            return None
-        return item.data(Qt.UserRole)
+        return sel[0].data(PATH_ROLE)
+
+    def _selected_varlog_paths(self) -> list[str]:
+        rows = sorted(self.table.selectionModel().selectedRows(), key=lambda index: index.row())
+        return [index.data(PATH_ROLE) for index in rows]
 
     def view_selected_varlog_file(self):
         try:
@@ -122,14 +166,50 @@ class VarLogTab(QWidget):
             show_info(self, trans("info"), trans("select_file"))
             return
         lines = int(self.varlog_lines_spin.value())
-        try:
-            out = backend.tail(path, lines)
-            sz = backend.size_bytes(path)
+        view_key = (path, lines)
+
+        # Same key for view and search: only the latest request updates the text
+        if self._view_key == view_key and path in self.cursors:
+            # Already showing this file: append only the new bytes
+            offset, inode = self.cursors[path]
+            self.main_window.run_job("varlog.view", backend.read_since, path, offset, REFRESH_MAX_BYTES, inode,
+                                     on_result=lambda r: self._append_since(path, offset, inode, r))
+            return
+
+        def done(result):
+            out, inode, sz = result
             header = f"{trans('info_file')} {path}\n{trans('info_size')} {sz/1024:.2f} KB\n--- {trans('info_last_lines').format(lines=lines)} ---\n\n"
-            self.varlog_text.setPlainText(header + out)
-            self.varlog_text.moveCursor(QTextCursor.End)
+            self.set_text(header + out)
+            self.cursors[path] = (sz, inode)
+            self._view_key = view_key
+
+        # Text and cursor from one read: nothing appended in between is skipped or shown twice
+        self.main_window.run_job("varlog.view", backend.tail_with_cursor, path, lines,
+                                 on_result=done)
+
+    def _append_since(self, path: str, old_offset: int, old_inode: int, result):
+        data, new_offset, inode, size = result
+        if inode != old_inode or size < old_offset:
+            self.varlog_text.append_text(f"\n{trans('log_rotated')}\n")
+        if data:
+            self.varlog_text.append_text(data)
+        self.cursors[path] = (new_offset, inode)
+
+    def browse_selected_varlog_file(self):
+        try:
+            backend = self.main_window.get_valid_backend()
         except Exception as e:
             show_error(self, trans("error"), str(e))
+            return
+
+        path = self._selected_varlog_path()
+        if not path:
+            show_info(self, trans("info"), trans("select_file"))
+            return
+        # Non-modal: several files can be browsed side by side
+        dlg = LogBrowserDialog(self.main_window, backend, path, self)
+        dlg.setAttribute(Qt.WA_DeleteOnClose)
+        dlg.show()
 
     def search_selected_varlog_file(self):
         try:
@@ -146,15 +226,32 @@ class VarLogTab(QWidget):
         if not pattern:
             show_info(self, trans("info"), trans("enter_keyword"))
             return
-        try:
-            out = backend.search(path, pattern, tail_lines=8000, max_hits=400)
-            if not out.strip():
-                out = trans("no_match")
-            sz = backend.size_bytes(path)
-            header = f"{trans('info_search')} {pattern}\n{trans('info_file')} {path}\n{trans('info_size')} {sz/1024:.2f} KB\n--- {trans('info_matches')} ---\n\n"
-            self.varlog_text.setPlainText(header + out)
-        except Exception as e:
-            show_error(self, trans("error"), str(e))
+
+        def done(count):
+            self._stop_search()
+            self._append_hits([trans("no_match") if not count else f"--- {trans('search_hits').format(count=count)} ---"])
+
+        header = f"{trans('info_search')} {pattern}\n{trans('info_file')} {path}\n--- {trans('info_matches')} ---\n\n"
+        self.set_text(header)
+        self.varlog_search_stop_btn.setEnabled(True)
+        # Hits show up batch by batch while the grep runs on the server
+        self._search_job = self.main_window.run_job(
+            "varlog.view", stream_search, backend, path, pattern,
+            tail_lines=SEARCH_TAIL_LINES, max_hits=SEARCH_MAX_HITS, **scope_kwargs(self.varlog_scope_combo, self.varlog_rotated_check),
+            pass_job=True, on_progress=self._append_hits, on_result=done, on_error=self._search_failed)
+
+    def _append_hits(self, rows: list[str]):
+        self.varlog_text.append_lines(rows)
+
+    def _stop_search(self):
+        if self.main_window.jobs.current("varlog.view") is self._search_job:
+            self.main_window.jobs.cancel("varlog.view")
+        self._search_job = None
+        self.varlog_search_stop_btn.setEnabled(False)
+
+    def _search_failed(self, e):
+        self._stop_search()
+        show_error(self, trans("error"), str(e))
 
     def download_selected_varlog_file(self):
         try:
@@ -172,18 +269,44 @@ class VarLogTab(QWidget):
         save_path, _ = QFileDialog.getSaveFileName(self, trans("download_open"), filename)
         if not save_path:
             return
-            
-        try:
-            msg = backend.download_file(path, save_path)
-            
+
+        def done(msg):
             box = QMessageBox()
             box.setText(f"{msg}\n{trans('open_file_ask')}")
             box.setStandardButtons(QMessageBox.Yes | QMessageBox.No)
             if box.exec() == QMessageBox.Yes:
                 os.startfile(save_path)
-            
+
+        start_download(self, self.main_window, "varlog.download", backend, path, save_path, done)
+
+    def download_bundle(self):
+        try:
+            backend = self.main_window.get_valid_backend()
         except Exception as e:
             show_error(self, trans("error"), str(e))
+            return
+
+        dialog = BundleDialog(self._selected_varlog_paths(), self)
+        if dialog.exec() != BundleDialog.Accepted:
+            return
+        paths = dialog.selected_paths()
+        if not paths:
+            show_info(self, trans("info"), trans("bundle_empty"))
+            return
+        compression = dialog.compression()
+        since = dialog.since()
+        host = self.main_window.cfg.host or "local"
+        filename = f"logs-{host}-{time.strftime('%Y%m%d-%H%M')}.tar.{compression}"
+        save_path, _ = QFileDialog.getSaveFileName(self, trans("varlog_bundle"), filename)
+        if not save_path:
+            return
+
+        def work(progress, cancel_event):
+            return backend.download_bundle(paths, save_path, compression, since,
+                                           progress=progress, cancel_event=cancel_event)
+
+        start_transfer(self, self.main_window, "varlog.bundle", os.path.basename(filename), work,
+                       lambda msg: show_info(self, trans("success"), msg))
 
     def clear_selected_file(self):
         try:
@@ -200,10 +323,9 @@ class VarLogTab(QWidget):
         if confirm != QMessageBox.Yes:
             return
 
-        try:
-            msg = backend.truncate(path)
+        def done(msg):
             show_info(self, trans("success"), msg)
             self.view_selected_varlog_file() # Refresh view
             self.refresh_varlog() # Refresh list to update size
-        except Exception as e:
-            show_error(self, trans("error"), str(e))
+
+        self.main_window.run_job("varlog.clear", backend.truncate, path, on_result=done)